@@ -0,0 +1,236 @@
+# ##########################################################
+# FlatCAM: 2D Post-processing for Manufacturing            #
+# http://flatcam.org                                       #
+# Date: 10/18/2026                                         #
+# MIT Licence                                              #
+# ##########################################################
+
+"""
+Drill path optimization: an open path through a set of points that starts in a given point.
+
+    nearest_neighbour_order()   - the greedy path that always goes to the nearest point not yet visited; the nearest
+                                  point is taken from the nearest neighbours of the current point or, when all of them
+                                  are visited, searched in a k-d tree of the points (appCommon/PointTree.py)
+    improve_order()             - local search on the path with 2-opt and Or-opt moves, tried only between each point
+                                  and its nearest neighbours
+    optimize_order()            - both of them
+"""
+
+from collections import deque
+from math import hypot
+import time
+
+import numpy as np
+
+from appCommon.PointTree import PointTree
+
+# the number of nearest neighbours of each point tried by the local search
+NEIGHBOURS = 8
+# the longest run of points moved by an Or-opt move
+OR_OPT_LENGTH = 3
+
+
+def path_length(points, order):
+    """
+    :param points:  (N, 2) array with the coordinates of the points
+    :param order:   the indexes of the points in the order of the path
+    :return:        the length of the path
+    """
+    path = np.asarray(points, dtype=float)[np.asarray(order, dtype=np.int64)]
+    if len(path) < 2:
+        return 0.0
+    return float(np.hypot(*np.diff(path, axis=0).T).sum())
+
+
+def nearest_neighbour_order(points, start=0):
+    """
+    Makes the path that always goes to the nearest point not yet visited.
+
+    :param points:  (N, 2) array-like with the coordinates of the points
+    :param start:   the index of the first point of the path
+    :return:        list of the indexes of the points in the order of the path
+    """
+    points = np.asarray(points, dtype=float).reshape(-1, 2)
+    if len(points) == 0:
+        return []
+
+    tree = PointTree(points)
+    # the nearest neighbours are sorted by distance: the first one not visited is the nearest point not visited
+    neighbours = tree.nearest_k(NEIGHBOURS).tolist()
+    visited = tree.removed
+
+    order = [start]
+    tree.remove(start)
+    for __ in range(len(points) - 1):
+        current = order[-1]
+        for idx in neighbours[current]:
+            if not visited[idx]:
+                break
+        else:
+            idx = tree.nearest(tree.xs[current], tree.ys[current])
+        tree.remove(idx)
+        order.append(idx)
+
+    return order
+
+
+def neighbour_lists(points, order, k=NEIGHBOURS):
+    """
+    :param points:  (N, 2) array with the coordinates of the points
+    :param order:   the indexes of the points in the order of a path
+    :param k:       the number of neighbours of each point
+    :return:        list with the list of the neighbours of each point, the nearest first: the k nearest points found in
+                    a k-d tree plus the points before and after it in the path
+    """
+    n = len(points)
+    if n < 2:
+        return [[] for __ in range(n)]
+
+    neighbours = PointTree(points).nearest_k(k).tolist()
+    for a, b in zip(order[:-1], order[1:]):
+        if b not in neighbours[a]:
+            neighbours[a].append(b)
+        if a not in neighbours[b]:
+            neighbours[b].append(a)
+    return neighbours
+
+
+def improve_order(points, order, time_limit=None, abort=None):
+    """
+    Improves an open path with 2-opt moves (a part of the path is reversed) and Or-opt moves (a run of up to
+    OR_OPT_LENGTH points is moved elsewhere, in either direction). Only the moves that join a point with one of its
+    nearest neighbours are tried. The first point of the path does not move.
+
+    :param points:      (N, 2) array-like with the coordinates of the points
+    :param order:       the indexes of the points in the order of the path
+    :param time_limit:  the search stops after this number of seconds; None for no limit
+    :param abort:       optional callable; the search stops when it returns True
+    :return:            list of the indexes of the points in the order of the improved path
+    """
+    points = np.asarray(points, dtype=float).reshape(-1, 2)
+    n = len(order)
+    if n < 4:
+        return list(order)
+
+    xs = points[:, 0].tolist()
+    ys = points[:, 1].tolist()
+    neighbours = neighbour_lists(points, order)
+
+    tour = np.asarray(order, dtype=np.int64)
+    pos = np.empty(n, dtype=np.int64)
+    pos[tour] = np.arange(n)
+
+    def dist(a, b):
+        return hypot(xs[a] - xs[b], ys[a] - ys[b])
+
+    def edge(p):
+        # the length of the edge from the position p to the next one; there is no edge after the last point
+        return dist(tour[p], tour[p + 1]) if p < n - 1 else 0.0
+
+    def reverse(p, q):
+        # reverses the points in the positions p .. q
+        tour[p:q + 1] = tour[p:q + 1][::-1].copy()
+        pos[tour[p:q + 1]] = np.arange(p, q + 1)
+
+    def try_two_opt(a):
+        pa = int(pos[a])
+        # a move pays only if the new edge of a is shorter than one of its edges
+        reach = max(edge(pa), edge(pa - 1) if pa > 0 else 0.0)
+        for c in neighbours[a]:
+            dist_ac = dist(a, c)
+            if dist_ac >= reach:
+                break
+            pc = int(pos[c])
+            p, q = min(pa, pc), max(pa, pc)
+            if q - p < 2:
+                continue
+            # reverse p + 1 .. q: the points in p and q become joined
+            after = dist(tour[q + 1], tour[p + 1]) if q < n - 1 else 0.0
+            if edge(p) + edge(q) - dist_ac - after > 1e-9:
+                touched = [tour[p], tour[p + 1], tour[q]] + ([tour[q + 1]] if q < n - 1 else [])
+                reverse(p + 1, q)
+                return touched
+            # reverse p .. q - 1: the points in p and q become joined
+            if p >= 1 and edge(p - 1) + edge(q - 1) - dist(tour[p - 1], tour[q - 1]) - dist_ac > 1e-9:
+                touched = [tour[p - 1], tour[p], tour[q - 1], tour[q]]
+                reverse(p, q - 1)
+                return touched
+        return None
+
+    def try_or_opt(a):
+        pa = int(pos[a])
+        if pa == 0:
+            return None
+        for length in range(1, OR_OPT_LENGTH + 1):
+            s, e = pa, pa + length - 1
+            if e >= n:
+                break
+            before = tour[s - 1]
+            after = tour[e + 1] if e < n - 1 else None
+            first, last = tour[s], tour[e]
+
+            removed = dist(before, first) + (dist(last, after) - dist(before, after) if after is not None else 0.0)
+            for c in neighbours[a]:
+                if dist(a, c) >= removed:
+                    break
+                pc = int(pos[c])
+                if s - 1 <= pc <= e:
+                    continue
+                # the run goes between c and the point after it or between the point before c and c
+                for k in (pc, pc - 1):
+                    if k < 0 or s - 1 <= k <= e:
+                        continue
+                    x = tour[k]
+                    y = tour[k + 1] if k < n - 1 else None
+                    base = dist(x, y) if y is not None else 0.0
+                    forward = dist(x, first) + (dist(last, y) if y is not None else 0.0) - base
+                    backward = dist(x, last) + (dist(first, y) if y is not None else 0.0) - base
+                    if removed - min(forward, backward) > 1e-9:
+                        run = tour[s:e + 1].copy()
+                        if backward < forward:
+                            run = run[::-1]
+                        rest = np.concatenate([tour[:s], tour[e + 1:]])
+                        at = k + 1 if k < s else k + 1 - length
+                        tour[:] = np.concatenate([rest[:at], run, rest[at:]])
+                        pos[tour] = np.arange(n)
+                        return [before, first, last, x] + [p for p in (after, y) if p is not None]
+        return None
+
+    started = time.perf_counter()
+    queue = deque(int(p) for p in tour)
+    queued = np.ones(n, dtype=bool)
+    steps = 0
+    while queue:
+        steps += 1
+        if steps % 256 == 0:
+            if time_limit is not None and time.perf_counter() - started > time_limit:
+                break
+            if abort is not None and abort():
+                break
+
+        a = queue.popleft()
+        queued[a] = False
+
+        touched = try_two_opt(a) or try_or_opt(a)
+        if touched:
+            for p in [a] + [int(t) for t in touched]:
+                if not queued[p]:
+                    queued[p] = True
+                    queue.append(p)
+
+    return tour.tolist()
+
+
+def optimize_order(points, start=0, time_limit=None, abort=None):
+    """
+    :param points:      (N, 2) array-like with the coordinates of the points
+    :param start:       the index of the first point of the path
+    :param time_limit:  the local search stops after this number of seconds; None for no limit
+    :param abort:       optional callable; the local search stops when it returns True
+    :return:            list of the indexes of the points in the order of the path
+    """
+    points = np.asarray(points, dtype=float).reshape(-1, 2)
+    if len(points) == 0:
+        return []
+    order = nearest_neighbour_order(points, start)
+    return improve_order(points, order, time_limit=time_limit, abort=abort)
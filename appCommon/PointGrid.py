@@ -0,0 +1,140 @@
+# ##########################################################
+# FlatCAM: 2D Post-processing for Manufacturing            #
+# http://flatcam.org                                       #
+# Date: 10/18/2026                                         #
+# MIT Licence                                              #
+# ##########################################################
+
+"""
+Neighbour search on a set of points bucketed in a regular grid.
+
+The points are sorted by the key of the grid cell that holds them, so the points of any cell are a contiguous run of
+the sorted order found with a binary search. The searches are vectorized with NumPy over chunks of about CHUNK_PAIRS
+candidate pairs of points:
+
+    pairs_within()  - all the pairs of points closer than a distance (the cell size at most)
+"""
+
+import numpy as np
+
+# the largest number of candidate pairs of points measured in one vectorized step; a single point with more candidates
+# than this in a neighbour cell is measured alone
+CHUNK_PAIRS = 1 << 20
+
+# the cell offsets searched for the pairs of points: the cell itself and half of its neighbours, so that each pair of
+# neighbour cells is searched once
+HALF_NEIGHBOURS = ((0, 0), (1, -1), (1, 0), (1, 1), (0, 1))
+
+
+class PointGrid:
+    """
+    Grid of square cells holding a set of points.
+
+    **USAGE**::
+
+        grid = PointGrid(centers, cell=radius)
+        first, second = grid.pairs_within(radius)
+    """
+
+    def __init__(self, points, cell):
+        """
+
+        :param points:  (N, 2) array-like with the coordinates of the points
+        :param cell:    the size of a grid cell
+        """
+        self.points = np.asarray(points, dtype=float).reshape(-1, 2)
+        self.cell = float(cell) if cell > 0 else 1.0
+
+        if len(self.points):
+            self.origin = self.points.min(axis=0)
+        else:
+            self.origin = np.zeros(2)
+
+        cells = np.floor((self.points - self.origin) / self.cell).astype(np.int64)
+        # one empty row below and above the grid so a neighbour cell never wraps in the next column
+        self.stride = int(cells[:, 1].max()) + 3 if len(cells) else 3
+        self.keys = cells[:, 0] * self.stride + cells[:, 1] + 1
+
+        self.order = np.argsort(self.keys, kind='stable')
+        self.sorted_keys = self.keys[self.order]
+
+    def __len__(self):
+        return len(self.points)
+
+    def cell_runs(self, idx, dx, dy):
+        """
+        :param idx:     int array with the indexes of the points
+        :param dx:      the column offset of the searched cell
+        :param dy:      the row offset of the searched cell
+        :return:        tuple of two int arrays: the start in the sorted order and the number of the points of the cell
+                        at (dx, dy) from the cell of each point of idx
+        """
+        target = self.keys[idx] + dx * self.stride + dy
+        start = np.searchsorted(self.sorted_keys, target, side='left')
+        counts = np.searchsorted(self.sorted_keys, target, side='right') - start
+        return start, counts
+
+    def cell_members(self, idx, dx, dy, runs=None):
+        """
+        Finds the points of the cell at an offset from the cell of each of the given points.
+
+        :param idx:     int array with the indexes of the points
+        :param dx:      the column offset of the searched cell
+        :param dy:      the row offset of the searched cell
+        :param runs:    the result of cell_runs() for the same arguments, if already known
+        :return:        tuple of two int arrays (i, j): i is an index from idx, j the index of a point in the cell at
+                        (dx, dy) from the cell of the point i; one item for each such pair
+        """
+        start, counts = self.cell_runs(idx, dx, dy) if runs is None else runs
+
+        i = np.repeat(idx, counts)
+        # the position in the sorted order of each member: the start of its run plus its rank in the run
+        run_start = np.repeat(start - (np.cumsum(counts) - counts), counts)
+        j = self.order[np.arange(len(i)) + run_start]
+        return i, j
+
+    def pairs_within(self, distance):
+        """
+        Finds the pairs of points closer than a distance.
+
+        :param distance:    the search distance; it has to be at most the cell size
+        :return:            tuple of two int arrays (i, j) with i < j, the indexes of the points of each pair
+                            whose distance is at most the search distance
+        """
+        if distance > self.cell:
+            raise ValueError("The search distance is larger than the grid cell.")
+
+        limit = distance * distance
+        first = []
+        second = []
+        idx = np.arange(len(self.points))
+        for dx, dy in HALF_NEIGHBOURS:
+            start, counts = self.cell_runs(idx, dx, dy)
+            if not len(counts):
+                continue
+
+            # the points are split in pieces of about CHUNK_PAIRS candidate pairs
+            total = np.cumsum(counts)
+            cuts = np.searchsorted(total, np.arange(CHUNK_PAIRS, total[-1], CHUNK_PAIRS), side='right')
+            cuts = np.unique(np.concatenate([[0], cuts, [len(idx)]]))
+            for piece_start, piece_stop in zip(cuts[:-1].tolist(), cuts[1:].tolist()):
+                piece = slice(piece_start, piece_stop)
+                i, j = self.cell_members(idx[piece], dx, dy, runs=(start[piece], counts[piece]))
+                if dx == 0 and dy == 0:
+                    keep = i < j
+                    i, j = i[keep], j[keep]
+
+                delta = self.points[i] - self.points[j]
+                keep = np.einsum('ij,ij->i', delta, delta) <= limit
+                first.append(i[keep])
+                second.append(j[keep])
+
+        if not first:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+        i = np.concatenate(first)
+        j = np.concatenate(second)
+        # the pairs of neighbour cells come in either order
+        swap = i > j
+        i[swap], j[swap] = j[swap], i[swap]
+        return i, j
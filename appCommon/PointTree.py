@@ -0,0 +1,244 @@
+# ##########################################################
+# FlatCAM: 2D Post-processing for Manufacturing            #
+# http://flatcam.org                                       #
+# Date: 10/18/2026                                         #
+# MIT Licence                                              #
+# ##########################################################
+
+"""
+Nearest neighbour search on a set of points split in a k-d tree.
+
+The points are split in two halves at the median of the longer side of their bounds until a part holds at most
+LEAF_POINTS points, so the parts follow the density of the points: a dense cluster gets as many small parts as it needs
+and the empty space around it gets none. The points of any part are a contiguous run of the tree order.
+
+    nearest_k()     - the k nearest points of all the points, searched leaf by leaf with NumPy
+    nearest()       - the nearest point, not yet removed, to a location
+    remove()        - removes a point from the searches of nearest()
+"""
+
+import numpy as np
+
+# the largest number of points in a leaf of the tree
+LEAF_POINTS = 32
+# the largest number of distances computed in one vectorized step of nearest_k()
+CHUNK_DISTANCES = 1 << 20
+
+
+class PointTree:
+    """
+    k-d tree holding a set of points.
+
+    **USAGE**::
+
+        tree = PointTree(centers)
+        neighbours = tree.nearest_k(8)
+
+        tree.remove(idx)
+        idx = tree.nearest(x, y)
+    """
+
+    def __init__(self, points, leaf_points=LEAF_POINTS):
+        """
+
+        :param points:      (N, 2) array-like with the coordinates of the points
+        :param leaf_points: the largest number of points in a leaf
+        """
+        self.points = np.asarray(points, dtype=float).reshape(-1, 2)
+        self.xs = self.points[:, 0].tolist()
+        self.ys = self.points[:, 1].tolist()
+
+        # the indexes of the points in the tree order
+        self.order = np.arange(len(self.points))
+        # for each node: the run of the tree order it holds, its children (-1 for a leaf), its parent and its bounds
+        self.lo = []
+        self.hi = []
+        self.left = []
+        self.right = []
+        self.parent = []
+        self.bounds = []
+        self.leaves = []
+        # the leaf of each point
+        self.leaf_of = [0] * len(self.points)
+
+        if len(self.points):
+            self._build(max(1, int(leaf_points)))
+
+        self.order_list = self.order.tolist()
+        # the points not yet removed under each node, for nearest()
+        self.count = [hi - lo for lo, hi in zip(self.lo, self.hi)]
+        self.removed = [False] * len(self.points)
+
+    def __len__(self):
+        return len(self.points)
+
+    def _add_node(self, lo, hi, parent):
+        self.lo.append(lo)
+        self.hi.append(hi)
+        self.left.append(-1)
+        self.right.append(-1)
+        self.parent.append(parent)
+        self.bounds.append(None)
+        return len(self.lo) - 1
+
+    def _build(self, leaf_points):
+        stack = [self._add_node(0, len(self.points), -1)]
+        while stack:
+            node = stack.pop()
+            lo, hi = self.lo[node], self.hi[node]
+            idx = self.order[lo:hi]
+            pts = self.points[idx]
+            minx, miny = pts.min(axis=0).tolist()
+            maxx, maxy = pts.max(axis=0).tolist()
+            self.bounds[node] = (minx, miny, maxx, maxy)
+
+            if hi - lo <= leaf_points:
+                self.leaves.append(node)
+                for point in idx.tolist():
+                    self.leaf_of[point] = node
+                continue
+
+            axis = 0 if maxx - minx >= maxy - miny else 1
+            mid = (lo + hi) // 2
+            self.order[lo:hi] = idx[np.argpartition(pts[:, axis], mid - lo)]
+
+            self.left[node] = self._add_node(lo, mid, node)
+            self.right[node] = self._add_node(mid, hi, node)
+            stack.append(self.left[node])
+            stack.append(self.right[node])
+
+    def _box_distance(self, node, bounds):
+        # the squared distance between the bounds of a node and the given bounds
+        minx, miny, maxx, maxy = self.bounds[node]
+        dx = max(minx - bounds[2], bounds[0] - maxx, 0.0)
+        dy = max(miny - bounds[3], bounds[1] - maxy, 0.0)
+        return dx * dx + dy * dy
+
+    def leaves_within(self, bounds, distance):
+        """
+        :param bounds:      (minx, miny, maxx, maxy) of the searched area
+        :param distance:    the search distance around the bounds
+        :return:            list of the leaves whose bounds are at most the search distance away from the given bounds
+        """
+        limit = distance * distance
+        found = []
+        stack = [0] if self.lo else []
+        while stack:
+            node = stack.pop()
+            if self._box_distance(node, bounds) > limit:
+                continue
+            if self.left[node] < 0:
+                found.append(node)
+            else:
+                stack.append(self.left[node])
+                stack.append(self.right[node])
+        return found
+
+    def _points_of(self, nodes):
+        return np.concatenate([self.order[self.lo[node]:self.hi[node]] for node in nodes])
+
+    def _nearest_of(self, idx, candidates, k):
+        # the k nearest candidates of each point of idx, the nearest first; the point itself is not a candidate
+        delta_x = self.points[idx, 0][:, None] - self.points[candidates, 0][None, :]
+        delta_y = self.points[idx, 1][:, None] - self.points[candidates, 1][None, :]
+        dist = delta_x * delta_x + delta_y * delta_y
+        dist[idx[:, None] == candidates[None, :]] = np.inf
+
+        nearest = np.argpartition(dist, k - 1, axis=1)[:, :k]
+        rows = np.arange(len(idx))[:, None]
+        nearest = nearest[rows, np.argsort(dist[rows, nearest], axis=1)]
+        return candidates[nearest]
+
+    def nearest_k(self, k):
+        """
+        Finds the k nearest points of every point.
+
+        For each leaf the points of the smallest subtree holding more than k points give the largest distance to the
+        k-th neighbour of each point of the leaf; only the leaves within that distance are searched. When the leaf
+        needs too many distances at once (a few points far from a dense cluster) its points are searched one by one,
+        each within its own distance.
+
+        :param k:   the number of neighbours
+        :return:    (N, min(k, N - 1)) int array with the indexes of the neighbours of each point, the nearest first
+        """
+        k = min(int(k), len(self.points) - 1)
+        result = np.zeros((len(self.points), max(k, 0)), dtype=np.int64)
+        if k <= 0:
+            return result
+
+        for leaf in self.leaves:
+            idx = self.order[self.lo[leaf]:self.hi[leaf]]
+
+            node = leaf
+            while self.hi[node] - self.lo[node] <= k:
+                node = self.parent[node]
+            near = self.order[self.lo[node]:self.hi[node]]
+            reach = np.sqrt(np.sort(((self.points[idx][:, None, :] - self.points[near][None, :, :]) ** 2).sum(axis=2),
+                                    axis=1)[:, k])
+
+            candidates = self._points_of(self.leaves_within(self.bounds[leaf], float(reach.max())))
+            if len(idx) * len(candidates) <= CHUNK_DISTANCES:
+                result[idx] = self._nearest_of(idx, candidates, k)
+                continue
+
+            for point, distance in zip(idx.tolist(), reach.tolist()):
+                x, y = self.xs[point], self.ys[point]
+                candidates = self._points_of(self.leaves_within((x, y, x, y), distance))
+                result[point] = self._nearest_of(np.array([point]), candidates, k)[0]
+
+        return result
+
+    def remove(self, idx):
+        """
+        Removes a point from the searches of nearest().
+
+        :param idx: the index of the point
+        """
+        if self.removed[idx]:
+            return
+        self.removed[idx] = True
+        node = self.leaf_of[idx]
+        while node >= 0:
+            self.count[node] -= 1
+            node = self.parent[node]
+
+    def nearest(self, x, y):
+        """
+        :param x:   the X coordinate of the location
+        :param y:   the Y coordinate of the location
+        :return:    the index of the nearest point not yet removed or None when all of them are removed
+        """
+        location = (x, y, x, y)
+        best = None
+        best_dist = float('inf')
+        stack = [(0.0, 0)] if self.lo else []
+        while stack:
+            dist, node = stack.pop()
+            if dist >= best_dist or not self.count[node]:
+                continue
+
+            left = self.left[node]
+            if left < 0:
+                for pos in range(self.lo[node], self.hi[node]):
+                    idx = self.order_list[pos]
+                    if self.removed[idx]:
+                        continue
+                    dx = self.xs[idx] - x
+                    dy = self.ys[idx] - y
+                    dist = dx * dx + dy * dy
+                    if dist < best_dist:
+                        best_dist = dist
+                        best = idx
+                continue
+
+            right = self.right[node]
+            dist_left = self._box_distance(left, location)
+            dist_right = self._box_distance(right, location)
+            # the nearer child is searched first
+            if dist_left <= dist_right:
+                stack.append((dist_right, right))
+                stack.append((dist_left, left))
+            else:
+                stack.append((dist_left, left))
+                stack.append((dist_right, right))
+        return best
@@ -0,0 +1,771 @@
+# ##########################################################
+# FlatCAM: 2D Post-processing for Manufacturing            #
+# http://flatcam.org                                       #
+# Date: 10/18/2026                                         #
+# MIT Licence                                              #
+# ##########################################################
+
+"""
+Chunked FlatCAM project container.
+
+The project is stored as a ZIP archive with a small JSON header and one set of chunks for each object:
+
+    header.json             - format marker, application version, project options and the list of objects
+    objs/<nr>/attrs.json    - the object attributes that hold no geometry (options, kind, colors ...)
+    objs/<nr>/geo.json      - the object attributes that hold geometry; each geometry is a reference in the blob
+    objs/<nr>/geo.wkb       - the WKB encoded geometries of the object, concatenated
+
+The geometry chunks are decoded only when the object needs them (see FlatCAMObj.defer_attributes()).
+"""
+
+import simplejson as json
+import zipfile
+import threading
+import hashlib
+import io
+import os
+
+from shapely.wkb import dumps as wkb_dumps
+from shapely.wkb import loads as wkb_loads
+from shapely.wkt import dumps as sdumps
+from shapely.geometry.base import BaseGeometry
+
+from camlib import ApertureMacro, dict2obj, to_dict
+from appCommon.Toolpath import Toolpath
+
+import logging
+
+log = logging.getLogger('base')
+
+PROJECT_FORMAT = 'FlatCAM-chunked'
+PROJECT_FORMAT_VERSION = 1
+
+HEADER_CHUNK = 'header.json'
+
+
+class VerificationError(IOError):
+    """
+    Raised when the checksum of a saved file does not match the checksum of the data written to it.
+    """
+    pass
+
+
+class ChecksumWriter:
+    """
+    Write only file wrapper that keeps a running SHA-256 hash of all the data written through it.
+    It is not seekable so the data is hashed in the same order as it lands in the file (ZipFile and LZMAFile
+    work with unseekable files).
+    """
+
+    def __init__(self, f):
+        self.f = f
+        self.hash = hashlib.sha256()
+        self.pos = 0
+
+    def write(self, data):
+        self.hash.update(data)
+        self.pos += len(data)
+        return self.f.write(data)
+
+    def tell(self):
+        return self.pos
+
+    def seekable(self):
+        return False
+
+    def seek(self, *args):
+        raise io.UnsupportedOperation("seek")
+
+    def flush(self):
+        self.f.flush()
+
+    def hexdigest(self):
+        return self.hash.hexdigest()
+
+
+def file_checksum(filename, chunk_size=1 << 20):
+    """
+    :param filename:    path of the file
+    :param chunk_size:  the file is read in chunks of this size
+    :return:            the SHA-256 hex digest of the file content
+    """
+    file_hash = hashlib.sha256()
+    with open(filename, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            file_hash.update(chunk)
+    return file_hash.hexdigest()
+
+
+def atomic_write(filename, writer):
+    """
+    Save a file safely: ``writer(f)`` writes the data into a temporary file, next to ``filename``, while a running
+    checksum is kept. The temporary file is flushed to the disk, verified against the checksum and then it
+    atomically replaces ``filename``. On failure ``filename`` is left untouched.
+
+    :param filename:    path of the file to save
+    :param writer:      callable that receives a binary, unseekable, file object and writes the data in it
+    :return:            the SHA-256 hex digest of the saved file
+    """
+    tmp_filename = filename + '.tmp'
+    try:
+        with open(tmp_filename, 'wb') as f:
+            checksum_writer = ChecksumWriter(f)
+            writer(checksum_writer)
+            f.flush()
+            os.fsync(f.fileno())
+
+        checksum = checksum_writer.hexdigest()
+        if file_checksum(tmp_filename) != checksum:
+            raise VerificationError("The checksum of the saved file does not match: %s" % tmp_filename)
+
+        os.replace(tmp_filename, filename)
+    except BaseException:
+        try:
+            os.remove(tmp_filename)
+        except OSError:
+            pass
+        raise
+
+    return checksum
+
+
+def is_chunked_project(filename):
+    """
+    Check if the file is a chunked project archive.
+
+    :param filename:    path to the project file
+    :return:            True if the file is a ZIP archive with a chunked project header
+    """
+    try:
+        if not zipfile.is_zipfile(filename):
+            return False
+        with zipfile.ZipFile(filename, 'r') as zf:
+            return HEADER_CHUNK in zf.namelist()
+    except (IOError, OSError):
+        return False
+
+
+def object_chunk_names(nr):
+    """
+    :param nr:  the index of the object in the project
+    :return:    tuple with the names of the attributes chunk, geometry chunk and WKB blob chunk of the object
+    """
+    base = 'objs/%04d/' % nr
+    return base + 'attrs.json', base + 'geo.json', base + 'geo.wkb'
+
+
+class GeometryPacker:
+    """
+    JSON ``default`` hook that moves every Shapely geometry into a binary WKB blob and leaves in the JSON only
+    a reference (offset, length) to it. The arrays of the parsed G-code (Toolpath) go in the blob too.
+    """
+
+    def __init__(self):
+        self.blob = bytearray()
+        self.count = 0
+
+    def __call__(self, obj):
+        if isinstance(obj, ApertureMacro):
+            return {
+                "__class__": "ApertureMacro",
+                "__inst__": obj.to_dict()
+            }
+        if isinstance(obj, BaseGeometry):
+            self.count += 1
+            try:
+                data = wkb_dumps(obj)
+            except Exception:
+                # some empty geometries (e.g. POINT EMPTY) can't be WKB encoded; keep them as WKT
+                return {
+                    "__class__": "Shply",
+                    "__inst__": sdumps(obj)
+                }
+            ref = {
+                "__class__": "ShplWKB",
+                "__inst__": [len(self.blob), len(data)]
+            }
+            self.blob += data
+            return ref
+        if isinstance(obj, Toolpath):
+            self.count += 1
+            data = obj.to_bytes()
+            ref = {
+                "__class__": "ToolpathBlob",
+                "__inst__": [len(self.blob), len(data)]
+            }
+            self.blob += data
+            return ref
+        return obj
+
+
+class GeometryUnpacker:
+    """
+    JSON ``object_hook`` that is the counterpart of GeometryPacker.
+    """
+
+    def __init__(self, blob):
+        self.blob = memoryview(blob)
+
+    def __call__(self, d):
+        if d.get('__class__') == "ShplWKB" and '__inst__' in d:
+            offset, length = d['__inst__']
+            return wkb_loads(bytes(self.blob[offset:offset + length]))
+        if d.get('__class__') == "ToolpathBlob" and '__inst__' in d:
+            offset, length = d['__inst__']
+            return Toolpath.from_bytes(bytes(self.blob[offset:offset + length]))
+        return dict2obj(d)
+
+
+def encode_object(obj_dict):
+    """
+    Serialize the dictionary representation of a FlatCAM object (as returned by obj.to_dict()) into chunks.
+
+    The attributes are split in two groups: the ones that hold no geometry are serialized into the attributes
+    chunk and the ones that hold geometry are serialized into the geometry chunk, with the geometry itself
+    WKB encoded into a separate binary blob.
+
+    :param obj_dict:    dictionary representation of a FlatCAM object
+    :return:            tuple (attributes JSON, geometry JSON, WKB blob, names of the attributes in the geometry
+                        JSON); the chunks are bytes
+    """
+    packer = GeometryPacker()
+
+    attrs_items = []
+    geo_items = []
+    geo_keys = []
+    for key in sorted(obj_dict.keys()):
+        before = packer.count
+        item = '%s: %s' % (json.dumps(key), json.dumps(obj_dict[key], default=packer, sort_keys=True))
+        if packer.count > before:
+            geo_items.append(item)
+            geo_keys.append(key)
+        else:
+            attrs_items.append(item)
+
+    attrs_chunk = ('{%s}' % ', '.join(attrs_items)).encode('utf-8')
+    geo_chunk = ('{%s}' % ', '.join(geo_items)).encode('utf-8')
+    return attrs_chunk, geo_chunk, bytes(packer.blob), geo_keys
+
+
+def decode_attributes(attrs_chunk):
+    """
+    :param attrs_chunk: the attributes chunk as created by encode_object()
+    :return:            dictionary with the attributes that hold no geometry
+    """
+    return json.loads(attrs_chunk.decode('utf-8'), object_hook=dict2obj)
+
+
+def decode_geometry(geo_chunk, blob):
+    """
+    :param geo_chunk:   the geometry chunk as created by encode_object()
+    :param blob:        the WKB blob as created by encode_object()
+    :return:            dictionary with the attributes that hold geometry
+    """
+    return json.loads(geo_chunk.decode('utf-8'), object_hook=GeometryUnpacker(blob))
+
+
+def plain_object_dict(obj_dict):
+    """
+    The objects options are LoudDict's with a callback into the object and can't be pickled. Make a shallow copy
+    of the object dictionary with plain dictionaries instead so it can be sent to the multiprocessing pool.
+
+    :param obj_dict:    dictionary representation of a FlatCAM object
+    :return:            a picklable shallow copy of the ``obj_dict``
+    """
+    return {k: dict(v) if isinstance(v, dict) and type(v) is not dict else v for k, v in obj_dict.items()}
+
+
+def encode_json_object(obj_dict):
+    """
+    Serialize the dictionary representation of a FlatCAM object for the JSON project format.
+
+    :param obj_dict:    dictionary representation of a FlatCAM object
+    :return:            JSON string
+    """
+    return json.dumps(obj_dict, default=to_dict, indent=2, sort_keys=True)
+
+
+def decode_json_object(raw):
+    """
+    Recreate the objects (Shapely geometry, ApertureMacro) in the dictionary of a FlatCAM object that was loaded
+    from a JSON project file without an object_hook.
+
+    :param raw:     dictionary as loaded by json.loads()
+    :return:        the dictionary with the serialized objects recreated by dict2obj()
+    """
+    if isinstance(raw, dict):
+        return dict2obj({k: decode_json_object(v) for k, v in raw.items()})
+    if isinstance(raw, list):
+        return [decode_json_object(v) for v in raw]
+    return raw
+
+
+def map_ordered(func, items, pool=None, progress=None):
+    """
+    Apply ``func`` on each item in ``items``, in the multiprocessing pool if one is given, and yield the results
+    in the order of the ``items``.
+
+    :param func:        picklable (module level) function
+    :param items:       list of items
+    :param pool:        multiprocessing Pool or None to run in the current process
+    :param progress:    callable that receives the percentage of the items done, or None
+    :return:            generator of results
+    """
+    if pool is not None and len(items) > 1:
+        results = pool.imap(func, items)
+    else:
+        results = map(func, items)
+
+    old_disp_number = 0
+    for nr, result in enumerate(results, start=1):
+        disp_number = int(nr * 100 / len(items))
+        if progress is not None and old_disp_number < disp_number <= 100:
+            progress(disp_number)
+            old_disp_number = disp_number
+        yield result
+
+
+def write_json_project(f, obj_dicts, options, version, pool=None, progress=None):
+    """
+    Write a JSON project. The same document as json.dump() would create but with the objects serialized
+    separately, in the multiprocessing pool if one is given.
+
+    :param f:           file object opened for writing in binary mode
+    :param obj_dicts:   list of dictionary representations of the FlatCAM objects, in project order
+    :param options:     the project (application) options
+    :param version:     the application version
+    :param pool:        multiprocessing Pool or None
+    :param progress:    callable that receives the percentage of the objects done, or None
+    :return:            None
+    """
+    f.write(b'{\n"objs": [\n')
+    items = [plain_object_dict(d) for d in obj_dicts] if pool is not None else obj_dicts
+    for nr, obj_json in enumerate(map_ordered(encode_json_object, items, pool=pool, progress=progress)):
+        if nr:
+            f.write(b',\n')
+        f.write(obj_json.encode('utf-8'))
+    f.write(b'\n],\n"options": ')
+    f.write(json.dumps(options, default=to_dict, indent=2, sort_keys=True).encode('utf-8'))
+    f.write(b',\n"version": ')
+    f.write(json.dumps(version).encode('utf-8'))
+    f.write(b'\n}\n')
+
+
+def read_json_project(content, pool=None, progress=None):
+    """
+    Parse a JSON project. The JSON is parsed without an object hook and the geometry of the objects is recreated
+    separately for each object, in the multiprocessing pool if one is given.
+
+    :param content:     the JSON document (str or bytes)
+    :param pool:        multiprocessing Pool or None
+    :param progress:    callable that receives the percentage of the objects done, or None
+    :return:            the project dictionary, with the geometry recreated
+    """
+    d = json.loads(content)
+    d['objs'] = list(map_ordered(decode_json_object, d['objs'], pool=pool, progress=progress))
+    return d
+
+
+def write_chunked_project(filename, obj_dicts, options, version, compression_level=None, pool=None, progress=None):
+    """
+    Write a chunked project archive.
+
+    :param filename:            path of the project file or a file object opened for writing in binary mode
+    :param obj_dicts:           list of dictionary representations of the FlatCAM objects, in project order
+    :param options:             the project (application) options
+    :param version:             the application version
+    :param compression_level:   None to store the chunks uncompressed, else a compression level between 0 and 9
+    :param pool:                multiprocessing Pool used to encode the objects in parallel, or None
+    :param progress:            callable that receives the percentage of the objects done, or None
+    :return:                    list with the header entry of each object
+    """
+    if compression_level is None:
+        compression = zipfile.ZIP_STORED
+        zip_kwargs = {}
+    else:
+        compression = zipfile.ZIP_DEFLATED
+        zip_kwargs = {'compresslevel': int(compression_level)}
+
+    header = {
+        "format": PROJECT_FORMAT,
+        "format_version": PROJECT_FORMAT_VERSION,
+        "version": version,
+        "options": dict(options),
+        "objs": []
+    }
+
+    items = [plain_object_dict(d) for d in obj_dicts] if pool is not None else obj_dicts
+    encoded = map_ordered(encode_object, items, pool=pool, progress=progress)
+
+    with zipfile.ZipFile(filename, 'w', compression=compression, **zip_kwargs) as zf:
+        for nr, (obj_dict, chunks) in enumerate(zip(obj_dicts, encoded)):
+            attrs_name, geo_name, blob_name = object_chunk_names(nr)
+            attrs_chunk, geo_chunk, blob, geo_keys = chunks
+
+            zf.writestr(attrs_name, attrs_chunk)
+            zf.writestr(geo_name, geo_chunk)
+            zf.writestr(blob_name, blob)
+
+            header['objs'].append({
+                "kind": obj_dict['kind'],
+                "name": obj_dict['options']['name'],
+                "nr": nr,
+                "deferred": geo_keys
+            })
+
+        zf.writestr(HEADER_CHUNK, json.dumps(header, indent=2, sort_keys=True))
+
+    return header['objs']
+
+
+def base_locations(header_objs):
+    """
+    :param header_objs: the header entries returned by write_chunked_project()
+    :return:            list with the location of the chunks of each object, as used by the ProjectJournal
+    """
+    return [{
+        "archive": "base",
+        "chunks": list(object_chunk_names(obj_header['nr'])),
+        "deferred": obj_header['deferred'],
+        "kind": obj_header['kind'],
+        "name": obj_header['name']
+    } for obj_header in header_objs]
+
+
+def archive_lock(filename):
+    """
+    :param filename:    path of an archive
+    :return:            the lock that serializes, in this process, the reading and the appending of the archive
+    """
+    with _archive_locks_lock:
+        return _archive_locks.setdefault(os.path.abspath(filename), threading.Lock())
+
+
+_archive_locks = {}
+_archive_locks_lock = threading.Lock()
+
+
+def load_geometry_chunk(filename, geo_name, blob_name, crc):
+    """
+    Read and decode the geometry chunk of one object from a chunked project archive.
+
+    :param filename:    path of the project file
+    :param geo_name:    name of the geometry chunk
+    :param blob_name:   name of the WKB blob chunk
+    :param crc:         tuple with the CRC of the two chunks, as they were when the project was opened
+    :return:            dictionary with the object attributes that hold geometry
+    """
+    with archive_lock(filename), zipfile.ZipFile(filename, 'r') as zf:
+        if (zf.getinfo(geo_name).CRC, zf.getinfo(blob_name).CRC) != crc:
+            raise IOError("The project file %s has changed since it was opened." % filename)
+        geo_chunk = zf.read(geo_name)
+        blob = zf.read(blob_name)
+    return decode_geometry(geo_chunk, blob)
+
+
+class DeferredGeometry:
+    """
+    Loads, on request, the geometry chunk of one object from a chunked project archive.
+    The CRC of the chunks recorded when the project was opened is used to detect if the file has changed since.
+    """
+
+    def __init__(self, filename, geo_info, blob_info):
+        self.filename = filename
+        self.geo_name = geo_info.filename
+        self.blob_name = blob_info.filename
+        self.crc = (geo_info.CRC, blob_info.CRC)
+
+        # AsyncResult of the load started in the multiprocessing pool by self.prefetch()
+        self.result = None
+
+        self.lock = threading.Lock()
+
+    def prefetch(self, pool):
+        """
+        Start decoding the geometry chunk in the multiprocessing pool. The result is collected by self.load().
+
+        :param pool:    multiprocessing Pool
+        :return:        None
+        """
+        with self.lock:
+            if self.result is None:
+                self.result = pool.apply_async(load_geometry_chunk,
+                                               args=(self.filename, self.geo_name, self.blob_name, self.crc))
+
+    def load(self):
+        """
+        :return:    dictionary with the object attributes that hold geometry
+        """
+        with self.lock:
+            result, self.result = self.result, None
+            if result is not None:
+                try:
+                    return result.get()
+                except Exception as e:
+                    log.debug("DeferredGeometry.load() -> Prefetch of %s failed: %s" % (self.geo_name, str(e)))
+
+            log.debug("DeferredGeometry.load() -> Loading geometry chunk %s" % self.geo_name)
+            return load_geometry_chunk(self.filename, self.geo_name, self.blob_name, self.crc)
+
+
+def read_chunked_project(filename, pool=None):
+    """
+    Read a chunked project archive. Only the header and the attributes chunks are decoded here, the geometry
+    chunks are loaded later by the DeferredGeometry instances.
+
+    :param filename:    path of the project file
+    :param pool:        if a multiprocessing Pool is given, the geometry chunks start decoding in it right away
+    :return:            dictionary with the keys 'options', 'version' and 'objs'. Each item in 'objs' is a tuple
+                        (attributes dictionary, list of deferred attribute names, DeferredGeometry instance or None,
+                        location of the object chunks as used by the ProjectJournal)
+    """
+    with zipfile.ZipFile(filename, 'r') as zf:
+        header = json.loads(zf.read(HEADER_CHUNK).decode('utf-8'))
+        if header.get('format') != PROJECT_FORMAT:
+            raise ValueError("Not a chunked FlatCAM project: %s" % filename)
+
+        objs = []
+        for location in base_locations(header['objs']):
+            attrs_name, geo_name, blob_name = location['chunks']
+            attrs = decode_attributes(zf.read(attrs_name))
+
+            geo_keys = location['deferred']
+            if geo_keys:
+                deferred = DeferredGeometry(filename, zf.getinfo(geo_name), zf.getinfo(blob_name))
+                if pool is not None:
+                    deferred.prefetch(pool)
+            else:
+                deferred = None
+            objs.append((attrs, geo_keys, deferred, location))
+
+    return {
+        'options': header['options'],
+        'version': header['version'],
+        'objs': objs
+    }
+
+
+JOURNAL_FORMAT = 'FlatCAM-journal'
+
+# after this many revisions the journal is compacted by saving the whole project
+JOURNAL_MAX_REVISIONS = 20
+
+
+def journal_filename(project_filename):
+    """
+    :param project_filename:    path of the project file
+    :return:                    path of the autosave journal of the project
+    """
+    return project_filename + '.journal'
+
+
+def file_signature(filename):
+    """
+    :param filename:    path of a file
+    :return:            list [size, modification time in ns] used to check that a file did not change
+    """
+    stat = os.stat(filename)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+class ProjectJournal:
+    """
+    Incremental autosave of a project.
+
+    Instead of saving the whole project, each autosave appends to a ZIP journal, next to the project file, only
+    the chunks of the objects that changed since the last save, followed by a new header (a revision) that lists
+    all the project objects and where their latest chunks are: in the project file itself ('base'), if it is a
+    chunked project, or in the journal. When the project is opened the latest revision in the journal is used.
+    A full save of the project starts a new, empty, journal.
+
+    The objects are identified by FlatCAMObj.uid.
+    """
+
+    def __init__(self, project_filename, locations=None, revision=0):
+        """
+        :param project_filename:    path of the project file (the base of the journal)
+        :param locations:           dict: object uid -> location of the latest chunks of the object
+        :param revision:            number of the last revision written in the journal; zero for a new journal
+        """
+        self.project_filename = project_filename
+        self.filename = journal_filename(project_filename)
+        self.base_signature = file_signature(project_filename)
+
+        self.locations = {} if locations is None else locations
+        self.revision = revision
+
+        # the uids of the objects in the last written revision, in project order
+        self.order = list(self.locations.keys())
+
+        # the uids of the objects that changed since they were last saved
+        self.dirty = set()
+        self.lock = threading.Lock()
+
+    @classmethod
+    def start(cls, project_filename, locations=None):
+        """
+        Start a new journal for a project file that was just saved or opened. Any old journal is removed.
+
+        :param project_filename:    path of the project file
+        :param locations:           dict: object uid -> location of the object chunks in the project file; None or
+                                    empty if the project file is not a chunked project
+        :return:                    ProjectJournal instance
+        """
+        try:
+            os.remove(journal_filename(project_filename))
+        except OSError:
+            pass
+
+        return cls(project_filename, locations=locations)
+
+    def mark_dirty(self, uid):
+        """
+        :param uid: the uid of an object that changed
+        :return:    None
+        """
+        with self.lock:
+            self.dirty.add(uid)
+
+    def take_dirty(self, uids):
+        """
+        Get the objects that need to be written in the next revision and mark them as clean. The dirty flag is
+        cleared before the objects are serialized so changes made while the revision is written are not lost.
+
+        :param uids:    the uids of the project objects, in project order
+        :return:        set of uids of the objects that changed or that are not in the journal yet
+        """
+        with self.lock:
+            changed = {uid for uid in uids if uid in self.dirty or uid not in self.locations}
+            self.dirty -= changed
+        return changed
+
+    def needs_compaction(self):
+        """
+        :return:    True if the journal grew enough to be replaced by a full save of the project
+        """
+        if self.revision >= JOURNAL_MAX_REVISIONS:
+            return True
+        try:
+            return os.path.getsize(self.filename) > os.path.getsize(self.project_filename)
+        except OSError:
+            return False
+
+    def write(self, objs, options, version, pool=None):
+        """
+        Append a revision to the journal.
+
+        :param objs:        list of tuples (uid, dictionary representation of the object or None if the object
+                            did not change), for all the project objects, in project order
+        :param options:     the project (application) options
+        :param version:     the application version
+        :param pool:        multiprocessing Pool used to encode the objects in parallel, or None
+        :return:            the number of objects written; zero if nothing changed and no revision was written
+        """
+        uids = [uid for uid, __ in objs]
+        changed = [(uid, obj_dict) for uid, obj_dict in objs if obj_dict is not None]
+        if not changed and uids == self.order:
+            return 0
+
+        revision = self.revision + 1
+        items = [plain_object_dict(d) for __, d in changed] if pool is not None else [d for __, d in changed]
+        encoded = map_ordered(encode_object, items, pool=pool)
+
+        with archive_lock(self.filename), zipfile.ZipFile(self.filename, 'a') as zf:
+            for (uid, obj_dict), chunks in zip(changed, encoded):
+                attrs_chunk, geo_chunk, blob, geo_keys = chunks
+                chunk_names = ['rev%06d/objs/%d/%s' % (revision, uid, name) for name in
+                               ['attrs.json', 'geo.json', 'geo.wkb']]
+                for chunk_name, chunk in zip(chunk_names, [attrs_chunk, geo_chunk, blob]):
+                    zf.writestr(chunk_name, chunk)
+
+                self.locations[uid] = {
+                    "archive": "journal",
+                    "chunks": chunk_names,
+                    "deferred": geo_keys,
+                    "kind": obj_dict['kind'],
+                    "name": obj_dict['options']['name']
+                }
+
+            header = {
+                "format": JOURNAL_FORMAT,
+                "format_version": PROJECT_FORMAT_VERSION,
+                "base": self.base_signature,
+                "revision": revision,
+                "version": version,
+                "options": dict(options),
+                "objs": [self.locations[uid] for uid in uids]
+            }
+            zf.writestr('rev%06d/%s' % (revision, HEADER_CHUNK), json.dumps(header, indent=2, sort_keys=True))
+
+        self.revision = revision
+        self.order = uids
+        log.debug("ProjectJournal.write() -> Revision %d with %d changed objects." % (revision, len(changed)))
+        return len(changed)
+
+
+def read_journal(project_filename, pool=None):
+    """
+    Read the latest revision of the autosave journal of a project, if there is one and it was made for the current
+    content of the project file.
+
+    :param project_filename:    path of the project file
+    :param pool:                if a multiprocessing Pool is given, the geometry chunks start decoding in it
+    :return:                    None if there is no usable journal, else a dictionary like the one returned by
+                                read_chunked_project() with the additional key 'revision'
+    """
+    filename = journal_filename(project_filename)
+    if not os.path.isfile(filename):
+        return None
+
+    try:
+        with archive_lock(filename), zipfile.ZipFile(filename, 'r') as zf:
+            headers = sorted(n for n in zf.namelist() if n.endswith('/' + HEADER_CHUNK))
+            if not headers:
+                return None
+            header = json.loads(zf.read(headers[-1]).decode('utf-8'))
+            if header.get('format') != JOURNAL_FORMAT or header['base'] != file_signature(project_filename):
+                log.debug("read_journal() -> The journal %s is not for the current project file." % filename)
+                return None
+
+            objs = []
+            with zipfile.ZipFile(project_filename, 'r') if is_chunked_project(project_filename) else \
+                    _NoArchive() as base_zf:
+                for location in header['objs']:
+                    archive_zf, archive_name = (zf, filename) if location['archive'] == 'journal' else \
+                        (base_zf, project_filename)
+                    attrs_name, geo_name, blob_name = location['chunks']
+                    attrs = decode_attributes(archive_zf.read(attrs_name))
+
+                    if location['deferred']:
+                        deferred = DeferredGeometry(archive_name, archive_zf.getinfo(geo_name),
+                                                    archive_zf.getinfo(blob_name))
+                    else:
+                        deferred = None
+                    objs.append((attrs, location['deferred'], deferred, location))
+    except Exception as e:
+        log.error("read_journal() -> Failed to read the journal %s: %s" % (filename, str(e)))
+        return None
+
+    if pool is not None:
+        for __, __, deferred, __ in objs:
+            if deferred is not None:
+                deferred.prefetch(pool)
+
+    return {
+        'options': header['options'],
+        'version': header['version'],
+        'revision': header['revision'],
+        'objs': objs
+    }
+
+
+class _NoArchive:
+    """
+    Stands for the project file in read_journal() when it is not a chunked project; no object references it.
+    """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
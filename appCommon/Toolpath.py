@@ -0,0 +1,465 @@
+# ##########################################################
+# FlatCAM: 2D Post-processing for Manufacturing            #
+# http://flatcam.org                                       #
+# Date: 10/18/2026                                         #
+# MIT Licence                                              #
+# ##########################################################
+
+"""
+Compact representation of the parsed G-code of a CNC job.
+
+The parsed G-code used to be a list of dictionaries, one for each path, holding a Shapely LineString and a
+two letters list with the kind of the path. Here the paths are kept in contiguous NumPy arrays:
+
+    vertices    - (N, 3) float array with the X, Y, Z coordinates of the vertices of all the paths
+    offsets     - (M + 1) int array; the vertices of the path i are vertices[offsets[i]:offsets[i + 1]]
+    kinds       - (M) uint8 array with the code of the kind of each path, an index in KINDS
+    tools       - (M) int array with the tool number (the last T word) of each path
+    circles     - (K) int array with the indexes of the paths that are the outline of a drill hole
+    circle_axes - (K, 2, 2) float array; the outline of a drill hole is a circle (as made by Point.buffer()) of
+                  radius 1, transformed by this matrix and moved in the only vertex of the path, the hole center
+
+A Toolpath is a sequence of the same dictionaries as before, {'geom': LineString, 'kind': ['C', 'F']}, made only
+when they are accessed, so the code that iterates the parsed G-code works with both representations.
+The geometry is not kept: changing the 'geom' of an item does not change the Toolpath. Use the transformation
+methods instead.
+"""
+
+from array import array
+from itertools import chain
+import io
+
+import numpy as np
+
+from shapely.geometry import LineString, LinearRing, Point
+
+try:
+    # Shapely >= 2.0 creates the geometries of a coordinates array in one call
+    from shapely import linestrings as shapely_linestrings
+    from shapely import linearrings as shapely_linearrings
+except ImportError:
+    shapely_linestrings = None
+    shapely_linearrings = None
+
+# the kind of a path: the first letter is T (travel) or C (cut), the second letter is F (fast) or S (slow)
+KINDS = ['TF', 'TS', 'CF', 'CS']
+KIND_CODES = {kind: code for code, kind in enumerate(KINDS)}
+
+# the outline of a drill hole of radius 1 centered in origin, as the G-code parser made it before Toolpath
+UNIT_CIRCLE = np.asarray(Point(0, 0).buffer(1.0).exterior.coords)
+
+
+def kind_code(kind):
+    """
+    :param kind:    kind of a path, as a two letters list or string: ['C', 'F']
+    :return:        the code of the kind, an index in KINDS
+    """
+    return KIND_CODES[kind[0] + kind[1]]
+
+
+def transform_unit(axes, unit):
+    """
+    :param axes:    (K, 2, 2) array with the axes of the drill holes
+    :param unit:    (V, 2) array of vertices (or steps) of the unit circle
+    :return:        tuple of two (K, V) arrays, the X and Y of the unit vertices transformed by the axes of each hole
+    """
+    # written out, the 2 x 2 products are much faster than a batched matmul or einsum
+    x = axes[:, 0, 0, np.newaxis] * unit[:, 0] + axes[:, 0, 1, np.newaxis] * unit[:, 1]
+    y = axes[:, 1, 0, np.newaxis] * unit[:, 0] + axes[:, 1, 1, np.newaxis] * unit[:, 1]
+    return x, y
+
+
+class ToolpathBuilder:
+    """
+    Collects the paths found by the G-code parser. The paths are stored in compact arrays as they are added.
+
+    **USAGE**::
+
+        builder = ToolpathBuilder()
+        builder.add([(0, 0), (10, 0)], z=1.0, kind=['T', 'F'], tool=1)
+        builder.add_circle((10, 0), 0.4, z=-1.7, kind=['C', 'F'], tool=1)
+        toolpath = builder.toolpath()
+    """
+
+    def __init__(self):
+        self.xy = array('d')
+        self.z = array('d')
+        self.offsets = array('q', [0])
+        self.kinds = array('B')
+        self.tools = array('q')
+        self.circles = array('q')
+        self.radii = array('d')
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def add(self, coords, z, kind, tool=0):
+        """
+        Adds a path.
+
+        :param coords:  list of (x, y) tuples
+        :param z:       the Z coordinate of the path
+        :param kind:    kind of the path, as a two letters list: ['C', 'F']
+        :param tool:    tool number
+        :return:        None
+        """
+        self.xy.extend(chain.from_iterable(coords))
+        self.z.append(z)
+        self.offsets.append(len(self.xy) // 2)
+        self.kinds.append(kind_code(kind))
+        self.tools.append(int(tool))
+
+    def add_circle(self, center, radius, z, kind, tool=0):
+        """
+        Adds the outline of a drill hole.
+
+        :param center:  (x, y) tuple
+        :param radius:  the hole radius
+        :param z:       the Z coordinate of the path
+        :param kind:    kind of the path, as a two letters list: ['C', 'F']
+        :param tool:    tool number
+        :return:        None
+        """
+        self.circles.append(len(self.kinds))
+        self.radii.append(radius)
+        self.add([center], z, kind, tool=tool)
+
+    def toolpath(self):
+        """
+        :return:    a Toolpath with the added paths
+        """
+        offsets = np.frombuffer(self.offsets, dtype=np.int64).copy()
+
+        vertices = np.empty((offsets[-1], 3))
+        vertices[:, :2] = np.frombuffer(self.xy, dtype=np.float64).reshape(-1, 2)
+        vertices[:, 2] = np.repeat(np.frombuffer(self.z, dtype=np.float64), np.diff(offsets))
+
+        radii = np.frombuffer(self.radii, dtype=np.float64)
+        circle_axes = np.zeros((len(radii), 2, 2))
+        circle_axes[:, 0, 0] = radii
+        circle_axes[:, 1, 1] = radii
+
+        return Toolpath(
+            vertices=vertices,
+            offsets=offsets,
+            kinds=np.frombuffer(self.kinds, dtype=np.uint8).copy(),
+            tools=np.frombuffer(self.tools, dtype=np.int64).copy(),
+            circles=np.frombuffer(self.circles, dtype=np.int64).copy(),
+            circle_axes=circle_axes
+        )
+
+
+class Toolpath:
+    """
+    The parsed G-code of a CNC job, as arrays of vertices. See the module documentation.
+    """
+
+    ARRAYS = ['vertices', 'offsets', 'kinds', 'tools', 'circles', 'circle_axes']
+
+    def __init__(self, vertices=None, offsets=None, kinds=None, tools=None, circles=None, circle_axes=None):
+        """
+
+        :param vertices:    (N, 3) array of the X, Y, Z coordinates of the vertices
+        :param offsets:     (M + 1) array with the index of the first vertex of each path and the number of vertices
+        :param kinds:       (M) array of kind codes
+        :param tools:       (M) array of tool numbers
+        :param circles:     (K) sorted array of the indexes of the drill hole paths
+        :param circle_axes: (K, 2, 2) array of the drill hole axes
+        """
+        self.vertices = np.empty((0, 3)) if vertices is None else vertices
+        self.offsets = np.zeros(1, dtype=np.int64) if offsets is None else offsets
+        self.kinds = np.empty(0, dtype=np.uint8) if kinds is None else kinds
+        self.tools = np.empty(0, dtype=np.int64) if tools is None else tools
+        self.circles = np.empty(0, dtype=np.int64) if circles is None else circles
+        self.circle_axes = np.empty((0, 2, 2)) if circle_axes is None else circle_axes
+
+    @classmethod
+    def concatenate(cls, toolpaths):
+        """
+        Joins more toolpaths in one, in order.
+
+        :param toolpaths:   list of Toolpath
+        :return:            Toolpath
+        """
+        toolpaths = [t for t in toolpaths if len(t)]
+        if not toolpaths:
+            return cls()
+
+        offsets = [np.zeros(1, dtype=np.int64)]
+        circles = []
+        v_start = 0
+        p_start = 0
+        for t in toolpaths:
+            offsets.append(t.offsets[1:] + v_start)
+            circles.append(t.circles + p_start)
+            v_start += t.offsets[-1]
+            p_start += len(t)
+
+        return cls(
+            vertices=np.concatenate([t.vertices for t in toolpaths]),
+            offsets=np.concatenate(offsets),
+            kinds=np.concatenate([t.kinds for t in toolpaths]),
+            tools=np.concatenate([t.tools for t in toolpaths]),
+            circles=np.concatenate(circles),
+            circle_axes=np.concatenate([t.circle_axes for t in toolpaths])
+        )
+
+    def paths(self, start, stop):
+        """
+        A part of the toolpath that shares the vertices with it: a transformation of the whole toolpath changes
+        the part too.
+
+        :param start:   index of the first path
+        :param stop:    index after the last path
+        :return:        Toolpath with the paths start ... stop - 1
+        """
+        v_start = self.offsets[start]
+        v_stop = self.offsets[stop]
+        c_start, c_stop = np.searchsorted(self.circles, [start, stop])
+        return Toolpath(
+            vertices=self.vertices[v_start:v_stop],
+            offsets=self.offsets[start:stop + 1] - v_start,
+            kinds=self.kinds[start:stop],
+            tools=self.tools[start:stop],
+            circles=self.circles[c_start:c_stop] - start,
+            circle_axes=self.circle_axes[c_start:c_stop]
+        )
+
+    # ## Sequence of the legacy dictionaries
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return [self[i] for i in range(*item.indices(len(self)))]
+        if item < 0:
+            item += len(self)
+        if not 0 <= item < len(self):
+            raise IndexError("Toolpath index out of range")
+        return {
+            "geom": self.geometry(item),
+            "kind": list(KINDS[self.kinds[item]])
+        }
+
+    def __iter__(self):
+        for geom, code in zip(self.geometries(), self.kinds):
+            yield {
+                "geom": geom,
+                "kind": list(KINDS[code])
+            }
+
+    # ## Geometry
+
+    def circle_mask(self):
+        """
+        :return:    bool array selecting the drill hole paths
+        """
+        mask = np.zeros(len(self), dtype=bool)
+        mask[self.circles] = True
+        return mask
+
+    def circle_index(self, idx):
+        """
+        :param idx: index of a path
+        :return:    the index in self.circles of the path or None if the path is not a drill hole
+        """
+        c_idx = int(np.searchsorted(self.circles, idx))
+        if c_idx < len(self.circles) and self.circles[c_idx] == idx:
+            return c_idx
+        return None
+
+    def circle_coords(self, selected=None):
+        """
+        :param selected:    optional indexes in self.circles of the drill holes
+        :return:            (K, V, 2) array with the outline vertices of the drill holes
+        """
+        if selected is None:
+            selected = slice(None)
+        centers = self.vertices[self.offsets[self.circles[selected]], :2]
+        # each vertex of the unit circle transformed by the axes of each hole
+        x, y = transform_unit(self.circle_axes[selected], UNIT_CIRCLE)
+        return np.stack((x + centers[:, 0, np.newaxis], y + centers[:, 1, np.newaxis]), axis=-1)
+
+    def path_coords(self, idx):
+        """
+        :param idx: index of the path
+        :return:    (K, 2) array with the X, Y coordinates of the path vertices
+        """
+        c_idx = self.circle_index(idx)
+        if c_idx is not None:
+            return self.circle_coords([c_idx])[0]
+        return self.vertices[self.offsets[idx]:self.offsets[idx + 1], :2]
+
+    def geometry(self, idx):
+        """
+        :param idx: index of the path
+        :return:    the path as a LineString (or a LinearRing for the drill hole outlines)
+        """
+        if self.circle_index(idx) is not None:
+            return LinearRing(self.path_coords(idx))
+        return LineString(self.path_coords(idx))
+
+    def geometries(self, mask=None):
+        """
+        Makes the Shapely geometry of the paths.
+
+        :param mask:    optional bool array selecting the paths
+        :return:        list of LineString (and LinearRing for the drill hole outlines)
+        """
+        indexes = np.arange(len(self)) if mask is None else np.flatnonzero(mask)
+        if len(indexes) == 0:
+            return []
+        if shapely_linestrings is None:
+            return [self.geometry(i) for i in indexes]
+
+        geoms = np.empty(len(indexes), dtype=object)
+        is_circle = self.circle_mask()[indexes]
+
+        lines = indexes[~is_circle]
+        if len(lines):
+            counts = self.offsets[lines + 1] - self.offsets[lines]
+            vertex_idx = np.repeat(self.offsets[lines] - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+            geoms[~is_circle] = shapely_linestrings(self.vertices[vertex_idx, :2],
+                                                    indices=np.repeat(np.arange(len(lines)), counts))
+
+        if is_circle.any():
+            coords = self.circle_coords(np.searchsorted(self.circles, indexes[is_circle]))
+            geoms[is_circle] = shapely_linearrings(coords.reshape(-1, 2),
+                                                   indices=np.repeat(np.arange(len(coords)), coords.shape[1]))
+        return list(geoms)
+
+    def kind_mask(self, letter):
+        """
+        :param letter:  'T' (travel), 'C' (cut), 'F' (fast) or 'S' (slow)
+        :return:        bool array selecting the paths of that kind
+        """
+        return np.array([letter in kind for kind in KINDS])[self.kinds]
+
+    def kind_letters(self, position=0):
+        """
+        :param position:    0 for the travel/cut letter, 1 for the fast/slow letter
+        :return:            list with the kind letter of each path
+        """
+        letters = np.array([kind[position] for kind in KINDS])
+        return letters[self.kinds].tolist()
+
+    def bounds(self, mask=None):
+        """
+        :param mask:    optional bool array selecting the paths
+        :return:        (xmin, ymin, xmax, ymax) of the paths
+        """
+        mask = np.ones(len(self), dtype=bool) if mask is None else mask
+
+        xy = self.vertices[np.repeat(mask & ~self.circle_mask(), np.diff(self.offsets)), :2]
+        xs = [xy[:, 0]]
+        ys = [xy[:, 1]]
+        selected = np.flatnonzero(mask[self.circles])
+        if len(selected):
+            # the extent of each hole outline around its center
+            x, y = transform_unit(self.circle_axes[selected], UNIT_CIRCLE)
+            centers = self.vertices[self.offsets[self.circles[selected]], :2]
+            xs += [centers[:, 0] + x.min(axis=1), centers[:, 0] + x.max(axis=1)]
+            ys += [centers[:, 1] + y.min(axis=1), centers[:, 1] + y.max(axis=1)]
+        xs = np.concatenate(xs)
+        ys = np.concatenate(ys)
+
+        if len(xs) == 0:
+            return 0, 0, 0, 0
+        return float(xs.min()), float(ys.min()), float(xs.max()), float(ys.max())
+
+    def endpoints(self, mask=None):
+        """
+        :param mask:    optional bool array selecting the paths
+        :return:        tuple of two (M, 2) arrays: the first and the last vertex of the paths
+        """
+        starts = self.vertices[self.offsets[:-1], :2]
+        ends = self.vertices[self.offsets[1:] - 1, :2]
+        if len(self.circles):
+            # the outlines of the holes start and end in the first vertex of the outline
+            first = self.circle_coords()[:, 0, :]
+            starts[self.circles] = first
+            ends[self.circles] = first
+        if mask is not None:
+            starts = starts[mask]
+            ends = ends[mask]
+        return starts, ends
+
+    # ## Transformations. They have the signature of the shapely.affinity functions and change the arrays in place
+
+    def affine_transform(self, matrix):
+        """
+        :param matrix:  [a, b, d, e, xoff, yoff] as in shapely.affinity.affine_transform()
+        :return:        None
+        """
+        a, b, d, e, xoff, yoff = matrix
+        x = self.vertices[:, 0].copy()
+        y = self.vertices[:, 1]
+        self.vertices[:, 0] = a * x + b * y + xoff
+        self.vertices[:, 1] = d * x + e * y + yoff
+        self.circle_axes[:] = np.matmul(np.array([[a, b], [d, e]]), self.circle_axes)
+
+    def translate(self, xoff=0.0, yoff=0.0):
+        self.vertices[:, 0] += xoff
+        self.vertices[:, 1] += yoff
+
+    def scale(self, xfact=1.0, yfact=1.0, origin=(0, 0)):
+        x0, y0 = origin
+        self.affine_transform([xfact, 0.0, 0.0, yfact, x0 - x0 * xfact, y0 - y0 * yfact])
+
+    def rotate(self, angle, origin=(0, 0), use_radians=False):
+        if not use_radians:
+            angle = np.radians(angle)
+        cosp = np.cos(angle)
+        sinp = np.sin(angle)
+        x0, y0 = origin
+        self.affine_transform([cosp, -sinp, sinp, cosp, x0 - x0 * cosp + y0 * sinp, y0 - x0 * sinp - y0 * cosp])
+
+    def skew(self, xs=0.0, ys=0.0, origin=(0, 0), use_radians=False):
+        if not use_radians:
+            xs = np.radians(xs)
+            ys = np.radians(ys)
+        tanx = np.tan(xs)
+        tany = np.tan(ys)
+        x0, y0 = origin
+        self.affine_transform([1.0, tanx, tany, 1.0, -y0 * tanx, -x0 * tany])
+
+    # ## Serialization
+
+    def to_dict(self):
+        """
+        :return:    JSON ready dictionary of lists
+        """
+        return {name: getattr(self, name).tolist() for name in self.ARRAYS}
+
+    @classmethod
+    def from_dict(cls, d):
+        """
+        :param d:   dictionary made by to_dict()
+        :return:    Toolpath
+        """
+        return cls(
+            vertices=np.array(d['vertices'], dtype=np.float64).reshape(-1, 3),
+            offsets=np.array(d['offsets'], dtype=np.int64),
+            kinds=np.array(d['kinds'], dtype=np.uint8),
+            tools=np.array(d['tools'], dtype=np.int64),
+            circles=np.array(d['circles'], dtype=np.int64),
+            circle_axes=np.array(d['circle_axes'], dtype=np.float64).reshape(-1, 2, 2)
+        )
+
+    def to_bytes(self):
+        """
+        :return:    the arrays, in the NumPy .npz format
+        """
+        buf = io.BytesIO()
+        np.savez(buf, **{name: getattr(self, name) for name in self.ARRAYS})
+        return buf.getvalue()
+
+    @classmethod
+    def from_bytes(cls, data):
+        """
+        :param data:    bytes made by to_bytes()
+        :return:        Toolpath
+        """
+        with np.load(io.BytesIO(data), allow_pickle=False) as arrays:
+            return cls(**{name: arrays[name] for name in cls.ARRAYS})
@@ -204,7 +204,7 @@ class PlotCanvas(QtCore.QObject, VisPyCanvas):
 
         self.shape_collections = []
 
-        self.shape_collection = self.new_shape_collection()
+        self.shape_collection = self.new_shape_collection(incremental=True)
         self.fcapp.pool_recreated.connect(self.on_pool_recreated)
         self.text_collection = self.new_text_collection()
 
@@ -212,6 +212,15 @@ class PlotCanvas(QtCore.QObject, VisPyCanvas):
 
         self.c = None
         self.big_cursor = None
+
+        # the level of detail and the culling of the main shape collection follow the view; the camera changes are
+        # collected by a timer so the collection is updated once the panning/zooming pauses
+        self.view_timer = QtCore.QTimer()
+        self.view_timer.setSingleShot(True)
+        self.view_timer.setInterval(100)
+        self.view_timer.timeout.connect(self.on_view_settled)
+        self.view.camera.transform.changed.connect(self.on_view_changed)
+
         # Keep VisPy canvas happy by letting it be "frozen" again.
         self.freeze()
         self.fit_view()
@@ -548,6 +557,23 @@ class PlotCanvas(QtCore.QObject, VisPyCanvas):
     def on_pool_recreated(self, pool):
         self.shape_collection.pool = pool
 
+    def on_view_changed(self, event=None):
+        self.view_timer.start()
+
+    def on_view_settled(self):
+        """
+        Passes the visible area and the pixel size to the main shape collection which will select the level of detail
+        of the shapes and cull the shapes outside the view.
+
+        :return: None
+        """
+        rect = self.view.camera.rect
+        width_px = self.view.size[0]
+        if width_px <= 0 or rect.width <= 0:
+            return
+
+        self.shape_collection.set_view((rect.left, rect.bottom, rect.right, rect.top), rect.width / width_px)
+
 
 class CursorBig(QtCore.QObject):
     """
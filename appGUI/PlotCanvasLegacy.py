@@ -17,6 +17,7 @@ from descartes.patch import PolygonPatch
 from shapely.geometry import Polygon, LineString, LinearRing
 
 from copy import deepcopy
+from contextlib import contextmanager
 import logging
 
 import numpy as np
@@ -1314,6 +1315,23 @@ class ShapeCollectionLegacy:
 
         return self.shape_id
 
+    def add_many(self, shapes, update=False):
+        """
+        Adds many shapes to the shape collection; for compatibility with the VisPy canvas
+
+        :param shapes: list of dicts with the keyword arguments for the add() method
+        :param update: not used; just for compatibility with VisPy canvas
+        :return: list of shape ids
+        """
+        return [self.add(**kwargs) for kwargs in shapes]
+
+    @contextmanager
+    def batch(self):
+        """
+        Does nothing; just for compatibility with VisPy canvas where it batches the shapes sent to the process pool
+        """
+        yield self
+
     def remove(self, shape_id, update=None):
         for k in list(self._shapes.keys()):
             if shape_id == k:
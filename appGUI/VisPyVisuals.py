@@ -6,15 +6,42 @@
 # MIT Licence                                              #
 # ##########################################################
 
-from vispy.visuals import CompoundVisual, LineVisual, MeshVisual, TextVisual, MarkersVisual
+from vispy.visuals import CompoundVisual, LineVisual, MeshVisual, TextVisual, MarkersVisual, Visual
 from vispy.scene.visuals import VisualNode, generate_docstring, visuals
+from vispy import gloo
 from vispy.gloo import set_state
 from vispy.color import Color
 from shapely.geometry import Polygon, LineString, LinearRing
+from rtree import index as rtindex
+from collections import OrderedDict
+from contextlib import contextmanager
 import threading
+import hashlib
+import bisect
+import math
+import os
+import weakref
 import numpy as np
 from appGUI.VisPyTesselators import GLUTess
 
+try:
+    from multiprocessing import shared_memory, resource_tracker
+except ImportError:
+    shared_memory = None
+
+# Simplification tolerance multipliers of the level-of-detail geometry kept by the incremental collections
+LOD_FACTORS = (1, 5, 25)
+# Shapes with less points are drawn with full detail at every level
+LOD_MIN_POINTS = 32
+# Batched additions are sent to the process pool in about this many tasks per CPU, of at least BATCH_MIN_CHUNK shapes
+BATCH_TASKS_PER_CPU = 4
+BATCH_MIN_CHUNK = 64
+# Translated buffers bigger than this come back from the process pool in a shared memory block instead of being
+# pickled. POSIX only: on Windows the block is destroyed when the worker process closes it
+SHM_MIN_BYTES = 64 * 1024
+# Changed row ranges of the incremental collection buffers closer than this many rows are uploaded together
+UPLOAD_MERGE_ROWS = 256
+
 
 class FlatCAMLineVisual(LineVisual):
     def __init__(self, pos=None, color=(0.5, 0.5, 0.5, 1), width=1, connect='strip', method='gl', antialias=False):
@@ -28,6 +55,116 @@ class FlatCAMLineVisual(LineVisual):
         self.update()
 
 
+class _SlotVisual(Visual):
+    _shaders = {
+        'vertex': """
+            attribute vec2 a_position;
+            attribute vec4 a_color;
+            varying vec4 v_color;
+
+            void main(void) {
+                gl_Position = $transform(vec4(a_position, 0.0, 1.0));
+                v_color = a_color;
+            }
+        """,
+        'fragment': """
+            varying vec4 v_color;
+
+            void main() {
+                gl_FragColor = v_color;
+            }
+        """
+    }
+
+    def __init__(self, mode):
+        """
+        Draws the slot buffers of an incremental ShapeCollectionVisual layer (see _SlotLayer). The GPU buffers have
+        the capacity of the slot buffers and only the rows changed since the last upload are sent to them
+        :param mode: str
+            'triangles' - mesh: vertices with colors and faces
+            'lines' - line segments: points with colors
+        """
+        Visual.__init__(self, vcode=self._shaders['vertex'], fcode=self._shaders['fragment'])
+
+        self._pos_vbo = gloo.VertexBuffer(np.zeros((0, 2), dtype=np.float32))
+        self._color_vbo = gloo.VertexBuffer(np.zeros((0, 4), dtype=np.float32))
+        self._faces_ibo = gloo.IndexBuffer(np.zeros((0, ), dtype=np.uint32)) if mode == 'triangles' else None
+        self._empty = True
+        self._width = 1
+
+        self.shared_program['a_position'] = self._pos_vbo
+        self.shared_program['a_color'] = self._color_vbo
+        self._draw_mode = mode
+        self._index_buffer = self._faces_ibo
+
+        if mode == 'triangles':
+            self.set_gl_state('translucent', depth_test=True, cull_face=False)
+        else:
+            self.set_gl_state('translucent')
+        self.freeze()
+
+    @staticmethod
+    def _upload_buffer(gl_buffer, slots, name, items=1):
+        """
+        Sends the rows of a slot buffer array changed since the last upload to a GPU buffer
+        :param gl_buffer: gloo.buffer.DataBuffer
+            Target buffer
+        :param slots: _SlotBuffer
+            Source buffer
+        :param name: str
+            Source array name
+        :param items: int
+            Buffer items per row: 1 for the vertex buffers, 3 for the faces
+        """
+        changes = slots.take_changes(name)
+        arr = slots.arrays[name]
+        if items > 1:
+            arr = arr.reshape((-1, ))
+
+        # Commands are queued until the next draw and the slot arrays are patched in place: the data is copied
+        if changes is None:
+            gl_buffer.set_data(arr, copy=True)
+        else:
+            for start, stop in changes:
+                gl_buffer.set_subdata(arr[start * items:stop * items], offset=start * items, copy=True)
+
+    def upload(self, points, faces=None, width=None):
+        """
+        Uploads the changed rows of the layer buffers
+        :param points: _SlotBuffer
+            Vertices or line points, with the 'pos' and 'colors' arrays
+        :param faces: _SlotBuffer
+            Mesh faces, with the 'faces' array
+        :param width: float
+            Line width
+        """
+        self._upload_buffer(self._pos_vbo, points, 'pos')
+        self._upload_buffer(self._color_vbo, points, 'colors')
+        if faces is not None:
+            self._upload_buffer(self._faces_ibo, faces, 'faces', items=3)
+            self._empty = faces.size == 0
+        else:
+            self._empty = points.size == 0
+        if width is not None:
+            self._width = width
+        self.update()
+
+    @staticmethod
+    def _prepare_transforms(view):
+        view.view_program.vert['transform'] = view.transforms.get_transform()
+
+    def _prepare_draw(self, view):
+        if self._empty:
+            return False
+        if self._draw_mode == 'lines':
+            self.update_gl_state(line_smooth=True)
+            self.update_gl_state(line_width=max(self.transforms.pixel_scale * self._width, 1.0))
+
+    def _compute_bounds(self, axis, view):
+        # The incremental ShapeCollectionVisual gets its bounds from the spatial index of the visible shapes
+        return None
+
+
 def _update_shape_buffers(data, triangulation='glu'):
     """
     Translates Shapely geometry to internal buffers for speedup redraws
@@ -36,14 +173,157 @@ def _update_shape_buffers(data, triangulation='glu'):
     :param triangulation: str
         Triangulation engine
     """
-    mesh_vertices = []                                              # Vertices for mesh
-    mesh_tris = []                                                  # Faces for mesh
-    mesh_colors = []                                                # Face colors
-    line_pts = []                                                   # Vertices for line
-    line_colors = []                                                # Line color
-
     geo, color, face_color, tolerance = data['geometry'], data['color'], data['face_color'], data['tolerance']
 
+    line_pts, mesh_vertices, mesh_tris = _shape_buffers(geo, color, face_color, tolerance, triangulation)
+
+    # Store buffers
+    data['line_pts'] = line_pts
+    data['mesh_vertices'] = mesh_vertices
+    data['mesh_tris'] = mesh_tris
+
+    # Colors are stored once per shape and expanded to vertices/faces when the layer buffers are merged
+    data['line_rgba'] = Color(color).rgba if len(line_pts) > 0 else None
+    data['face_rgba'] = Color(face_color).rgba if len(mesh_tris) > 0 else None
+
+    # Bounds and coarser levels of detail, used by the incremental collections for culling and zoomed out views
+    if data.get('lod'):
+        valid = geo is not None and not geo.is_empty
+        data['bounds'] = geo.bounds if valid else None
+        if valid and tolerance and _point_count(geo) >= LOD_MIN_POINTS:
+            data['lod'] = [_shape_buffers(geo, color, face_color, tolerance * factor, triangulation)
+                           for factor in LOD_FACTORS[1:]]
+        else:
+            data['lod'] = None
+
+    # Clear shapely geometry
+    del data['geometry']
+
+    return data
+
+
+def _update_shape_buffers_shared(data):
+    """
+    Process pool version of _update_shape_buffers: large buffers are returned in a shared memory block
+    :param data: dict
+        Input shape data
+    """
+    return _share_buffers(_update_shape_buffers(data))
+
+
+def _buffer_arrays(data):
+    """
+    :return: list
+        (container, index) pairs addressing every buffer array of the translated shape data
+    """
+    slots = [(data, 'line_pts'), (data, 'mesh_vertices'), (data, 'mesh_tris')]
+    if data.get('lod'):
+        data['lod'] = [list(level) for level in data['lod']]
+        for level in data['lod']:
+            slots.extend((level, i) for i in range(len(level)))
+    return slots
+
+
+def _share_buffers(data):
+    """
+    Moves the buffer arrays of translated shape data to one shared memory block and replaces them with
+    (offset, dtype, shape) descriptors. Done in the pool workers, see _attach_buffers()
+    :param data: dict
+        Shape data as returned by _update_shape_buffers
+    """
+    if shared_memory is None or os.name == 'nt':
+        return data
+
+    slots = _buffer_arrays(data)
+    offsets = []
+    size = 0
+    for container, idx in slots:
+        offsets.append(size)
+        size += (container[idx].nbytes + 7) // 8 * 8        # 8 bytes aligned arrays
+
+    if size < SHM_MIN_BYTES:
+        return data
+
+    try:
+        shm = shared_memory.SharedMemory(create=True, size=size)
+    except OSError:
+        return data
+
+    block = np.ndarray((size, ), dtype=np.uint8, buffer=shm.buf)
+    for (container, idx), offset in zip(slots, offsets):
+        arr = np.ascontiguousarray(container[idx])
+        block[offset:offset + arr.nbytes] = arr.view(np.uint8).reshape(-1)
+        container[idx] = (offset, arr.dtype.str, arr.shape)
+    del block
+
+    data['shm'] = shm.name
+    shm.close()
+
+    # The block is owned (and unlinked) by the GUI process from now on, keep it out of this process resource tracker
+    try:
+        resource_tracker.unregister(shm._name, 'shared_memory')
+    except Exception:
+        pass
+
+    return data
+
+
+# Shared memory blocks whose arrays were all released, closed on the next _close_released_shm()
+_released_shm = []
+
+
+def _attach_buffers(data):
+    """
+    Replaces the shared memory descriptors made by _share_buffers() with arrays viewing the shared memory block
+    (no copy). The block name is unlinked right away; the mapping is closed after all the arrays are released.
+    :param data: dict
+        Shape data returned by the process pool
+    """
+    name = data.pop('shm', None)
+    if name is None:
+        return data
+
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        shm.unlink()
+    except OSError:
+        pass
+
+    block = np.ndarray((shm.size, ), dtype=np.uint8, buffer=shm.buf)
+    for container, idx in _buffer_arrays(data):
+        offset, dtype, shape = container[idx]
+        dtype = np.dtype(dtype)
+        nbytes = int(np.prod(shape)) * dtype.itemsize
+        container[idx] = block[offset:offset + nbytes].view(dtype).reshape(shape)
+    data['lod'] = [tuple(level) for level in data['lod']] if data.get('lod') else data.get('lod')
+
+    # The arrays are views of the block, it dies with the last one of them
+    weakref.finalize(block, _released_shm.append, shm)
+
+    return data
+
+
+def _close_released_shm():
+    while _released_shm:
+        shm = _released_shm.pop()
+        try:
+            shm.close()
+        except BufferError:
+            # Still exported, try again later
+            _released_shm.append(shm)
+            break
+
+
+def _shape_buffers(geo, color, face_color, tolerance, triangulation='glu'):
+    """
+    Translates a Shapely geometry simplified with the given tolerance to line and mesh buffers
+    :return: tuple
+        Line points, mesh vertices, mesh faces (indexes in mesh vertices)
+    """
+    mesh_vertices = np.empty((0, 2), dtype=np.float32)              # Vertices for mesh
+    mesh_tris = np.empty((0, ), dtype=np.uint32)                    # Faces for mesh (indexes in mesh_vertices)
+    line_pts = np.empty((0, 2), dtype=np.float32)                   # Vertices for line
+
     if geo is not None and not geo.is_empty:
         simplified_geo = geo.simplify(tolerance) if tolerance else geo      # Simplified shape
         pts = []                                                            # Shape line points
@@ -52,11 +332,11 @@ def _update_shape_buffers(data, triangulation='glu'):
 
         if type(geo) == LineString:
             # Prepare lines
-            pts = _linestring_to_segments(list(simplified_geo.coords))
+            pts = [_linestring_to_segments(simplified_geo.coords)]
 
         elif type(geo) == LinearRing:
             # Prepare lines
-            pts = _linearring_to_segments(list(simplified_geo.coords))
+            pts = [_linearring_to_segments(simplified_geo.coords)]
 
         elif type(geo) == Polygon:
             # Prepare polygon faces
@@ -69,38 +349,197 @@ def _update_shape_buffers(data, triangulation='glu'):
 
             # Prepare polygon edges
             if color is not None:
-                pts = _linearring_to_segments(list(simplified_geo.exterior.coords))
+                pts = [_linearring_to_segments(simplified_geo.exterior.coords)]
                 for ints in simplified_geo.interiors:
-                    pts += _linearring_to_segments(list(ints.coords))
+                    pts.append(_linearring_to_segments(ints.coords))
 
-        # Appending data for mesh
+        # Buffers for mesh
         if len(tri_pts) > 0 and len(tri_tris) > 0:
-            mesh_tris += tri_tris
-            mesh_vertices += tri_pts
-            face_color_rgba = Color(face_color).rgba
-            # mesh_colors += [face_color_rgba] * (len(tri_tris) // 3)
-            mesh_colors += [face_color_rgba for __ in range(len(tri_tris) // 3)]
+            try:
+                mesh_tris = np.asarray(tri_tris, dtype=np.uint32)
+                mesh_vertices = np.asarray(tri_pts, dtype=np.float32)[:, :2]
+            except (TypeError, ValueError) as e:
+                print("VisPyVisuals._update_shape_buffers() --> Triangulation data error. %s" % str(e))
+                mesh_tris = np.empty((0, ), dtype=np.uint32)
 
-        # Appending data for line
+        # Buffers for line
         if len(pts) > 0:
-            line_pts += pts
-            colo_rgba = Color(color).rgba
-            # line_colors += [colo_rgba] * len(pts)
-            line_colors += [colo_rgba for __ in range(len(pts))]
+            line_pts = np.concatenate(pts).astype(np.float32)
+
+    return line_pts, mesh_vertices, mesh_tris
+
+
+def _point_count(geo):
+    if type(geo) == Polygon:
+        return len(geo.exterior.coords) + sum(len(ints.coords) for ints in geo.interiors)
+    try:
+        return len(geo.coords)
+    except (AttributeError, NotImplementedError):
+        return 0
+
+
+def _lod_level(tolerance, pixel_size):
+    """
+    Coarsest level of detail whose simplification error is under a screen pixel
+    :param tolerance: float
+        Shape simplification tolerance
+    :param pixel_size: float
+        Size of a screen pixel in scene units
+    :return: int
+    """
+    level = 0
+    if tolerance and pixel_size:
+        for i, factor in enumerate(LOD_FACTORS):
+            if tolerance * factor <= pixel_size:
+                level = i
+    return level
+
+
+def _shape_level(data, level):
+    """
+    Buffers of a shape at a level of detail
+    :return: tuple
+        Effective level (shapes without coarser levels always use level 0), line points, mesh vertices, mesh faces
+    """
+    if level > 0 and data.get('lod'):
+        return (level, ) + tuple(data['lod'][level - 1])
+    return 0, data['line_pts'], data['mesh_vertices'], data['mesh_tris']
+
+
+def _cached_shape_data(data, buffers):
+    """
+    Fills shape data with buffers taken from the tessellation cache, like _update_shape_buffers would
+    :param data: dict
+        Input shape data
+    :param buffers: tuple
+        Cached line points, mesh vertices, mesh faces, levels of detail and bounds
+    """
+    line_pts, mesh_vertices, mesh_tris, lod, bounds = buffers
 
-    # Store buffers
     data['line_pts'] = line_pts
-    data['line_colors'] = line_colors
     data['mesh_vertices'] = mesh_vertices
     data['mesh_tris'] = mesh_tris
-    data['mesh_colors'] = mesh_colors
+    data['line_rgba'] = Color(data['color']).rgba if len(line_pts) > 0 else None
+    data['face_rgba'] = Color(data['face_color']).rgba if len(mesh_tris) > 0 else None
+
+    if data.get('lod'):
+        data['lod'] = lod
+        data['bounds'] = bounds
 
-    # Clear shapely geometry
     del data['geometry']
 
     return data
 
 
+class TessellationCache(object):
+    def __init__(self, max_bytes=256 * 1024 * 1024):
+        """
+        Bounded LRU cache of translated shape buffers, shared by all the shape collections so replotting unchanged
+        geometry (color changes, plot toggles) skips the triangulation. The least recently used entries are
+        evicted when the cached buffers exceed max_bytes.
+        :param max_bytes: int
+            Memory limit of the cached buffers
+        """
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(shape, tolerance, triangulation, color, face_color, lod):
+        """
+        Cache key of a shape: geometry fingerprint (hash of the WKB), tolerance, triangulation method and the
+        options that change the buffers (edges drawn, faces drawn, levels of detail kept)
+        :return: tuple or None if the geometry can't be fingerprinted
+        """
+        try:
+            digest = hashlib.blake2b(shape.wkb, digest_size=16).digest()
+        except Exception:
+            return None
+        return digest, tolerance, triangulation, color is not None, face_color is not None, bool(lod)
+
+    def get(self, key):
+        """
+        :param key: tuple
+            Key made by TessellationCache.key()
+        :return: tuple
+            Buffers (line points, mesh vertices, mesh faces, levels of detail, bounds) or None
+        """
+        if key is None:
+            return None
+
+        self._lock.acquire(True)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+        else:
+            self._entries.move_to_end(key)
+            self.hits += 1
+        self._lock.release()
+
+        return entry[0] if entry is not None else None
+
+    def put(self, key, data):
+        """
+        Stores the buffers of a translated shape. The arrays are shared by all the shapes using the entry, so they
+        are made read-only.
+        :param key: tuple
+            Key made by TessellationCache.key()
+        :param data: dict
+            Shape data as returned by _update_shape_buffers
+        """
+        if key is None or 'line_pts' not in data:
+            return
+
+        lod = data.get('lod') or None
+        buffers = (data['line_pts'], data['mesh_vertices'], data['mesh_tris'], lod, data.get('bounds'))
+
+        arrays = [data['line_pts'], data['mesh_vertices'], data['mesh_tris']]
+        if lod:
+            for level in lod:
+                arrays.extend(level)
+        nbytes = 0
+        for arr in arrays:
+            arr.flags.writeable = False
+            nbytes += arr.nbytes
+
+        if nbytes > self.max_bytes:
+            return
+
+        self._lock.acquire(True)
+        if key in self._entries:
+            self.nbytes -= self._entries.pop(key)[1]
+        self._entries[key] = (buffers, nbytes)
+        self.nbytes += nbytes
+
+        while self.nbytes > self.max_bytes:
+            self.nbytes -= self._entries.popitem(last=False)[1][1]
+            self.evictions += 1
+        self._lock.release()
+
+    def clear(self):
+        self._lock.acquire(True)
+        self._entries.clear()
+        self.nbytes = 0
+        self._lock.release()
+
+    def stats(self):
+        """
+        :return: dict
+            Entries, memory used and hit/miss/eviction counters
+        """
+        return {'entries': len(self._entries), 'nbytes': self.nbytes, 'max_bytes': self.max_bytes,
+                'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions}
+
+
+# Shared by all the ShapeCollectionVisual instances
+tessellation_cache = TessellationCache()
+
+
 def _linearring_to_segments(arr):
     # Close linear ring
     """
@@ -110,8 +549,9 @@ def _linearring_to_segments(arr):
     :return: numpy.array
         Line segments
     """
-    if arr[0] != arr[-1]:
-        arr.append(arr[0])
+    arr = np.asarray(arr)[:, :2]
+    if len(arr) > 0 and not np.array_equal(arr[0], arr[-1]):
+        arr = np.vstack((arr, arr[:1]))
 
     return _linestring_to_segments(arr)
 
@@ -124,7 +564,302 @@ def _linestring_to_segments(arr):
     :return: numpy.array
         Line segments
     """
-    return [arr[i // 2] for i in range(0, len(arr) * 2)][1:-1]
+    arr = np.asarray(arr)[:, :2]
+    return np.repeat(arr, 2, axis=0)[1:-1]
+
+
+def _merge_shape_buffers(shapes):
+    """
+    Merges the buffers of the shapes in a layer with one concatenation per buffer
+    :param shapes: list
+        Shape data (as returned by _update_shape_buffers) of the visible shapes in the layer
+    :return: dict
+        Merged buffers: 'mesh_vertices', 'mesh_tris' (faces array), 'line_pts' and the per shape vertex/face counts
+        needed to expand the shape colors
+    """
+    mesh_shapes = [d for d in shapes if len(d['mesh_tris']) > 0]
+    line_shapes = [d for d in shapes if len(d['line_pts']) > 0]
+
+    merged = {
+        'mesh_shapes': mesh_shapes,
+        'line_shapes': line_shapes,
+        'mesh_vertices': np.empty((0, 2), dtype=np.float32),
+        'mesh_tris': np.empty((0, 3), dtype=np.uint32),
+        'face_counts': np.empty((0, ), dtype=np.int64),
+        'line_pts': np.empty((0, 2), dtype=np.float32),
+        'line_counts': np.empty((0, ), dtype=np.int64)
+    }
+
+    if mesh_shapes:
+        vertex_counts = np.fromiter((len(d['mesh_vertices']) for d in mesh_shapes), dtype=np.int64,
+                                    count=len(mesh_shapes))
+        tri_counts = np.fromiter((len(d['mesh_tris']) for d in mesh_shapes), dtype=np.int64, count=len(mesh_shapes))
+
+        # Offset of the first vertex of each shape in the merged vertex buffer
+        offsets = np.zeros(len(mesh_shapes), dtype=np.uint32)
+        np.cumsum(vertex_counts[:-1], out=offsets[1:])
+
+        merged['mesh_vertices'] = np.concatenate([d['mesh_vertices'] for d in mesh_shapes])
+        tris = np.concatenate([d['mesh_tris'] for d in mesh_shapes])
+        tris += np.repeat(offsets, tri_counts)
+        merged['mesh_tris'] = tris.reshape((-1, 3))
+        merged['face_counts'] = tri_counts // 3
+
+    if line_shapes:
+        merged['line_pts'] = np.concatenate([d['line_pts'] for d in line_shapes])
+        merged['line_counts'] = np.fromiter((len(d['line_pts']) for d in line_shapes), dtype=np.int64,
+                                            count=len(line_shapes))
+
+    return merged
+
+
+def _merged_colors(shapes, counts, rgba_key):
+    """
+    Expands the per shape colors to the merged buffer
+    :param shapes: list
+        Shape data in the order of the merged buffer
+    :param counts: numpy.array
+        Number of faces/vertices of each shape in the merged buffer
+    :param rgba_key: str
+        'face_rgba' or 'line_rgba'
+    :return: numpy.array
+        Colors array
+    """
+    if not shapes:
+        return np.empty((0, 4), dtype=np.float32)
+    rgba = np.array([d[rgba_key] for d in shapes], dtype=np.float32)
+    return np.repeat(rgba, counts, axis=0)
+
+
+class _SlotBuffer(object):
+    def __init__(self, **fields):
+        """
+        Growable set of parallel arrays in which every shape owns a contiguous range of rows.
+        Released ranges are zeroed and kept in a free-list to be reused by the next allocations.
+        The rows written since the last upload of each array are recorded (see mark() and take_changes()).
+        :param fields: dict
+            Array name -> (columns, dtype). Zero columns makes a 1D array
+        """
+        self._fields = fields
+        self._free = []                 # Sorted (start, length) free ranges below self.size
+        self.arrays = {}
+        self.capacity = 0
+        self.size = 0                   # Rows in use, free ranges below it included
+        self.free_rows = 0
+        self._changed = {name: [] for name in fields}   # Array name -> (start, stop) rows written since its upload
+        self._reallocated = set()       # Arrays reallocated since their upload, they are uploaded whole
+        self._grow(0)
+
+    def _grow(self, capacity):
+        arrays = {}
+        for name, (columns, dtype) in self._fields.items():
+            arr = np.zeros((capacity, columns) if columns else (capacity, ), dtype=dtype)
+            if name in self.arrays:
+                arr[:self.size] = self.arrays[name][:self.size]
+            arrays[name] = arr
+        self.arrays = arrays
+        self.capacity = capacity
+        self._reallocated.update(self._fields)
+
+    def mark(self, start, length, *names):
+        """
+        Records a range of rows written in some of the arrays
+        :param start: int
+            First row of the range
+        :param length: int
+            Number of rows
+        :param names: str
+            Names of the written arrays; all the arrays if none is given
+        """
+        if length == 0:
+            return
+        for name in names or self._fields:
+            self._changed[name].append((start, start + length))
+
+    def take_changes(self, name):
+        """
+        Gets and forgets the rows of an array written since the last call
+        :param name: str
+            Array name
+        :return: list
+            None if the array was reallocated and has to be uploaded whole, else the sorted (start, stop) ranges of
+            the written rows. Ranges closer than UPLOAD_MERGE_ROWS rows are merged
+        """
+        ranges, self._changed[name] = self._changed[name], []
+        if name in self._reallocated:
+            self._reallocated.discard(name)
+            return None
+
+        merged = []
+        for start, stop in sorted(ranges):
+            if merged and start <= merged[-1][1] + UPLOAD_MERGE_ROWS:
+                merged[-1][1] = max(merged[-1][1], stop)
+            else:
+                merged.append([start, stop])
+        return [tuple(r) for r in merged]
+
+    def alloc(self, length):
+        """
+        Reserves a range of rows
+        :param length: int
+            Number of rows
+        :return: int
+            First row of the range
+        """
+        if length == 0:
+            return 0
+
+        # First fit in the free-list
+        for i, (start, free_length) in enumerate(self._free):
+            if free_length >= length:
+                if free_length == length:
+                    del self._free[i]
+                else:
+                    self._free[i] = (start + length, free_length - length)
+                self.free_rows -= length
+                return start
+
+        start = self.size
+        if start + length > self.capacity:
+            self._grow(max(2 * self.capacity, start + length, 1024))
+        self.size += length
+        return start
+
+    def release(self, start, length):
+        """
+        Zeroes a range of rows and returns it to the free-list
+        :param start: int
+            First row of the range
+        :param length: int
+            Number of rows
+        """
+        if length == 0:
+            return
+
+        for arr in self.arrays.values():
+            arr[start:start + length] = 0
+        self.mark(start, length)
+        self.free_rows += length
+
+        # Coalesce with the neighbouring free ranges
+        idx = bisect.bisect(self._free, (start, length))
+        if idx < len(self._free) and self._free[idx][0] == start + length:
+            length += self._free[idx][1]
+            del self._free[idx]
+        if idx > 0 and self._free[idx - 1][0] + self._free[idx - 1][1] == start:
+            idx -= 1
+            start, length = self._free[idx][0], self._free[idx][1] + length
+            del self._free[idx]
+
+        if start + length == self.size:
+            # Trailing range, shrink the used rows instead
+            self.size = start
+            self.free_rows -= length
+        else:
+            self._free.insert(idx, (start, length))
+
+
+class _SlotLayer(object):
+    def __init__(self):
+        """
+        Persistent buffers of one ShapeCollectionVisual layer. Each shape owns a slot (a range of mesh vertices,
+        mesh faces and line points) so adding, removing, recoloring and hiding a shape only patches its own rows.
+        The mesh colors are per vertex: the vertices of a shape are not shared with other shapes.
+        Hidden and released shapes have degenerated faces and transparent lines.
+        """
+        self.vertices = _SlotBuffer(pos=(2, np.float32), colors=(4, np.float32))
+        self.faces = _SlotBuffer(faces=(3, np.uint32))
+        self.lines = _SlotBuffer(pos=(2, np.float32), colors=(4, np.float32))
+
+        self.slots = {}                 # Shape key -> (level of detail, vertex start, vertex count, face start,
+                                        #               face count, line start, line count)
+        self.mesh_changed = True
+        self.line_changed = True
+        self.line_width = None          # Line width of the last upload
+
+    def insert(self, key, data, level=0):
+        """
+        Allocates the slot of a translated shape and writes its geometry
+        :param key: int
+            Shape key
+        :param data: dict
+            Shape data as returned by _update_shape_buffers
+        :param level: int
+            Level of detail
+        """
+        level, line_pts, vertices, tris = _shape_level(data, level)
+        if len(tris) == 0:
+            vertices = vertices[:0]
+
+        v = self.vertices.alloc(len(vertices))
+        f = self.faces.alloc(len(tris) // 3)
+        ln = self.lines.alloc(len(line_pts))
+
+        self.vertices.arrays['pos'][v:v + len(vertices)] = vertices
+        self.vertices.mark(v, len(vertices), 'pos')
+        self.lines.arrays['pos'][ln:ln + len(line_pts)] = line_pts
+        self.lines.mark(ln, len(line_pts), 'pos')
+        self.slots[key] = (level, v, len(vertices), f, len(tris) // 3, ln, len(line_pts))
+
+        self.patch(key, data)
+
+    def patch(self, key, data):
+        """
+        Writes the faces and the colors of a shape according to its visibility and colors
+        :param key: int
+            Shape key
+        :param data: dict
+            Shape data as returned by _update_shape_buffers
+        """
+        level, v, nv, f, nf, ln, nl = self.slots[key]
+        visible = bool(data['visible'])
+
+        if nf > 0:
+            if visible:
+                self.faces.arrays['faces'][f:f + nf] = _shape_level(data, level)[3].reshape((-1, 3)) + v
+                self.vertices.arrays['colors'][v:v + nv] = data['face_rgba']
+                self.vertices.mark(v, nv, 'colors')
+            else:
+                self.faces.arrays['faces'][f:f + nf] = 0
+            self.faces.mark(f, nf)
+            self.mesh_changed = True
+
+        if nl > 0:
+            self.lines.arrays['colors'][ln:ln + nl] = data['line_rgba'] if visible else 0
+            self.lines.mark(ln, nl, 'colors')
+            self.line_changed = True
+
+    def remove(self, key):
+        """
+        Releases the slot of a shape
+        :param key: int
+            Shape key
+        """
+        level, v, nv, f, nf, ln, nl = self.slots.pop(key)
+
+        self.vertices.release(v, nv)
+        self.faces.release(f, nf)
+        self.lines.release(ln, nl)
+
+        self.mesh_changed = self.mesh_changed or nf > 0
+        self.line_changed = self.line_changed or nl > 0
+
+    def needs_compaction(self):
+        return any(b.free_rows > 4096 and b.free_rows > b.size // 2 for b in (self.vertices, self.faces, self.lines))
+
+    def compact(self, data):
+        """
+        Rebuilds the buffers without the free ranges
+        :param data: dict
+            Shapes data of the collection
+        """
+        levels = [(k, slot[0]) for k, slot in self.slots.items()]
+        self.__init__()
+        for k, level in levels:
+            self.insert(k, data[k], level)
+
+    def level(self, key):
+        return self.slots[key][0]
 
 
 class ShapeGroup(object):
@@ -149,6 +884,24 @@ class ShapeGroup(object):
         self._indexes.append(key)
         return key
 
+    def add_many(self, shapes):
+        """
+        Adds shapes to collection in batches and store indexes in group
+        :param shapes: list
+            Keyword arguments dicts for ShapeCollection.add function
+        :return: list
+            Indexes of shapes
+        """
+        keys = self._collection.add_many(shapes)
+        self._indexes.extend(keys)
+        return keys
+
+    def batch(self):
+        """
+        Context manager that sends the shapes added inside it to the process pool in batches
+        """
+        return self._collection.batch()
+
     def remove(self, idx, update=False):
         self._indexes.remove(idx)
         self._collection.remove(idx, False)
@@ -193,26 +946,24 @@ class ShapeGroup(object):
         :param value: bool
         """
         self._visible = value
-        for i in self._indexes:
-            self._collection.data[i]['visible'] = value
+        self._collection.update_visibility(value, indexes=self._indexes)
 
         self._collection.redraw([])
 
     def update_visibility(self, state, indexes=None):
         if indexes:
-            for i in indexes:
-                if i in self._indexes:
-                    self._collection.data[i]['visible'] = state
+            own_indexes = set(self._indexes)
+            indexes = [i for i in indexes if i in own_indexes]
         else:
-            for i in self._indexes:
-                self._collection.data[i]['visible'] = state
+            indexes = self._indexes
+        self._collection.update_visibility(state, indexes=indexes)
 
         self._collection.redraw([])
 
 
 class ShapeCollectionVisual(CompoundVisual):
 
-    def __init__(self, linewidth=1, triangulation='vispy', layers=3, pool=None, **kwargs):
+    def __init__(self, linewidth=1, triangulation='vispy', layers=3, pool=None, incremental=False, **kwargs):
         """
         Represents collection of shapes to draw on VisPy scene
         :param linewidth: float
@@ -224,6 +975,9 @@ class ShapeCollectionVisual(CompoundVisual):
         :param layers: int
             Layers count
             Each layer adds 2 visuals on VisPy scene. Be careful: more layers cause less fps
+        :param incremental: bool
+            Keep persistent layer buffers where each shape owns a slot; updates patch only the changed shapes.
+            Incremental collections also keep levels of detail and cull the shapes outside the view (see set_view())
         :param kwargs:
         """
         self.data = {}
@@ -233,18 +987,44 @@ class ShapeCollectionVisual(CompoundVisual):
         self.key_lock = threading.Lock()
         self.results_lock = threading.Lock()
         self.update_lock = threading.Lock()
+        self.dirty_lock = threading.Lock()
 
         # Process pool
         self.pool = pool
-        self.results = {}
-
-        self._meshes = [MeshVisual() for _ in range(0, layers)]
-        # self._lines = [LineVisual(antialias=True) for _ in range(0, layers)]
-        self._lines = [FlatCAMLineVisual(antialias=True) for _ in range(0, layers)]
+        self.results = {}               # Shape key -> (process pool result, index of the shape in the result)
+        self._cache_keys = {}           # Tessellation cache keys of the shapes waiting for the process pool
+        self._batch = threading.local()     # Keys added in a batch() by the current thread, not sent to the pool yet
+        self._orphans = []              # Results of removed shapes; collected to release their shared memory
+
+        if incremental:
+            self._meshes = [_SlotVisual('triangles') for _ in range(0, layers)]
+            self._lines = [_SlotVisual('lines') for _ in range(0, layers)]
+        else:
+            self._meshes = [MeshVisual() for _ in range(0, layers)]
+            # self._lines = [LineVisual(antialias=True) for _ in range(0, layers)]
+            self._lines = [FlatCAMLineVisual(antialias=True) for _ in range(0, layers)]
 
         self._line_width = linewidth
         self._triangulation = triangulation
 
+        # Merged buffers of each layer and the signature (visible shape keys, line width) they were made for
+        self._layer_cache = [None for _ in range(0, layers)]
+
+        # Incremental mode: slot buffers of each layer, layer of each shape that has a slot and the changed shapes
+        self._incremental = incremental
+        self._slot_layers = [_SlotLayer() for _ in range(0, layers)] if incremental else []
+        self._slot_keys = {}
+        self._dirty = set()
+
+        # Incremental mode: spatial index of the translated shapes, shapes with levels of detail grouped by tolerance,
+        # culling area (the view with a margin) and the shapes in it, screen pixel size in scene units
+        self._rtree = rtindex.Index()
+        self._indexed = {}
+        self._lod_keys = {}
+        self._cull_rect = None
+        self._in_view = None
+        self._pixel_size = None
+
         visuals_ = [self._lines[i // 2] if i % 2 else self._meshes[i // 2] for i in range(0, layers * 2)]
 
         CompoundVisual.__init__(self, visuals_, **kwargs)
@@ -293,22 +1073,94 @@ class ShapeCollectionVisual(CompoundVisual):
 
         # Prepare data for translation
         self.data[key] = {'geometry': shape, 'color': color, 'alpha': alpha, 'face_color': face_color,
-                          'visible': visible, 'layer': layer, 'tolerance': tolerance}
+                          'visible': visible, 'layer': layer, 'tolerance': tolerance, 'lod': self._incremental}
 
         if linewidth:
             self._line_width = linewidth
 
-        # Add data to process pool if pool exists
-        try:
-            self.results[key] = self.pool.map_async(_update_shape_buffers, [self.data[key]])
-        except Exception:
-            self.data[key] = _update_shape_buffers(self.data[key])
+        # Unchanged geometry is taken from the tessellation cache (the translation always uses the GLU tessellator)
+        cache_key = tessellation_cache.key(shape, tolerance, 'glu', color, face_color, self._incremental)
+        buffers = tessellation_cache.get(cache_key)
+        if buffers is not None:
+            self.data[key] = _cached_shape_data(self.data[key], buffers)
+            self._mark_dirty([key])
+        else:
+            self._cache_keys[key] = cache_key
+            batch = getattr(self._batch, 'keys', None)
+            if batch is not None:
+                batch.append(key)
+            else:
+                self._submit([key])
 
         if update:
             self.redraw()   # redraw() waits for pool process end
 
         return key
 
+    def add_many(self, shapes, update=False):
+        """
+        Adds shapes to collection, the shapes to translate are sent to the process pool in batches
+        :param shapes: list
+            Keyword arguments dicts for the add function
+        :param update: bool
+            Set True to redraw collection
+        :return: list
+            Indexes of shapes
+        """
+        with self.batch():
+            keys = [self.add(**dict(kwargs, update=False)) for kwargs in shapes]
+
+        if update:
+            self.redraw()
+
+        return keys
+
+    @contextmanager
+    def batch(self):
+        """
+        Context manager: the shapes added inside it by the current thread are sent to the process pool in a few
+        chunked tasks when the outermost batch ends, instead of one task per shape
+        """
+        outer = getattr(self._batch, 'keys', None) is None
+        if outer:
+            self._batch.keys = []
+        try:
+            yield self
+        finally:
+            if outer:
+                keys = self._batch.keys
+                self._batch.keys = None
+                self._submit(keys)
+
+    def _submit(self, keys):
+        """
+        Sends shapes to the process pool for translation, in chunks sized to the CPU count.
+        Without a process pool the shapes are translated here.
+        :param keys: list
+            Shape keys
+        """
+        keys = [k for k in keys if k in self.data]
+        if not keys:
+            return
+
+        tasks = BATCH_TASKS_PER_CPU * (os.cpu_count() or 1)
+        chunk_size = max(BATCH_MIN_CHUNK, int(math.ceil(len(keys) / tasks))) if len(keys) > 1 else 1
+
+        for start in range(0, len(keys), chunk_size):
+            chunk = keys[start:start + chunk_size]
+
+            # Add data to process pool if pool exists
+            try:
+                result = self.pool.map_async(_update_shape_buffers_shared, [self.data[k] for k in chunk],
+                                             chunksize=len(chunk))
+                for pos, k in enumerate(chunk):
+                    self.results[k] = (result, pos)
+            except Exception:
+                for k in chunk:
+                    self.data[k] = _update_shape_buffers(self.data[k])
+                    tessellation_cache.put(self._cache_keys.pop(k, None), self.data[k])
+                self._mark_dirty(chunk)
+
     def remove(self, key, update=False):
         """
         Removes shape from collection
@@ -319,12 +1171,14 @@ class ShapeCollectionVisual(CompoundVisual):
         """
         # Remove process result
         self.results_lock.acquire(True)
-        if key in list(self.results.copy().keys()):
-            del self.results[key]
+        if key in self.results:
+            self._orphans.append(self.results.pop(key))
+        self._cache_keys.pop(key, None)
         self.results_lock.release()
 
         # Remove data
         del self.data[key]
+        self._mark_dirty([key])
 
         if update:
             self.__update()
@@ -336,22 +1190,52 @@ class ShapeCollectionVisual(CompoundVisual):
             Set True to redraw collection
         """
         self.data.clear()
+
+        self.results_lock.acquire(True)
+        self._orphans.extend(self.results.values())
+        self.results.clear()
+        self._cache_keys.clear()
+        self.results_lock.release()
+
+        if self._incremental:
+            self.update_lock.acquire(True)
+            self.dirty_lock.acquire(True)
+            self._slot_layers = [_SlotLayer() for _ in range(0, len(self._meshes))]
+            self._slot_keys.clear()
+            self._dirty.clear()
+            self._rtree = rtindex.Index()
+            self._indexed.clear()
+            self._lod_keys.clear()
+            self._in_view = set() if self._cull_rect is not None else None
+            self.dirty_lock.release()
+            self.update_lock.release()
+
         if update:
             self.__update()
 
     def update_visibility(self, state: bool, indexes=None) -> None:
         # Lock sub-visuals updates
         self.update_lock.acquire(True)
-        if indexes is None:
-            for k, data in list(self.data.items()):
-                self.data[k]['visible'] = state
-        else:
-            for k, data in list(self.data.items()):
-                if k in indexes:
-                    self.data[k]['visible'] = state
+        keys = [k for k in (list(self.data.keys()) if indexes is None else indexes) if k in self.data]
+        for k in keys:
+            self.data[k]['visible'] = state
+        self._mark_dirty(keys)
 
         self.update_lock.release()
 
+    def _mark_dirty(self, keys):
+        """
+        Records the shapes to patch on the next update (incremental mode only)
+        :param keys: iterable
+            Shape keys
+        """
+        if not self._incremental:
+            return
+
+        self.dirty_lock.acquire(True)
+        self._dirty.update(keys)
+        self.dirty_lock.release()
+
     def update_color(self, new_mesh_color=None, new_line_color=None, indexes=None):
         if new_mesh_color is None and new_line_color is None:
             return
@@ -361,174 +1245,95 @@ class ShapeCollectionVisual(CompoundVisual):
 
         # if a new color is empty string then make it None so it will not be updated
         # if a new color is valid then transform it here in a format palatable
-        mesh_color_rgba = None
-        line_color_rgba = None
-        if new_mesh_color:
-            if new_mesh_color != '':
-                mesh_color_rgba = Color(new_mesh_color).rgba
-            else:
-                new_mesh_color = None
-        if new_line_color:
-            if new_line_color != '':
-                line_color_rgba = Color(new_line_color).rgba
-            else:
-                new_line_color = None
-
-        mesh_colors = [[] for _ in range(0, len(self._meshes))]     # Face colors
-        line_colors = [[] for _ in range(0, len(self._meshes))]     # Line colors
-        line_pts = [[] for _ in range(0, len(self._lines))]         # Vertices for line
+        mesh_color_rgba = Color(new_mesh_color).rgba if new_mesh_color else None
+        line_color_rgba = Color(new_line_color).rgba if new_line_color else None
 
         # Lock sub-visuals updates
         self.update_lock.acquire(True)
-        # Merge shapes buffers
-
-        if indexes is None:
-            for k, data in list(self.data.items()):
-                if data['visible'] and 'line_pts' in data:
-                    if new_mesh_color and new_mesh_color != '':
-                        dim_mesh_tris = (len(data['mesh_tris']) // 3)
-                        if dim_mesh_tris != 0:
-                            try:
-                                mesh_colors[data['layer']] += [mesh_color_rgba] * dim_mesh_tris
-                                self.data[k]['face_color'] = new_mesh_color
-
-                                data['mesh_colors'] = [mesh_color_rgba for __ in range(len(data['mesh_colors']))]
-                            except Exception as e:
-                                print("VisPyVisuals.ShapeCollectionVisual.update_color(). "
-                                      "Create mesh colors --> Data error. %s" % str(e))
-
-                    if new_line_color and new_line_color != '':
-                        dim_line_pts = (len(data['line_pts']))
-                        if dim_line_pts != 0:
-                            try:
-                                line_pts[data['layer']] += data['line_pts']
-                                line_colors[data['layer']] += [line_color_rgba] * dim_line_pts
-                                self.data[k]['color'] = new_line_color
-
-                                data['line_colors'] = [mesh_color_rgba for __ in range(len(data['line_colors']))]
-                            except Exception as e:
-                                print("VisPyVisuals.ShapeCollectionVisual.update_color(). "
-                                      "Create line colors --> Data error. %s" % str(e))
-        else:
-            for k, data in list(self.data.items()):
-                if data['visible'] and 'line_pts' in data:
-                    dim_mesh_tris = (len(data['mesh_tris']) // 3)
-                    dim_line_pts = (len(data['line_pts']))
-
-                    if k in indexes:
-                        if new_mesh_color and new_mesh_color != '':
-                            if dim_mesh_tris != 0:
-                                try:
-                                    mesh_colors[data['layer']] += [mesh_color_rgba] * dim_mesh_tris
-                                    self.data[k]['face_color'] = new_mesh_color
-
-                                    data['mesh_colors'] = [mesh_color_rgba for __ in range(len(data['mesh_colors']))]
-                                except Exception as e:
-                                    print("VisPyVisuals.ShapeCollectionVisual.update_color(). "
-                                          "Create mesh colors --> Data error. %s" % str(e))
-                        if new_line_color and new_line_color != '':
-                            if dim_line_pts != 0:
-                                try:
-                                    line_pts[data['layer']] += data['line_pts']
-                                    line_colors[data['layer']] += [line_color_rgba] * dim_line_pts
-                                    self.data[k]['color'] = new_line_color
-
-                                    data['line_colors'] = [mesh_color_rgba for __ in range(len(data['line_colors']))]
-                                except Exception as e:
-                                    print("VisPyVisuals.ShapeCollectionVisual.update_color(). "
-                                          "Create line colors --> Data error. %s" % str(e))
-                    else:
-                        if dim_mesh_tris != 0:
-                            try:
-                                mesh_colors[data['layer']] += [Color(data['face_color']).rgba] * dim_mesh_tris
-                            except Exception as e:
-                                print("VisPyVisuals.ShapeCollectionVisual.update_color(). "
-                                      "Create mesh colors --> Data error. %s" % str(e))
-
-                        if dim_line_pts != 0:
-                            try:
-                                line_pts[data['layer']] += data['line_pts']
-                                line_colors[data['layer']] += [Color(data['color']).rgba] * dim_line_pts
-                            except Exception as e:
-                                print("VisPyVisuals.ShapeCollectionVisual.update_color(). "
-                                      "Create line colors --> Data error. %s" % str(e))
-
-        # Updating meshes
-        if new_mesh_color and new_mesh_color != '':
-            for i, mesh in enumerate(self._meshes):
-                if mesh_colors[i]:
-                    try:
-                        mesh._meshdata.set_face_colors(colors=np.asarray(mesh_colors[i]))
-                        mesh.mesh_data_changed()
-                    except Exception as e:
-                        print("VisPyVisuals.ShapeCollectionVisual.update_color(). "
-                              "Apply mesh colors --> Data error. %s" % str(e))
-
-        # Updating lines
-        if new_line_color and new_line_color != '':
-            for i, line in enumerate(self._lines):
-                if len(line_pts[i]) > 0:
-                    try:
-                        line._color = np.asarray(line_colors[i])
-                        line._changed['color'] = True
-                        line.update()
-                    except Exception as e:
-                        print("VisPyVisuals.ShapeCollectionVisual.update_color(). "
-                              "Apply line colors --> Data error. %s" % str(e))
-                else:
-                    line.clear_data()
+
+        for k in (list(self.data.keys()) if indexes is None else indexes):
+            data = self.data.get(k)
+            if data is None or 'line_pts' not in data:
+                continue
+
+            if mesh_color_rgba is not None and data['face_rgba'] is not None:
+                data['face_color'] = new_mesh_color
+                data['face_rgba'] = mesh_color_rgba
+
+            if line_color_rgba is not None and data['line_rgba'] is not None:
+                data['color'] = new_line_color
+                data['line_rgba'] = line_color_rgba
+
+            self._mark_dirty([k])
 
         self.update_lock.release()
 
+        # The merged geometry buffers are reused, only the color buffers are rebuilt
+        self.__update()
+
     def __update(self):
         """
         Merges internal buffers, sets data to visuals, redraws collection on scene
         """
-        mesh_vertices = [[] for _ in range(0, len(self._meshes))]       # Vertices for mesh
-        mesh_tris = [[] for _ in range(0, len(self._meshes))]           # Faces for mesh
-        mesh_colors = [[] for _ in range(0, len(self._meshes))]         # Face colors
-        line_pts = [[] for _ in range(0, len(self._lines))]             # Vertices for line
-        line_colors = [[] for _ in range(0, len(self._lines))]          # Line color
+        if self._incremental:
+            self.__update_slots()
+            return
+
+        layer_shapes = [[] for _ in range(0, len(self._meshes))]        # Visible shapes data
+        layer_keys = [[] for _ in range(0, len(self._meshes))]          # Visible shapes keys
 
         # Lock sub-visuals updates
         self.update_lock.acquire(True)
 
-        # Merge shapes buffers
-        for data in list(self.data.values()):
+        for k, data in list(self.data.items()):
             if data['visible'] and 'line_pts' in data:
                 try:
-                    line_pts[data['layer']] += data['line_pts']
-                    line_colors[data['layer']] += data['line_colors']
-
-                    mesh_tris[data['layer']] += [x + len(mesh_vertices[data['layer']]) for x in data['mesh_tris']]
-                    mesh_vertices[data['layer']] += data['mesh_vertices']
-                    mesh_colors[data['layer']] += data['mesh_colors']
+                    layer_shapes[data['layer']].append(data)
+                    layer_keys[data['layer']].append(k)
                 except Exception as e:
                     print("VisPyVisuals.ShapeCollectionVisual._update() --> Data error. %s" % str(e))
 
-        # Updating meshes
-        for i, mesh in enumerate(self._meshes):
-            if len(mesh_vertices[i]) > 0:
-                set_state(polygon_offset_fill=False)
-                faces_array = np.asarray(mesh_tris[i], dtype=np.uint32)
-                mesh.set_data(
-                    vertices=np.asarray(mesh_vertices[i]),
-                    faces=faces_array.reshape((-1, 3)),
-                    face_colors=np.asarray(mesh_colors[i])
-                )
+        for i, (mesh, line) in enumerate(zip(self._meshes, self._lines)):
+            # Merge shapes buffers only when the visible shapes in the layer changed
+            signature = (tuple(layer_keys[i]), self._line_width)
+            geometry_changed = self._layer_cache[i] is None or self._layer_cache[i][0] != signature
+            if geometry_changed:
+                merged = _merge_shape_buffers(layer_shapes[i])
+                self._layer_cache[i] = (signature, merged)
+            else:
+                merged = self._layer_cache[i][1]
+
+            # Updating meshes
+            if len(merged['mesh_vertices']) > 0:
+                face_colors = _merged_colors(merged['mesh_shapes'], merged['face_counts'], 'face_rgba')
+                if geometry_changed:
+                    set_state(polygon_offset_fill=False)
+                    mesh.set_data(
+                        vertices=merged['mesh_vertices'],
+                        faces=merged['mesh_tris'],
+                        face_colors=face_colors
+                    )
+                else:
+                    mesh._meshdata.set_face_colors(colors=face_colors)
+                    mesh.mesh_data_changed()
             else:
                 mesh.set_data()
 
             mesh._bounds_changed()
 
-        # Updating lines
-        for i, line in enumerate(self._lines):
-            if len(line_pts[i]) > 0:
-                line.set_data(
-                    pos=np.asarray(line_pts[i]),
-                    color=np.asarray(line_colors[i]),
-                    width=self._line_width,
-                    connect='segments')
+            # Updating lines
+            if len(merged['line_pts']) > 0:
+                line_colors = _merged_colors(merged['line_shapes'], merged['line_counts'], 'line_rgba')
+                if geometry_changed:
+                    line.set_data(
+                        pos=merged['line_pts'],
+                        color=line_colors,
+                        width=self._line_width,
+                        connect='segments')
+                else:
+                    line._color = line_colors
+                    line._changed['color'] = True
+                    line.update()
             else:
                 line.clear_data()
 
@@ -537,6 +1342,163 @@ class ShapeCollectionVisual(CompoundVisual):
         self._bounds_changed()
         self.update_lock.release()
 
+    def __update_slots(self):
+        """
+        Patches the slots of the changed shapes in the layer buffers and uploads the changed rows to the visuals
+        """
+        # Lock sub-visuals updates
+        self.update_lock.acquire(True)
+
+        self.dirty_lock.acquire(True)
+        dirty, self._dirty = self._dirty, set()
+        self.dirty_lock.release()
+
+        for k in dirty:
+            data = self.data.get(k)
+            layer_idx = self._slot_keys.get(k)
+
+            if data is None or 'line_pts' not in data:
+                # Removed shape, or still waiting for the process pool
+                if layer_idx is not None:
+                    self._slot_layers[layer_idx].remove(k)
+                    del self._slot_keys[k]
+                if data is None:
+                    self._unindex(k)
+                continue
+
+            if k not in self._indexed:
+                self._index(k, data)
+
+            # Culled shapes have no slot
+            if not self._in_cull_rect(data.get('bounds')):
+                if layer_idx is not None:
+                    self._slot_layers[layer_idx].remove(k)
+                    del self._slot_keys[k]
+                continue
+
+            try:
+                level = _shape_level(data, _lod_level(data['tolerance'], self._pixel_size))[0]
+                if layer_idx is not None and self._slot_layers[layer_idx].level(k) != level:
+                    self._slot_layers[layer_idx].remove(k)
+                    del self._slot_keys[k]
+                    layer_idx = None
+
+                if layer_idx is None:
+                    self._slot_layers[data['layer']].insert(k, data, level)
+                    self._slot_keys[k] = data['layer']
+                else:
+                    self._slot_layers[layer_idx].patch(k, data)
+            except Exception as e:
+                print("VisPyVisuals.ShapeCollectionVisual._update_slots() --> Data error. %s" % str(e))
+
+        for layer, mesh, line in zip(self._slot_layers, self._meshes, self._lines):
+            if layer.needs_compaction():
+                layer.compact(self.data)
+
+            # Updating meshes
+            if layer.mesh_changed:
+                if layer.faces.size > 0:
+                    set_state(polygon_offset_fill=False)
+                mesh.upload(layer.vertices, faces=layer.faces)
+                layer.mesh_changed = False
+
+            # Updating lines
+            if layer.line_changed or layer.line_width != self._line_width:
+                line.upload(layer.lines, width=self._line_width)
+                layer.line_changed = False
+                layer.line_width = self._line_width
+
+        self._bounds_changed()
+        self.update_lock.release()
+
+    def _index(self, key, data):
+        bounds = data.get('bounds')
+        self._indexed[key] = bounds
+        if bounds is not None:
+            self._rtree.insert(key, bounds)
+            if self._in_view is not None and self._in_cull_rect(bounds):
+                self._in_view.add(key)
+        if data.get('lod'):
+            self._lod_keys.setdefault(data['tolerance'], set()).add(key)
+
+    def _unindex(self, key):
+        if key not in self._indexed:
+            return
+
+        bounds = self._indexed.pop(key)
+        if bounds is not None:
+            self._rtree.delete(key, bounds)
+        for keys in self._lod_keys.values():
+            keys.discard(key)
+        if self._in_view is not None:
+            self._in_view.discard(key)
+
+    def _in_cull_rect(self, bounds):
+        if bounds is None or self._cull_rect is None:
+            return True
+        xmin, ymin, xmax, ymax = self._cull_rect
+        return bounds[0] <= xmax and bounds[2] >= xmin and bounds[1] <= ymax and bounds[3] >= ymin
+
+    def set_view(self, rect, pixel_size):
+        """
+        Selects the level of detail of the shapes from the view scale and culls the shapes outside the view.
+        Only the shapes whose level or culling state changed are patched. Incremental mode only.
+        :param rect: tuple
+            Visible area (xmin, ymin, xmax, ymax)
+        :param pixel_size: float
+            Size of a screen pixel in scene units
+        """
+        if not self._incremental:
+            return
+
+        dirty = set()
+
+        self.update_lock.acquire(True)
+
+        # Shapes that change level of detail
+        for tolerance, keys in self._lod_keys.items():
+            if _lod_level(tolerance, self._pixel_size) != _lod_level(tolerance, pixel_size):
+                dirty.update(keys)
+        self._pixel_size = pixel_size
+
+        # The culling area is the view with a margin, it is recomputed when the view leaves it or is much smaller
+        xmin, ymin, xmax, ymax = rect
+        cull = self._cull_rect
+        if cull is None or xmin < cull[0] or ymin < cull[1] or xmax > cull[2] or ymax > cull[3] or \
+                (cull[2] - cull[0]) > 4 * (xmax - xmin):
+            dx = (xmax - xmin) * 0.5
+            dy = (ymax - ymin) * 0.5
+            self._cull_rect = (xmin - dx, ymin - dy, xmax + dx, ymax + dy)
+
+            in_view = set(self._rtree.intersection(self._cull_rect))
+            if self._in_view is None:
+                dirty.update(k for k in self._indexed if k not in in_view)
+            else:
+                dirty.update(in_view.symmetric_difference(self._in_view))
+            self._in_view = in_view
+
+        self.update_lock.release()
+
+        if dirty:
+            self._mark_dirty(dirty)
+            self.__update()
+
+    def _compute_bounds(self, axis, view):
+        if not self._incremental:
+            return CompoundVisual._compute_bounds(self, axis, view)
+
+        # The shapes are 2D, their bounds hold only X and Y
+        if axis >= 2:
+            return 0, 0
+
+        # Culled shapes are not in the buffers, the bounds come from the visible shapes in the spatial index
+        values = [b for k, b in list(self._indexed.items())
+                  if b is not None and self.data.get(k, {}).get('visible')]
+        if not values:
+            return None
+        values = np.asarray(values)
+        return values[:, axis].min(), values[:, axis + 2].max()
+
     def redraw(self, indexes=None, update_colors=None):
         """
         Redraws collection
@@ -548,16 +1510,20 @@ class ShapeCollectionVisual(CompoundVisual):
         self.results_lock.acquire(True)
 
         for i in list(self.data.keys()) if not indexes else indexes:
-            if i in list(self.results.keys()):
+            if i in self.results:
                 try:
-                    self.results[i].wait()                                  # Wait for process results
+                    result, pos = self.results[i]
+                    result.wait()                                           # Wait for process results
                     if i in self.data:
-                        self.data[i] = self.results[i].get()[0]             # Store translated data
+                        self.data[i] = _attach_buffers(result.get()[pos])   # Store translated data
                         del self.results[i]
+                        tessellation_cache.put(self._cache_keys.pop(i, None), self.data[i])
+                        self._mark_dirty([i])
                 except Exception as e:
                     print("VisPyVisuals.ShapeCollectionVisual.redraw() --> Data error = %s. Indexes = %s" %
                           (str(e), str(indexes)))
 
+        self.__collect_orphans()
         self.results_lock.release()
 
         if update_colors is None or update_colors is False:
@@ -572,6 +1538,23 @@ class ShapeCollectionVisual(CompoundVisual):
             except Exception as e:
                 print("VisPyVisuals.ShapeCollectionVisual.redraw() --> Update colors error = %s." % str(e))
 
+    def __collect_orphans(self):
+        """
+        Attaches and drops the finished results of removed shapes so their shared memory blocks are released
+        """
+        pending = []
+        for result, pos in self._orphans:
+            if not result.ready():
+                pending.append((result, pos))
+                continue
+            try:
+                _attach_buffers(result.get()[pos])
+            except Exception:
+                pass
+        self._orphans = pending
+
+        _close_released_shm()
+
     def lock_updates(self):
         self.update_lock.acquire(True)
 
@@ -66,6 +66,7 @@ class PreferencesUIManager:
             "global_tolerance": self.ui.general_defaults_form.general_app_group.tol_entry,
 
             "global_compression_level": self.ui.general_defaults_form.general_app_group.compress_spinner,
+            "global_project_format": self.ui.general_defaults_form.general_app_group.project_format_radio,
             "global_save_compressed": self.ui.general_defaults_form.general_app_group.save_type_cb,
             "global_autosave": self.ui.general_defaults_form.general_app_group.autosave_cb,
             "global_autosave_timeout": self.ui.general_defaults_form.general_app_group.autosave_entry,
@@ -218,13 +218,16 @@ class ExcellonGenPrefGroupUI(OptionsGroupUI):
               "If <<Basic>> is checked then Google OR-Tools Basic algorithm is used.\n"
               "If <<TSA>> is checked then Travelling Salesman algorithm is used for\n"
               "drill path optimization.\n"
+              "If <<2-Opt>> is checked then the nearest neighbour path, found with a\n"
+              "spatial index, is improved with 2-Opt and Or-Opt moves for the set duration.\n"
               "\n"
               "Some options are disabled when the application works in 32bit mode.")
         )
 
         self.excellon_optimization_radio = RadioSet([{'label': _('MetaHeuristic'), 'value': 'M'},
                                                      {'label': _('Basic'), 'value': 'B'},
-                                                     {'label': _('TSA'), 'value': 'T'}],
+                                                     {'label': _('TSA'), 'value': 'T'},
+                                                     {'label': _('2-Opt'), 'value': 'O'}],
                                                     orientation='vertical', stretch=False)
 
         grid2.addWidget(self.excellon_optimization_label, 9, 0)
@@ -233,9 +236,10 @@ class ExcellonGenPrefGroupUI(OptionsGroupUI):
         self.optimization_time_label = QtWidgets.QLabel('%s:' % _('Duration'))
         self.optimization_time_label.setAlignment(QtCore.Qt.AlignLeft)
         self.optimization_time_label.setToolTip(
-            _("When OR-Tools Metaheuristic (MH) is enabled there is a\n"
+            _("When OR-Tools Metaheuristic (MH) or 2-Opt is enabled there is a\n"
               "maximum threshold for how much time is spent doing the\n"
               "path optimization. This max duration is set here.\n"
+              "For 2-Opt a zero value means no time limit.\n"
               "In seconds.")
 
         )
@@ -333,7 +337,7 @@ class ExcellonGenPrefGroupUI(OptionsGroupUI):
         self.excellon_optimization_radio.activated_custom.connect(self.optimization_selection)
 
     def optimization_selection(self):
-        if self.excellon_optimization_radio.get_value() == 'M':
+        if self.excellon_optimization_radio.get_value() in ['M', 'O']:
             self.optimization_time_label.setDisabled(False)
             self.optimization_time_entry.setDisabled(False)
         else:
@@ -252,6 +252,21 @@ class GeneralAppPrefGroupUI(OptionsGroupUI):
         self.save_label = QtWidgets.QLabel('<b>%s</b>' % _("Save Settings"))
         grid0.addWidget(self.save_label, 28, 0, 1, 2)
 
+        # Project Format
+        self.project_format_label = QtWidgets.QLabel('%s:' % _('Project Format'))
+        self.project_format_label.setToolTip(
+            _("The file format used when saving a project.\n"
+              "- JSON -> the whole project is saved as one JSON document\n"
+              "- Chunked -> each object is saved in it's own chunk with the geometry\n"
+              "in binary form. It is faster for large projects and the geometry\n"
+              "of an object is loaded only when it is needed.")
+        )
+        self.project_format_radio = RadioSet([{'label': _('JSON'), 'value': 'json'},
+                                              {'label': _('Chunked'), 'value': 'chunked'}])
+
+        grid0.addWidget(self.project_format_label, 29, 0)
+        grid0.addWidget(self.project_format_radio, 29, 1)
+
         # Save compressed project CB
         self.save_type_cb = FCCheckBox(_('Save Compressed Project'))
         self.save_type_cb.setToolTip(
@@ -259,7 +274,7 @@ class GeneralAppPrefGroupUI(OptionsGroupUI):
               "When checked it will save a compressed FlatCAM project.")
         )
 
-        grid0.addWidget(self.save_type_cb, 29, 0, 1, 2)
+        grid0.addWidget(self.save_type_cb, 30, 0, 1, 2)
 
         # Project LZMA Comppression Level
         self.compress_spinner = FCSpinner()
@@ -271,8 +286,8 @@ class GeneralAppPrefGroupUI(OptionsGroupUI):
               "but require more RAM usage and more processing time.")
         )
 
-        grid0.addWidget(self.compress_label, 30, 0)
-        grid0.addWidget(self.compress_spinner, 30, 1)
+        grid0.addWidget(self.compress_label, 31, 0)
+        grid0.addWidget(self.compress_spinner, 31, 1)
 
         self.proj_ois = OptionalInputSection(self.save_type_cb, [self.compress_label, self.compress_spinner], True)
 
@@ -284,7 +299,7 @@ class GeneralAppPrefGroupUI(OptionsGroupUI):
               "at the set interval.")
         )
 
-        grid0.addWidget(self.autosave_cb, 31, 0, 1, 2)
+        grid0.addWidget(self.autosave_cb, 32, 0, 1, 2)
 
         # Auto Save Timeout Interval
         self.autosave_entry = FCSpinner()
@@ -297,21 +312,21 @@ class GeneralAppPrefGroupUI(OptionsGroupUI):
               "While active, some operations may block this feature.")
         )
 
-        grid0.addWidget(self.autosave_label, 32, 0)
-        grid0.addWidget(self.autosave_entry, 32, 1)
+        grid0.addWidget(self.autosave_label, 33, 0)
+        grid0.addWidget(self.autosave_entry, 33, 1)
 
         # self.as_ois = OptionalInputSection(self.autosave_cb, [self.autosave_label, self.autosave_entry], True)
 
         separator_line = QtWidgets.QFrame()
         separator_line.setFrameShape(QtWidgets.QFrame.HLine)
         separator_line.setFrameShadow(QtWidgets.QFrame.Sunken)
-        grid0.addWidget(separator_line, 33, 0, 1, 2)
+        grid0.addWidget(separator_line, 34, 0, 1, 2)
 
         self.pdf_param_label = QtWidgets.QLabel('<B>%s:</b>' % _("Text to PDF parameters"))
         self.pdf_param_label.setToolTip(
             _("Used when saving text in Code Editor or in FlatCAM Document objects.")
         )
-        grid0.addWidget(self.pdf_param_label, 34, 0, 1, 2)
+        grid0.addWidget(self.pdf_param_label, 35, 0, 1, 2)
 
         # Top Margin value
         self.tmargin_entry = FCDoubleSpinner()
@@ -323,8 +338,8 @@ class GeneralAppPrefGroupUI(OptionsGroupUI):
             _("Distance between text body and the top of the PDF file.")
         )
 
-        grid0.addWidget(self.tmargin_label, 35, 0)
-        grid0.addWidget(self.tmargin_entry, 35, 1)
+        grid0.addWidget(self.tmargin_label, 36, 0)
+        grid0.addWidget(self.tmargin_entry, 36, 1)
 
         # Bottom Margin value
         self.bmargin_entry = FCDoubleSpinner()
@@ -336,8 +351,8 @@ class GeneralAppPrefGroupUI(OptionsGroupUI):
             _("Distance between text body and the bottom of the PDF file.")
         )
 
-        grid0.addWidget(self.bmargin_label, 36, 0)
-        grid0.addWidget(self.bmargin_entry, 36, 1)
+        grid0.addWidget(self.bmargin_label, 37, 0)
+        grid0.addWidget(self.bmargin_entry, 37, 1)
 
         # Left Margin value
         self.lmargin_entry = FCDoubleSpinner()
@@ -349,8 +364,8 @@ class GeneralAppPrefGroupUI(OptionsGroupUI):
             _("Distance between text body and the left of the PDF file.")
         )
 
-        grid0.addWidget(self.lmargin_label, 37, 0)
-        grid0.addWidget(self.lmargin_entry, 37, 1)
+        grid0.addWidget(self.lmargin_label, 38, 0)
+        grid0.addWidget(self.lmargin_entry, 38, 1)
 
         # Right Margin value
         self.rmargin_entry = FCDoubleSpinner()
@@ -362,8 +377,8 @@ class GeneralAppPrefGroupUI(OptionsGroupUI):
             _("Distance between text body and the right of the PDF file.")
         )
 
-        grid0.addWidget(self.rmargin_label, 38, 0)
-        grid0.addWidget(self.rmargin_entry, 38, 1)
+        grid0.addWidget(self.rmargin_label, 39, 0)
+        grid0.addWidget(self.rmargin_entry, 39, 1)
 
         self.layout.addStretch()
 
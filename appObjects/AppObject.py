@@ -190,7 +190,11 @@ class AppObject(QtCore.QObject):
         # Create the bounding box for the object and then add the results to the obj.options
         # But not for Scripts or for Documents
         # ############################################################################################################
-        if kind != 'document' and kind != 'script':
+        if kind != 'document' and kind != 'script' and obj.has_deferred_attributes() and \
+                all(obj.options.get(k) is not None for k in ['xmin', 'ymin', 'xmax', 'ymax']):
+            # the bounds were restored from a project file, no need to load the deferred geometry only for them
+            pass
+        elif kind != 'document' and kind != 'script':
             try:
                 xmin, ymin, xmax, ymax = obj.bounds()
                 obj.options['xmin'] = xmin
@@ -498,6 +502,7 @@ class AppObject(QtCore.QObject):
         # delete the old selection shape
         self.app.delete_selection_shape()
         self.app.should_we_save = True
+        obj.mark_changed()
 
     def on_object_plotted(self):
         """
@@ -48,6 +48,9 @@ fcTranslate.apply_language('strings')
 if '_' not in builtins.__dict__:
     _ = gettext.gettext
 
+# size of the write buffer of the exported G-code files
+GCODE_WRITE_BUFFER = 1024 * 1024
+
 
 class CNCJobObject(FlatCAMObj, CNCjob):
     """
@@ -2185,114 +2188,7 @@ class CNCJobObject(FlatCAMObj, CNCjob):
                 self.exc_cnc_tools[first_key]['data']['tools_drill_ppname_e']
             ].include_header
 
-        gcode = ''
-        if include_header is False:
-            # detect if using multi-tool and make the Gcode summation correctly for each case
-            if self.multitool is True:
-                for tooluid_key in self.cnc_tools:
-                    for key, value in self.cnc_tools[tooluid_key].items():
-                        if key == 'gcode':
-                            gcode += value
-                            break
-            else:
-                gcode += self.gcode
-
-            g = preamble + '\n' + gcode + '\n' + postamble
-        else:
-            # search for the GCode beginning which is usually a G20 or G21
-            # fix so the preamble gets inserted in between the comments header and the actual start of GCODE
-            # g_idx = gcode.rfind('G20')
-            #
-            # # if it did not find 'G20' then search for 'G21'
-            # if g_idx == -1:
-            #     g_idx = gcode.rfind('G21')
-            #
-            # # if it did not find 'G20' and it did not find 'G21' then there is an error and return
-            # if g_idx == -1:
-            #     self.app.inform.emit('[ERROR_NOTCL] %s' % _("G-code does not have a units code: either G20 or G21"))
-            #     return
-
-            # detect if using multi-tool and make the Gcode summation correctly for each case
-            if self.multitool is True:
-                if self.origin_kind == 'excellon':
-                    for tooluid_key in self.exc_cnc_tools:
-                        for key, value in self.exc_cnc_tools[tooluid_key].items():
-                            if key == 'gcode' and value:
-                                gcode += value
-                                break
-                else:
-                    for tooluid_key in self.cnc_tools:
-                        for key, value in self.cnc_tools[tooluid_key].items():
-                            if key == 'gcode' and value:
-                                gcode += value
-                                break
-            else:
-                gcode += self.gcode
-
-            end_gcode = self.gcode_footer() if self.app.defaults['cncjob_footer'] is True else ''
-
-            # detect if using a HPGL preprocessor
-            hpgl = False
-            if self.cnc_tools:
-                for key in self.cnc_tools:
-                    if 'ppname_g' in self.cnc_tools[key]['data']:
-                        if 'hpgl' in self.cnc_tools[key]['data']['ppname_g']:
-                            hpgl = True
-                            break
-            elif self.exc_cnc_tools:
-                for key in self.cnc_tools:
-                    if 'ppname_e' in self.cnc_tools[key]['data']:
-                        if 'hpgl' in self.cnc_tools[key]['data']['ppname_e']:
-                            hpgl = True
-                            break
-
-            if hpgl:
-                processed_body_gcode = ''
-                pa_re = re.compile(r"^PA\s*(-?\d+\.\d*),?\s*(-?\d+\.\d*)*;?$")
-
-                # process body gcode
-                for gline in gcode.splitlines():
-                    match = pa_re.search(gline)
-                    if match:
-                        x_int = int(float(match.group(1)))
-                        y_int = int(float(match.group(2)))
-                        new_line = 'PA%d,%d;\n' % (x_int, y_int)
-                        processed_body_gcode += new_line
-                    else:
-                        processed_body_gcode += gline + '\n'
-
-                gcode = processed_body_gcode
-                g = self.gc_header + '\n' + self.gc_start + '\n' + preamble + '\n' + \
-                    gcode + '\n' + postamble + end_gcode
-            else:
-                # try:
-                #     g_idx = gcode.index('G94')
-                #     if preamble != '' and postamble != '':
-                #         g = self.gc_header + gcode[:g_idx + 3] + '\n' + preamble + '\n' + \
-                #             gcode[(g_idx + 3):] + postamble + end_gcode
-                #     elif preamble == '':
-                #         g = self.gc_header + gcode[:g_idx + 3] + '\n' + \
-                #             gcode[(g_idx + 3):] + postamble + end_gcode
-                #     elif postamble == '':
-                #         g = self.gc_header + gcode[:g_idx + 3] + '\n' + preamble + '\n' + \
-                #             gcode[(g_idx + 3):] + end_gcode
-                #     else:
-                #         g = self.gc_header + gcode[:g_idx + 3] + gcode[(g_idx + 3):] + end_gcode
-                # except ValueError:
-                #     self.app.inform.emit('[ERROR_NOTCL] %s' %
-                #                          _("G-code does not have a G94 code.\n"
-                #                            "Append Code snippet will not be used.."))
-                #     g = self.gc_header + '\n' + gcode + postamble + end_gcode
-                g = ''
-                if preamble != '' and postamble != '':
-                    g = self.gc_header + self.gc_start + '\n' + preamble + '\n' + gcode + '\n' + \
-                        postamble + '\n' + end_gcode
-                if preamble == '':
-                    g = self.gc_header + self.gc_start + '\n' + gcode + '\n' + postamble + '\n' + end_gcode
-                if postamble == '':
-                    g = self.gc_header + self.gc_start + '\n' + preamble + '\n' + gcode + '\n' + end_gcode
-                if preamble == '' and postamble == '':
-                    g = self.gc_header + self.gc_start + '\n' + gcode + '\n' + end_gcode
+        blocks = self.export_gcode_blocks(preamble=preamble, postamble=postamble, include_header=include_header)
 
         # if toolchange custom is used, replace M6 code with the code from the Toolchange Custom Text box
         # if self.ui.toolchange_cb.get_value() is True:
@@ -2308,20 +2204,14 @@ class CNCJobObject(FlatCAMObj, CNCjob):
         #         g = g.replace('M6', m6_code)
         #         self.app.inform.emit('[success] %s' % _("Toolchange G-code was replaced by a custom code."))
 
-        lines = StringIO(g)
-
         # Write
         if filename is not None:
             try:
                 force_windows_line_endings = self.app.defaults['cncjob_line_ending']
-                if force_windows_line_endings and sys.platform != 'win32':
-                    with open(filename, 'w', newline='\r\n') as f:
-                        for line in lines:
-                            f.write(line)
-                else:
-                    with open(filename, 'w') as f:
-                        for line in lines:
-                            f.write(line)
+                newline = '\r\n' if force_windows_line_endings and sys.platform != 'win32' else None
+                # the blocks are written as they are made, the G-code is never joined in a single string
+                with open(filename, 'w', newline=newline, buffering=GCODE_WRITE_BUFFER) as f:
+                    f.writelines(blocks)
             except FileNotFoundError:
                 self.app.inform.emit('[WARNING_NOTCL] %s' % _("No such file or directory"))
                 return
@@ -2339,8 +2229,99 @@ class CNCJobObject(FlatCAMObj, CNCjob):
 
             self.app.inform.emit('[success] %s: %s' % (_("Saved to"), filename))
         else:
+            lines = StringIO()
+            lines.writelines(blocks)
+            lines.seek(0)
             return lines
 
+    def export_gcode_blocks(self, preamble='', postamble='', include_header=True):
+        """
+        Generator of the blocks of text of the exported G-code, in order: the header, the preamble, the G-code of
+        each tool, the postamble and the footer. The G-code of the tools is yielded as it is held by the object so
+        the export does not make a copy of the whole G-code.
+
+        :param preamble:        a custom Gcode block to be added at the beginning of the Gcode file
+        :param postamble:       a custom Gcode block to be added at the end of the Gcode file
+        :param include_header:  if False, only the preamble, the G-code and the postamble are exported
+        :return:                generator of strings
+        """
+        if include_header is False:
+            yield preamble + '\n'
+            # detect if using multi-tool and make the Gcode summation correctly for each case
+            if self.multitool is True:
+                for tooluid_key in self.cnc_tools:
+                    yield self.cnc_tools[tooluid_key].get('gcode', '')
+            else:
+                yield self.gcode
+            yield '\n' + postamble
+            return
+
+        # detect if using multi-tool and make the Gcode summation correctly for each case
+        if self.multitool is True:
+            tools = self.exc_cnc_tools if self.origin_kind == 'excellon' else self.cnc_tools
+            gcode_blocks = (tools[tooluid_key]['gcode'] for tooluid_key in tools if tools[tooluid_key].get('gcode'))
+        else:
+            gcode_blocks = [self.gcode]
+
+        end_gcode = self.gcode_footer() if self.app.defaults['cncjob_footer'] is True else ''
+
+        # detect if using a HPGL preprocessor
+        hpgl = False
+        if self.cnc_tools:
+            for key in self.cnc_tools:
+                if 'ppname_g' in self.cnc_tools[key]['data']:
+                    if 'hpgl' in self.cnc_tools[key]['data']['ppname_g']:
+                        hpgl = True
+                        break
+        elif self.exc_cnc_tools:
+            for key in self.cnc_tools:
+                if 'ppname_e' in self.cnc_tools[key]['data']:
+                    if 'hpgl' in self.cnc_tools[key]['data']['ppname_e']:
+                        hpgl = True
+                        break
+
+        if hpgl:
+            yield self.gc_header + '\n' + self.gc_start + '\n' + preamble + '\n'
+            yield from self.hpgl_absolute_lines(gcode_blocks)
+            yield '\n' + postamble + end_gcode
+        else:
+            yield self.gc_header + self.gc_start + '\n'
+            if preamble != '':
+                yield preamble + '\n'
+            yield from gcode_blocks
+            yield '\n'
+            if postamble != '':
+                yield postamble + '\n'
+            yield end_gcode
+
+    @staticmethod
+    def hpgl_absolute_lines(blocks):
+        """
+        Rounds to integers the coordinates of the HPGL PA (Plot Absolute) commands.
+
+        :param blocks:  iterable of strings of HPGL code; a line can continue in the next string
+        :return:        generator of the lines of code, each one ended by a new line
+        """
+        pa_re = re.compile(r"^PA\s*(-?\d+\.\d*),?\s*(-?\d+\.\d*)*;?$")
+
+        def process(text):
+            for gline in text.splitlines():
+                match = pa_re.search(gline)
+                if match:
+                    x_int = int(float(match.group(1)))
+                    y_int = int(float(match.group(2)))
+                    yield 'PA%d,%d;\n' % (x_int, y_int)
+                else:
+                    yield gline + '\n'
+
+        rest = ''
+        for block in blocks:
+            lines = (rest + block).splitlines(True)
+            # the last line is complete only if it ends with a new line
+            rest = lines.pop() if lines and not lines[-1].endswith('\n') else ''
+            yield from process(''.join(lines))
+        yield from process(rest)
+
     # def on_toolchange_custom_clicked(self, signal):
     #     """
     #     Handler for clicking toolchange custom.
@@ -2473,35 +2454,39 @@ class CNCJobObject(FlatCAMObj, CNCjob):
 
         visible = visible if visible else self.options['plot']
 
-        # Geometry shapes plotting
+        # Geometry shapes plotting; the shapes added by plot2() are sent to the process pool in batches
         try:
-            if self.multitool is False:  # single tool usage
-                try:
-                    dia_plot = float(self.options["tooldia"])
-                except ValueError:
-                    # we may have a tuple with only one element and a comma
-                    dia_plot = [float(el) for el in self.options["tooldia"].split(',') if el != ''][0]
-                self.plot2(tooldia=dia_plot, obj=self, visible=visible, kind=kind)
-            else:
-                # I do this so the travel lines thickness will reflect the tool diameter
-                # may work only for objects created within the app and not Gcode imported from elsewhere for which we
-                # don't know the origin
-                if self.origin_kind == "excellon":
-                    if self.exc_cnc_tools:
-                        for tooldia_key in self.exc_cnc_tools:
-                            tooldia = float('%.*f' % (self.decimals, float(tooldia_key)))
-                            gcode_parsed = self.exc_cnc_tools[tooldia_key]['gcode_parsed']
-                            if not gcode_parsed:
-                                continue
-                            # gcode_parsed = self.gcode_parsed
-                            self.plot2(tooldia=tooldia, obj=self, visible=visible, gcode_parsed=gcode_parsed, kind=kind)
+            with self.shapes.batch():
+                if self.multitool is False:  # single tool usage
+                    try:
+                        dia_plot = float(self.options["tooldia"])
+                    except ValueError:
+                        # we may have a tuple with only one element and a comma
+                        dia_plot = [float(el) for el in self.options["tooldia"].split(',') if el != ''][0]
+                    self.plot2(tooldia=dia_plot, obj=self, visible=visible, kind=kind)
                 else:
-                    # multiple tools usage
-                    if self.cnc_tools:
-                        for tooluid_key in self.cnc_tools:
-                            tooldia = float('%.*f' % (self.decimals, float(self.cnc_tools[tooluid_key]['tooldia'])))
-                            gcode_parsed = self.cnc_tools[tooluid_key]['gcode_parsed']
-                            self.plot2(tooldia=tooldia, obj=self, visible=visible, gcode_parsed=gcode_parsed, kind=kind)
+                    # I do this so the travel lines thickness will reflect the tool diameter
+                    # may work only for objects created within the app and not Gcode imported from elsewhere for which
+                    # we don't know the origin
+                    if self.origin_kind == "excellon":
+                        if self.exc_cnc_tools:
+                            for tooldia_key in self.exc_cnc_tools:
+                                tooldia = float('%.*f' % (self.decimals, float(tooldia_key)))
+                                gcode_parsed = self.exc_cnc_tools[tooldia_key]['gcode_parsed']
+                                if not gcode_parsed:
+                                    continue
+                                # gcode_parsed = self.gcode_parsed
+                                self.plot2(tooldia=tooldia, obj=self, visible=visible, gcode_parsed=gcode_parsed,
+                                           kind=kind)
+                    else:
+                        # multiple tools usage
+                        if self.cnc_tools:
+                            for tooluid_key in self.cnc_tools:
+                                tooldia = float('%.*f' % (self.decimals,
+                                                          float(self.cnc_tools[tooluid_key]['tooldia'])))
+                                gcode_parsed = self.cnc_tools[tooluid_key]['gcode_parsed']
+                                self.plot2(tooldia=tooldia, obj=self, visible=visible, gcode_parsed=gcode_parsed,
+                                           kind=kind)
 
             self.shapes.redraw()
         except (ObjectDeleted, AttributeError):
@@ -1192,30 +1192,24 @@ class ExcellonObject(FlatCAMObj, Excellon):
                         self.tools[tool]['multicolor'] = None
 
                     # tool is a dict also
-                    for geo in self.tools[tool]["solid_geometry"]:
-                        idx = self.add_shape(shape=geo,
-                                             color=geo_color if multicolored else self.outline_color,
-                                             face_color=geo_color if multicolored else self.fill_color,
-                                             visible=visible,
-                                             layer=2)
-                        try:
-                            self.shape_indexes_dict[tool].append(idx)
-                        except KeyError:
-                            self.shape_indexes_dict[tool] = [idx]
+                    shapes = [dict(shape=geo,
+                                   color=geo_color if multicolored else self.outline_color,
+                                   face_color=geo_color if multicolored else self.fill_color,
+                                   visible=visible,
+                                   layer=2) for geo in self.tools[tool]["solid_geometry"]]
+                    idx = self.add_shapes(shapes)
+                    if idx:
+                        self.shape_indexes_dict.setdefault(tool, []).extend(idx)
             else:
                 for tool in self.tools:
+                    shapes = []
                     for geo in self.tools[tool]['solid_geometry']:
-                        idx = self.add_shape(shape=geo.exterior, color='red', visible=visible)
-                        try:
-                            self.shape_indexes_dict[tool].append(idx)
-                        except KeyError:
-                            self.shape_indexes_dict[tool] = [idx]
+                        shapes.append(dict(shape=geo.exterior, color='red', visible=visible))
                         for ints in geo.interiors:
-                            idx = self.add_shape(shape=ints, color='orange', visible=visible)
-                            try:
-                                self.shape_indexes_dict[tool].append(idx)
-                            except KeyError:
-                                self.shape_indexes_dict[tool] = [idx]
+                            shapes.append(dict(shape=ints, color='orange', visible=visible))
+                    idx = self.add_shapes(shapes)
+                    if idx:
+                        self.shape_indexes_dict.setdefault(tool, []).extend(idx)
                 # for geo in self.solid_geometry:
                 #     self.add_shape(shape=geo.exterior, color='red', visible=visible)
                 #     for ints in geo.interiors:
@@ -918,35 +918,38 @@ class GerberObject(FlatCAMObj, Gerber):
                 return new_color
 
         try:
+            shapes = []
             if self.options["solid"]:
                 for g in geometry:
                     if type(g) == Polygon or type(g) == LineString:
-                        self.add_shape(shape=g, color=color,
-                                       face_color=random_color() if self.options['multicolored']
-                                       else face_color, visible=visible)
+                        shapes.append(dict(shape=g, color=color,
+                                           face_color=random_color() if self.options['multicolored']
+                                           else face_color, visible=visible))
                     elif type(g) == Point:
                         pass
                     else:
                         try:
                             for el in g:
-                                self.add_shape(shape=el, color=color,
-                                               face_color=random_color() if self.options['multicolored']
-                                               else face_color, visible=visible)
+                                shapes.append(dict(shape=el, color=color,
+                                                   face_color=random_color() if self.options['multicolored']
+                                                   else face_color, visible=visible))
                         except TypeError:
-                            self.add_shape(shape=g, color=color,
-                                           face_color=random_color() if self.options['multicolored']
-                                           else face_color, visible=visible)
+                            shapes.append(dict(shape=g, color=color,
+                                               face_color=random_color() if self.options['multicolored']
+                                               else face_color, visible=visible))
             else:
                 for g in geometry:
                     if type(g) == Polygon or type(g) == LineString:
-                        self.add_shape(shape=g, color=random_color() if self.options['multicolored'] else 'black',
-                                       visible=visible)
+                        shapes.append(dict(shape=g, color=random_color() if self.options['multicolored'] else 'black',
+                                           visible=visible))
                     elif type(g) == Point:
                         pass
                     else:
                         for el in g:
-                            self.add_shape(shape=el, color=random_color() if self.options['multicolored'] else 'black',
-                                           visible=visible)
+                            shapes.append(dict(shape=el,
+                                               color=random_color() if self.options['multicolored'] else 'black',
+                                               visible=visible))
+            self.add_shapes(shapes)
             self.shapes.redraw(
                 # update_colors=(self.fill_color, self.outline_color),
                 # indexes=self.app.plotcanvas.shape_collection.data.keys()
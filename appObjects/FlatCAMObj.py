@@ -22,6 +22,8 @@ from shapely.ops import unary_union
 from shapely.geometry import Polygon, MultiPolygon
 
 from copy import deepcopy
+import functools
+import itertools
 import sys
 import math
 
@@ -46,6 +48,24 @@ class ValidationError(Exception):
         self.errors = errors
 
 
+def marks_changed(method):
+    """
+    Decorate a method that changes the geometry of a FlatCAM object so the object is saved again by the autosave.
+    The transformations change the geometry in place and do not always set a serialized attribute.
+
+    :param method:  method of a FlatCAMObj subclass
+    :return:        the decorated method
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        result = method(self, *args, **kwargs)
+        self.mark_changed()
+        return result
+
+    wrapper.marks_changed = True
+    return wrapper
+
+
 class FlatCAMObj(QtCore.QObject):
     """
     Base type of objects handled in FlatCAM. These become interactive
@@ -57,12 +77,26 @@ class FlatCAMObj(QtCore.QObject):
     # The app should set this value.
     app = None
 
+    # source of the unique identifiers of the objects (self.uid)
+    uid_counter = itertools.count(1)
+
     # signal to plot a single object
     plot_single_object = QtCore.pyqtSignal()
 
     # signal for Properties
     calculations_finished = QtCore.pyqtSignal(float, float, float, float, float, object)
 
+    # the methods that change the geometry of the object; see marks_changed()
+    geometry_methods = ('offset', 'scale', 'mirror', 'rotate', 'skew', 'buffer')
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+
+        for method_name in FlatCAMObj.geometry_methods:
+            method = getattr(cls, method_name, None)
+            if method is not None and not getattr(method, 'marks_changed', False):
+                setattr(cls, method_name, marks_changed(method))
+
     def __init__(self, name):
         """
         Constructor.
@@ -73,12 +107,19 @@ class FlatCAMObj(QtCore.QObject):
 
         QtCore.QObject.__init__(self)
 
+        # unique identifier of the object in this session; the names of the objects can change
+        self.uid = next(FlatCAMObj.uid_counter)
+
         # View
         self.ui = None
 
         # set True by the collection.append() when the object load is complete
         self.load_complete = None
 
+        # attributes which are set only when first used; see self.defer_attributes()
+        self._deferred_attrs = set()
+        self._deferred_loader = None
+
         self.options = LoudDict(name=name)
         self.options.set_change_callback(self.on_options_change)
 
@@ -131,6 +172,24 @@ class FlatCAMObj(QtCore.QObject):
     def __str__(self):
         return "<FlatCAMObj({:12s}): {:20s}>".format(self.kind, self.options["name"])
 
+    def __setattr__(self, attr, value):
+        # setting a serialized attribute to a new value means the object has to be saved again by the autosave
+        if attr in self.__dict__.get('ser_attrs', ()):
+            old = self.__dict__.get(attr)
+            if old is not value and not (isinstance(value, (str, int, float)) and old == value):
+                self.mark_changed()
+        super().__setattr__(attr, value)
+
+    def mark_changed(self):
+        """
+        Let the autosave journal know that the object changed. The changes made while the object is created or
+        loaded are not counted; the new objects are saved anyway.
+
+        :return: None
+        """
+        if self.__dict__.get('load_complete'):
+            self.app.mark_object_dirty(self)
+
     def from_dict(self, d):
         """
         This supersedes ``from_dict`` in derived classes. Derived classes
@@ -145,6 +204,9 @@ class FlatCAMObj(QtCore.QObject):
         """
 
         for attr in self.ser_attrs:
+            if attr in self._deferred_attrs:
+                # will be set later by self.load_deferred()
+                continue
 
             if attr == 'options':
                 self.options.update(d[attr])
@@ -162,7 +224,69 @@ class FlatCAMObj(QtCore.QObject):
                               "have all attributes in the latest application version." % str(attr))
                     pass
 
+    def defer_attributes(self, attrs, loader):
+        """
+        Postpone the setting of the attributes in ``attrs`` until one of them is first used. This is used when
+        loading projects so the geometry of an object is decoded only when the object is plotted or processed.
+
+        :param attrs:   list of attribute names
+        :param loader:  object with a load() method that returns a dictionary with the values of the ``attrs``
+        :return:        None
+        """
+        for attr in attrs:
+            self.__dict__.pop(attr, None)
+        self._deferred_loader = loader
+        self._deferred_attrs = set(attrs)
+
+    def load_deferred(self):
+        """
+        Set the attributes postponed by self.defer_attributes().
+
+        :return: None
+        """
+        loader = self.__dict__.get('_deferred_loader')
+        if loader is None:
+            return
+
+        # clear the deferred state first so the from_dict() below does not skip the attributes
+        self._deferred_loader = None
+        deferred = self._deferred_attrs
+        self._deferred_attrs = set()
+
+        try:
+            d = loader.load()
+        except Exception:
+            self._deferred_loader = loader
+            self._deferred_attrs = deferred
+            raise
+
+        log.debug("FlatCAMObj.load_deferred() --> Loaded deferred attributes for: %s" % self.options['name'])
+        for attr in deferred:
+            if attr == 'tools':
+                if d[attr] is not None:
+                    d[attr] = {int(k): v for k, v in d[attr].items()}
+            # loading the attributes does not change the object
+            super().__setattr__(attr, d[attr])
+
+    def has_deferred_attributes(self):
+        """
+        :return: True if there are attributes postponed by self.defer_attributes() that were not loaded yet
+        """
+        return bool(self.__dict__.get('_deferred_attrs'))
+
+    def __getattr__(self, attr):
+        # called only when the regular attribute lookup fails, therefore for the deferred attributes
+        # that are not loaded yet
+        deferred = self.__dict__.get('_deferred_attrs')
+        if deferred and attr in deferred:
+            self.load_deferred()
+            return self.__dict__[attr]
+        return super().__getattr__(attr)
+
     def on_options_change(self, key):
+        # the object has to be saved again by the autosave
+        self.mark_changed()
+
         # Update form on programmatically options change
         self.set_form_item(key)
 
@@ -428,6 +552,19 @@ class FlatCAMObj(QtCore.QObject):
             key = self.shapes.add(tolerance=self.drawing_tolerance, **kwargs)
         return key
 
+    def add_shapes(self, shapes):
+        """
+        Adds many shapes at once; the shapes are sent to the process pool in batches
+
+        :param shapes:  list of dicts, each one with the keyword arguments for add_shape()
+        :return:        list of shape keys
+        """
+        if self.deleted:
+            raise ObjectDeleted()
+        else:
+            keys = self.shapes.add_many([dict(kwargs, tolerance=self.drawing_tolerance) for kwargs in shapes])
+        return keys
+
     def add_mark_shape(self, **kwargs):
         if self.deleted:
             raise ObjectDeleted()
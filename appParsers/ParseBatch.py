@@ -0,0 +1,132 @@
+# ##########################################################
+# FlatCAM: 2D Post-processing for Manufacturing            #
+# http://flatcam.org                                       #
+# Date: 10/18/2026                                         #
+# MIT Licence                                              #
+# ##########################################################
+
+"""
+Parsing of Gerber and Excellon files in the processes of the multiprocessing pool.
+
+The parsed attributes (the ``ser_attrs`` of the parser) travel back to the application in the chunk format of the
+project files (appCommon/ProjectArchive.py): a small JSON and the WKB encoded geometry, concatenated.
+"""
+
+import traceback
+
+from camlib import ParseError
+from appParsers.ParseGerber import Gerber
+from appParsers.ParseExcellon import Excellon
+from appCommon.ProjectArchive import encode_object, decode_attributes, decode_geometry
+
+PARSERS = {
+    'gerber': Gerber,
+    'excellon': Excellon
+}
+
+
+class _ErrorLog:
+    """
+    Stands in for the inform signal of the App. The parsers report some of their errors only with a message, so the
+    error messages are kept and sent back with the parsing result.
+    """
+
+    def __init__(self):
+        self.errors = []
+
+    def emit(self, *args):
+        if args and isinstance(args[0], str) and args[0].startswith('[ERROR'):
+            self.errors.append(args[0])
+
+
+class ParserApp:
+    """
+    Stands in for the App in the pool processes; it has only what the parsers use.
+    """
+
+    def __init__(self, defaults, decimals):
+        """
+
+        :param defaults:    plain dictionary copy of the App defaults
+        :param decimals:    App decimals
+        """
+        self.defaults = defaults
+        self.decimals = decimals
+
+        self.abort_flag = False
+        self.is_legacy = False
+        self.inform = _ErrorLog()
+        self.proc_container = self
+        self.plotcanvas = self
+
+    def new_shape_collection(self, **kwargs):
+        # there is no canvas to plot on
+        return None
+
+    def update_view_text(self, text):
+        pass
+
+
+def parse_source(kind, filename, defaults, decimals):
+    """
+    Parse a Gerber or Excellon file. Runs in the multiprocessing pool.
+
+    :param kind:        'gerber' or 'excellon'
+    :param filename:    path to the file
+    :param defaults:    plain dictionary copy of the App defaults
+    :param decimals:    App decimals
+    :return:            tuple (status, payload, errors); status is 'ok' with the payload a tuple of the encoded chunks
+                        (attributes JSON, geometry JSON, WKB blob) or 'io', 'parse', 'fail', 'error' with the
+                        payload the error message; errors is the list of the error messages emitted by the parser
+    """
+    parser_class = PARSERS[kind]
+
+    # the App instance is not available in the pool processes
+    parser = parser_class.__new__(parser_class)
+    parser.app = ParserApp(defaults, decimals)
+    errors = parser.app.inform.errors
+
+    try:
+        parser.__init__()
+        if parser.parse_file(filename) == 'fail':
+            return 'fail', filename, errors
+
+        attrs_chunk, geo_chunk, blob, __ = encode_object({attr: getattr(parser, attr) for attr in parser.ser_attrs})
+    except IOError as err:
+        return 'io', str(err), errors
+    except ParseError as err:
+        return 'parse', str(err), errors
+    except Exception:
+        return 'error', traceback.format_exc(), errors
+
+    return 'ok', (attrs_chunk, geo_chunk, blob), errors
+
+
+def apply_parsed(obj, parsed):
+    """
+    Set on the object the attributes parsed by parse_source(). The errors are raised again, as they would be
+    raised by the parse_file() method of the object.
+
+    :param obj:     GerberObject or ExcellonObject
+    :param parsed:  the result of parse_source()
+    :return:        'fail' if the file could not be parsed, else None
+    """
+    status, payload = parsed[:2]
+    if status == 'io':
+        raise IOError(payload)
+    if status == 'parse':
+        raise ParseError(payload)
+    if status == 'error':
+        raise Exception(payload)
+    if status == 'fail':
+        return 'fail'
+
+    attrs_chunk, geo_chunk, blob = payload
+    d = decode_attributes(attrs_chunk)
+    d.update(decode_geometry(geo_chunk, blob))
+
+    for attr, value in d.items():
+        if attr == 'tools' and value is not None:
+            # JSON stringifies the keys but the tools are indexed by integer
+            value = {int(k): v for k, v in value.items()}
+        setattr(obj, attr, value)
@@ -7,6 +7,7 @@
 # ########################################################## ##
 
 from camlib import Geometry, grace
+from appParsers.ParseSource import SourceFile
 
 import shapely.affinity as affinity
 from shapely.geometry import Point, LineString
@@ -226,25 +227,29 @@ class Excellon(Geometry):
         :return:            None
         """
         if file_obj:
-            estr = file_obj
-        else:
-            if filename is None:
+            try:
+                self.parse_lines(file_obj)
+            except Exception:
                 return "fail"
-            efile = open(filename, 'r')
-            estr = efile.readlines()
-            efile.close()
+            return
 
-        try:
-            self.parse_lines(estr)
-        except Exception:
+        if filename is None:
             return "fail"
 
-    def parse_lines(self, elines):
+        with SourceFile(filename) as efile:
+            try:
+                self.parse_lines(efile.lines(), progress=efile.percent)
+            except Exception:
+                return "fail"
+
+    def parse_lines(self, elines, progress=None):
         """
         Main Excellon parser.
 
-        :param elines: List of strings, each being a line of Excellon code.
+        :param elines: List (or any iterable) of strings, each being a line of Excellon code.
         :type elines: list
+        :param progress: callable returning the parsed percentage of the source, used to report progress
+        :type progress: callable
         :return: None
         """
 
@@ -271,6 +276,11 @@ class Excellon(Geometry):
         # ## Parsing starts here ## ##
         line_num = 0  # Line number
         eline = ""
+
+        # the source lines are joined once at the end; adding them one by one to the string is quadratic
+        source_lines = [self.source_file] if self.source_file else []
+        old_disp_number = 0
+
         try:
             for eline in elines:
                 if self.app.abort_flag:
@@ -280,7 +290,13 @@ class Excellon(Geometry):
                 line_num += 1
                 # log.debug("%3d %s" % (line_num, str(eline)))
 
-                self.source_file += eline
+                source_lines.append(eline)
+
+                if progress is not None and line_num % 10000 == 0:
+                    disp_number = progress()
+                    if old_disp_number < disp_number <= 100:
+                        self.app.proc_container.update_view_text(' %d%%' % disp_number)
+                        old_disp_number = disp_number
 
                 # Cleanup lines
                 eline = eline.strip(' \r\n')
@@ -979,6 +995,10 @@ class Excellon(Geometry):
             self.app.inform.emit(msg)
 
             return "fail"
+        finally:
+            self.source_file = ''.join(source_lines)
+            if progress is not None:
+                self.app.proc_container.update_view_text('')
 
     def parse_number(self, number_str):
         """
@@ -3,7 +3,6 @@ from camlib import Geometry, arc, arc_angle, ApertureMacro, grace
 
 import numpy as np
 import traceback
-from copy import deepcopy
 
 from shapely.ops import unary_union, linemerge
 import shapely.affinity as affinity
@@ -15,6 +14,8 @@ import ezdxf
 
 from appParsers.ParseDXF import *
 from appParsers.ParseSVG import svgparselength, getsvggeo, svgparse_viewbox
+from appParsers.ParseSource import SourceFile
+from appParsers.ParsePolarity import PolarityLayers
 
 import gettext
 import builtins
@@ -139,6 +140,9 @@ class Gerber(Geometry):
 
         self.source_file = ''
 
+        # flash geometry of each aperture built at the origin; the flashes are translated copies of it
+        self.flash_templates = {}
+
         # ### Parser patterns ## ##
         # FS - Format Specification
         # The format of X and Y must be the same!
@@ -174,6 +178,10 @@ class Gerber(Geometry):
         # Operation code alone, usually just D03 (Flash)
         self.opcode_re = re.compile(r'^D0?([123])\*$')
 
+        # D01/D02/D03 coordinate lines, the bulk of the Gerber files, without the lookaheads of lin_re.
+        # Same groups as lin_re; when it matches with X or Y coordinates lin_re matches too.
+        self.coord_re = re.compile(r'^(?:G0?(1))?(?:X([\+-]?\d+))?(?:Y([\+-]?\d+))?(?:D0?([123]))?\*$')
+
         # G02/3... - Circular interpolation with coordinates
         # 2-clockwise, 3-counterclockwise
         # Operation code (D0x) missing is deprecated... oh well I will support it.
@@ -258,6 +266,9 @@ class Gerber(Geometry):
         # referenced it without the zero, so this is a hack to handle that.
         apid = str(int(apertureId))
 
+        # the aperture may be redefined
+        self.flash_templates.pop(apid, None)
+
         try:  # Could be empty for aperture macros
             paramList = apParameters.split('X')
         except Exception:
@@ -321,10 +332,10 @@ class Gerber(Geometry):
         :return:                None
         """
 
-        with open(filename, 'r') as gfile:
+        with SourceFile(filename) as gfile:
 
             def line_generator():
-                for line in gfile:
+                for line in gfile.lines():
                     line = line.strip(' \r\n')
                     while len(line) > 0:
 
@@ -346,18 +357,20 @@ class Gerber(Geometry):
                             yield line
                             break
 
-            processed_lines = list(line_generator())
-            self.parse_lines(processed_lines)
+            self.app.inform.emit('%s %.1f MB.' % (_("Gerber processing. Parsing"), gfile.size / 1048576.0))
+            self.parse_lines(line_generator(), progress=gfile.percent)
 
     # @profile
-    def parse_lines(self, glines):
+    def parse_lines(self, glines, progress=None):
         """
         Main Gerber parser. Reads Gerber and populates ``self.paths``, ``self.apertures``,
         ``self.flashes``, ``self.regions`` and ``self.units``.
 
-        :param glines: Gerber code as list of strings, each element being
-            one line of the source file.
+        :param glines: Gerber code as list (or any iterable, like the generator of SourceFile.lines()) of strings,
+            each element being one line of the source file.
         :type glines: list
+        :param progress: callable returning the parsed percentage of the source, used to report progress
+        :type progress: callable
         :return: None
         :rtype: None
         """
@@ -372,10 +385,12 @@ class Gerber(Geometry):
         geo_f = None
 
         # Polygons are stored here until there is a change in polarity.
-        # Only then they are combined via unary_union and added or
-        # subtracted from solid_geometry. This is ~100 times faster than
-        # applying a union for every new polygon.
+        # Only then they are recorded as a dark or clear layer in polarity_layers
+        # and all the layers are resolved at the end of the parsing. This is ~100 times
+        # faster than applying a union for every new polygon.
         poly_buffer = []
+        polarity_layers = PolarityLayers()
+        polarity_layers.add('D', [self.solid_geometry])
 
         # store here the follow geometry
         follow_buffer = []
@@ -421,7 +436,15 @@ class Gerber(Geometry):
 
         s_tol = float(self.app.defaults["gerber_simp_tolerance"])
 
-        self.app.inform.emit('%s %d %s.' % (_("Gerber processing. Parsing"), len(glines), _("Lines").lower()))
+        # the source lines are joined once at the end; adding them one by one to the string is quadratic
+        source_lines = [self.source_file] if self.source_file else []
+        old_disp_number = 0
+
+        self.flash_templates = {}
+
+        # a stream of lines (a generator) has no length; without a progress callable nothing is reported for it
+        if progress is None and hasattr(glines, '__len__'):
+            self.app.inform.emit('%s %d %s.' % (_("Gerber processing. Parsing"), len(glines), _("Lines").lower()))
         try:
             for gline in glines:
                 if self.app.abort_flag:
@@ -429,17 +452,27 @@ class Gerber(Geometry):
                     raise grace
 
                 line_num += 1
-                self.source_file += gline + '\n'
+                source_lines.append(gline + '\n')
+
+                if progress is not None and line_num % 10000 == 0:
+                    disp_number = progress()
+                    if old_disp_number < disp_number <= 100:
+                        self.app.proc_container.update_view_text(' %d%%' % disp_number)
+                        old_disp_number = disp_number
 
                 # Cleanup #
                 gline = gline.strip(' \r\n')
                 # log.debug("Line=%3s %s" % (line_num, gline))
 
+                # The kind of the line selects the patterns that are tried below; a pattern is skipped only when
+                # it can't match a line of that kind. See Gerber.line_kind().
+                kind, coord_match = self.line_kind(gline, current_macro)
+
                 # ###############################################################
                 # ################   Ignored lines   ############################
                 # ################     Comments      ############################
                 # ###############################################################
-                match = self.comm_re.search(gline)
+                match = self.comm_re.search(gline) if kind == 'G' else None
                 if match:
                     continue
 
@@ -449,7 +482,7 @@ class Gerber(Geometry):
                 # ########   If polarity changes, creates geometry from current #
                 # ########    buffer, then adds or subtracts accordingly.       #
                 # ###############################################################
-                match = self.lpol_re.search(gline)
+                match = self.lpol_re.search(gline) if kind == '%' else None
                 if match:
                     new_polarity = match.group(1)
                     # log.info("Polarity CHANGE, LPC = %s, poly_buff = %s" % (self.is_lpc, poly_buffer))
@@ -487,7 +520,7 @@ class Gerber(Geometry):
                             self.apertures[last_path_aperture] = {}
                         if 'geometry' not in self.apertures[last_path_aperture]:
                             self.apertures[last_path_aperture]['geometry'] = []
-                        self.apertures[last_path_aperture]['geometry'].append(deepcopy(geo_dict))
+                        self.apertures[last_path_aperture]['geometry'].append(geo_dict)
 
                         path = [path[-1]]
 
@@ -500,11 +533,8 @@ class Gerber(Geometry):
                         buff_length = 1
 
                     if buff_length > 0:
-                        if current_polarity == 'D':
-                            self.solid_geometry = self.solid_geometry.union(unary_union(poly_buffer))
-
-                        else:
-                            self.solid_geometry = self.solid_geometry.difference(unary_union(poly_buffer))
+                        # the layers are resolved at the end, in tiles (appParsers/ParsePolarity.py)
+                        polarity_layers.add(current_polarity, poly_buffer)
 
                         # follow_buffer = []
                         poly_buffer = []
@@ -517,7 +547,7 @@ class Gerber(Geometry):
                 # #####################  Example: %FSLAX24Y24*%  #################
                 # ################################################################
 
-                match = self.fmt_re.search(gline)
+                match = self.fmt_re.search(gline) if 'FS' in gline else None
                 if match:
                     absolute = {'A': 'Absolute', 'I': 'Relative'}[match.group(2)]
                     if match.group(1) is not None:
@@ -536,7 +566,7 @@ class Gerber(Geometry):
                 # ######################## Mode (IN/MM)    #######################
                 # #####################    Example: %MOIN*%  #####################
                 # ################################################################
-                match = self.mode_re.search(gline)
+                match = self.mode_re.search(gline) if kind in ('%', 'M') else None
                 if match:
                     self.units = match.group(1)
                     log.debug("Gerber units found = %s" % self.units)
@@ -548,7 +578,7 @@ class Gerber(Geometry):
                 # ################################################################
                 # Combined Number format and Mode --- Allegro does this ##########
                 # ################################################################
-                match = self.fmt_re_alt.search(gline)
+                match = self.fmt_re_alt.search(gline) if '%FS' in gline else None
                 if match:
                     absolute = {'A': 'Absolute', 'I': 'Relative'}[match.group(2)]
                     if match.group(1) is not None:
@@ -571,7 +601,7 @@ class Gerber(Geometry):
                 # ################################################################
                 # ####     Search for OrCAD way for having Number format  ########
                 # ################################################################
-                match = self.fmt_re_orcad.search(gline)
+                match = self.fmt_re_orcad.search(gline) if '%FS' in gline else None
                 if match:
                     if match.group(1) is not None:
                         if match.group(1) == 'G74':
@@ -600,7 +630,7 @@ class Gerber(Geometry):
                 # ################################################################
                 # ############     Units (G70/1) OBSOLETE   ######################
                 # ################################################################
-                match = self.units_re.search(gline)
+                match = self.units_re.search(gline) if kind == 'G' else None
                 if match:
                     obs_gerber_units = {'0': 'IN', '1': 'MM'}[match.group(1)]
                     self.units = obs_gerber_units
@@ -613,7 +643,7 @@ class Gerber(Geometry):
                 # ################################################################
                 # #####   Absolute/relative coordinates G90/1 OBSOLETE ###########
                 # ################################################################
-                match = self.absrel_re.search(gline)
+                match = self.absrel_re.search(gline) if kind == 'G' else None
                 if match:
                     absolute = {'0': "Absolute", '1': "Relative"}[match.group(1)]
                     log.warning("Gerber obsolete coordinates type found = %s (Absolute or Relative) " % absolute)
@@ -626,12 +656,14 @@ class Gerber(Geometry):
                 # be caught by other patterns.
                 # ################################################################
                 if current_macro is None:  # No macro started yet
-                    match = self.am1_re.search(gline)
+                    match = self.am1_re.search(gline) if kind == '%' else None
                     # Start macro if match, else not an AM, carry on.
                     if match:
                         log.debug("Starting macro. Line %d: %s" % (line_num, gline))
                         current_macro = match.group(1)
                         self.aperture_macros[current_macro] = ApertureMacro(name=current_macro)
+                        # a redefined macro changes the flashes of the AM apertures
+                        self.flash_templates.clear()
                         if match.group(2):  # Append
                             self.aperture_macros[current_macro].append(match.group(2))
                         if match.group(3):  # Finish macro
@@ -654,7 +686,7 @@ class Gerber(Geometry):
                 # ################################################################
                 # ##############   Aperture definitions %ADD...  #################
                 # ################################################################
-                match = self.ad_re.search(gline)
+                match = self.ad_re.search(gline) if kind == '%' else None
                 if match:
                     # log.info("Found aperture definition. Line %d: %s" % (line_num, gline))
                     self.aperture_parse(match.group(1), match.group(2), match.group(3))
@@ -665,7 +697,7 @@ class Gerber(Geometry):
                 # ###########   Operation code alone, usually just D03 (Flash) ###
                 # self.opcode_re = re.compile(r'^D0?([123])\*$')
                 # ################################################################
-                match = self.opcode_re.search(gline)
+                match = self.opcode_re.search(gline) if kind == 'D' else None
                 if match:
                     current_operation_code = int(match.group(1))
                     current_d = current_operation_code
@@ -676,9 +708,7 @@ class Gerber(Geometry):
                         try:
                             # log.debug("Bare op-code %d." % current_operation_code)
                             geo_dict = {}
-                            flash = self.create_flash_geometry(
-                                Point(current_x, current_y), self.apertures[current_aperture],
-                                self.steps_per_circle)
+                            flash = self.flash_geometry(current_x, current_y, current_aperture)
 
                             geo_dict['follow'] = Point([current_x, current_y])
 
@@ -696,7 +726,7 @@ class Gerber(Geometry):
                                     self.apertures[current_aperture] = {}
                                 if 'geometry' not in self.apertures[current_aperture]:
                                     self.apertures[current_aperture]['geometry'] = []
-                                self.apertures[current_aperture]['geometry'].append(deepcopy(geo_dict))
+                                self.apertures[current_aperture]['geometry'].append(geo_dict)
 
                         except IndexError:
                             log.warning("Line %d: %s -> Nothing there to flash!" % (line_num, gline))
@@ -707,7 +737,7 @@ class Gerber(Geometry):
                 # ################  Tool/aperture change  ########################
                 # ################  Example: D12*         ########################
                 # ################################################################
-                match = self.tool_re.search(gline)
+                match = self.tool_re.search(gline) if kind in ('D', 'G') else None
                 if match:
                     current_aperture = match.group(1)
                     # log.debug("Line %d: Aperture change to (%s)" % (line_num, current_aperture))
@@ -755,7 +785,7 @@ class Gerber(Geometry):
                                 self.apertures[last_path_aperture] = {}
                             if 'geometry' not in self.apertures[last_path_aperture]:
                                 self.apertures[last_path_aperture]['geometry'] = []
-                            self.apertures[last_path_aperture]['geometry'].append(deepcopy(geo_dict))
+                            self.apertures[last_path_aperture]['geometry'].append(geo_dict)
 
                             path = [path[-1]]
                     continue
@@ -763,7 +793,7 @@ class Gerber(Geometry):
                 # ################################################################
                 # ################  G36* - Begin region   ########################
                 # ################################################################
-                if self.regionon_re.search(gline):
+                if kind == 'G' and self.regionon_re.search(gline):
                     try:
                         path_length = len(path)
                     except TypeError:
@@ -795,7 +825,7 @@ class Gerber(Geometry):
                             self.apertures[last_path_aperture] = {}
                         if 'geometry' not in self.apertures[last_path_aperture]:
                             self.apertures[last_path_aperture]['geometry'] = []
-                        self.apertures[last_path_aperture]['geometry'].append(deepcopy(geo_dict))
+                        self.apertures[last_path_aperture]['geometry'].append(geo_dict)
 
                         path = [path[-1]]
 
@@ -805,7 +835,7 @@ class Gerber(Geometry):
                 # ################################################################
                 # ################  G37* - End region     ########################
                 # ################################################################
-                if self.regionoff_re.search(gline):
+                if kind == 'G' and self.regionoff_re.search(gline):
                     making_region = False
 
                     if '0' not in self.apertures:
@@ -841,7 +871,7 @@ class Gerber(Geometry):
                                         geo_dict['solid'] = geo_s
 
                             if geo_s or geo_f:
-                                self.apertures['0']['geometry'].append(deepcopy(geo_dict))
+                                self.apertures['0']['geometry'].append(geo_dict)
 
                             path = [[current_x, current_y]]  # Start new path
 
@@ -890,7 +920,7 @@ class Gerber(Geometry):
                             geo_dict['solid'] = region_s
 
                     if not region_s.is_empty or not region_f.is_empty:
-                        self.apertures['0']['geometry'].append(deepcopy(geo_dict))
+                        self.apertures['0']['geometry'].append(geo_dict)
 
                     path = [[current_x, current_y]]  # Start new path
                     continue
@@ -901,7 +931,7 @@ class Gerber(Geometry):
                 # ####  sometimes by itself (handled here).  #####################
                 # ####  Example: G01*                        #####################
                 # ################################################################
-                match = self.interp_re.search(gline)
+                match = self.interp_re.search(gline) if kind == 'G' else None
                 if match:
                     current_interpolation_mode = int(match.group(1))
                     continue
@@ -911,7 +941,10 @@ class Gerber(Geometry):
                 # ######### Operation code (D0x) missing is deprecated   #########
                 # REGEX: r'^(?:G0?(1))?(?:X(-?\d+))?(?:Y(-?\d+))?(?:D0([123]))?\*$'
                 # ################################################################
-                match = self.lin_re.search(gline)
+                if kind == 'coord':
+                    match = coord_match
+                else:
+                    match = self.lin_re.search(gline) if kind in ('G', 'X', 'Y') else None
                 if match:
                     # Dxx alone?
                     # if match.group(1) is None and match.group(2) is None and match.group(3) is None:
@@ -967,11 +1000,7 @@ class Gerber(Geometry):
                                     geo_dict['follow'] = geo_flash
 
                                     # this treats the case when we are storing geometry as solids
-                                    flash = self.create_flash_geometry(
-                                        Point([current_x, current_y]),
-                                        self.apertures[current_aperture],
-                                        self.steps_per_circle
-                                    )
+                                    flash = self.flash_geometry(current_x, current_y, current_aperture)
                                     if not flash.is_empty:
                                         if self.app.defaults['gerber_simplification']:
                                             poly_buffer.append(flash.simplify(s_tol))
@@ -987,7 +1016,7 @@ class Gerber(Geometry):
                                         self.apertures[current_aperture] = {}
                                     if 'geometry' not in self.apertures[current_aperture]:
                                         self.apertures[current_aperture]['geometry'] = []
-                                    self.apertures[current_aperture]['geometry'].append(deepcopy(geo_dict))
+                                    self.apertures[current_aperture]['geometry'].append(geo_dict)
 
                             if making_region is False:
                                 # if the aperture is rectangle then add a rectangular shape having as parameters the
@@ -1023,7 +1052,7 @@ class Gerber(Geometry):
                                             self.apertures[current_aperture] = {}
                                         if 'geometry' not in self.apertures[current_aperture]:
                                             self.apertures[current_aperture]['geometry'] = []
-                                        self.apertures[current_aperture]['geometry'].append(deepcopy(geo_dict))
+                                        self.apertures[current_aperture]['geometry'].append(geo_dict)
                                 except Exception:
                                     pass
                             last_path_aperture = current_aperture
@@ -1130,7 +1159,7 @@ class Gerber(Geometry):
                                 self.apertures[last_path_aperture] = {}
                             if 'geometry' not in self.apertures[last_path_aperture]:
                                 self.apertures[last_path_aperture]['geometry'] = []
-                            self.apertures[last_path_aperture]['geometry'].append(deepcopy(geo_dict))
+                            self.apertures[last_path_aperture]['geometry'].append(geo_dict)
 
                         # if linear_x or linear_y are None, ignore those
                         if linear_x is not None and linear_y is not None:
@@ -1197,7 +1226,7 @@ class Gerber(Geometry):
                                 self.apertures[last_path_aperture] = {}
                             if 'geometry' not in self.apertures[last_path_aperture]:
                                 self.apertures[last_path_aperture]['geometry'] = []
-                            self.apertures[last_path_aperture]['geometry'].append(deepcopy(geo_dict))
+                            self.apertures[last_path_aperture]['geometry'].append(geo_dict)
 
                         # Reset path starting point
                         path = [[linear_x, linear_y]]
@@ -1211,11 +1240,7 @@ class Gerber(Geometry):
                         geo_dict['follow'] = geo_flash
 
                         # this treats the case when we are storing geometry as solids
-                        flash = self.create_flash_geometry(
-                            Point([linear_x, linear_y]),
-                            self.apertures[current_aperture],
-                            self.steps_per_circle
-                        )
+                        flash = self.flash_geometry(linear_x, linear_y, current_aperture)
                         if not flash.is_empty:
                             if self.app.defaults['gerber_simplification']:
                                 poly_buffer.append(flash.simplify(s_tol))
@@ -1231,7 +1256,7 @@ class Gerber(Geometry):
                             self.apertures[current_aperture] = {}
                         if 'geometry' not in self.apertures[current_aperture]:
                             self.apertures[current_aperture]['geometry'] = []
-                        self.apertures[current_aperture]['geometry'].append(deepcopy(geo_dict))
+                        self.apertures[current_aperture]['geometry'].append(geo_dict)
 
                     # maybe those lines are not exactly needed but it is easier to read the program as those coordinates
                     # are used in case that circular interpolation is encountered within the Gerber file
@@ -1244,7 +1269,7 @@ class Gerber(Geometry):
                 # ################################################################
                 # ######### G74/75* - Single or multiple quadrant arcs  ##########
                 # ################################################################
-                match = self.quad_re.search(gline)
+                match = self.quad_re.search(gline) if kind == 'G' else None
                 if match:
                     if match.group(1) == '4':
                         quadrant_mode = 'SINGLE'
@@ -1258,7 +1283,7 @@ class Gerber(Geometry):
                 # ######### Ex. format: G03 X0 Y50 I-50 J0 where the     #########
                 # ######### X, Y coords are the coords of the End Point  #########
                 # ################################################################
-                match = self.circ_re.search(gline)
+                match = self.circ_re.search(gline) if kind in ('G', 'X', 'Y', 'I', 'J') else None
                 if match:
                     arcdir = [None, None, "cw", "ccw"]
 
@@ -1344,7 +1369,7 @@ class Gerber(Geometry):
                                 self.apertures[last_path_aperture] = {}
                             if 'geometry' not in self.apertures[last_path_aperture]:
                                 self.apertures[last_path_aperture]['geometry'] = []
-                            self.apertures[last_path_aperture]['geometry'].append(deepcopy(geo_dict))
+                            self.apertures[last_path_aperture]['geometry'].append(geo_dict)
 
                         current_x = circular_x
                         current_y = circular_y
@@ -1446,7 +1471,7 @@ class Gerber(Geometry):
                 # ################################################################
                 # ######### EOF - END OF FILE ####################################
                 # ################################################################
-                match = self.eof_re.search(gline)
+                match = self.eof_re.search(gline) if kind == 'M' else None
                 if match:
                     continue
 
@@ -1497,12 +1522,17 @@ class Gerber(Geometry):
                         self.apertures[last_path_aperture] = {}
                     if 'geometry' not in self.apertures[last_path_aperture]:
                         self.apertures[last_path_aperture]['geometry'] = []
-                    self.apertures[last_path_aperture]['geometry'].append(deepcopy(geo_dict))
+                    self.apertures[last_path_aperture]['geometry'].append(geo_dict)
 
             # --- Apply buffer ---
             # this treats the case when we are storing geometry as paths
             self.follow_geometry = follow_buffer
 
+            # resolve the polarity layers recorded on the polarity changes
+            if len(polarity_layers):
+                self.app.inform.emit('%s' % _("Gerber processing. Applying Gerber polarity."))
+                self.solid_geometry = polarity_layers.resolve(pool=getattr(self.app, 'pool', None))
+
             # this treats the case when we are storing geometry as solids
             try:
                 buff_length = len(poly_buffer)
@@ -1604,6 +1634,52 @@ class Gerber(Geometry):
             loc = '%s #%d %s: %s\n' % (_("Gerber Line"), line_num, _("Gerber Line Content"), gline) + repr(err)
             self.app.inform.emit('[ERROR] %s\n%s:' %
                                  (_("Gerber Parser ERROR"), loc))
+        finally:
+            self.source_file = ''.join(source_lines)
+            # the flash templates are needed only while parsing; they are not kept, saved or copied with the object
+            self.flash_templates = {}
+            if progress is not None:
+                self.app.proc_container.update_view_text('')
+
+    def line_kind(self, gline, current_macro=None):
+        """
+        Classify a Gerber line by its leading characters so the parser tries only the patterns that can match it.
+
+        :param gline:           the Gerber line, stripped
+        :param current_macro:   the name of the aperture macro being parsed or None
+        :return:                tuple (kind, match); kind is 'coord' for the D01/D02/D03 coordinate lines, with the
+                                match of self.coord_re, else it is the first character of the line ('%', 'G', 'D',
+                                'X' ...) with the match None
+        """
+        lead = gline[:1]
+
+        # inside an aperture macro every line is macro content
+        if current_macro is None and lead in ('X', 'Y', 'G'):
+            match = self.coord_re.match(gline)
+            if match and (match.group(2) is not None or match.group(3) is not None):
+                return 'coord', match
+
+        return lead, None
+
+    def flash_geometry(self, x, y, aperture_id):
+        """
+        Flash of an aperture at a location. The aperture shape is built once, at the origin, and each flash is a
+        translated copy of it.
+
+        :param x:               X coordinate of the flash
+        :param y:               Y coordinate of the flash
+        :param aperture_id:     aperture identifier, key in self.apertures
+        :return:                Shapely geometry of the flash
+        """
+        try:
+            template = self.flash_templates[aperture_id]
+        except KeyError:
+            template = self.create_flash_geometry(Point(0, 0), self.apertures[aperture_id], self.steps_per_circle)
+            self.flash_templates[aperture_id] = template
+
+        if template is None or template.is_empty:
+            return template
+        return affinity.translate(template, xoff=x, yoff=y)
 
     @staticmethod
     def create_flash_geometry(location, aperture, steps_per_circle=None):
@@ -1922,7 +1998,7 @@ class Gerber(Geometry):
 
         for pol in flat_geo:
             new_el = {'solid': pol, 'follow': pol}
-            self.apertures['0']['geometry'].append(deepcopy(new_el))
+            self.apertures['0']['geometry'].append(new_el)
 
     def scale(self, xfactor, yfactor=None, point=None):
         """
@@ -2020,7 +2096,7 @@ class Gerber(Geometry):
                             new_geo_el['clear'] = scale_geom(geo_el['clear'])
                         new_geometry.append(new_geo_el)
 
-                self.apertures[apid]['geometry'] = deepcopy(new_geometry)
+                self.apertures[apid]['geometry'] = new_geometry
 
                 try:
                     if str(self.apertures[apid]['type']) == 'R' or str(self.apertures[apid]['type']) == 'O':
@@ -2412,7 +2488,7 @@ class Gerber(Geometry):
                                 new_geo_el['clear'] = buffer_geom(geo_el['clear'])
                             new_geometry.append(new_geo_el)
 
-                    self.apertures[apid]['geometry'] = deepcopy(new_geometry)
+                    self.apertures[apid]['geometry'] = new_geometry
 
                     try:
                         if str(self.apertures[apid]['type']) == 'R' or str(self.apertures[apid]['type']) == 'O':
@@ -2486,7 +2562,7 @@ class Gerber(Geometry):
                                 new_geo_el['clear'] = geo_el['clear']
                             new_geometry.append(new_geo_el)
 
-                    self.apertures[apid]['geometry'] = deepcopy(new_geometry)
+                    self.apertures[apid]['geometry'] = new_geometry
             except Exception as e:
                 log.debug('camlib.Gerber.buffer() Exception --> %s' % str(e))
                 return 'fail'
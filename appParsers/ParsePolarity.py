@@ -0,0 +1,204 @@
+# ##########################################################
+# FlatCAM: 2D Post-processing for Manufacturing            #
+# http://flatcam.org                                       #
+# Date: 10/18/2026                                         #
+# MIT Licence                                              #
+# ##########################################################
+
+from math import ceil, sqrt
+
+from shapely.geometry import Polygon, box
+from shapely.geometry.base import BaseGeometry
+from shapely.ops import unary_union
+from shapely.strtree import STRtree
+
+# average number of polygons evaluated in one tile
+PARTS_PER_TILE = 25
+# the grid has at most MAX_TILES_PER_SIDE x MAX_TILES_PER_SIDE tiles
+MAX_TILES_PER_SIDE = 64
+# below this number of tiles the tiles are not sent to the process pool
+MIN_POOL_TILES = 16
+
+
+def resolve_tile(groups):
+    """
+    Applies, in order, the polarity groups clipped to one tile.
+
+    :param groups:  list of (polarity, list of polygons) tuples, polarity is 'D' (dark) or 'C' (clear)
+    :return:        the resulting geometry or None if nothing is left in the tile
+    """
+    result = None
+    for polarity, geos in groups:
+        if polarity == 'D':
+            result = unary_union(geos if result is None else [result] + geos)
+        elif result is not None:
+            result = result.difference(unary_union(geos))
+            if result.is_empty:
+                result = None
+    return result
+
+
+class PolarityLayers:
+    """
+    Records the dark (%LPD) and clear (%LPC) layers of a Gerber file and resolves them once, at the end of the
+    parsing, instead of adding (or subtracting) every layer to the solid geometry as it grows.
+
+    The polygons of all the layers are kept in a STRtree and the area covered by the dark polygons is split in
+    a grid of tiles. Each tile replays only the layers that have polygons in it, on the polygons clipped to the
+    tile, so a clear feature costs a boolean operation on the small part of the copper pour around it.
+    The tile results are joined by a final union.
+
+    **USAGE**::
+
+        layers = PolarityLayers()
+        layers.add('D', dark_polygons)
+        layers.add('C', clear_polygons)
+        solid_geometry = layers.resolve(pool=app.pool)
+    """
+
+    def __init__(self, parts_per_tile=PARTS_PER_TILE, max_tiles_per_side=MAX_TILES_PER_SIDE):
+        """
+
+        :param parts_per_tile:      average number of polygons evaluated in one tile
+        :param max_tiles_per_side:  the grid has at most max_tiles_per_side x max_tiles_per_side tiles
+        """
+        self.parts_per_tile = parts_per_tile
+        self.max_tiles_per_side = max_tiles_per_side
+
+        # polarity of each layer
+        self.polarities = []
+        # the polygons of all the layers, in the order they were added, and the layer of each polygon
+        self.parts = []
+        self.part_layer = []
+        # index of the polygons by id(), only used with Shapely < 2.0
+        self._part_index = None
+
+    def __len__(self):
+        return len(self.polarities)
+
+    def add(self, polarity, geometries):
+        """
+        Adds a polarity layer.
+
+        :param polarity:    'D' for dark or 'C' for clear
+        :param geometries:  list of geometries (Polygon, MultiPolygon)
+        :return:            None
+        """
+        # a clear layer with nothing dark under it does nothing
+        if polarity == 'C' and not self.parts:
+            return
+
+        layer = len(self.polarities)
+        added = False
+        for geo in geometries:
+            if geo is None or geo.is_empty:
+                continue
+            for part in getattr(geo, 'geoms', [geo]):
+                if not part.is_empty:
+                    self.parts.append(part)
+                    self.part_layer.append(layer)
+                    added = True
+
+        if added:
+            self.polarities.append(polarity)
+
+    def grid(self):
+        """
+        Splits the bounds of the dark polygons in tiles.
+
+        :return:    list of tile bounds (minx, miny, maxx, maxy); the tiles share the edges exactly
+        """
+        dark = [p.bounds for p, l in zip(self.parts, self.part_layer) if self.polarities[l] == 'D']
+        minx = min(b[0] for b in dark)
+        miny = min(b[1] for b in dark)
+        maxx = max(b[2] for b in dark)
+        maxy = max(b[3] for b in dark)
+
+        n = int(ceil(sqrt(len(self.parts) / float(self.parts_per_tile))))
+        n = max(1, min(n, self.max_tiles_per_side))
+
+        xs = [minx + (maxx - minx) * i / n for i in range(n)] + [maxx]
+        ys = [miny + (maxy - miny) * i / n for i in range(n)] + [maxy]
+        return [(xs[i], ys[j], xs[i + 1], ys[j + 1]) for i in range(n) for j in range(n)]
+
+    def tile_groups(self, tree, tile):
+        """
+        Collects the polygons in a tile, clipped to the tile, grouped by consecutive polarity.
+
+        :param tree:    STRtree of self.parts
+        :param tile:    tile bounds
+        :return:        list of (polarity, list of polygons) tuples, as used by resolve_tile()
+        """
+        tile_box = box(*tile)
+        tminx, tminy, tmaxx, tmaxy = tile
+
+        groups = []
+        for idx in sorted(self.query(tree, tile_box)):
+            part = self.parts[idx]
+            polarity = self.polarities[self.part_layer[idx]]
+
+            # clear polygons before any dark polygon of this tile do nothing
+            if not groups and polarity == 'C':
+                continue
+
+            minx, miny, maxx, maxy = part.bounds
+            if minx < tminx or miny < tminy or maxx > tmaxx or maxy > tmaxy:
+                part = part.intersection(tile_box)
+                # polygons touching the tile edge leave lines and points
+                if part.geom_type == 'GeometryCollection':
+                    part = unary_union([g for g in part.geoms if g.geom_type in ('Polygon', 'MultiPolygon')])
+                if part.is_empty or part.area == 0:
+                    continue
+
+            if groups and groups[-1][0] == polarity:
+                groups[-1][1].append(part)
+            else:
+                groups.append((polarity, [part]))
+        return groups
+
+    def query(self, tree, geometry):
+        """
+        :return:    the indexes in self.parts of the polygons whose bounds intersect the geometry bounds
+        """
+        hits = tree.query(geometry)
+        if len(hits) and isinstance(hits[0], BaseGeometry):
+            # Shapely < 2.0 returns the geometries instead of their indexes
+            if self._part_index is None:
+                self._part_index = {id(p): i for i, p in enumerate(self.parts)}
+            return [self._part_index[id(h)] for h in hits]
+        return [int(h) for h in hits]
+
+    def resolve(self, pool=None):
+        """
+        Resolves the polarity layers.
+
+        :param pool:    optional multiprocessing pool used to resolve the tiles in parallel
+        :return:        the resulting geometry (Polygon or MultiPolygon)
+        """
+        if not self.parts:
+            return Polygon()
+
+        tiles = self.grid()
+        if len(tiles) == 1:
+            groups = []
+            for part, layer in zip(self.parts, self.part_layer):
+                polarity = self.polarities[layer]
+                if groups and groups[-1][0] == polarity:
+                    groups[-1][1].append(part)
+                else:
+                    groups.append((polarity, [part]))
+            result = resolve_tile(groups)
+            return Polygon() if result is None else result
+
+        tree = STRtree(self.parts)
+        tasks = [g for g in (self.tile_groups(tree, tile) for tile in tiles) if g]
+
+        if pool is not None and len(tasks) >= MIN_POOL_TILES:
+            results = pool.map(resolve_tile, tasks)
+        else:
+            results = [resolve_tile(t) for t in tasks]
+
+        results = [r for r in results if r is not None and not r.is_empty]
+        if not results:
+            return Polygon()
+        return unary_union(results)
@@ -0,0 +1,88 @@
+# ##########################################################
+# FlatCAM: 2D Post-processing for Manufacturing            #
+# http://flatcam.org                                       #
+# Date: 10/18/2026                                         #
+# MIT Licence                                              #
+# ##########################################################
+
+import mmap
+import os
+
+
+class SourceFile:
+    """
+    Streams the lines of a source file (Gerber, Excellon) from a memory map so the parsers never hold the whole file
+    as a list of lines, and reports how much of the file was consumed.
+
+    **USAGE**::
+
+        with SourceFile(filename) as src:
+            for line in src.lines():
+                do_something(line, src.percent())
+    """
+
+    def __init__(self, filename, encoding='utf-8'):
+        """
+
+        :param filename:    path to the source file
+        :param encoding:    encoding of the file; undecodable bytes are replaced
+        """
+        self.filename = filename
+        self.encoding = encoding
+
+        self._file = open(filename, 'rb')
+        self.size = os.fstat(self._file.fileno()).st_size
+
+        # an empty file can't be memory mapped
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self.size > 0 else None
+
+    def lines(self):
+        """
+        Yields the file lines as strings, with universal newlines ('\\r\\n' and '\\r' become '\\n').
+
+        :return:    generator of str
+        """
+        if self._map is None:
+            return
+
+        self._map.seek(0)
+        readline = self._map.readline
+        encoding = self.encoding
+
+        while True:
+            raw = readline()
+            if not raw:
+                break
+
+            line = raw.decode(encoding, 'replace')
+            if '\r' in line:
+                for part in line.replace('\r\n', '\n').replace('\r', '\n').splitlines(True):
+                    yield part
+            else:
+                yield line
+
+    def tell(self):
+        """
+        :return:    number of bytes consumed
+        """
+        return self._map.tell() if self._map is not None else 0
+
+    def percent(self):
+        """
+        :return:    percentage of the file consumed, as an int
+        """
+        if not self.size:
+            return 100
+        return int(self.tell() * 100 / self.size)
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -10,6 +10,7 @@ from importlib.machinery import SourceFileLoader
 import os
 from abc import ABCMeta, abstractmethod
 import math
+import re
 
 # module-root dictionary of preprocessors
 
@@ -30,7 +31,157 @@ class ABCPreProcRegister(ABCMeta):
         return newclass
 
 
+# module-root dictionary of the G-code tokenizers, one for each dialect of G-code made by the preprocessors
+gcode_tokenizers = {}
+
+# when the preprocessors of a job have different dialects the first one in this list is used to parse the G-code
+DIALECT_PRIORITY = ['roland', 'hpgl', 'laser', 'paste', 'gcode']
+
+
+def gcode_tokenizer(dialect):
+    """
+    Decorator registering a G-code tokenizer for a dialect. A tokenizer parses a line of G-code in a dictionary
+    such as {'G': 1.0, 'X': 1234.0, 'Y': 987.0}.
+
+    :param dialect: name of the dialect; a preprocessor class selects it with its gcode_dialect attribute
+    :return:        the decorator
+    """
+    def register(tokenizer):
+        gcode_tokenizers[dialect] = tokenizer
+        return tokenizer
+    return register
+
+
+def preprocessor_dialect(pp_name):
+    """
+    The dialect of the G-code made by a preprocessor.
+
+    :param pp_name: preprocessor name
+    :return:        the gcode_dialect of the preprocessor class; for the preprocessors that do not set it, the
+                    dialect is found by the keywords in their name ('Roland', 'hpgl', 'laser', 'paste')
+    """
+    dialect = getattr(preprocessors.get(pp_name), 'gcode_dialect', None)
+    if dialect is not None:
+        return dialect
+
+    if 'Roland' in pp_name:
+        return 'roland'
+    if 'hpgl' in pp_name:
+        return 'hpgl'
+    if 'laser' in pp_name.lower():
+        return 'laser'
+    if 'paste' in pp_name.lower():
+        return 'paste'
+    return 'gcode'
+
+
+def resolve_dialect(pp_names):
+    """
+    The dialect used to parse the G-code of a job made with more preprocessors.
+
+    :param pp_names:    list of preprocessor names; None items are skipped
+    :return:            dialect name, a key of gcode_tokenizers
+    """
+    dialects = [preprocessor_dialect(name) for name in pp_names if name is not None]
+    for dialect in DIALECT_PRIORITY:
+        if dialect in dialects:
+            return dialect
+    return 'gcode'
+
+
+# a G-code word: letter and number
+gcode_word_re = re.compile(r'\s*([A-Z])\s*([\+\-\.\d\s]+)')
+# the words at the start of the line, up to the first thing that is not a word (comment, end of line)
+gcode_words_re = re.compile(r'(?:\s*[A-Z]\s*[\+\-\.\d\s]+)*')
+
+
+@gcode_tokenizer('gcode')
+def split_gcode(gline):
+    words = gcode_word_re.findall(gline, 0, gcode_words_re.match(gline).end())
+    try:
+        return {letter: float(value) for letter, value in words}
+    except ValueError:
+        # spaces inside the numbers
+        return {letter: float(value.replace(" ", "")) for letter, value in words}
+
+
+roland_z_re = re.compile(r"^Z(\s*-?\d+\.\d+?),(\s*\s*-?\d+\.\d+?),(\s*\s*-?\d+\.\d+?)*;$")
+
+
+@gcode_tokenizer('roland')
+def split_roland(gline):
+    command = {}
+    match_z = roland_z_re.search(gline)
+    if match_z:
+        command['G'] = 0
+        command['X'] = float(match_z.group(1).replace(" ", "")) * 0.025
+        command['Y'] = float(match_z.group(2).replace(" ", "")) * 0.025
+        command['Z'] = float(match_z.group(3).replace(" ", "")) * 0.025
+    return command
+
+
+hpgl_pa_re = re.compile(r"^PA(\s*-?\d+\.\d+?),(\s*\s*-?\d+\.\d+?)*;$")
+hpgl_pen_re = re.compile(r"^(P[U|D])")
+
+
+@gcode_tokenizer('hpgl')
+def split_hpgl(gline):
+    command = {}
+    match_pa = hpgl_pa_re.search(gline)
+    if match_pa:
+        command['G'] = 0
+        command['X'] = float(match_pa.group(1).replace(" ", "")) / 40
+        command['Y'] = float(match_pa.group(2).replace(" ", "")) / 40
+    match_pen = hpgl_pen_re.search(gline)
+    if match_pen:
+        if match_pen.group(1) == 'PU':
+            # the value does not matter, only that it is positive so the gcode_parse() know it is > 0,
+            # therefore the move is of kind T (travel)
+            command['Z'] = 1
+        else:
+            command['Z'] = 0
+    return command
+
+
+laser_xy_re = re.compile(r"X([\+-]?\d+.[\+-]?\d+)\s*Y([\+-]?\d+.[\+-]?\d+)")
+laser_on_off_re = re.compile(r"^(M0?[3-5])")
+laser_fan_re = re.compile(r"^(M10[6|7])")
+
+
+@gcode_tokenizer('laser')
+def split_laser(gline):
+    command = {}
+    match_lsr = laser_xy_re.search(gline)
+    if match_lsr:
+        command['X'] = float(match_lsr.group(1).replace(" ", ""))
+        command['Y'] = float(match_lsr.group(2).replace(" ", ""))
+
+    match_lsr_pos = laser_on_off_re.search(gline)
+    if match_lsr_pos:
+        if 'M05' in match_lsr_pos.group(1) or 'M5' in match_lsr_pos.group(1):
+            # the value does not matter, only that it is positive so the gcode_parse() know it is > 0,
+            # therefore the move is of kind T (travel)
+            command['Z'] = 1
+        else:
+            command['Z'] = 0
+
+    match_lsr_pos_2 = laser_fan_re.search(gline)
+    if match_lsr_pos_2:
+        if 'M107' in match_lsr_pos_2.group(1):
+            command['Z'] = 1
+        else:
+            command['Z'] = 0
+    return command
+
+
+# the solder paste dispenser is turned on and off like the laser
+gcode_tokenizers['paste'] = split_laser
+
+
 class PreProc(object, metaclass=ABCPreProcRegister):
+    # dialect of the made G-code, a key of gcode_tokenizers; when None it is found by the preprocessor name
+    gcode_dialect = None
+
     @abstractmethod
     def start_code(self, p):
         pass
@@ -77,6 +228,9 @@ class PreProc(object, metaclass=ABCPreProcRegister):
 
 
 class AppPreProcTools(object, metaclass=ABCPreProcRegister):
+    # dialect of the made G-code, a key of gcode_tokenizers; when None it is found by the preprocessor name
+    gcode_dialect = None
+
     @abstractmethod
     def start_code(self, p):
         pass
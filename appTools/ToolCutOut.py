@@ -1414,6 +1414,7 @@ class CutOut(AppTool):
         self.man_cutout_obj.plot(plot_tool=1)
         self.app.inform.emit('%s' % _("Added manual Bridge Gap. Left click to add another or right click to finish."))
 
+        self.app.app_obj.object_changed.emit(self.man_cutout_obj)
         self.app.should_we_save = True
 
     def on_manual_geo(self):
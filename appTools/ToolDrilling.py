@@ -12,6 +12,7 @@ from appGUI.GUIElements import FCCheckBox, FCDoubleSpinner, RadioSet, FCTable, F
     FCComboBox, OptionalInputSection, FCSpinner, NumericalEvalEntry, OptionalHideInputSection, FCLabel, \
     NumericalEvalTupleEntry
 from appParsers.ParseExcellon import Excellon
+from appCommon.Toolpath import Toolpath
 
 from copy import deepcopy
 
@@ -1657,7 +1658,8 @@ class ToolDrilling(AppTool, Excellon):
         # #############################################################################################################
         used_excellon_optimization_type = self.app.defaults["excellon_optimization_type"]
         current_platform = platform.architecture()[0]
-        if current_platform != '64bit':
+        if current_platform != '64bit' and used_excellon_optimization_type in ['M', 'B']:
+            # the OR-Tools optimizations are not available in 32bit
             used_excellon_optimization_type = 'T'
 
         # #############################################################################################################
@@ -1839,6 +1841,8 @@ class ToolDrilling(AppTool, Excellon):
                 # parse the Gcode
                 tool_gcode_parsed = job_obj.excellon_tool_gcode_parse(used_tooldia, gcode=tool_gcode,
                                                                       start_pt=first_drill_point)
+                if tool_gcode_parsed == 'fail':
+                    return 'fail'
 
                 # store the results in Excellon CNC tools storage
                 job_obj.exc_cnc_tools[used_tooldia]['nr_drills'] = nr_drills
@@ -1860,6 +1864,8 @@ class ToolDrilling(AppTool, Excellon):
 
             # ####################### TOOLCHANGE ACTIVE ######################################################
             else:
+                # the parsed G-code of each tool, in the order of the tools
+                parsed_tools = []
                 for tool in sel_tools:
                     tool_points = points[tool]
                     used_tooldia = self.excellon_tools[tool]['tooldia']
@@ -1896,6 +1902,8 @@ class ToolDrilling(AppTool, Excellon):
                     # parse Gcode for the current tool
                     tool_gcode_parsed = job_obj.excellon_tool_gcode_parse(used_tooldia, gcode=tool_gcode,
                                                                           start_pt=first_drill_point)
+                    if tool_gcode_parsed == 'fail':
+                        return 'fail'
                     first_drill_point = last_pt
 
                     # store the results of GCode generation and parsing
@@ -1906,7 +1914,16 @@ class ToolDrilling(AppTool, Excellon):
                         job_obj.gc_start = start_gcode
 
                     self.total_gcode += tool_gcode
-                    self.total_gcode_parsed += tool_gcode_parsed
+                    parsed_tools.append((used_tooldia, tool_gcode_parsed))
+
+                # the parsed G-code of the job joins the parsed G-code of the tools; the parsed G-code of each tool
+                # is replaced by its part in the job so they are transformed together
+                self.total_gcode_parsed = Toolpath.concatenate([tool_parsed for __, tool_parsed in parsed_tools])
+                start = 0
+                for used_tooldia, tool_gcode_parsed in parsed_tools:
+                    stop = start + len(tool_gcode_parsed)
+                    job_obj.exc_cnc_tools[used_tooldia]['gcode_parsed'] = self.total_gcode_parsed.paths(start, stop)
+                    start = stop
 
             job_obj.gcode = self.total_gcode
             job_obj.source_file = self.total_gcode
@@ -1914,8 +1931,7 @@ class ToolDrilling(AppTool, Excellon):
             if job_obj.gcode == 'fail':
                 return 'fail'
 
-            # create Geometry for plotting
-            # FIXME is it necessary? didn't we do it previously when filling data in self.exc_cnc_tools dictionary?
+            # the Geometry is made from the parsed G-code when it is first used
             job_obj.create_geometry()
 
             if used_excellon_optimization_type == 'M':
@@ -1928,6 +1944,10 @@ class ToolDrilling(AppTool, Excellon):
                 log.debug(
                     "The total travel distance with Travelling Salesman Algorithm is: %s" %
                     str(job_obj.measured_distance))
+            elif used_excellon_optimization_type == 'O':
+                log.debug(
+                    "The total travel distance with Spatial Travelling Salesman (2-Opt) is: %s" %
+                    str(job_obj.measured_distance))
             else:
                 log.debug("The total travel distance with with no optimization is: %s" %
                           str(job_obj.measured_distance))
@@ -14,8 +14,30 @@ from copy import deepcopy
 from appPool import *
 # from os import getpid
 from shapely.ops import nearest_points
-from shapely.geometry import MultiPolygon, Polygon
-
+from shapely.geometry import MultiPolygon, Polygon, box
+from shapely.geometry.base import BaseGeometry
+from shapely.strtree import STRtree
+
+try:
+    # Shapely >= 2.0 encodes an array of geometries in one call
+    from shapely import to_wkb as shapely_to_wkb
+except ImportError:
+    shapely_to_wkb = None
+
+from appCommon.ProjectArchive import encode_object, decode_attributes, decode_geometry
+from appCommon.PointGrid import PointGrid
+
+import numpy as np
+
+from collections import OrderedDict
+from math import ceil, sqrt
+import os
+import time
+import atexit
+import shutil
+import pickle
+import hashlib
+import tempfile
 import logging
 import gettext
 import appTranslation as fcTranslate
@@ -27,10 +49,344 @@ if '_' not in builtins.__dict__:
 
 log = logging.getLogger('base')
 
+# a clearance rule is split in about this number of spatial tiles for each CPU
+TILES_PER_CPU = 4
+# the least number of polygons measured in one tile
+MIN_TILE_POLYGONS = 500
+# the number of checked objects that each pool process keeps decoded
+MAX_LOADED_OBJECTS = 8
+# the hole clearance searches the drills up to this multiple of the median drill diameter in a grid; the slots and the
+# larger drills are searched one by one
+LARGE_DRILL_RATIO = 2.0
+
+# the objects decoded by load_checked_object(), by version, and the polygons loaded by load_clearance_polygons(), by
+# file; filled in the pool processes
+_loaded_objects = OrderedDict()
+
+
+class PolygonIndex:
+    """
+    STRtree of a list of polygons, queried for the indexes of the polygons near a geometry.
+    """
+
+    def __init__(self, polygons):
+        """
+
+        :param polygons:    list of polygons
+        """
+        self.polygons = polygons
+        self.tree = STRtree(polygons)
+        # index of the polygons by id(), only used with Shapely < 2.0
+        self._index = None
+
+    def near(self, geometry, distance=0.0):
+        """
+        :param geometry:    Shapely geometry
+        :param distance:    the search distance
+        :return:            sorted list of the indexes of the polygons whose bounds are closer than distance to the
+                            bounds of the geometry
+        """
+        minx, miny, maxx, maxy = geometry.bounds
+        hits = self.tree.query(box(minx - distance, miny - distance, maxx + distance, maxy + distance))
+        if len(hits) and isinstance(hits[0], BaseGeometry):
+            # Shapely < 2.0 returns the geometries instead of their indexes
+            if self._index is None:
+                self._index = {id(p): i for i, p in enumerate(self.polygons)}
+            return sorted(self._index[id(h)] for h in hits)
+        return sorted(int(h) for h in hits)
+
+
+class CheckedObjects:
+    """
+    The objects checked by a run of the rules. Each object is encoded once for each run, in the chunk format of the
+    project files (appCommon/ProjectArchive.py), and saved in a temporary folder. The rules get only a reference to
+    the object and the pool processes decode each object once (see load_checked_object()).
+
+    The version of an object is the hash of its plain values and of the WKB of its geometry; the results of the
+    rules are cached by it and the object is encoded only when there is no file for its version yet.
+    The data that the pool processes derive from the objects and share between them (the polygons of the clearance
+    rules) is saved in the same folder, in the files named by derived_file().
+    """
+
+    def __init__(self):
+        self.folder = None
+        # the references to the objects added in the current run, by name
+        self.refs = {}
+        # the files of the data derived from the objects in the current run
+        self.derived = set()
+
+    def begin(self):
+        """
+        Starts a run of the rules.
+
+        :return:    None
+        """
+        self.refs = {}
+        self.derived = set()
+
+    def make_folder(self):
+        """
+        :return:    the temporary folder of the files, made on the first call
+        """
+        if self.folder is None:
+            self.folder = tempfile.mkdtemp(prefix='flatcam_rules_')
+            atexit.register(shutil.rmtree, self.folder, True)
+        return self.folder
+
+    def add(self, obj):
+        """
+        :param obj:     GerberObject or ExcellonObject
+        :return:        the reference to the object, as used by the rules: a dict with the 'name', the 'kind' of the
+                        object data ('apertures' or 'tools'), the 'version' and the 'file' of the encoded data
+        """
+        name = obj.options['name']
+        if name not in self.refs:
+            kind = 'apertures' if obj.kind == 'gerber' else 'tools'
+            data = getattr(obj, kind)
+            version = self.version(kind, data)
+
+            filename = os.path.join(self.make_folder(), version)
+            if not os.path.exists(filename):
+                attrs_chunk, geo_chunk, blob, __ = encode_object({kind: data})
+                with open(filename, 'wb') as f:
+                    pickle.dump((attrs_chunk, geo_chunk, blob), f, protocol=pickle.HIGHEST_PROTOCOL)
+
+            self.refs[name] = {'name': name, 'kind': kind, 'version': version, 'file': filename}
+        return dict(self.refs[name])
+
+    def derived_file(self, label, refs):
+        """
+        :param label:   the name of the data derived from the objects
+        :param refs:    list of the references made by add() to the objects the data is derived from, in order
+        :return:        the name of the file for the data; it is kept while the objects are checked
+        """
+        digest = hashlib.sha1(label.encode('utf-8'))
+        for ref in refs:
+            if ref:
+                digest.update(ref['version'].encode('utf-8'))
+
+        filename = os.path.join(self.make_folder(), 'derived_%s' % digest.hexdigest())
+        self.derived.add(filename)
+        return filename
+
+    @staticmethod
+    def version(kind, data):
+        """
+        :param kind:    'apertures' or 'tools'
+        :param data:    the apertures (Gerber) or the tools (Excellon) of an object
+        :return:        the SHA-1 hex digest of the plain values and of the WKB of the geometries of the data
+        """
+        digest = hashlib.sha1(kind.encode('utf-8'))
+        geometries = []
+
+        def walk(value):
+            if isinstance(value, BaseGeometry):
+                # the geometries are hashed after the plain values, in the same order
+                geometries.append(value)
+                digest.update(b'G')
+            elif isinstance(value, dict):
+                digest.update(b'{%d' % len(value))
+                for key in sorted(value, key=str):
+                    digest.update(repr(key).encode('utf-8'))
+                    walk(value[key])
+            elif isinstance(value, (list, tuple)):
+                digest.update(b'[%d' % len(value))
+                for item in value:
+                    walk(item)
+            else:
+                digest.update(repr(value).encode('utf-8'))
+
+        walk(data)
+        if shapely_to_wkb is not None and geometries:
+            geometry_array = np.empty(len(geometries), dtype=object)
+            geometry_array[:] = geometries
+            blobs = shapely_to_wkb(geometry_array).tolist()
+        else:
+            blobs = [geo.wkb for geo in geometries]
+        digest.update(b''.join(blobs))
+        return digest.hexdigest()
+
+    def finish(self):
+        """
+        Ends a run of the rules: deletes the files of the objects that were not checked in this run.
+
+        :return:    None
+        """
+        if self.folder is None:
+            return
+
+        used = {ref['file'] for ref in self.refs.values()} | self.derived
+        for entry in os.listdir(self.folder):
+            filename = os.path.join(self.folder, entry)
+            if filename not in used:
+                try:
+                    os.remove(filename)
+                except OSError as e:
+                    log.debug("CheckedObjects.finish() --> %s" % str(e))
+
+
+def load_checked_object(obj):
+    """
+    Loads an object checked by the rules. Each pool process keeps the last decoded objects.
+
+    :param obj: a reference made by CheckedObjects.add() or a dict with the 'name' and the 'apertures' (or the
+                'tools') of the object
+    :return:    dict with the 'name' and the 'apertures' (Gerber) or the 'tools' (Excellon) of the object
+    """
+    if not obj or 'version' not in obj:
+        return obj
+
+    data = _loaded_objects.get(obj['version'])
+    if data is None:
+        with open(obj['file'], 'rb') as f:
+            attrs_chunk, geo_chunk, blob = pickle.load(f)
+        data = decode_attributes(attrs_chunk)
+        data.update(decode_geometry(geo_chunk, blob))
+        if 'tools' in data:
+            # JSON stringifies the keys but the tools are indexed by integer
+            data['tools'] = {int(k): v for k, v in data['tools'].items()}
+
+        while len(_loaded_objects) >= MAX_LOADED_OBJECTS:
+            _loaded_objects.popitem(last=False)
+        _loaded_objects[obj['version']] = data
+    else:
+        _loaded_objects.move_to_end(obj['version'])
+
+    return {'name': obj['name'], obj['kind']: data[obj['kind']]}
+
+
+def load_clearance_polygons(filename):
+    """
+    Loads the polygons of a clearance rule saved by RulesCheck.prepare_clearance(). Each pool process keeps them,
+    with the index and the bounds used to split them in tiles, among the last decoded objects.
+
+    :param filename:    the file of the polygons
+    :return:            tuple (list of polygons, list of polygons or None, PolygonIndex of the polygons measured
+                        against, array of the bounds of the polygons of the first list)
+    """
+    data = _loaded_objects.get(filename)
+    if data is None:
+        with open(filename, 'rb') as f:
+            geometry_1, geometry_2 = pickle.load(f)
+        index = PolygonIndex(geometry_1 if geometry_2 is None else geometry_2)
+        bounds = np.array([geo.bounds for geo in geometry_1], dtype=float).reshape((-1, 4))
+        data = geometry_1, geometry_2, index, bounds
+
+        while len(_loaded_objects) >= MAX_LOADED_OBJECTS:
+            _loaded_objects.popitem(last=False)
+        _loaded_objects[filename] = data
+    else:
+        _loaded_objects.move_to_end(filename)
+
+    return data
+
+
+class CachedResult:
+    """
+    The result of a rule found in the cache. It takes the place of the AsyncResult of the rule.
+    """
+
+    def __init__(self, result):
+        self.result = result
+
+    def ready(self):
+        return True
+
+    def get(self):
+        return self.result
+
+
+class ClearanceCheck:
+    """
+    A clearance rule run in the process pool in two steps: one task collects the polygons to check and saves them in a
+    file, then the distances are measured by parallel tasks, each one for a spatial tile of the polygons. The tasks get
+    only the file and the bounds of their tile. It takes the place of the AsyncResult of the rule.
+    """
+
+    def __init__(self, pool, prepare, args, size, rule, filename):
+        """
+
+        :param pool:        the process pool
+        :param prepare:     RulesCheck.inside_clearance_geometry or RulesCheck.gerber_clearance_geometry
+        :param args:        arguments of prepare
+        :param size:        the rule distance
+        :param rule:        the rule title
+        :param filename:    the file for the polygons, named by CheckedObjects.derived_file()
+        """
+        self.pool = pool
+        self.size = size
+        self.rule = rule
+        self.filename = filename
+        self.prepared = pool.apply_async(RulesCheck.prepare_clearance, args=(prepare, args, filename))
+        # the exception of the first task, raised again by self.get()
+        self.error = None
+
+        self.name = None
+        # the AsyncResult of each tile, None until the polygons are collected
+        self.tasks = None
+        # the result of the rule when there is nothing to measure
+        self.result = None
+
+    def start(self):
+        """
+        Splits in tiles the bounds of the polygons collected by the first task and starts measuring the tiles.
+
+        :return:    None
+        """
+        self.tasks = []
+        try:
+            prepared = self.prepared.get()
+        except Exception as e:
+            log.debug("ClearanceCheck.start() --> %s" % str(e))
+            self.error = e
+            return
+
+        if isinstance(prepared, str):
+            self.result = prepared
+            return
+
+        self.name, count, bounds = prepared
+        if count is None:
+            self.result = RulesCheck.clearance_result(self.rule, self.name, ['Failed. Only one polygon.'])
+            return
+
+        tiles = min(TILES_PER_CPU * (os.cpu_count() or 1), count // MIN_TILE_POLYGONS)
+        for grid, cell in RulesCheck.clearance_tiles(bounds, tiles):
+            self.tasks.append(self.pool.apply_async(RulesCheck.clearance_tile,
+                                                    args=(self.filename, self.size, grid, cell)))
+
+    def ready(self):
+        """
+        :return:    True if the result is available
+        """
+        if self.tasks is None:
+            if not self.prepared.ready():
+                return False
+            self.start()
+        return all(task.ready() for task in self.tasks)
+
+    def get(self):
+        """
+        :return:    the result of the rule, as made by RulesCheck.check_inside_gerber_clearance() or
+                    RulesCheck.check_gerber_clearance()
+        """
+        if self.tasks is None:
+            self.start()
+        if self.error is not None:
+            raise self.error
+        if self.result is not None:
+            return self.result
+
+        points_list = set()
+        for task in self.tasks:
+            points_list.update(task.get())
+        return RulesCheck.clearance_result(self.rule, self.name, list(points_list))
+
 
 class RulesCheck(AppTool):
 
-    tool_finished = QtCore.pyqtSignal(list)
+    # the report sections of the finished rules, in the rules order, and True if all the rules are finished
+    report_updated = QtCore.pyqtSignal(list, bool)
 
     def __init__(self, app):
         self.decimals = app.decimals
@@ -67,7 +423,7 @@ class RulesCheck(AppTool):
         self.ui.reset_button.clicked.connect(self.set_tool_ui)
         
         # Custom Signals
-        self.tool_finished.connect(self.on_tool_finished)
+        self.report_updated.connect(self.on_report_updated)
 
         # list to hold the temporary objects
         self.objs = []
@@ -80,8 +436,17 @@ class RulesCheck(AppTool):
 
         # Multiprocessing Process Pool
         self.pool = self.app.pool
+        # the (cache key, AsyncResult) of each rule of the current run, in the rules order
         self.results = None
 
+        # the objects checked by the current run
+        self.checked_objects = CheckedObjects()
+        # the results of the rules of the last run by the rule function and its arguments; the checked objects are
+        # in the key by their version so a rule is run again only when one of its objects changed
+        self.results_cache = {}
+        # the document object of the report of the current run
+        self.report_obj = None
+
         self.decimals = 4
 
     # def on_object_loaded(self, index, row):
@@ -158,38 +523,44 @@ class RulesCheck(AppTool):
         self.reset_fields()
 
     @staticmethod
-    def check_inside_gerber_clearance(gerber_obj, size, rule):
-        log.debug("RulesCheck.check_inside_gerber_clearance()")
-
-        rule_title = rule
+    def solid_geometry(gerber_obj, clear=False):
+        """
+        :param gerber_obj:  dict with the 'name' and the 'apertures' of a Gerber object
+        :param clear:       if True the clear geometry is returned instead of the solid geometry
+        :return:            list of the solid (or clear) geometry elements of the apertures
+        """
+        key = 'clear' if clear else 'solid'
+        geo_list = []
+        for apid in gerber_obj['apertures']:
+            if 'geometry' in gerber_obj['apertures'][apid]:
+                geometry = gerber_obj['apertures'][apid]['geometry']
+                for geo_el in geometry:
+                    if key in geo_el and geo_el[key] is not None:
+                        geo_list.append(geo_el[key])
+        return geo_list
 
-        violations = []
-        obj_violations = {}
-        obj_violations.update({
-            'name': '',
-            'points': list()
-        })
+    @staticmethod
+    def inside_clearance_geometry(gerber_obj):
+        """
+        Collects the polygons of a Gerber object for the clearance check between them.
 
+        :param gerber_obj:  dict with the 'name' and the 'apertures' of a Gerber object
+        :return:            tuple (name, list of polygons, None); the list is None if there is only one polygon
+        """
         if not gerber_obj:
             return 'Fail. Not enough Gerber objects to check Gerber 2 Gerber clearance'
 
-        obj_violations['name'] = gerber_obj['name']
-
-        solid_geo = []
-        clear_geo = []
-        for apid in gerber_obj['apertures']:
-            if 'geometry' in gerber_obj['apertures'][apid]:
-                geometry = gerber_obj['apertures'][apid]['geometry']
-                for geo_el in geometry:
-                    if 'solid' in geo_el and geo_el['solid'] is not None:
-                        solid_geo.append(geo_el['solid'])
-                    if 'clear' in geo_el and geo_el['clear'] is not None:
-                        clear_geo.append(geo_el['clear'])
+        gerber_obj = load_checked_object(gerber_obj)
+        solid_geo = RulesCheck.solid_geometry(gerber_obj)
+        clear_geo = RulesCheck.solid_geometry(gerber_obj, clear=True)
 
         if clear_geo:
+            # only the solid polygons whose bounds hold the bounds of the clear polygon can hold it
+            solid_index = PolygonIndex(solid_geo)
             total_geo = []
             for geo_c in clear_geo:
-                for geo_s in solid_geo:
+                for idx in solid_index.near(geo_c):
+                    geo_s = solid_geo[idx]
                     if geo_c.within(geo_s):
                         total_geo.append(geo_s.difference(geo_c))
         else:
@@ -197,53 +568,19 @@ class RulesCheck(AppTool):
             total_geo = total_geo.buffer(0.000001)
 
         if isinstance(total_geo, Polygon):
-            obj_violations['points'] = ['Failed. Only one polygon.']
-            return rule_title, [obj_violations]
-        else:
-            iterations = len(total_geo)
-            iterations = (iterations * (iterations - 1)) / 2
-        log.debug("RulesCheck.check_gerber_clearance(). Iterations: %s" % str(iterations))
-
-        min_dict = {}
-        idx = 1
-        for geo in total_geo:
-            for s_geo in total_geo[idx:]:
-                # minimize the number of distances by not taking into considerations those that are too small
-                dist = geo.distance(s_geo)
-                if float(dist) < float(size):
-                    loc_1, loc_2 = nearest_points(geo, s_geo)
-
-                    dx = loc_1.x - loc_2.x
-                    dy = loc_1.y - loc_2.y
-                    loc = min(loc_1.x, loc_2.x) + (abs(dx) / 2), min(loc_1.y, loc_2.y) + (abs(dy) / 2)
-
-                    if dist in min_dict:
-                        min_dict[dist].append(loc)
-                    else:
-                        min_dict[dist] = [loc]
-            idx += 1
-        points_list = set()
-        for dist in min_dict.keys():
-            for location in min_dict[dist]:
-                points_list.add(location)
-
-        obj_violations['points'] = list(points_list)
-        violations.append(deepcopy(obj_violations))
-
-        return rule_title, violations
+            return gerber_obj['name'], None, None
+        return gerber_obj['name'], list(getattr(total_geo, 'geoms', total_geo)), None
 
     @staticmethod
-    def check_gerber_clearance(gerber_list, size, rule):
-        log.debug("RulesCheck.check_gerber_clearance()")
-        rule_title = rule
-
-        violations = []
-        obj_violations = {}
-        obj_violations.update({
-            'name': '',
-            'points': list()
-        })
-
+    def gerber_clearance_geometry(gerber_list):
+        """
+        Collects the polygons of two sets of Gerber objects for the clearance check between the sets.
+
+        :param gerber_list: list of two or three dicts with the 'name' and the 'apertures' of Gerber objects;
+                            the last one is checked against the others
+        :return:            tuple (list of names, list of polygons, list of polygons)
+        """
+        gerber_list = [load_checked_object(obj) for obj in gerber_list]
         if len(gerber_list) == 2:
             gerber_1 = gerber_list[0]
             # added it so I won't have errors of using before declaring
@@ -257,30 +594,12 @@ class RulesCheck(AppTool):
         else:
             return 'Fail. Not enough Gerber objects to check Gerber 2 Gerber clearance'
 
-        total_geo_grb_1 = []
-        for apid in gerber_1['apertures']:
-            if 'geometry' in gerber_1['apertures'][apid]:
-                geometry = gerber_1['apertures'][apid]['geometry']
-                for geo_el in geometry:
-                    if 'solid' in geo_el and geo_el['solid'] is not None:
-                        total_geo_grb_1.append(geo_el['solid'])
-
+        total_geo_grb_1 = RulesCheck.solid_geometry(gerber_1)
         if len(gerber_list) == 3:
             # add the second Gerber geometry to the first one if it exists
-            for apid in gerber_2['apertures']:
-                if 'geometry' in gerber_2['apertures'][apid]:
-                    geometry = gerber_2['apertures'][apid]['geometry']
-                    for geo_el in geometry:
-                        if 'solid' in geo_el and geo_el['solid'] is not None:
-                            total_geo_grb_1.append(geo_el['solid'])
+            total_geo_grb_1 += RulesCheck.solid_geometry(gerber_2)
 
-        total_geo_grb_3 = []
-        for apid in gerber_3['apertures']:
-            if 'geometry' in gerber_3['apertures'][apid]:
-                geometry = gerber_3['apertures'][apid]['geometry']
-                for geo_el in geometry:
-                    if 'solid' in geo_el and geo_el['solid'] is not None:
-                        total_geo_grb_3.append(geo_el['solid'])
+        total_geo_grb_3 = RulesCheck.solid_geometry(gerber_3)
 
         total_geo_grb_1 = MultiPolygon(total_geo_grb_1)
         total_geo_grb_1 = total_geo_grb_1.buffer(0)
@@ -288,142 +607,364 @@ class RulesCheck(AppTool):
         total_geo_grb_3 = MultiPolygon(total_geo_grb_3)
         total_geo_grb_3 = total_geo_grb_3.buffer(0)
 
-        if isinstance(total_geo_grb_1, Polygon):
-            len_1 = 1
-            total_geo_grb_1 = [total_geo_grb_1]
-        else:
-            len_1 = len(total_geo_grb_1)
+        name_list = []
+        if gerber_1:
+            name_list.append(gerber_1['name'])
+        if gerber_2:
+            name_list.append(gerber_2['name'])
+        if gerber_3:
+            name_list.append(gerber_3['name'])
 
-        if isinstance(total_geo_grb_3, Polygon):
-            len_3 = 1
-            total_geo_grb_3 = [total_geo_grb_3]
-        else:
-            len_3 = len(total_geo_grb_3)
+        return name_list, list(getattr(total_geo_grb_1, 'geoms', [total_geo_grb_1])), \
+            list(getattr(total_geo_grb_3, 'geoms', [total_geo_grb_3]))
 
-        iterations = len_1 * len_3
-        log.debug("RulesCheck.check_gerber_clearance(). Iterations: %s" % str(iterations))
+    @staticmethod
+    def clearance_violations(geometry_1, geometry_2, size, ids_1=None, ids_2=None):
+        """
+        Finds where the polygons of geometry_1 are closer than the rule distance to the polygons of geometry_2.
+        The polygons are looked up in a STRtree so only the polygons whose bounds are closer than the rule distance
+        are measured.
+
+        :param geometry_1:  list of polygons
+        :param geometry_2:  list of polygons, or None to check the polygons of geometry_1 between them
+        :param size:        the rule distance
+        :param ids_1:       when the polygons of both lists are taken from the same list: the index of each polygon of
+                            geometry_1 in that list
+        :param ids_2:       the index of each polygon of geometry_2 in the same list as ids_1
+        :return:            set of the locations of the violations: the middle of the shortest line between the
+                            polygons
+        """
+        log.debug("RulesCheck.clearance_violations(). Polygons: %s" % str(len(geometry_1)))
+
+        if geometry_2 is None:
+            geometry_2 = geometry_1
+            ids_1 = ids_2 = range(len(geometry_1))
+
+        index = PolygonIndex(geometry_2)
+        size = float(size)
+
+        points_list = set()
+        for idx, geo in enumerate(geometry_1):
+            if geo.is_empty:
+                continue
+
+            for s_idx in index.near(geo, size):
+                # each pair of polygons of the same list is measured once
+                if ids_1 is not None and ids_2[s_idx] <= ids_1[idx]:
+                    continue
+
+                s_geo = geometry_2[s_idx]
+                if s_geo.is_empty:
+                    continue
 
-        min_dict = {}
-        for geo in total_geo_grb_1:
-            for s_geo in total_geo_grb_3:
-                # minimize the number of distances by not taking into considerations those that are too small
                 dist = geo.distance(s_geo)
-                if float(dist) < float(size):
+                if float(dist) < size:
                     loc_1, loc_2 = nearest_points(geo, s_geo)
 
                     dx = loc_1.x - loc_2.x
                     dy = loc_1.y - loc_2.y
                     loc = min(loc_1.x, loc_2.x) + (abs(dx) / 2), min(loc_1.y, loc_2.y) + (abs(dy) / 2)
+                    points_list.add(loc)
+        return points_list
 
-                    if dist in min_dict:
-                        min_dict[dist].append(loc)
-                    else:
-                        min_dict[dist] = [loc]
+    @staticmethod
+    def prepare_clearance(prepare, args, filename):
+        """
+        The first task of a ClearanceCheck: collects the polygons to check and saves them for the tile tasks.
+
+        :param prepare:     RulesCheck.inside_clearance_geometry or RulesCheck.gerber_clearance_geometry
+        :param args:        arguments of prepare
+        :param filename:    the file for the polygons
+        :return:            the message of prepare when there is nothing to check, else a tuple (name, number of
+                            polygons, bounds of the polygons); the number is None if there is only one polygon
+        """
+        prepared = prepare(*args)
+        if isinstance(prepared, str):
+            return prepared
+
+        name, geometry_1, geometry_2 = prepared
+        if geometry_1 is None:
+            return name, None, None
+
+        # written under a temporary name so the tile tasks never read a partial file
+        temp_name = '%s.%d' % (filename, os.getpid())
+        with open(temp_name, 'wb') as f:
+            pickle.dump((geometry_1, geometry_2), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_name, filename)
+
+        if not geometry_1:
+            return name, 0, None
+        bounds = [geo.bounds for geo in geometry_1]
+        return name, len(geometry_1), (min(b[0] for b in bounds), min(b[1] for b in bounds),
+                                       max(b[2] for b in bounds), max(b[3] for b in bounds))
 
-        points_list = set()
-        for dist in min_dict.keys():
-            for location in min_dict[dist]:
-                points_list.add(location)
+    @staticmethod
+    def clearance_tiles(bounds, tiles):
+        """
+        Splits a clearance check in a grid of spatial tiles, each one measured by a clearance_tile() task.
+
+        :param bounds:  the bounds of the checked polygons
+        :param tiles:   the number of tiles wanted
+        :return:        list of the (grid, cell) arguments of the clearance_tile() task of each tile
+        """
+        n = int(ceil(sqrt(tiles))) if tiles > 1 else 1
+        if n < 2 or bounds is None:
+            return [(None, None)]
+
+        minx, miny, maxx, maxy = bounds
+        grid = (minx, miny, (maxx - minx) / n or 1.0, (maxy - miny) / n or 1.0, n)
+        return [(grid, (col, row)) for col in range(n) for row in range(n)]
 
-        name_list = []
-        if gerber_1:
-            name_list.append(gerber_1['name'])
-        if gerber_2:
-            name_list.append(gerber_2['name'])
-        if gerber_3:
-            name_list.append(gerber_3['name'])
+    @staticmethod
+    def clearance_tile(filename, size, grid=None, cell=None):
+        """
+        A tile task of a ClearanceCheck. Each polygon of the first list belongs to the tile holding the center of its
+        bounds and it is measured only against the polygons found near the polygons of its tile.
+
+        :param filename:    the file of the polygons saved by prepare_clearance()
+        :param size:        the rule distance
+        :param grid:        tuple (minx, miny, tile width, tile height, number of tiles on each side) or None to
+                            measure all the polygons
+        :param cell:        tuple (column, row) of the tile in the grid
+        :return:            set of the locations of the violations, as returned by clearance_violations()
+        """
+        geometry_1, geometry_2, index, bounds = load_clearance_polygons(filename)
+        if grid is None:
+            return RulesCheck.clearance_violations(geometry_1, geometry_2, size)
+
+        minx, miny, width, height, n = grid
+        cols = np.minimum((((bounds[:, 0] + bounds[:, 2]) / 2 - minx) / width).astype(int), n - 1)
+        rows = np.minimum((((bounds[:, 1] + bounds[:, 3]) / 2 - miny) / height).astype(int), n - 1)
+        owned = np.flatnonzero((cols == cell[0]) & (rows == cell[1]))
+        if len(owned) == 0:
+            return set()
+
+        owned_bounds = bounds[owned]
+        envelope = box(owned_bounds[:, 0].min(), owned_bounds[:, 1].min(),
+                       owned_bounds[:, 2].max(), owned_bounds[:, 3].max())
+        near = index.near(envelope, float(size))
+        if not near:
+            return set()
+
+        owned = owned.tolist()
+        others = geometry_1 if geometry_2 is None else geometry_2
+        owned_geo = [geometry_1[i] for i in owned]
+        near_geo = [others[i] for i in near]
+        log.debug("RulesCheck.clearance_tile(). Tile: %s" % str(cell))
+        if geometry_2 is None:
+            return RulesCheck.clearance_violations(owned_geo, near_geo, size, owned, near)
+        return RulesCheck.clearance_violations(owned_geo, near_geo, size)
 
-        obj_violations['name'] = name_list
-        obj_violations['points'] = list(points_list)
-        violations.append(deepcopy(obj_violations))
+    @staticmethod
+    def clearance_result(rule, name, points):
+        """
+        :param rule:    the rule title
+        :param name:    the name of the checked object or the list of names of the checked objects
+        :param points:  list of the locations of the violations
+        :return:        the result of a clearance rule, as used by the report
+        """
+        obj_violations = {
+            'name': name,
+            'points': points
+        }
+        return rule, [obj_violations]
 
-        return rule_title, violations
+    @staticmethod
+    def check_inside_gerber_clearance(gerber_obj, size, rule):
+        log.debug("RulesCheck.check_inside_gerber_clearance()")
+
+        prepared = RulesCheck.inside_clearance_geometry(gerber_obj)
+        if isinstance(prepared, str):
+            return prepared
+
+        name, total_geo, __ = prepared
+        if total_geo is None:
+            return RulesCheck.clearance_result(rule, name, ['Failed. Only one polygon.'])
+
+        points_list = RulesCheck.clearance_violations(total_geo, None, size)
+        return RulesCheck.clearance_result(rule, name, list(points_list))
+
+    @staticmethod
+    def check_gerber_clearance(gerber_list, size, rule):
+        log.debug("RulesCheck.check_gerber_clearance()")
+
+        prepared = RulesCheck.gerber_clearance_geometry(gerber_list)
+        if isinstance(prepared, str):
+            return prepared
+
+        name_list, total_geo_grb_1, total_geo_grb_3 = prepared
+        points_list = RulesCheck.clearance_violations(total_geo_grb_1, total_geo_grb_3, size)
+        return RulesCheck.clearance_result(rule, name_list, list(points_list))
 
     @staticmethod
     def check_holes_size(elements, size):
         log.debug("RulesCheck.check_holes_size()")
+        elements = [load_checked_object(elem) for elem in elements]
 
         rule = _("Hole Size")
 
         violations = []
-        obj_violations = {}
-        obj_violations.update({
-            'name': '',
-            'dia': list()
-        })
-
         for elem in elements:
-            dia_list = []
-
-            name = elem['name']
-            for tool in elem['tools']:
-                tool_dia = float('%.*f' % (4, float(elem['tools'][tool]['tooldia'])))
-                if tool_dia < float(size):
-                    dia_list.append(tool_dia)
-            obj_violations['name'] = name
-            obj_violations['dia'] = dia_list
-            violations.append(deepcopy(obj_violations))
+            dias = np.array([float('%.*f' % (4, float(tool['tooldia']))) for tool in elem['tools'].values()])
+            violations.append({
+                'name': elem['name'],
+                'dia': dias[dias < float(size)].tolist()
+            })
 
         return rule, violations
 
     @staticmethod
-    def check_holes_clearance(elements, size):
-        log.debug("RulesCheck.check_holes_clearance()")
-        rule = _("Hole to Hole Clearance")
-
-        violations = []
-        obj_violations = {}
-        obj_violations.update({
-            'name': '',
-            'points': list()
-        })
-
-        total_geo = []
+    def drill_holes(elements):
+        """
+        Collects the holes of Excellon objects. A hole is the shape swept by a circle along a segment; the segment of a
+        drill hole has the same start and stop point.
+
+        :param elements:    list of dicts with the 'name' and the 'tools' of Excellon objects
+        :return:            tuple of three arrays: the (N, 2) start and the (N, 2) stop points of the segments and the
+                            (N) radius of each hole
+        """
+        starts = []
+        stops = []
+        radii = []
         for elem in elements:
-            for tool in elem['tools']:
-                if 'solid_geometry' in elem['tools'][tool]:
-                    geometry = elem['tools'][tool]['solid_geometry']
-                    for geo in geometry:
-                        total_geo.append(geo)
+            for tool in elem['tools'].values():
+                radius = float(tool['tooldia']) / 2.0
+                drills = [(pt.x, pt.y) for pt in tool.get('drills', [])]
+                slots = tool.get('slots', [])
 
-        min_dict = {}
-        idx = 1
-        for geo in total_geo:
-            for s_geo in total_geo[idx:]:
+                starts += drills
+                stops += drills
+                starts += [(slot[0].x, slot[0].y) for slot in slots]
+                stops += [(slot[1].x, slot[1].y) for slot in slots]
+                radii += [radius] * (len(drills) + len(slots))
 
-                # minimize the number of distances by not taking into considerations those that are too small
-                dist = geo.distance(s_geo)
-                loc_1, loc_2 = nearest_points(geo, s_geo)
-
-                dx = loc_1.x - loc_2.x
-                dy = loc_1.y - loc_2.y
-                loc = min(loc_1.x, loc_2.x) + (abs(dx) / 2), min(loc_1.y, loc_2.y) + (abs(dy) / 2)
+        return np.array(starts, dtype=float).reshape(-1, 2), np.array(stops, dtype=float).reshape(-1, 2), \
+            np.array(radii, dtype=float)
 
-                if dist in min_dict:
-                    min_dict[dist].append(loc)
-                else:
-                    min_dict[dist] = [loc]
-            idx += 1
+    @staticmethod
+    def segments_nearest_points(a_0, a_1, b_0, b_1):
+        """
+        Finds the nearest points of pairs of segments (the algorithm of C. Ericson, Real-Time Collision Detection,
+        5.1.9), for all the pairs at once.
+
+        :param a_0:     (N, 2) array with the start points of the first segment of each pair
+        :param a_1:     (N, 2) array with the stop points of the first segment of each pair
+        :param b_0:     (N, 2) array with the start points of the second segment of each pair
+        :param b_1:     (N, 2) array with the stop points of the second segment of each pair
+        :return:        tuple of two (N, 2) arrays: the nearest point on the first and on the second segment
+        """
+        d_1 = a_1 - a_0
+        d_2 = b_1 - b_0
+        r = a_0 - b_0
+        a = np.einsum('ij,ij->i', d_1, d_1)
+        e = np.einsum('ij,ij->i', d_2, d_2)
+        f = np.einsum('ij,ij->i', d_2, r)
+        c = np.einsum('ij,ij->i', d_1, r)
+        b = np.einsum('ij,ij->i', d_1, d_2)
+
+        def ratio(num, den):
+            return np.divide(num, den, out=np.zeros_like(num), where=den > 0.0)
+
+        # the parameter of the nearest point on each segment; zero on a segment that is a point
+        denom = a * e - b * b
+        s = np.clip(ratio(b * f - c * e, denom), 0.0, 1.0)
+        t = ratio(b * s + f, e)
+        s = np.where(t < 0.0, np.clip(ratio(-c, a), 0.0, 1.0), np.where(t > 1.0, np.clip(ratio(b - c, a), 0.0, 1.0), s))
+        t = np.clip(t, 0.0, 1.0)
+        # the second segment is a point
+        s = np.where(e > 0.0, s, np.clip(ratio(-c, a), 0.0, 1.0))
+
+        return a_0 + d_1 * s[:, None], b_0 + d_2 * t[:, None]
 
-        points_list = set()
-        for dist in min_dict.keys():
-            if float(dist) < size:
-                for location in min_dict[dist]:
-                    points_list.add(location)
+    @staticmethod
+    def near_holes(starts, stops, radii, size):
+        """
+        Finds the pairs of holes that may be closer than the rule distance.
+
+        The round drills up to LARGE_DRILL_RATIO times the median drill are searched in a grid whose cells are sized
+        from the largest of them. The slots and the larger drills are searched one by one against the bounds of all the
+        holes, sorted by their left side, so a long slot or a mounting hole does not make the cells larger for all the
+        holes.
+
+        :param starts:  (N, 2) array with the start points of the segments of the holes
+        :param stops:   (N, 2) array with the stop points of the segments of the holes
+        :param radii:   (N) array with the radius of each hole
+        :param size:    the rule distance
+        :return:        tuple of two int arrays with the indexes of the holes of each pair
+        """
+        small = np.all(starts == stops, axis=1)
+        if small.any():
+            small &= radii <= LARGE_DRILL_RATIO * np.median(radii[small])
+
+        pairs_1 = []
+        pairs_2 = []
+        small_idx = np.flatnonzero(small)
+        if len(small_idx) > 1:
+            # two drills may be closer than the rule distance only if their centers are closer than this
+            reach = 2.0 * radii[small_idx].max() + size
+            first, second = PointGrid(starts[small_idx], cell=reach).pairs_within(reach)
+            pairs_1.append(small_idx[first])
+            pairs_2.append(small_idx[second])
+
+        large_idx = np.flatnonzero(~small)
+        if len(large_idx):
+            low = np.minimum(starts, stops) - radii[:, None]
+            high = np.maximum(starts, stops) + radii[:, None]
+            # the holes sorted by the left side of their bounds: the holes whose bounds may be closer than the rule
+            # distance to the bounds of a hole are a run of this order, found with a binary search
+            by_left = np.argsort(low[:, 0], kind='stable')
+            left_sorted = low[by_left, 0]
+            widest = float((high[:, 0] - low[:, 0]).max())
+            for idx in large_idx.tolist():
+                run_start = np.searchsorted(left_sorted, low[idx, 0] - size - widest, side='left')
+                run_stop = np.searchsorted(left_sorted, high[idx, 0] + size, side='right')
+                near = by_left[run_start:run_stop]
+                near = near[(high[near, 0] >= low[idx, 0] - size) &
+                            (low[near, 1] <= high[idx, 1] + size) & (high[near, 1] >= low[idx, 1] - size)]
+                # a pair of two large holes is found from both of them; only the one from the first hole is kept
+                near = near[(near != idx) & (small[near] | (near > idx))]
+                pairs_1.append(np.full(len(near), idx, dtype=np.int64))
+                pairs_2.append(near)
+
+        if not pairs_1:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        return np.concatenate(pairs_1), np.concatenate(pairs_2)
 
-        name_list = []
-        for elem in elements:
-            name_list.append(elem['name'])
+    @staticmethod
+    def check_holes_clearance(elements, size):
+        log.debug("RulesCheck.check_holes_clearance()")
+        elements = [load_checked_object(elem) for elem in elements]
+        rule = _("Hole to Hole Clearance")
 
-        obj_violations['name'] = name_list
-        obj_violations['points'] = list(points_list)
-        violations.append(deepcopy(obj_violations))
+        size = float(size)
+        starts, stops, radii = RulesCheck.drill_holes(elements)
 
-        return rule, violations
+        points_list = set()
+        if len(radii) > 1:
+            first, second = RulesCheck.near_holes(starts, stops, radii, size)
+
+            pt_1, pt_2 = RulesCheck.segments_nearest_points(starts[first], stops[first], starts[second], stops[second])
+            axis = pt_2 - pt_1
+            axis_len = np.hypot(*axis.T)
+            dist = np.maximum(axis_len - radii[first] - radii[second], 0.0)
+
+            found = dist < size
+            axis = axis[found] / np.where(axis_len[found] > 0.0, axis_len[found], 1.0)[:, None]
+            # the middle of the shortest line between the holes
+            loc_1 = pt_1[found] + axis * radii[first][found][:, None]
+            loc_2 = pt_2[found] - axis * radii[second][found][:, None]
+            points_list = set(map(tuple, ((loc_1 + loc_2) / 2.0).tolist()))
+
+        obj_violations = {
+            'name': [elem['name'] for elem in elements],
+            'points': list(points_list)
+        }
+        return rule, [obj_violations]
 
     @staticmethod
     def check_traces_size(elements, size):
         log.debug("RulesCheck.check_traces_size()")
+        elements = [load_checked_object(elem) for elem in elements]
 
         rule = _("Trace Size")
 
@@ -464,6 +1005,7 @@ class RulesCheck(AppTool):
     @staticmethod
     def check_gerber_annular_ring(obj_list, size, rule):
         rule_title = rule
+        obj_list = [load_checked_object(obj) for obj in obj_list]
 
         violations = []
         obj_violations = {}
@@ -617,8 +1159,51 @@ class RulesCheck(AppTool):
         violations.append(deepcopy(obj_violations))
         return rule_title, violations
 
+    @staticmethod
+    def rule_key(arg):
+        """
+        :param arg: argument of a rule function
+        :return:    hashable key of the argument; a checked object is keyed by its name and its version
+        """
+        if isinstance(arg, dict):
+            if 'version' in arg:
+                return 'object', arg['name'], arg['version']
+            return tuple(sorted((k, RulesCheck.rule_key(v)) for k, v in arg.items()))
+        if isinstance(arg, (list, tuple)):
+            return tuple(RulesCheck.rule_key(a) for a in arg)
+        return arg
+
+    def submit(self, function, args):
+        """
+        Starts a rule in the process pool, unless its result is in the cache of the last run.
+
+        :param function:    the rule function
+        :param args:        tuple of the arguments of the rule function
+        :return:            None
+        """
+        key = (function.__name__, self.rule_key(args))
+
+        if key in self.results_cache:
+            task = CachedResult(self.results_cache[key])
+        elif function is self.check_inside_gerber_clearance:
+            obj, size, rule = args
+            filename = self.checked_objects.derived_file(self.inside_clearance_geometry.__name__, [obj])
+            task = ClearanceCheck(self.pool, self.inside_clearance_geometry, args=(obj, ), size=size, rule=rule,
+                                  filename=filename)
+        elif function is self.check_gerber_clearance:
+            obj_list, size, rule = args
+            filename = self.checked_objects.derived_file(self.gerber_clearance_geometry.__name__, obj_list)
+            task = ClearanceCheck(self.pool, self.gerber_clearance_geometry, args=(obj_list, ), size=size, rule=rule,
+                                  filename=filename)
+        else:
+            task = self.pool.apply_async(function, args=args)
+
+        self.results.append((key, task))
+
     def execute(self):
         self.results = []
+        self.report_obj = None
+        self.checked_objects.begin()
 
         log.debug("RuleCheck() executing")
 
@@ -631,22 +1216,16 @@ class RulesCheck(AppTool):
                 copper_list = []
                 copper_name_1 = self.ui.copper_t_object.currentText()
                 if copper_name_1 != '' and self.ui.copper_t_cb.get_value():
-                    elem_dict = {
-                        'name': deepcopy(copper_name_1),
-                        'apertures': deepcopy(app_obj.collection.get_by_name(copper_name_1).apertures)
-                    }
+                    elem_dict = self.checked_objects.add(app_obj.collection.get_by_name(copper_name_1))
                     copper_list.append(elem_dict)
 
                 copper_name_2 = self.ui.copper_b_object.currentText()
                 if copper_name_2 != '' and self.ui.copper_b_cb.get_value():
-                    elem_dict = {
-                        'name': deepcopy(copper_name_2),
-                        'apertures': deepcopy(app_obj.collection.get_by_name(copper_name_2).apertures)
-                    }
+                    elem_dict = self.checked_objects.add(app_obj.collection.get_by_name(copper_name_2))
                     copper_list.append(elem_dict)
 
                 trace_size = float(self.ui.trace_size_entry.get_value())
-                self.results.append(self.pool.apply_async(self.check_traces_size, args=(copper_list, trace_size)))
+                self.submit(self.check_traces_size, (copper_list, trace_size))
 
             # RULE: Check Copper to Copper Clearance
             if self.ui.clearance_copper2copper_cb.get_value():
@@ -665,24 +1244,18 @@ class RulesCheck(AppTool):
                     copper_t_dict = {}
 
                     if copper_t_obj != '':
-                        copper_t_dict['name'] = deepcopy(copper_t_obj)
-                        copper_t_dict['apertures'] = deepcopy(app_obj.collection.get_by_name(copper_t_obj).apertures)
+                        copper_t_dict = self.checked_objects.add(app_obj.collection.get_by_name(copper_t_obj))
 
-                        self.results.append(self.pool.apply_async(self.check_inside_gerber_clearance,
-                                                                  args=(copper_t_dict,
-                                                                        copper_copper_clearance,
-                                                                        _("TOP -> Copper to Copper clearance"))))
+                        self.submit(self.check_inside_gerber_clearance, (copper_t_dict, copper_copper_clearance,
+                                                                         _("TOP -> Copper to Copper clearance")))
                 if self.ui.copper_b_cb.get_value():
                     copper_b_obj = self.ui.copper_b_object.currentText()
                     copper_b_dict = {}
                     if copper_b_obj != '':
-                        copper_b_dict['name'] = deepcopy(copper_b_obj)
-                        copper_b_dict['apertures'] = deepcopy(app_obj.collection.get_by_name(copper_b_obj).apertures)
+                        copper_b_dict = self.checked_objects.add(app_obj.collection.get_by_name(copper_b_obj))
 
-                        self.results.append(self.pool.apply_async(self.check_inside_gerber_clearance,
-                                                                  args=(copper_b_dict,
-                                                                        copper_copper_clearance,
-                                                                        _("BOTTOM -> Copper to Copper clearance"))))
+                        self.submit(self.check_inside_gerber_clearance, (copper_b_dict, copper_copper_clearance,
+                                                                         _("BOTTOM -> Copper to Copper clearance")))
 
                 if self.ui.copper_t_cb.get_value() is False and self.ui.copper_b_cb.get_value() is False:
                     app_obj.inform.emit('[ERROR_NOTCL] %s. %s' % (
@@ -698,18 +1271,15 @@ class RulesCheck(AppTool):
 
                 copper_top = self.ui.copper_t_object.currentText()
                 if copper_top != '' and self.ui.copper_t_cb.get_value():
-                    top_dict['name'] = deepcopy(copper_top)
-                    top_dict['apertures'] = deepcopy(app_obj.collection.get_by_name(copper_top).apertures)
+                    top_dict = self.checked_objects.add(app_obj.collection.get_by_name(copper_top))
 
                 copper_bottom = self.ui.copper_b_object.currentText()
                 if copper_bottom != '' and self.ui.copper_b_cb.get_value():
-                    bottom_dict['name'] = deepcopy(copper_bottom)
-                    bottom_dict['apertures'] = deepcopy(app_obj.collection.get_by_name(copper_bottom).apertures)
+                    bottom_dict = self.checked_objects.add(app_obj.collection.get_by_name(copper_bottom))
 
                 copper_outline = self.ui.outline_object.currentText()
                 if copper_outline != '' and self.ui.out_cb.get_value():
-                    outline_dict['name'] = deepcopy(copper_outline)
-                    outline_dict['apertures'] = deepcopy(app_obj.collection.get_by_name(copper_outline).apertures)
+                    outline_dict = self.checked_objects.add(app_obj.collection.get_by_name(copper_outline))
 
                 try:
                     copper_outline_clearance = float(self.ui.clearance_copper2ol_entry.get_value())
@@ -739,10 +1309,8 @@ class RulesCheck(AppTool):
                         _("Outline Gerber object presence is mandatory for this rule but it is not selected.")))
                     return
 
-                self.results.append(self.pool.apply_async(self.check_gerber_clearance,
-                                                          args=(objs,
-                                                                copper_outline_clearance,
-                                                                _("Copper to Outline clearance"))))
+                self.submit(self.check_gerber_clearance, (objs, copper_outline_clearance,
+                                                          _("Copper to Outline clearance")))
 
             # RULE: Check Silk to Silk Clearance
             if self.ui.clearance_silk2silk_cb.get_value():
@@ -760,23 +1328,17 @@ class RulesCheck(AppTool):
                 if self.ss_t_cb.get_value():
                     silk_obj = self.ui.ss_t_object.currentText()
                     if silk_obj != '':
-                        silk_dict['name'] = deepcopy(silk_obj)
-                        silk_dict['apertures'] = deepcopy(app_obj.collection.get_by_name(silk_obj).apertures)
+                        silk_dict = self.checked_objects.add(app_obj.collection.get_by_name(silk_obj))
 
-                        self.results.append(self.pool.apply_async(self.check_inside_gerber_clearance,
-                                                                  args=(silk_dict,
-                                                                        silk_silk_clearance,
-                                                                        _("TOP -> Silk to Silk clearance"))))
+                        self.submit(self.check_inside_gerber_clearance, (silk_dict, silk_silk_clearance,
+                                                                         _("TOP -> Silk to Silk clearance")))
                 if self.ui.ss_b_cb.get_value():
                     silk_obj = self.ui.ss_b_object.currentText()
                     if silk_obj != '':
-                        silk_dict['name'] = deepcopy(silk_obj)
-                        silk_dict['apertures'] = deepcopy(app_obj.collection.get_by_name(silk_obj).apertures)
+                        silk_dict = self.checked_objects.add(app_obj.collection.get_by_name(silk_obj))
 
-                        self.results.append(self.pool.apply_async(self.check_inside_gerber_clearance,
-                                                                  args=(silk_dict,
-                                                                        silk_silk_clearance,
-                                                                        _("BOTTOM -> Silk to Silk clearance"))))
+                        self.submit(self.check_inside_gerber_clearance, (silk_dict, silk_silk_clearance,
+                                                                         _("BOTTOM -> Silk to Silk clearance")))
 
                 if self.ui.ss_t_cb.get_value() is False and self.ui.ss_b_cb.get_value() is False:
                     app_obj.inform.emit('[ERROR_NOTCL] %s. %s' % (
@@ -798,26 +1360,22 @@ class RulesCheck(AppTool):
 
                 silk_top = self.ui.ss_t_object.currentText()
                 if silk_top != '' and self.ui.ss_t_cb.get_value():
-                    silk_t_dict['name'] = deepcopy(silk_top)
-                    silk_t_dict['apertures'] = deepcopy(app_obj.collection.get_by_name(silk_top).apertures)
+                    silk_t_dict = self.checked_objects.add(app_obj.collection.get_by_name(silk_top))
                     top_ss = True
 
                 silk_bottom = self.ui.ss_b_object.currentText()
                 if silk_bottom != '' and self.ui.ss_b_cb.get_value():
-                    silk_b_dict['name'] = deepcopy(silk_bottom)
-                    silk_b_dict['apertures'] = deepcopy(app_obj.collection.get_by_name(silk_bottom).apertures)
+                    silk_b_dict = self.checked_objects.add(app_obj.collection.get_by_name(silk_bottom))
                     bottom_ss = True
 
                 sm_top = self.ui.sm_t_object.currentText()
                 if sm_top != '' and self.ui.sm_t_cb.get_value():
-                    sm_t_dict['name'] = deepcopy(sm_top)
-                    sm_t_dict['apertures'] = deepcopy(app_obj.collection.get_by_name(sm_top).apertures)
+                    sm_t_dict = self.checked_objects.add(app_obj.collection.get_by_name(sm_top))
                     top_sm = True
 
                 sm_bottom = self.ui.sm_b_object.currentText()
                 if sm_bottom != '' and self.ui.sm_b_cb.get_value():
-                    sm_b_dict['name'] = deepcopy(sm_bottom)
-                    sm_b_dict['apertures'] = deepcopy(app_obj.collection.get_by_name(sm_bottom).apertures)
+                    sm_b_dict = self.checked_objects.add(app_obj.collection.get_by_name(sm_bottom))
                     bottom_sm = True
 
                 try:
@@ -837,16 +1395,12 @@ class RulesCheck(AppTool):
 
                 if top_ss is True and top_sm is True:
                     objs = [silk_t_dict, sm_t_dict]
-                    self.results.append(self.pool.apply_async(self.check_gerber_clearance,
-                                                              args=(objs,
-                                                                    silk_sm_clearance,
-                                                                    _("TOP -> Silk to Solder Mask Clearance"))))
+                    self.submit(self.check_gerber_clearance, (objs, silk_sm_clearance,
+                                                              _("TOP -> Silk to Solder Mask Clearance")))
                 elif bottom_ss is True and bottom_sm is True:
                     objs = [silk_b_dict, sm_b_dict]
-                    self.results.append(self.pool.apply_async(self.check_gerber_clearance,
-                                                              args=(objs,
-                                                                    silk_sm_clearance,
-                                                                    _("BOTTOM -> Silk to Solder Mask Clearance"))))
+                    self.submit(self.check_gerber_clearance, (objs, silk_sm_clearance,
+                                                              _("BOTTOM -> Silk to Solder Mask Clearance")))
                 else:
                     app_obj.inform.emit('[ERROR_NOTCL] %s. %s' % (
                         _("Silk to Solder Mask Clearance"),
@@ -861,18 +1415,15 @@ class RulesCheck(AppTool):
 
                 silk_top = self.ui.ss_t_object.currentText()
                 if silk_top != '' and self.ui.ss_t_cb.get_value():
-                    top_dict['name'] = deepcopy(silk_top)
-                    top_dict['apertures'] = deepcopy(app_obj.collection.get_by_name(silk_top).apertures)
+                    top_dict = self.checked_objects.add(app_obj.collection.get_by_name(silk_top))
 
                 silk_bottom = self.ui.ss_b_object.currentText()
                 if silk_bottom != '' and self.ui.ss_b_cb.get_value():
-                    bottom_dict['name'] = deepcopy(silk_bottom)
-                    bottom_dict['apertures'] = deepcopy(app_obj.collection.get_by_name(silk_bottom).apertures)
+                    bottom_dict = self.checked_objects.add(app_obj.collection.get_by_name(silk_bottom))
 
                 copper_outline = self.ui.outline_object.currentText()
                 if copper_outline != '' and self.ui.out_cb.get_value():
-                    outline_dict['name'] = deepcopy(copper_outline)
-                    outline_dict['apertures'] = deepcopy(app_obj.collection.get_by_name(copper_outline).apertures)
+                    outline_dict = self.checked_objects.add(app_obj.collection.get_by_name(copper_outline))
 
                 try:
                     copper_outline_clearance = float(self.ui.clearance_copper2ol_entry.get_value())
@@ -903,10 +1454,8 @@ class RulesCheck(AppTool):
                         _("Outline Gerber object presence is mandatory for this rule but it is not selected.")))
                     return
 
-                self.results.append(self.pool.apply_async(self.check_gerber_clearance,
-                                                          args=(objs,
-                                                                copper_outline_clearance,
-                                                                _("Silk to Outline Clearance"))))
+                self.submit(self.check_gerber_clearance, (objs, copper_outline_clearance,
+                                                          _("Silk to Outline Clearance")))
 
             # RULE: Check Minimum Solder Mask Sliver
             if self.ui.clearance_silk2silk_cb.get_value():
@@ -924,23 +1473,17 @@ class RulesCheck(AppTool):
                 if self.ui.sm_t_cb.get_value():
                     solder_obj = self.ui.sm_t_object.currentText()
                     if solder_obj != '':
-                        sm_dict['name'] = deepcopy(solder_obj)
-                        sm_dict['apertures'] = deepcopy(app_obj.collection.get_by_name(solder_obj).apertures)
+                        sm_dict = self.checked_objects.add(app_obj.collection.get_by_name(solder_obj))
 
-                        self.results.append(self.pool.apply_async(self.check_inside_gerber_clearance,
-                                                                  args=(sm_dict,
-                                                                        sm_sm_clearance,
-                                                                        _("TOP -> Minimum Solder Mask Sliver"))))
+                        self.submit(self.check_inside_gerber_clearance, (sm_dict, sm_sm_clearance,
+                                                                         _("TOP -> Minimum Solder Mask Sliver")))
                 if self.ui.sm_b_cb.get_value():
                     solder_obj = self.ui.sm_b_object.currentText()
                     if solder_obj != '':
-                        sm_dict['name'] = deepcopy(solder_obj)
-                        sm_dict['apertures'] = deepcopy(app_obj.collection.get_by_name(solder_obj).apertures)
+                        sm_dict = self.checked_objects.add(app_obj.collection.get_by_name(solder_obj))
 
-                        self.results.append(self.pool.apply_async(self.check_inside_gerber_clearance,
-                                                                  args=(sm_dict,
-                                                                        sm_sm_clearance,
-                                                                        _("BOTTOM -> Minimum Solder Mask Sliver"))))
+                        self.submit(self.check_inside_gerber_clearance, (sm_dict, sm_sm_clearance,
+                                                                         _("BOTTOM -> Minimum Solder Mask Sliver")))
 
                 if self.ui.sm_t_cb.get_value() is False and self.ui.sm_b_cb.get_value() is False:
                     app_obj.inform.emit('[ERROR_NOTCL] %s. %s' % (
@@ -957,25 +1500,19 @@ class RulesCheck(AppTool):
 
                 copper_top = self.ui.copper_t_object.currentText()
                 if copper_top != '' and self.ui.copper_t_cb.get_value():
-                    top_dict['name'] = deepcopy(copper_top)
-                    top_dict['apertures'] = deepcopy(app_obj.collection.get_by_name(copper_top).apertures)
+                    top_dict = self.checked_objects.add(app_obj.collection.get_by_name(copper_top))
 
                 copper_bottom = self.ui.copper_b_object.currentText()
                 if copper_bottom != '' and self.ui.copper_b_cb.get_value():
-                    bottom_dict['name'] = deepcopy(copper_bottom)
-                    bottom_dict['apertures'] = deepcopy(app_obj.collection.get_by_name(copper_bottom).apertures)
+                    bottom_dict = self.checked_objects.add(app_obj.collection.get_by_name(copper_bottom))
 
                 excellon_1 = self.ui.e1_object.currentText()
                 if excellon_1 != '' and self.ui.e1_cb.get_value():
-                    exc_1_dict['name'] = deepcopy(excellon_1)
-                    exc_1_dict['tools'] = deepcopy(
-                        app_obj.collection.get_by_name(excellon_1).tools)
+                    exc_1_dict = self.checked_objects.add(app_obj.collection.get_by_name(excellon_1))
 
                 excellon_2 = self.ui.e2_object.currentText()
                 if excellon_2 != '' and self.ui.e2_cb.get_value():
-                    exc_2_dict['name'] = deepcopy(excellon_2)
-                    exc_2_dict['tools'] = deepcopy(
-                        app_obj.collection.get_by_name(excellon_2).tools)
+                    exc_2_dict = self.checked_objects.add(app_obj.collection.get_by_name(excellon_2))
 
                 try:
                     ring_val = float(self.ui.ring_integrity_entry.get_value())
@@ -1008,131 +1545,183 @@ class RulesCheck(AppTool):
                         _("Excellon object presence is mandatory for this rule but none is selected.")))
                     return
 
-                self.results.append(self.pool.apply_async(self.check_gerber_annular_ring,
-                                                          args=(objs,
-                                                                ring_val,
-                                                                _("Minimum Annular Ring"))))
+                self.submit(self.check_gerber_annular_ring, (objs, ring_val, _("Minimum Annular Ring")))
 
             # RULE: Check Hole to Hole Clearance
             if self.ui.clearance_d2d_cb.get_value():
                 exc_list = []
                 exc_name_1 = self.ui.e1_object.currentText()
                 if exc_name_1 != '' and self.ui.e1_cb.get_value():
-                    elem_dict = {
-                        'name': deepcopy(exc_name_1),
-                        'tools': deepcopy(app_obj.collection.get_by_name(exc_name_1).tools)
-                    }
+                    elem_dict = self.checked_objects.add(app_obj.collection.get_by_name(exc_name_1))
                     exc_list.append(elem_dict)
 
                 exc_name_2 = self.ui.e2_object.currentText()
                 if exc_name_2 != '' and self.ui.e2_cb.get_value():
-                    elem_dict = {
-                        'name': deepcopy(exc_name_2),
-                        'tools': deepcopy(app_obj.collection.get_by_name(exc_name_2).tools)
-                    }
+                    elem_dict = self.checked_objects.add(app_obj.collection.get_by_name(exc_name_2))
                     exc_list.append(elem_dict)
 
                 hole_clearance = float(self.ui.clearance_d2d_entry.get_value())
-                self.results.append(self.pool.apply_async(self.check_holes_clearance, args=(exc_list, hole_clearance)))
+                self.submit(self.check_holes_clearance, (exc_list, hole_clearance))
 
             # RULE: Check Holes Size
             if self.ui.drill_size_cb.get_value():
                 exc_list = []
                 exc_name_1 = self.ui.e1_object.currentText()
                 if exc_name_1 != '' and self.ui.e1_cb.get_value():
-                    elem_dict = {
-                        'name': deepcopy(exc_name_1),
-                        'tools': deepcopy(app_obj.collection.get_by_name(exc_name_1).tools)
-                    }
+                    elem_dict = self.checked_objects.add(app_obj.collection.get_by_name(exc_name_1))
                     exc_list.append(elem_dict)
 
                 exc_name_2 = self.ui.e2_object.currentText()
                 if exc_name_2 != '' and self.ui.e2_cb.get_value():
-                    elem_dict = {
-                        'name': deepcopy(exc_name_2),
-                        'tools': deepcopy(app_obj.collection.get_by_name(exc_name_2).tools)
-                    }
+                    elem_dict = self.checked_objects.add(app_obj.collection.get_by_name(exc_name_2))
                     exc_list.append(elem_dict)
 
                 drill_size = float(self.ui.drill_size_entry.get_value())
-                self.results.append(self.pool.apply_async(self.check_holes_size, args=(exc_list, drill_size)))
+                self.submit(self.check_holes_size, (exc_list, drill_size))
+
+            def task_ready(task):
+                try:
+                    return task.ready()
+                except Exception as err:
+                    # the rule failed; task.get() raises the error again
+                    log.debug("RulesCheck.execute.worker_job() --> %s" % str(err))
+                    return True
+
+            # the results are collected as the rules finish and the report shows the section of each finished rule,
+            # in the rules order
+            sections = [None] * len(self.results)
+            self.report_updated.emit([], not sections)
+            results_cache = {}
+            pending = list(range(len(self.results)))
+            while pending:
+                done = [idx for idx in pending if task_ready(self.results[idx][1])]
+                if not done:
+                    time.sleep(0.05)
+                    continue
+
+                for idx in done:
+                    key, task = self.results[idx]
+                    try:
+                        result = task.get()
+                    except Exception as e:
+                        log.debug("RulesCheck.execute.worker_job() --> %s" % str(e))
+                        result = 'Failed. %s' % str(e)
+                    else:
+                        results_cache[key] = result
+                    sections[idx] = self.rule_report(result)
+                    pending.remove(idx)
+
+                progress = int(100 * (len(sections) - len(pending)) / len(sections))
+                app_obj.proc_container.update_view_text(' %d%%' % progress)
+                self.report_updated.emit([section for section in sections if section is not None], not pending)
 
-            output = []
-            for p in self.results:
-                output.append(p.get())
+            # only the results of this run are kept
+            self.results_cache = results_cache
+            self.checked_objects.finish()
 
-            self.tool_finished.emit(output)
+            app_obj.proc_container.update_view_text('')
             app_obj.proc_container.view.set_idle()
 
             log.debug("RuleCheck() finished")
 
         self.app.worker_task.emit({'fcn': worker_job, 'params': [self.app]})
 
-    def on_tool_finished(self, res):
-        def init(new_obj, app_obj):
-            txt = ''
-            for el in res:
-                txt += '<b>RULE NAME:</b>&nbsp;&nbsp;&nbsp;&nbsp;%s<BR>' % str(el[0]).upper()
-                if isinstance(el[1][0]['name'], list):
-                    for name in el[1][0]['name']:
-                        txt += 'File name: %s<BR>' % str(name)
-                else:
-                    txt += 'File name: %s<BR>' % str(el[1][0]['name'])
-
-                point_txt = ''
-                try:
-                    if el[1][0]['points']:
-                        txt += '{title}: <span style="color:{color};background-color:{h_color}"' \
-                               '>&nbsp;{status} </span>.<BR>'.format(title=_("STATUS"),
-                                                                     h_color='red',
-                                                                     color='white',
-                                                                     status=_("FAILED"))
-                        if 'Failed' in el[1][0]['points'][0]:
-                            point_txt = el[1][0]['points'][0]
-                        else:
-                            for pt in el[1][0]['points']:
-                                point_txt += '(%.*f, %.*f)' % (self.decimals, float(pt[0]), self.decimals, float(pt[1]))
-                                point_txt += ', '
-                        txt += 'Violations: %s<BR>' % str(point_txt)
-                    else:
-                        txt += '{title}: <span style="color:{color};background-color:{h_color}"' \
-                               '>&nbsp;{status} </span>.<BR>'.format(title=_("STATUS"),
-                                                                     h_color='green',
-                                                                     color='white',
-                                                                     status=_("PASSED"))
-                        txt += '%s<BR>' % _("Violations: There are no violations for the current rule.")
-                except KeyError:
-                    pass
+    def rule_report(self, el):
+        """
+        :param el:  the result of a rule
+        :return:    the report section of the rule (HTML)
+        """
+        if isinstance(el, str):
+            return '%s<BR><BR>' % el
+
+        txt = '<b>RULE NAME:</b>&nbsp;&nbsp;&nbsp;&nbsp;%s<BR>' % str(el[0]).upper()
+        if isinstance(el[1][0]['name'], list):
+            for name in el[1][0]['name']:
+                txt += 'File name: %s<BR>' % str(name)
+        else:
+            txt += 'File name: %s<BR>' % str(el[1][0]['name'])
 
-                try:
-                    if el[1][0]['dia']:
-                        txt += '{title}: <span style="color:{color};background-color:{h_color}"' \
-                               '>&nbsp;{status} </span>.<BR>'.format(title=_("STATUS"),
-                                                                     h_color='red',
-                                                                     color='white',
-                                                                     status=_("FAILED"))
-                        if 'Failed' in el[1][0]['dia']:
-                            point_txt = el[1][0]['dia']
-                        else:
-                            for pt in el[1][0]['dia']:
-                                point_txt += '%.*f' % (self.decimals, float(pt))
-                                point_txt += ', '
-                        txt += 'Violations: %s<BR>' % str(point_txt)
-                    else:
-                        txt += '{title}: <span style="color:{color};background-color:{h_color}"' \
-                               '>&nbsp;{status} </span>.<BR>'.format(title=_("STATUS"),
-                                                                     h_color='green',
-                                                                     color='white',
-                                                                     status=_("PASSED"))
-                        txt += '%s<BR>' % _("Violations: There are no violations for the current rule.")
-                except KeyError:
-                    pass
+        point_txt = ''
+        try:
+            if el[1][0]['points']:
+                txt += '{title}: <span style="color:{color};background-color:{h_color}"' \
+                       '>&nbsp;{status} </span>.<BR>'.format(title=_("STATUS"),
+                                                             h_color='red',
+                                                             color='white',
+                                                             status=_("FAILED"))
+                if 'Failed' in el[1][0]['points'][0]:
+                    point_txt = el[1][0]['points'][0]
+                else:
+                    for pt in el[1][0]['points']:
+                        point_txt += '(%.*f, %.*f)' % (self.decimals, float(pt[0]), self.decimals, float(pt[1]))
+                        point_txt += ', '
+                txt += 'Violations: %s<BR>' % str(point_txt)
+            else:
+                txt += '{title}: <span style="color:{color};background-color:{h_color}"' \
+                       '>&nbsp;{status} </span>.<BR>'.format(title=_("STATUS"),
+                                                             h_color='green',
+                                                             color='white',
+                                                             status=_("PASSED"))
+                txt += '%s<BR>' % _("Violations: There are no violations for the current rule.")
+        except KeyError:
+            pass
 
-                txt += '<BR><BR>'
-            new_obj.source_file = txt
-            new_obj.read_only = True
+        try:
+            if el[1][0]['dia']:
+                txt += '{title}: <span style="color:{color};background-color:{h_color}"' \
+                       '>&nbsp;{status} </span>.<BR>'.format(title=_("STATUS"),
+                                                             h_color='red',
+                                                             color='white',
+                                                             status=_("FAILED"))
+                if 'Failed' in el[1][0]['dia']:
+                    point_txt = el[1][0]['dia']
+                else:
+                    for pt in el[1][0]['dia']:
+                        point_txt += '%.*f' % (self.decimals, float(pt))
+                        point_txt += ', '
+                txt += 'Violations: %s<BR>' % str(point_txt)
+            else:
+                txt += '{title}: <span style="color:{color};background-color:{h_color}"' \
+                       '>&nbsp;{status} </span>.<BR>'.format(title=_("STATUS"),
+                                                             h_color='green',
+                                                             color='white',
+                                                             status=_("PASSED"))
+                txt += '%s<BR>' % _("Violations: There are no violations for the current rule.")
+        except KeyError:
+            pass
 
-        self.app.app_obj.new_object('document', name='Rules_check_results', initialize=init, plot=False)
+        txt += '<BR><BR>'
+        return txt
+
+    def on_report_updated(self, sections, finished):
+        """
+        Shows the report of the current run: the document object is made by the first update and its text is
+        replaced by the next ones.
+
+        :param sections:    the report sections of the finished rules, in the rules order
+        :param finished:    True if all the rules are finished
+        :return:            None
+        """
+        report = ''.join(sections)
+        if not finished:
+            report += '%s<BR>' % _("Working...")
+
+        if self.report_obj is None:
+            def init(new_obj, app_obj):
+                new_obj.source_file = report
+                new_obj.read_only = True
+
+            self.report_obj = self.app.app_obj.new_object('document', name='Rules_check_results', initialize=init,
+                                                          plot=False)
+            return
+
+        # the report is not updated anymore if its document was deleted
+        if self.report_obj == 'fail' or self.report_obj not in self.app.collection.get_list():
+            return
+
+        self.report_obj.source_file = report
+        if self.report_obj.document_editor_tab is not None:
+            self.report_obj.document_editor_tab.load_text(report, move_to_start=True, clear_text=True, as_html=True)
 
     def reset_fields(self):
         # self.object_combo.setRootModelIndex(self.app.collection.index(0, 0, QtCore.QModelIndex()))
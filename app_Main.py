@@ -67,7 +67,11 @@ from appObjects.AppObject import AppObject
 # FlatCAM Parsing files
 from appParsers.ParseExcellon import Excellon
 from appParsers.ParseGerber import Gerber
+from appParsers.ParseBatch import parse_source, apply_parsed
 from camlib import to_dict, dict2obj, ET, ParseError, Geometry, CNCjob
+from appCommon.ProjectArchive import is_chunked_project, read_chunked_project, write_chunked_project, \
+    read_json_project, write_json_project, atomic_write, VerificationError, ProjectJournal, read_journal, \
+    base_locations
 
 # FlatCAM appGUI
 from appGUI.PlotCanvas import *
@@ -200,6 +204,9 @@ class App(QtCore.QObject):
     # flag is True if saving action has been triggered
     save_in_progress = False
 
+    # the journal used by the autosave to save only the objects that changed (ProjectJournal instance)
+    project_journal = None
+
     # ###############################################################################################################
     # #######################################    APP Signals   ######################################################
     # ###############################################################################################################
@@ -790,7 +797,8 @@ class App(QtCore.QObject):
                                   'join_geometry', 'list_sys', 'milld', 'mills', 'milldrills', 'millslots',
                                   'mirror', 'ncc',
                                   'ncr', 'new', 'new_geometry', 'non_copper_regions', 'offset',
-                                  'open_dxf', 'open_excellon', 'open_gcode', 'open_gerber', 'open_project', 'open_svg',
+                                  'open_batch', 'open_dxf', 'open_excellon', 'open_gcode', 'open_gerber',
+                                  'open_project', 'open_svg',
                                   'options', 'origin',
                                   'paint', 'panelize', 'plot_all', 'plot_objects', 'plot_status', 'quit_flatcam',
                                   'save', 'save_project',
@@ -1775,6 +1783,10 @@ class App(QtCore.QObject):
             args_to_process = App.args
 
         self.log.debug("Application was started with arguments: %s. Processing ..." % str(args_to_process))
+
+        # the Gerber and Excellon files are opened together, at the end
+        batch_files = []
+
         for argument in args_to_process:
             if '.FlatPrj'.lower() in argument.lower():
                 try:
@@ -1832,6 +1844,7 @@ class App(QtCore.QObject):
             else:
                 exc_list = self.ui.util_defaults_form.fa_excellon_group.exc_list_text.get_value().split(',')
                 proc_arg = argument.lower()
+                file_kind = None
                 for ext in exc_list:
                     proc_ext = ext.replace(' ', '')
                     proc_ext = '.%s' % proc_ext
@@ -1841,8 +1854,11 @@ class App(QtCore.QObject):
                             if silent is False:
                                 self.inform.emit(_("Open Excellon file failed."))
                         else:
-                            self.on_fileopenexcellon(name=file_name, signal=None)
-                            return
+                            batch_files.append(('excellon', file_name))
+                        file_kind = 'excellon'
+                        break
+                if file_kind is not None:
+                    continue
 
                 gco_list = self.ui.util_defaults_form.fa_gcode_group.gco_list_text.get_value().split(',')
                 for ext in gco_list:
@@ -1854,8 +1870,11 @@ class App(QtCore.QObject):
                             if silent is False:
                                 self.inform.emit(_("Open GCode file failed."))
                         else:
-                            self.on_fileopengcode(name=file_name, signal=None)
-                            return
+                            self.f_handlers.on_fileopengcode(name=file_name, signal=None)
+                        file_kind = 'gcode'
+                        break
+                if file_kind is not None:
+                    continue
 
                 grb_list = self.ui.util_defaults_form.fa_gerber_group.grb_list_text.get_value().split(',')
                 for ext in grb_list:
@@ -1867,8 +1886,18 @@ class App(QtCore.QObject):
                             if silent is False:
                                 self.inform.emit(_("Open Gerber file failed."))
                         else:
-                            self.on_fileopengerber(name=file_name, signal=None)
-                            return
+                            batch_files.append(('gerber', file_name))
+                        break
+
+        if len(batch_files) > 1:
+            # parse the files in parallel, in the multiprocessing pool
+            self.worker_task.emit({'fcn': self.f_handlers.open_batch, 'params': [batch_files]})
+        elif batch_files:
+            kind, file_name = batch_files[0]
+            if kind == 'excellon':
+                self.f_handlers.on_fileopenexcellon(name=file_name, signal=None)
+            else:
+                self.f_handlers.on_fileopengerber(name=file_name, signal=None)
 
         # if it reached here without already returning then the app was registered with a file that it does not
         # recognize therefore we must quit but take into consideration the app reboot from within, in that case
@@ -8129,7 +8158,26 @@ class App(QtCore.QObject):
         """
 
         if self.block_autosave is False and self.should_we_save is True and self.save_in_progress is False:
-            self.on_file_saveproject()
+            journal = self.project_journal
+            if journal is None or self.project_filename is None or \
+                    journal.project_filename != self.project_filename or journal.needs_compaction():
+                # save the whole project; this also starts a new, empty, journal
+                self.f_handlers.on_file_saveproject()
+            else:
+                # save only the objects that changed since the last save
+                self.worker_task.emit({'fcn': self.f_handlers.save_project_journal, 'params': [journal]})
+                self.should_we_save = False
+
+    def mark_object_dirty(self, obj):
+        """
+        Let the autosave journal know that an object changed and has to be saved again.
+
+        :param obj:     FlatCAM object
+        :return:        None
+        """
+        journal = self.project_journal
+        if journal is not None:
+            journal.mark_dirty(obj.uid)
 
     def save_project_auto_update(self):
         """
@@ -8268,6 +8316,9 @@ class ArgsThread(QtCore.QObject):
 
 class MenuFileHandlers(QtCore.QObject):
 
+    # Emitted with the percentage of the objects serialized/deserialized while saving/opening a project
+    project_progress = QtCore.pyqtSignal(int)
+
     def __init__(self, app):
         super().__init__()
 
@@ -8279,6 +8330,17 @@ class MenuFileHandlers(QtCore.QObject):
 
         self.pagesize = {}
 
+        self.project_progress.connect(self.on_project_progress)
+
+    def on_project_progress(self, percentage):
+        """
+        Display the progress of the project saving/loading in the activity view.
+
+        :param percentage:  percentage of the project objects done
+        :return:            None
+        """
+        self.app.proc_container.update_view_text(' %d%%' % percentage)
+
     def on_fileopengerber(self, signal, name=None):
         """
         File menu callback for opening a Gerber.
@@ -8322,12 +8384,14 @@ class MenuFileHandlers(QtCore.QObject):
                                     alignment=Qt.AlignBottom | Qt.AlignLeft,
                                     color=QtGui.QColor("gray"))
 
+        filenames = [filename for filename in filenames if filename != '']
         if len(filenames) == 0:
             self.inform.emit('[WARNING_NOTCL] %s' % _("Cancelled."))
+        elif len(filenames) > 1:
+            # parse the files in parallel, in the multiprocessing pool
+            self.worker_task.emit({'fcn': self.open_batch, 'params': [[('gerber', f) for f in filenames]]})
         else:
-            for filename in filenames:
-                if filename != '':
-                    self.worker_task.emit({'fcn': self.open_gerber, 'params': [filename]})
+            self.worker_task.emit({'fcn': self.open_gerber, 'params': [filenames[0]]})
 
     def on_fileopenexcellon(self, signal, name=None):
         """
@@ -8361,12 +8425,14 @@ class MenuFileHandlers(QtCore.QObject):
                                     alignment=Qt.AlignBottom | Qt.AlignLeft,
                                     color=QtGui.QColor("gray"))
 
+        filenames = [filename for filename in filenames if filename != '']
         if len(filenames) == 0:
             self.inform.emit('[WARNING_NOTCL] %s' % _("Cancelled."))
+        elif len(filenames) > 1:
+            # parse the files in parallel, in the multiprocessing pool
+            self.worker_task.emit({'fcn': self.open_batch, 'params': [[('excellon', f) for f in filenames]]})
         else:
-            for filename in filenames:
-                if filename != '':
-                    self.worker_task.emit({'fcn': self.open_excellon, 'params': [filename]})
+            self.worker_task.emit({'fcn': self.open_excellon, 'params': [filenames[0]]})
 
     def on_fileopengcode(self, signal, name=None):
         """
@@ -9075,6 +9141,7 @@ class MenuFileHandlers(QtCore.QObject):
 
         # Clear project filename
         self.app.project_filename = None
+        self.app.project_journal = None
 
         # Load the application defaults
         self.defaults.load(filename=os.path.join(self.app.data_path, 'current_defaults.FlatConfig'), inform=self.inform)
@@ -10141,7 +10208,7 @@ class MenuFileHandlers(QtCore.QObject):
             # Register recent file
             self.app.file_opened.emit("dxf", filename)
 
-    def open_gerber(self, filename, outname=None, plot=True, from_tcl=False):
+    def open_gerber(self, filename, outname=None, plot=True, from_tcl=False, parsed=None):
         """
         Opens a Gerber file, parses it and creates a new object for
         it in the program. Thread-safe.
@@ -10152,6 +10219,7 @@ class MenuFileHandlers(QtCore.QObject):
         :type filename:     str
         :param plot:        boolean, to plot or not the resulting object
         :param from_tcl:    True if run from Tcl Shell
+        :param parsed:      the file already parsed in the multiprocessing pool (see self.open_batch()) or None
         :return: None
         """
 
@@ -10163,7 +10231,10 @@ class MenuFileHandlers(QtCore.QObject):
 
             # Opening the file happens here
             try:
-                gerber_obj.parse_file(filename)
+                if parsed is None:
+                    gerber_obj.parse_file(filename)
+                else:
+                    apply_parsed(gerber_obj, parsed)
             except IOError:
                 app_obj.inform.emit('[ERROR_NOTCL] %s: %s' % (_("Failed to open file"), filename))
                 return "fail"
@@ -10205,7 +10276,7 @@ class MenuFileHandlers(QtCore.QObject):
             # appGUI feedback
             self.app.inform.emit('[success] %s: %s' % (_("Opened"), filename))
 
-    def open_excellon(self, filename, outname=None, plot=True, from_tcl=False):
+    def open_excellon(self, filename, outname=None, plot=True, from_tcl=False, parsed=None):
         """
         Opens an Excellon file, parses it and creates a new object for
         it in the program. Thread-safe.
@@ -10215,6 +10286,7 @@ class MenuFileHandlers(QtCore.QObject):
         :type filename:     str
         :param plot:        boolean, to plot or not the resulting object
         :param from_tcl:    True if run from Tcl Shell
+        :param parsed:      the file already parsed in the multiprocessing pool (see self.open_batch()) or None
         :return:            None
         """
 
@@ -10223,7 +10295,10 @@ class MenuFileHandlers(QtCore.QObject):
         # How the object should be initialized
         def obj_init(excellon_obj, app_obj):
             try:
-                ret = excellon_obj.parse_file(filename=filename)
+                if parsed is None:
+                    ret = excellon_obj.parse_file(filename=filename)
+                else:
+                    ret = apply_parsed(excellon_obj, parsed)
                 if ret == "fail":
                     app_obj.log.debug("Excellon parsing failed.")
                     self.inform.emit('[ERROR_NOTCL] %s' % _("This is not Excellon file."))
@@ -10268,6 +10343,67 @@ class MenuFileHandlers(QtCore.QObject):
             # appGUI feedback
             self.inform.emit('[success] %s: %s' % (_("Opened"), filename))
 
+    def open_batch(self, files, plot=True, from_tcl=False):
+        """
+        Opens a set of Gerber and Excellon files (e.g. a fabrication set). The files are parsed in parallel in the
+        multiprocessing pool and the objects are created, in the order of the files, as the parsing results
+        come back.
+
+        :param files:       list of (kind, filename) tuples; kind is 'gerber' or 'excellon'
+        :param plot:        boolean, to plot or not the resulting objects
+        :param from_tcl:    True if run from Tcl Shell
+        :return:            'fail' if any of the files failed to open or its parser reported an error, else None
+        """
+        self.app.log.debug("open_batch()")
+
+        # the defaults are a FlatCAMDefaults with a LoudDict that can't be sent to the pool
+        defaults = dict(self.defaults)
+        results = [
+            self.app.pool.apply_async(parse_source, args=(kind, filename, defaults, self.app.decimals))
+            for kind, filename in files
+        ]
+
+        ret_val = None
+        for (kind, filename), result in zip(files, results):
+            try:
+                parsed = result.get()
+            except Exception:
+                parsed = ('error', traceback.format_exc(), [])
+
+            # the errors that the parser reported only with a message, in the pool process
+            errors = parsed[2]
+            for msg in errors:
+                self.inform.emit(msg)
+            if errors:
+                self.inform.emit('[ERROR_NOTCL] %s: %s' % (_("Failed to parse file"), filename))
+                ret_val = 'fail'
+                continue
+
+            if kind == 'gerber':
+                ret = self.open_gerber(filename, plot=plot, from_tcl=from_tcl, parsed=parsed)
+            else:
+                ret = self.open_excellon(filename, plot=plot, from_tcl=from_tcl, parsed=parsed)
+
+            if ret == 'fail' or parsed[0] != 'ok':
+                ret_val = 'fail'
+        return ret_val
+
+    def source_kind(self, filename):
+        """
+        Find the kind of a file by its extension and the file associations in Preferences.
+
+        :param filename:    path to the file
+        :return:            'gerber', 'excellon' or None
+        """
+        ext = os.path.splitext(filename)[1][1:].lower()
+        if ext == '':
+            return None
+
+        for kind, key in (('excellon', 'fa_excellon'), ('gerber', 'fa_gerber')):
+            if ext in [e.strip().lower() for e in self.defaults[key].split(',')]:
+                return kind
+        return None
+
     def open_gcode(self, filename, outname=None, force_parsing=None, plot=True, from_tcl=False):
         """
         Opens a G-gcode file, parses it and creates a new object for
@@ -10554,23 +10690,47 @@ class MenuFileHandlers(QtCore.QObject):
                 self.inform.emit('[ERROR_NOTCL] %s: %s' % (_("Failed to open project file"), filename))
                 return
 
-        try:
-            d = json.load(f, object_hook=dict2obj)
-        except Exception as e:
-            self.app.log.error(
-                "Failed to parse project file, trying to see if it loads as an LZMA archive: %s because %s" %
-                (filename, str(e)))
+        # if the project has an autosave journal made for the current project file, use its latest revision
+        journal_d = read_journal(filename, pool=self.app.pool if plot else None)
+
+        if journal_d is not None:
+            f.close()
+            d = journal_d
+            self.app.log.debug("Opening project from the autosave journal, revision: %s" % str(d['revision']))
+        elif is_chunked_project(filename):
             f.close()
 
-            # Open and parse a compressed Project file
+            # Open and parse a chunked Project file. The objects geometry is loaded later, when needed, but if the
+            # objects are plotted it will be needed right away so start decoding it in the multiprocessing pool
             try:
-                with lzma.open(filename) as f:
-                    file_content = f.read().decode('utf-8')
-                    d = json.loads(file_content, object_hook=dict2obj)
+                d = read_chunked_project(filename, pool=self.app.pool if plot else None)
             except Exception as e:
                 self.app.log.error("Failed to open project file: %s with error: %s" % (filename, str(e)))
                 self.inform.emit('[ERROR_NOTCL] %s: %s' % (_("Failed to open project file"), filename))
                 return
+        else:
+            # the objects are recreated in parallel, in the multiprocessing pool
+            try:
+                d = read_json_project(f.read(), pool=self.app.pool, progress=self.project_progress.emit)
+                f.close()
+            except Exception as e:
+                self.app.log.error(
+                    "Failed to parse project file, trying to see if it loads as an LZMA archive: %s because %s" %
+                    (filename, str(e)))
+                f.close()
+
+                # Open and parse a compressed Project file
+                try:
+                    with lzma.open(filename) as f:
+                        file_content = f.read().decode('utf-8')
+                        d = read_json_project(file_content, pool=self.app.pool, progress=self.project_progress.emit)
+                except Exception as e:
+                    self.app.log.error("Failed to open project file: %s with error: %s" % (filename, str(e)))
+                    self.inform.emit('[ERROR_NOTCL] %s: %s' % (_("Failed to open project file"), filename))
+                    return
+
+            # in a JSON project file all the attributes are loaded at once, nothing is deferred
+            d['objs'] = [(obj, [], None, None) for obj in d['objs']]
 
         # Clear the current project
         # # NOT THREAD SAFE # ##
@@ -10594,9 +10754,14 @@ class MenuFileHandlers(QtCore.QObject):
         # Re create objects
         self.app.log.debug(" **************** Started PROEJCT loading... **************** ")
 
-        for obj in d['objs']:
+        # where the chunks of each object are, for the autosave journal
+        locations = {}
+
+        for obj, deferred_attrs, deferred_loader, location in d['objs']:
             def obj_init(obj_inst, app_inst):
                 try:
+                    if deferred_loader is not None:
+                        obj_inst.defer_attributes(deferred_attrs, deferred_loader)
                     obj_inst.from_dict(obj)
                 except Exception as erro:
                     app_inst.log('MenuFileHandlers.open_project() --> ' + str(erro))
@@ -10611,9 +10776,17 @@ class MenuFileHandlers(QtCore.QObject):
                 self.app.ui.set_ui_title(name="{} {}: {}".format(
                     _("Loading Project ... restoring"), obj['kind'].upper(), obj['options']['name']))
 
-            self.app.app_obj.new_object(obj['kind'], obj['options']['name'], obj_init, plot=plot)
+            new_obj = self.app.app_obj.new_object(obj['kind'], obj['options']['name'], obj_init, plot=plot)
+            if new_obj != 'fail' and location is not None:
+                locations[new_obj.uid] = location
 
-        self.inform.emit('[success] %s: %s' % (_("Project loaded from"), filename))
+        # the autosave continues the journal that was read or starts a new one
+        if journal_d is not None:
+            self.app.project_journal = ProjectJournal(filename, locations=locations, revision=journal_d['revision'])
+            self.inform.emit('[success] %s: %s' % (_("Project loaded from autosave journal"), filename))
+        else:
+            self.app.project_journal = ProjectJournal.start(filename, locations=locations)
+            self.inform.emit('[success] %s: %s' % (_("Project loaded from"), filename))
 
         self.app.should_we_save = False
         self.app.file_opened.emit("project", filename)
@@ -10656,70 +10829,111 @@ class MenuFileHandlers(QtCore.QObject):
                 self.app.log.debug("save_project() --> There was no active object. Skipping read_form. %s" % str(e))
 
             # Serialize the whole project
+            saved_objs = self.app.collection.get_list()
             d = {
-                "objs":     [obj.to_dict() for obj in self.app.collection.get_list()],
+                "objs":     [obj.to_dict() for obj in saved_objs],
                 "options":  self.app.options,
                 "version":  self.app.version
             }
 
-            if self.defaults["global_save_compressed"] is True:
-                with lzma.open(filename, "w", preset=int(self.defaults['global_compression_level'])) as f:
-                    g = json.dumps(d, default=to_dict, indent=2, sort_keys=True).encode('utf-8')
-                    # # Write
-                    f.write(g)
-                self.inform.emit('[success] %s: %s' % (_("Project saved to"), filename))
-            else:
-                # Open file
-                try:
-                    f = open(filename, 'w')
-                except IOError:
-                    self.app.log.error("Failed to open file for saving: %s", filename)
-                    self.inform.emit('[ERROR_NOTCL] %s' % _("The object is used by another application."))
-                    return
+            # the header entries of the objects saved in the chunked format, used to start the autosave journal
+            header_objs = []
 
-                # Write
-                json.dump(d, f, default=to_dict, indent=2, sort_keys=True)
-                f.close()
+            # the objects are serialized in parallel, in the multiprocessing pool
+            if self.defaults["global_project_format"] == 'chunked':
+                if self.defaults["global_save_compressed"] is True:
+                    compression_level = int(self.defaults['global_compression_level'])
+                else:
+                    compression_level = None
+
+                def write_project(f):
+                    header_objs[:] = write_chunked_project(f, d['objs'], d['options'], d['version'],
+                                                           compression_level=compression_level,
+                                                           pool=self.app.pool, progress=self.project_progress.emit)
+            elif self.defaults["global_save_compressed"] is True:
+                def write_project(f):
+                    with lzma.open(f, "w", preset=int(self.defaults['global_compression_level'])) as lzma_f:
+                        write_json_project(lzma_f, d['objs'], d['options'], d['version'],
+                                           pool=self.app.pool, progress=self.project_progress.emit)
+            else:
+                def write_project(f):
+                    write_json_project(f, d['objs'], d['options'], d['version'],
+                                       pool=self.app.pool, progress=self.project_progress.emit)
 
-                # verification of the saved project
-                # Open and parse
-                try:
-                    saved_f = open(filename, 'r')
-                except IOError:
-                    if silent is False:
-                        self.inform.emit('[ERROR_NOTCL] %s: %s %s' %
-                                         (_("Failed to verify project file"), filename, _("Retry to save it.")))
-                    return
+            # Write into a temporary file with a running checksum, verify it by the checksum and replace the project
+            # file with it. No need to parse the saved file again to verify it.
+            try:
+                atomic_write(filename, write_project)
+            except VerificationError as e:
+                self.app.log.error("Failed to verify project file: %s" % str(e))
+                if silent is False:
+                    self.inform.emit('[ERROR_NOTCL] %s: %s %s' %
+                                     (_("Failed to verify project file"), filename, _("Retry to save it.")))
+                return
+            except IOError:
+                self.app.log.error("Failed to open file for saving: %s", filename)
+                self.inform.emit('[ERROR_NOTCL] %s' % _("The object is used by another application."))
+                return
 
-                try:
-                    saved_d = json.load(saved_f, object_hook=dict2obj)
-                except Exception:
-                    if silent is False:
-                        self.inform.emit('[ERROR_NOTCL] %s: %s %s' %
-                                         (_("Failed to parse saved project file"), filename, _("Retry to save it.")))
-                    f.close()
-                    return
-                saved_f.close()
+            if silent is False:
+                self.inform.emit('[success] %s: %s' % (_("Project saved to"), filename))
 
-                if silent is False:
-                    if 'version' in saved_d:
-                        self.inform.emit('[success] %s: %s' % (_("Project saved to"), filename))
-                    else:
-                        self.inform.emit('[ERROR_NOTCL] %s: %s %s' %
-                                         (_("Failed to parse saved project file"), filename, _("Retry to save it.")))
+            # the project file has all the changes now, start a new autosave journal for it
+            locations = dict(zip([obj.uid for obj in saved_objs], base_locations(header_objs)))
+            self.app.project_journal = ProjectJournal.start(filename, locations=locations)
 
-                tb_settings = QSettings("Open Source", "FlatCAM")
-                lock_state = self.app.ui.lock_action.isChecked()
-                tb_settings.setValue('toolbar_lock', lock_state)
+            tb_settings = QSettings("Open Source", "FlatCAM")
+            lock_state = self.app.ui.lock_action.isChecked()
+            tb_settings.setValue('toolbar_lock', lock_state)
 
-                # This will write the setting to the platform specific storage.
-                del tb_settings
+            # This will write the setting to the platform specific storage.
+            del tb_settings
 
             # if quit:
             # t = threading.Thread(target=lambda: self.check_project_file_size(1, filename=filename))
             # t.start()
             self.app.start_delayed_quit(delay=500, filename=filename, should_quit=quit_action)
 
+    def save_project_journal(self, journal):
+        """
+        Autosave only the objects that changed since the project was last saved, into the autosave journal
+        of the project.
+
+        :param journal:     ProjectJournal instance
+        :return:            None
+        """
+        self.app.log.debug("save_project_journal()")
+        self.app.save_in_progress = True
+
+        with self.app.proc_container.new(_("Saving Project ...")):
+            # Capture the latest changes
+            try:
+                current_object = self.app.collection.get_active()
+                if current_object:
+                    current_object.read_form()
+            except Exception as e:
+                self.app.log.debug("save_project_journal() --> There was no active object. %s" % str(e))
+
+            objs = self.app.collection.get_list()
+            changed = journal.take_dirty([obj.uid for obj in objs])
+
+            try:
+                nr_changed = journal.write(
+                    [(obj.uid, obj.to_dict() if obj.uid in changed else None) for obj in objs],
+                    self.app.options, self.app.version, pool=self.app.pool)
+            except Exception as e:
+                self.app.log.error("save_project_journal() --> Failed to write the journal: %s" % str(e))
+                # the objects were not saved, mark them to be saved by the next autosave
+                for uid in changed:
+                    journal.mark_dirty(uid)
+                self.app.should_we_save = True
+                self.app.save_in_progress = False
+                return
+
+            self.app.log.debug("save_project_journal() --> %d objects saved in the journal." % nr_changed)
+
+        self.app.save_in_progress = False
+
     def save_source_file(self, obj_name, filename):
         """
         Exports a FlatCAM Object to an Gerber/Excellon file.
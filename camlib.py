@@ -13,6 +13,7 @@ from io import StringIO
 from numpy.linalg import solve, norm
 
 import platform
+import time
 from copy import deepcopy
 
 import traceback
@@ -32,6 +33,18 @@ from shapely.wkt import dumps as sdumps
 from shapely.geometry.base import BaseGeometry
 from shapely.geometry import shape
 
+try:
+    # Shapely >= 2.0 buffers and simplifies an array of geometries in one call
+    from shapely import buffer as shapely_buffer
+    from shapely import simplify as shapely_simplify
+    from shapely import polygons as shapely_polygons
+    from shapely import get_type_id as shapely_get_type_id
+except ImportError:
+    shapely_buffer = None
+    shapely_simplify = None
+    shapely_polygons = None
+    shapely_get_type_id = None
+
 # ---------------------------------------
 # NEEDED for Legacy mode
 # Used for solid polygons in Matplotlib
@@ -45,6 +58,9 @@ from rasterio.features import shapes
 import ezdxf
 
 from appCommon.Common import GracefulException as grace
+from appCommon.Toolpath import Toolpath, ToolpathBuilder
+from appCommon.DrillPath import nearest_neighbour_order, improve_order, path_length, neighbour_lists
+from appPreProcessor import gcode_tokenizers, resolve_dialect
 
 # Commented for FlatCAM packaging with cx_freeze
 # from scipy.spatial import KDTree, Delaunay
@@ -76,6 +92,13 @@ log.addHandler(handler)
 if '_' not in builtins.__dict__:
     _ = gettext.gettext
 
+# OR-Tools works with integer distances: the distances between the drill locations are scaled by this factor
+ORTOOLS_DISTANCE_SCALE = 10000
+# up to this number of locations OR-Tools gets the whole distance matrix
+ORTOOLS_DENSE_LOCATIONS = 1500
+# above ORTOOLS_DENSE_LOCATIONS a location may be followed only by one of this number of nearest locations
+ORTOOLS_NEIGHBOURS = 16
+
 
 class ParseError(Exception):
     pass
@@ -2792,6 +2815,50 @@ class CNCjob(Geometry):
         """
         return self.__dict__
 
+    @property
+    def solid_geometry(self):
+        """
+        The geometry of the job. When the parsed G-code is a Toolpath the geometry is made from it the first time it
+        is used after create_geometry() or after the job is loaded, not after each parsing or transformation.
+
+        :return:    List of Shapely geometry elements
+        :rtype:     list
+        """
+        try:
+            geometry = self.__dict__['solid_geometry']
+        except KeyError:
+            # not set, as when its loading is postponed by FlatCAMObj.defer_attributes(); __getattr__() loads it
+            raise AttributeError('solid_geometry')
+
+        # the parsed G-code may be deferred too; reading it loads it
+        if geometry is None and isinstance(self.gcode_parsed, Toolpath):
+            geometry = self.__dict__['solid_geometry'] = self.gcode_parsed.geometries()
+        return geometry
+
+    @solid_geometry.setter
+    def solid_geometry(self, geometry):
+        self.__dict__['solid_geometry'] = geometry
+
+    def to_dict(self):
+        """
+        Returns a representation of the object as a dictionary.
+        Attributes to include are listed in ``self.ser_attrs``.
+        When the parsed G-code is a Toolpath the solid_geometry is not saved; it is made from the Toolpath when it is
+        first used after the job is loaded.
+
+        :return:    A dictionary-encoded copy of the object.
+        :rtype:     dict
+        """
+        toolpath = isinstance(self.gcode_parsed, Toolpath)
+
+        d = {}
+        for attr in self.ser_attrs:
+            if attr == 'solid_geometry' and toolpath:
+                d[attr] = None
+            else:
+                d[attr] = getattr(self, attr)
+        return d
+
     def convert_units(self, units):
         """
         Will convert the parameters in the class that are relevant, from metric to imperial and reverse
@@ -2871,40 +2938,125 @@ class CNCjob(Geometry):
 
     # Distance callback
     class CreateDistanceCallback(object):
-        """Create callback to calculate distances between points."""
+        """
+        Create callback to get the distances between points. It is used only when OR-Tools can't take the distance
+        matrix (RegisterTransitMatrix() is missing in the older OR-Tools) and for the sparse distances of many points.
+        """
 
-        def __init__(self, locs, manager):
-            self.manager = manager
-            self.matrix = {}
+        def __init__(self, matrix, manager, locs=None):
+            """
 
-            if locs:
-                size = len(locs)
+            :param matrix:  the integer distances from each node: a list of lists (all the nodes) or a list of dicts
+                            (the nearest nodes)
+            :param manager: RoutingIndexManager
+            :param locs:    list of the (x, y) locations of the nodes, used for the distances missing in the matrix
+            """
+            self.manager = manager
+            self.matrix = matrix
+            self.locs = locs
+            # the node of each routing variable index, read from a list instead of a call into OR-Tools for each arc
+            self.nodes = [manager.IndexToNode(index) for index in range(manager.GetNumberOfIndices())]
 
-                for from_node in range(size):
-                    self.matrix[from_node] = {}
-                    for to_node in range(size):
-                        if from_node == to_node:
-                            self.matrix[from_node][to_node] = 0
-                        else:
-                            x1 = locs[from_node][0]
-                            y1 = locs[from_node][1]
-                            x2 = locs[to_node][0]
-                            y2 = locs[to_node][1]
-                            self.matrix[from_node][to_node] = distance_euclidian(x1, y1, x2, y2)
-
-        # def Distance(self, from_node, to_node):
-        #     return int(self.matrix[from_node][to_node])
         def Distance(self, from_index, to_index):
             # Convert from routing variable Index to distance matrix NodeIndex.
-            from_node = self.manager.IndexToNode(from_index)
-            to_node = self.manager.IndexToNode(to_index)
-            return self.matrix[from_node][to_node]
+            from_node = self.nodes[from_index]
+            to_node = self.nodes[to_index]
+            try:
+                return self.matrix[from_node][to_node]
+            except KeyError:
+                x1, y1 = self.locs[from_node]
+                x2, y2 = self.locs[to_node]
+                return int(round(distance_euclidian(x1, y1, x2, y2) * ORTOOLS_DISTANCE_SCALE))
+
+    @staticmethod
+    def distance_matrix(locations):
+        """
+        :param locations:   list of (x, y) tuples
+        :return:            (N, N) int64 array with the distances between the locations, scaled by
+                            ORTOOLS_DISTANCE_SCALE and rounded
+        """
+        pts = np.asarray(locations, dtype=float).reshape(-1, 2)
+        matrix = np.empty((len(pts), len(pts)), dtype=np.int64)
+
+        # in blocks of rows so the float distances of the whole matrix are never held at once
+        block = 512
+        for row in range(0, len(pts), block):
+            dx = pts[row:row + block, None, 0] - pts[None, :, 0]
+            dy = pts[row:row + block, None, 1] - pts[None, :, 1]
+            matrix[row:row + block] = np.rint(np.hypot(dx, dy) * ORTOOLS_DISTANCE_SCALE)
+        return matrix
+
+    def register_ortools_distances(self, routing, manager, locations, depot):
+        """
+        Gives the OR-Tools routing model the distances between the locations.
+
+        Up to ORTOOLS_DENSE_LOCATIONS locations the distance matrix is computed once, with NumPy, and registered as a
+        matrix that the solver reads without calling back into Python.
+        For more locations each location may be followed only by one of its ORTOOLS_NEIGHBOURS nearest locations
+        (or by the end of the route) and only those distances are computed. The neighbours of each location include
+        the locations before and after it in the nearest neighbour path, so this path is always a valid route.
+        OR-Tools takes a matrix only with all the distances, which does not fit in memory for many locations, so these
+        sparse distances are still read by the Python callback of CreateDistanceCallback, on each arc.
+
+        The nearest neighbour path, searched in a k-d tree of the locations (appCommon/DrillPath.py), is the initial
+        solution so the search time is not spent on finding a first solution.
+
+        :param routing:     RoutingModel
+        :param manager:     RoutingIndexManager
+        :param locations:   list of (x, y) tuples
+        :param depot:       index of the start location
+        :return:            tuple (transit callback index, the callback object that has to be kept while solving or
+                            None, the initial route as a list of nodes or None)
+        """
+        pts = np.asarray(locations, dtype=float)
+        route = nearest_neighbour_order(pts, depot)
+
+        if len(locations) <= ORTOOLS_DENSE_LOCATIONS:
+            matrix = self.distance_matrix(locations).tolist()
+            if hasattr(routing, 'RegisterTransitMatrix'):
+                return routing.RegisterTransitMatrix(matrix), None, route
+
+            dist_between_locations = self.CreateDistanceCallback(matrix=matrix, manager=manager)
+            return routing.RegisterTransitCallback(dist_between_locations.Distance), dist_between_locations, route
+
+        neighbours = neighbour_lists(pts, route, k=ORTOOLS_NEIGHBOURS)
+
+        matrix = []
+        for node, nodes in enumerate(neighbours):
+            dist = np.rint(np.hypot(*(pts[nodes] - pts[node]).T) * ORTOOLS_DISTANCE_SCALE).astype(np.int64)
+            matrix.append(dict(zip(nodes, dist.tolist())))
+
+            allowed = [manager.NodeToIndex(n) for n in nodes if n != depot] + [routing.End(0)]
+            routing.NextVar(manager.NodeToIndex(node)).SetValues(allowed)
+
+        dist_between_locations = self.CreateDistanceCallback(matrix=matrix, manager=manager, locs=locations)
+        return routing.RegisterTransitCallback(dist_between_locations.Distance), dist_between_locations, route
 
     @staticmethod
     def create_tool_data_array(points):
         # Create the data.
         return [(pt.coords.xy[0][0], pt.coords.xy[1][0]) for pt in points]
 
+    @staticmethod
+    def solve_ortools(routing, manager, search_parameters, route, depot):
+        """
+        :param routing:             RoutingModel
+        :param manager:             RoutingIndexManager
+        :param search_parameters:   the search parameters
+        :param route:               the initial route, as the list of the nodes starting with the depot, or None
+        :param depot:               the index of the start location
+        :return:                    the solution (Assignment) or None
+        """
+        if route is not None:
+            # the search parameters are applied when the model is closed
+            routing.CloseModelWithParameters(search_parameters)
+            # the start and the end of the route are not part of the routes read by OR-Tools
+            initial = routing.ReadAssignmentFromRoutes([[manager.NodeToIndex(node) for node in route if node != depot]],
+                                                       True)
+            if initial:
+                return routing.SolveFromAssignmentWithParameters(initial, search_parameters)
+        return routing.SolveWithParameters(search_parameters)
+
     def optimized_ortools_meta(self, locations, start=None, opt_time=0):
         optimized_path = []
 
@@ -2932,24 +3084,18 @@ class CNCjob(Geometry):
         else:
             search_parameters.time_limit.seconds = 3
 
-        # Callback to the distance function. The callback takes two
-        # arguments (the from and to node indices) and returns the distance between them.
-        dist_between_locations = self.CreateDistanceCallback(locs=locations, manager=manager)
-
-        # if there are no distances then go to the next tool
-        if not dist_between_locations:
-            return
-
-        dist_callback = dist_between_locations.Distance
-        transit_callback_index = routing.RegisterTransitCallback(dist_callback)
+        # the distances between the locations, computed once
+        transit_callback_index, dist_between_locations, route = self.register_ortools_distances(
+            routing, manager, locations, depot)
         routing.SetArcCostEvaluatorOfAllVehicles(transit_callback_index)
 
         # Solve, returns a solution if any.
-        assignment = routing.SolveWithParameters(search_parameters)
+        assignment = self.solve_ortools(routing, manager, search_parameters, route, depot)
 
         if assignment:
             # Solution cost.
-            log.info("OR-tools metaheuristics - Total distance: " + str(assignment.ObjectiveValue()))
+            log.info("OR-tools metaheuristics - Total distance: " +
+                     str(assignment.ObjectiveValue() / ORTOOLS_DISTANCE_SCALE))
 
             # Inspect solution.
             # Only one route here; otherwise iterate from 0 to routing.vehicles() - 1.
@@ -2988,24 +3134,17 @@ class CNCjob(Geometry):
         routing = pywrapcp.RoutingModel(manager)
         search_parameters = pywrapcp.DefaultRoutingSearchParameters()
 
-        # Callback to the distance function. The callback takes two
-        # arguments (the from and to node indices) and returns the distance between them.
-        dist_between_locations = self.CreateDistanceCallback(locs=locations, manager=manager)
-
-        # if there are no distances then go to the next tool
-        if not dist_between_locations:
-            return
-
-        dist_callback = dist_between_locations.Distance
-        transit_callback_index = routing.RegisterTransitCallback(dist_callback)
+        # the distances between the locations, computed once
+        transit_callback_index, dist_between_locations, route = self.register_ortools_distances(
+            routing, manager, locations, depot)
         routing.SetArcCostEvaluatorOfAllVehicles(transit_callback_index)
 
         # Solve, returns a solution if any.
-        assignment = routing.SolveWithParameters(search_parameters)
+        assignment = self.solve_ortools(routing, manager, search_parameters, route, depot)
 
         if assignment:
             # Solution cost.
-            log.info("Total distance: " + str(assignment.ObjectiveValue()))
+            log.info("Total distance: " + str(assignment.ObjectiveValue() / ORTOOLS_DISTANCE_SCALE))
 
             # Inspect solution.
             # Only one route here; otherwise iterate from 0 to routing.vehicles() - 1.
@@ -3022,6 +3161,37 @@ class CNCjob(Geometry):
         return optimized_path
         # ############################################# ##
 
+    def optimized_spatial_tsp(self, locations, start=None, opt_time=0):
+        """
+        Orders the locations with the nearest neighbour heuristic, searched in a k-d tree of the locations, and improves
+        the order with 2-opt and Or-opt moves between each location and its nearest neighbours (appCommon/DrillPath.py).
+
+        :param locations:   list of (x, y) tuples
+        :param start:       index of the first location; the first one if None
+        :param opt_time:    the improvement stops after this number of seconds; 0 for no time limit
+        :return:            list of the indexes of the locations in the optimized order
+        """
+        if not locations:
+            log.warning('Spatial TSA - Specify an instance greater than 0.')
+            return []
+
+        started = time.perf_counter()
+        order = nearest_neighbour_order(locations, 0 if start is None else start)
+        nn_distance = path_length(locations, order)
+        nn_time = time.perf_counter() - started
+
+        time_limit = float(opt_time) if opt_time and float(opt_time) > 0 else None
+        order = improve_order(locations, order, time_limit=time_limit, abort=lambda: self.app.abort_flag)
+        if self.app.abort_flag:
+            # graceful abort requested by the user
+            raise grace
+
+        log.info("Spatial TSA - Locations: %d. Nearest neighbour distance: %s in %.3f s. "
+                 "Total distance: %s in %.3f s." %
+                 (len(locations), str(nn_distance), nn_time, str(path_length(locations, order)),
+                  time.perf_counter() - started))
+        return order
+
     def optimized_travelling_salesman(self, points, start=None):
         """
         As solving the problem in the brute force way is too slow,
@@ -3145,6 +3315,8 @@ class CNCjob(Geometry):
             log.debug("Using OR-Tools Basic drill path optimization.")
         elif opt_type == 'T':
             log.debug("Using Travelling Salesman drill path optimization.")
+        elif opt_type == 'O':
+            log.debug("Using Spatial Travelling Salesman (2-Opt) drill path optimization.")
         else:
             log.debug("Using no path optimization.")
 
@@ -3275,6 +3447,13 @@ class CNCjob(Geometry):
             if not locations:
                 return 'fail'
             optimized_path = self.optimized_travelling_salesman(locations)
+        elif opt_type == 'O':
+            locations = self.create_tool_data_array(points=points)
+            # if there are no locations then go to the next tool
+            if not locations:
+                return 'fail'
+            opt_time = self.app.defaults["excellon_search_time"]
+            optimized_path = self.optimized_spatial_tsp(locations=locations, opt_time=opt_time)
         else:
             # it's actually not optimized path but here we build a list of (x,y) coordinates
             # out of the tool's drills
@@ -4082,9 +4261,9 @@ class CNCjob(Geometry):
             return 'fail'
 
         current_platform = platform.architecture()[0]
-        if current_platform == '64bit':
-            used_excellon_optimization_type = self.excellon_optimization_type
-        else:
+        used_excellon_optimization_type = self.excellon_optimization_type
+        if current_platform != '64bit' and used_excellon_optimization_type in ['M', 'B']:
+            # the OR-Tools optimizations are not available in 32bit
             used_excellon_optimization_type = 'T'
 
         # #############################################################################################################
@@ -4098,6 +4277,8 @@ class CNCjob(Geometry):
             log.debug("Using OR-Tools Basic drill path optimization.")
         elif used_excellon_optimization_type == 'T':
             log.debug("Using Travelling Salesman drill path optimization.")
+        elif used_excellon_optimization_type == 'O':
+            log.debug("Using Spatial Travelling Salesman (2-Opt) drill path optimization.")
         else:
             log.debug("Using no path optimization.")
 
@@ -4176,6 +4357,14 @@ class CNCjob(Geometry):
                     for point in points[tool]:
                         altPoints.append((point.coords.xy[0][0], point.coords.xy[1][0]))
                     optimized_path = self.optimized_travelling_salesman(altPoints)
+                elif used_excellon_optimization_type == 'O':
+                    if tool in points:
+                        locations = self.create_tool_data_array(points=points[tool])
+                    # if there are no locations then go to the next tool
+                    if not locations:
+                        continue
+                    opt_time = self.app.defaults["excellon_search_time"]
+                    optimized_path = self.optimized_spatial_tsp(locations=locations, opt_time=opt_time)
                 else:
                     # it's actually not optimized path but here we build a list of (x,y) coordinates
                     # out of the tool's drills
@@ -4412,6 +4601,14 @@ class CNCjob(Geometry):
                 for point in all_points:
                     altPoints.append((point.coords.xy[0][0], point.coords.xy[1][0]))
                 optimized_path = self.optimized_travelling_salesman(altPoints)
+            elif used_excellon_optimization_type == 'O':
+                if all_points:
+                    locations = self.create_tool_data_array(points=all_points)
+                # if there are no locations then go to the next tool
+                if not locations:
+                    return 'fail'
+                opt_time = self.app.defaults["excellon_search_time"]
+                optimized_path = self.optimized_spatial_tsp(locations=locations, opt_time=opt_time)
             else:
                 # it's actually not optimized path but here we build a list of (x,y) coordinates
                 # out of the tool's drills
@@ -4572,6 +4769,9 @@ class CNCjob(Geometry):
             log.debug("The total travel distance with OR-TOOLS Basic Algorithm is: %s" % str(measured_distance))
         elif used_excellon_optimization_type == 'T':
             log.debug("The total travel distance with Travelling Salesman Algorithm is: %s" % str(measured_distance))
+        elif used_excellon_optimization_type == 'O':
+            log.debug("The total travel distance with Spatial Travelling Salesman (2-Opt) is: %s" %
+                      str(measured_distance))
         else:
             log.debug("The total travel distance with with no optimization is: %s" % str(measured_distance))
 
@@ -5427,35 +5627,36 @@ class CNCjob(Geometry):
         self.pp_geometry = self.app.preprocessors[self.pp_geometry_name]
         p = self.pp_geometry
 
-        self.gcode = self.doformat(p.start_code)
+        # the G-code is added to a local string; adding to the attribute copies the whole G-code on each addition
+        gcode = self.doformat(p.start_code)
 
-        self.gcode += self.doformat(p.feedrate_code)  # sets the feed rate
+        gcode += self.doformat(p.feedrate_code)  # sets the feed rate
 
         if toolchange is False:
-            self.gcode += self.doformat(p.lift_code, x=0, y=0)  # Move (up) to travel height
-            self.gcode += self.doformat(p.startz_code, x=0, y=0)
+            gcode += self.doformat(p.lift_code, x=0, y=0)  # Move (up) to travel height
+            gcode += self.doformat(p.startz_code, x=0, y=0)
 
         if toolchange:
             # if "line_xyz" in self.pp_geometry_name:
             #     self.gcode += self.doformat(p.toolchange_code, x=self.xy_toolchange[0], y=self.xy_toolchange[1])
             # else:
             #     self.gcode += self.doformat(p.toolchange_code)
-            self.gcode += self.doformat(p.toolchange_code)
+            gcode += self.doformat(p.toolchange_code)
 
             if 'laser' not in self.pp_geometry_name:
-                self.gcode += self.doformat(p.spindle_code)  # Spindle start
+                gcode += self.doformat(p.spindle_code)  # Spindle start
             else:
                 # for laser this will disable the laser
-                self.gcode += self.doformat(p.lift_code, x=self.oldx, y=self.oldy)  # Move (up) to travel height
+                gcode += self.doformat(p.lift_code, x=self.oldx, y=self.oldy)  # Move (up) to travel height
 
             if self.dwell is True:
-                self.gcode += self.doformat(p.dwell_code)  # Dwell time
+                gcode += self.doformat(p.dwell_code)  # Dwell time
         else:
             if 'laser' not in self.pp_geometry_name:
-                self.gcode += self.doformat(p.spindle_code)  # Spindle start
+                gcode += self.doformat(p.spindle_code)  # Spindle start
 
             if self.dwell is True:
-                self.gcode += self.doformat(p.dwell_code)  # Dwell time
+                gcode += self.doformat(p.dwell_code)  # Dwell time
 
         total_travel = 0.0
         total_cut = 0.0
@@ -5503,8 +5704,8 @@ class CNCjob(Geometry):
                     # calculate the cut distance
                     total_cut = total_cut + geo.length
 
-                    self.gcode += self.create_gcode_single_pass(geo, current_tooldia, extracut, extracut_length,
-                                                                tolerance, z_move=z_move, old_point=current_pt)
+                    gcode += self.create_gcode_single_pass(geo, current_tooldia, extracut, extracut_length,
+                                                           tolerance, z_move=z_move, old_point=current_pt)
 
                 # --------- Multi-pass ---------
                 else:
@@ -5521,7 +5722,7 @@ class CNCjob(Geometry):
                     gc, geo = self.create_gcode_multi_pass(geo, current_tooldia, extracut, extracut_length,
                                                            tolerance,  z_move=z_move, postproc=p,
                                                            old_point=current_pt)
-                    self.gcode += gc
+                    gcode += gc
 
                 # calculate the total distance
                 total_travel = total_travel + abs(distance(pt1=current_pt, pt2=pt))
@@ -5544,12 +5745,13 @@ class CNCjob(Geometry):
         self.routing_time += total_cut / self.feedrate
 
         # Finish
-        self.gcode += self.doformat(p.spindle_stop_code)
-        self.gcode += self.doformat(p.lift_code, x=current_pt[0], y=current_pt[1])
-        self.gcode += self.doformat(p.end_code, x=0, y=0)
+        gcode += self.doformat(p.spindle_stop_code)
+        gcode += self.doformat(p.lift_code, x=current_pt[0], y=current_pt[1])
+        gcode += self.doformat(p.end_code, x=0, y=0)
         self.app.inform.emit(
             '%s... %s %s.' % (_("Finished G-Code generation"), str(path_count), _("paths traced"))
         )
+        self.gcode = gcode
         return self.gcode
 
     def generate_from_geometry_2(self, geometry, append=True, tooldia=None, offset=0.0, tolerance=0, z_cut=None,
@@ -5837,34 +6039,36 @@ class CNCjob(Geometry):
             start_gcode = self.doformat(p.start_code)
 
         # self.gcode = self.doformat(p.start_code)
-        self.gcode += self.doformat(p.feedrate_code)  # sets the feed rate
+        # the G-code is added to a local string; adding to the attribute copies the whole G-code on each addition
+        gcode = self.gcode
+        gcode += self.doformat(p.feedrate_code)  # sets the feed rate
 
         if toolchange is False:
             # all the x and y parameters in self.doformat() are used only by some preprocessors not by all
-            self.gcode += self.doformat(p.lift_code, x=self.oldx, y=self.oldy)  # Move (up) to travel height
-            self.gcode += self.doformat(p.startz_code, x=self.oldx, y=self.oldy)
+            gcode += self.doformat(p.lift_code, x=self.oldx, y=self.oldy)  # Move (up) to travel height
+            gcode += self.doformat(p.startz_code, x=self.oldx, y=self.oldy)
 
         if toolchange:
             # if "line_xyz" in self.pp_geometry_name:
             #     self.gcode += self.doformat(p.toolchange_code, x=self.xy_toolchange[0], y=self.xy_toolchange[1])
             # else:
             #     self.gcode += self.doformat(p.toolchange_code)
-            self.gcode += self.doformat(p.toolchange_code)
+            gcode += self.doformat(p.toolchange_code)
 
             if 'laser' not in self.pp_geometry_name:
-                self.gcode += self.doformat(p.spindle_code)  # Spindle start
+                gcode += self.doformat(p.spindle_code)  # Spindle start
             else:
                 # for laser this will disable the laser
-                self.gcode += self.doformat(p.lift_code, x=self.oldx, y=self.oldy)  # Move (up) to travel height
+                gcode += self.doformat(p.lift_code, x=self.oldx, y=self.oldy)  # Move (up) to travel height
 
             if self.dwell is True:
-                self.gcode += self.doformat(p.dwell_code)  # Dwell time
+                gcode += self.doformat(p.dwell_code)  # Dwell time
         else:
             if 'laser' not in self.pp_geometry_name:
-                self.gcode += self.doformat(p.spindle_code)  # Spindle start
+                gcode += self.doformat(p.spindle_code)  # Spindle start
 
             if self.dwell is True:
-                self.gcode += self.doformat(p.dwell_code)  # Dwell time
+                gcode += self.doformat(p.dwell_code)  # Dwell time
 
         total_travel = 0.0
         total_cut = 0.0
@@ -5912,8 +6116,8 @@ class CNCjob(Geometry):
                 if not multidepth:
                     # calculate the cut distance
                     total_cut += geo.length
-                    self.gcode += self.create_gcode_single_pass(geo, current_tooldia, extracut, self.extracut_length,
-                                                                tolerance, z_move=z_move, old_point=current_pt)
+                    gcode += self.create_gcode_single_pass(geo, current_tooldia, extracut, self.extracut_length,
+                                                           tolerance, z_move=z_move, old_point=current_pt)
 
                 # --------- Multi-pass ---------
                 else:
@@ -5930,7 +6134,7 @@ class CNCjob(Geometry):
                     gc, geo = self.create_gcode_multi_pass(geo, current_tooldia, extracut, self.extracut_length,
                                                            tolerance, z_move=z_move, postproc=p,
                                                            old_point=current_pt)
-                    self.gcode += gc
+                    gcode += gc
 
                 # calculate the travel distance
                 total_travel += abs(distance(pt1=current_pt, pt2=pt))
@@ -5954,13 +6158,14 @@ class CNCjob(Geometry):
         self.routing_time += total_cut / self.feedrate
 
         # Finish
-        self.gcode += self.doformat(p.spindle_stop_code)
-        self.gcode += self.doformat(p.lift_code, x=current_pt[0], y=current_pt[1])
-        self.gcode += self.doformat(p.end_code, x=0, y=0)
+        gcode += self.doformat(p.spindle_stop_code)
+        gcode += self.doformat(p.lift_code, x=current_pt[0], y=current_pt[1])
+        gcode += self.doformat(p.end_code, x=0, y=0)
         self.app.inform.emit(
             '%s... %s %s.' % (_("Finished G-Code generation"), str(path_count), _("paths traced"))
         )
 
+        self.gcode = gcode
         return self.gcode, start_gcode
 
     def generate_gcode_from_solderpaste_geo(self, **kwargs):
@@ -6031,9 +6236,10 @@ class CNCjob(Geometry):
                 storage.insert(geo_shape)
 
         # Initial G-Code
-        self.gcode = self.doformat(p.start_code)
-        self.gcode += self.doformat(p.spindle_off_code)
-        self.gcode += self.doformat(p.toolchange_code)
+        # the G-code is added to a local string; adding to the attribute copies the whole G-code on each addition
+        gcode = self.doformat(p.start_code)
+        gcode += self.doformat(p.spindle_off_code)
+        gcode += self.doformat(p.toolchange_code)
 
         # ## Iterate over geometry paths getting the nearest each time.
         log.debug("Starting SolderPaste G-Code...")
@@ -6063,7 +6269,7 @@ class CNCjob(Geometry):
                     # geo.coords = list(geo.coords)[::-1] # Shapely 2.0
                     geo = LineString(list(geo.coords)[::-1])
 
-                self.gcode += self.create_soldepaste_gcode(geo, p=p, old_point=current_pt)
+                gcode += self.create_soldepaste_gcode(geo, p=p, old_point=current_pt)
                 current_pt = geo.coords[-1]
                 pt, geo = storage.nearest(current_pt)  # Next
 
@@ -6080,9 +6286,10 @@ class CNCjob(Geometry):
         )
 
         # Finish
-        self.gcode += self.doformat(p.lift_code)
-        self.gcode += self.doformat(p.end_code)
+        gcode += self.doformat(p.lift_code)
+        gcode += self.doformat(p.end_code)
 
+        self.gcode = gcode
         return self.gcode
 
     def create_soldepaste_gcode(self, geometry, p, old_point=(0, 0)):
@@ -6273,77 +6480,28 @@ class CNCjob(Geometry):
         gcode_multi_pass += self.doformat(p.lift_code, x=old_point[0], y=old_point[1])
         return gcode_multi_pass, geometry
 
+    def gcode_dialect(self):
+        """
+        The dialect of the G-code of this job, set by the preprocessors used to make it.
+
+        :return:    dialect name, a key of appPreProcessor.gcode_tokenizers
+        :rtype:     str
+        """
+        return resolve_dialect([self.pp_excellon_name, self.pp_geometry_name, self.pp_solderpaste_name])
+
     def codes_split(self, gline):
         """
         Parses a line of G-Code such as "G01 X1234 Y987" into
         a dictionary: {'G': 1.0, 'X': 1234.0, 'Y': 987.0}
 
+        The parsers of many lines select the tokenizer once, with self.gcode_dialect().
+
         :param gline:       G-Code line string
         :type gline:        str
         :return:            Dictionary with parsed line.
         :rtype:             dict
         """
-
-        command = {}
-
-        if 'Roland' in self.pp_excellon_name or 'Roland' in self.pp_geometry_name:
-            match_z = re.search(r"^Z(\s*-?\d+\.\d+?),(\s*\s*-?\d+\.\d+?),(\s*\s*-?\d+\.\d+?)*;$", gline)
-            if match_z:
-                command['G'] = 0
-                command['X'] = float(match_z.group(1).replace(" ", "")) * 0.025
-                command['Y'] = float(match_z.group(2).replace(" ", "")) * 0.025
-                command['Z'] = float(match_z.group(3).replace(" ", "")) * 0.025
-
-        elif 'hpgl' in self.pp_excellon_name or 'hpgl' in self.pp_geometry_name:
-            match_pa = re.search(r"^PA(\s*-?\d+\.\d+?),(\s*\s*-?\d+\.\d+?)*;$", gline)
-            if match_pa:
-                command['G'] = 0
-                command['X'] = float(match_pa.group(1).replace(" ", "")) / 40
-                command['Y'] = float(match_pa.group(2).replace(" ", "")) / 40
-            match_pen = re.search(r"^(P[U|D])", gline)
-            if match_pen:
-                if match_pen.group(1) == 'PU':
-                    # the value does not matter, only that it is positive so the gcode_parse() know it is > 0,
-                    # therefore the move is of kind T (travel)
-                    command['Z'] = 1
-                else:
-                    command['Z'] = 0
-
-        elif 'laser' in self.pp_excellon_name.lower() or 'laser' in self.pp_geometry_name.lower() or \
-                (self.pp_solderpaste_name is not None and 'paste' in self.pp_solderpaste_name.lower()):
-            match_lsr = re.search(r"X([\+-]?\d+.[\+-]?\d+)\s*Y([\+-]?\d+.[\+-]?\d+)", gline)
-            if match_lsr:
-                command['X'] = float(match_lsr.group(1).replace(" ", ""))
-                command['Y'] = float(match_lsr.group(2).replace(" ", ""))
-
-            match_lsr_pos = re.search(r"^(M0?[3-5])", gline)
-            if match_lsr_pos:
-                if 'M05' in match_lsr_pos.group(1) or 'M5' in match_lsr_pos.group(1):
-                    # the value does not matter, only that it is positive so the gcode_parse() know it is > 0,
-                    # therefore the move is of kind T (travel)
-                    command['Z'] = 1
-                else:
-                    command['Z'] = 0
-
-            match_lsr_pos_2 = re.search(r"^(M10[6|7])", gline)
-            if match_lsr_pos_2:
-                if 'M107' in match_lsr_pos_2.group(1):
-                    command['Z'] = 1
-                else:
-                    command['Z'] = 0
-        elif self.pp_solderpaste_name is not None:
-            if 'Paste' in self.pp_solderpaste_name:
-                match_paste = re.search(r"X([\+-]?\d+.[\+-]?\d+)\s*Y([\+-]?\d+.[\+-]?\d+)", gline)
-                if match_paste:
-                    command['X'] = float(match_paste.group(1).replace(" ", ""))
-                    command['Y'] = float(match_paste.group(2).replace(" ", ""))
-        else:
-            match = re.search(r'^\s*([A-Z])\s*([\+\-\.\d\s]+)', gline)
-            while match:
-                command[match.group(1)] = float(match.group(2).replace(" ", ""))
-                gline = gline[match.end():]
-                match = re.search(r'^\s*([A-Z])\s*([\+\-\.\d\s]+)', gline)
-        return command
+        return gcode_tokenizers[self.gcode_dialect()](gline)
 
     def gcode_parse(self, force_parsing=None):
         """
@@ -6351,7 +6509,7 @@ class CNCjob(Geometry):
         single-segment LineString's and "kind" indicating cut or travel,
         fast or feedrate speed.
 
-        Will return a list of dict in the format:
+        Will return a Toolpath (appCommon/Toolpath.py), a sequence of dict in the format:
         {
             "geom": LineString(path),
             "kind": kind
@@ -6361,13 +6519,13 @@ class CNCjob(Geometry):
         :param force_parsing:
         :type force_parsing:
         :return:
-        :rtype:                 dict
+        :rtype:                 Toolpath
         """
 
         kind = ["C", "F"]  # T=travel, C=cut, F=fast, S=slow
 
         # Results go here
-        geometry = []
+        geometry = ToolpathBuilder()
 
         # Last known instruction
         current = {'X': 0.0, 'Y': 0.0, 'Z': 0.0, 'G': 0}
@@ -6399,16 +6557,23 @@ class CNCjob(Geometry):
         path = [pos_xy]
         # path = [(0, 0)]
 
+        # the drill diameters of the CNC jobs made from Excellon objects, indexed by the drill coordinates
+        drill_dias = self.drill_dia_index() if self.origin_kind == 'excellon' else {}
+
         gcode_lines_list = self.gcode.splitlines()
         self.app.inform.emit('%s: %d' % (_("Parsing GCode file. Number of lines"), len(gcode_lines_list)))
 
+        # the dialect is resolved once, not for every line
+        dialect = self.gcode_dialect()
+        codes_split = gcode_tokenizers[dialect]
+
         # Process every instruction
         for line in gcode_lines_list:
             if force_parsing is False or force_parsing is None:
                 if '%MO' in line or '%' in line or 'MOIN' in line or 'MOMM' in line:
                     return "fail"
 
-            gobj = self.codes_split(line)
+            gobj = codes_split(line)
 
             # ## Units
             if 'G' in gobj and (gobj['G'] == 20.0 or gobj['G'] == 21.0):
@@ -6421,11 +6586,7 @@ class CNCjob(Geometry):
 
             # ## Changing height
             if 'Z' in gobj:
-                if 'Roland' in self.pp_excellon_name or 'Roland' in self.pp_geometry_name:
-                    pass
-                elif 'hpgl' in self.pp_excellon_name or 'hpgl' in self.pp_geometry_name:
-                    pass
-                elif 'laser' in self.pp_excellon_name or 'laser' in self.pp_geometry_name:
+                if dialect in ('roland', 'hpgl', 'laser'):
                     pass
                 elif ('X' in gobj or 'Y' in gobj) and gobj['Z'] != current['Z']:
                     if self.pp_geometry_name == 'line_xyz' or self.pp_excellon_name == 'line_xyz':
@@ -6434,12 +6595,11 @@ class CNCjob(Geometry):
                         log.warning("Non-orthogonal motion: From %s" % str(current))
                         log.warning("  To: %s" % str(gobj))
 
-                current['Z'] = gobj['Z']
                 # Store the path into geometry and reset path
                 if len(path) > 1:
-                    geometry.append({"geom": LineString(path),
-                                     "kind": kind})
+                    geometry.add(path, current['Z'], kind, tool=current.get('T', 0))
                     path = [path[-1]]  # Start with the last point of last path.
+                current['Z'] = gobj['Z']
 
                 # create the geometry for the holes created when drilling Excellon drills
                 if self.origin_kind == 'excellon':
@@ -6450,27 +6610,11 @@ class CNCjob(Geometry):
                         )
 
                         # find the drill diameter knowing the drill coordinates
-                        break_loop = False
-                        for tool, tool_dict in self.exc_tools.items():
-                            if 'drills' in tool_dict:
-                                for drill_pt in tool_dict['drills']:
-                                    point_in_dict_coords = (
-                                        float('%.*f' % (self.decimals, drill_pt.x)),
-                                        float('%.*f' % (self.decimals, drill_pt.y))
-                                    )
-                                    if point_in_dict_coords == current_drill_point_coords:
-                                        dia = self.exc_tools[tool]['tooldia']
-                                        kind = ['C', 'F']
-                                        geometry.append(
-                                            {
-                                                "geom": Point(current_drill_point_coords).buffer(dia / 2.0).exterior,
-                                                "kind": kind
-                                            }
-                                        )
-                                        break_loop = True
-                                        break
-                                if break_loop:
-                                    break
+                        dia = drill_dias.get(current_drill_point_coords)
+                        if dia is not None:
+                            kind = ['C', 'F']
+                            geometry.add_circle(current_drill_point_coords, dia / 2.0, current['Z'], kind,
+                                                tool=current.get('T', 0))
 
             if 'G' in gobj:
                 current['G'] = int(gobj['G'])
@@ -6517,15 +6661,33 @@ class CNCjob(Geometry):
         # end, therefore, see here too if there is
         # a final path.
         if len(path) > 1:
-            geometry.append(
-                {
-                    "geom": LineString(path),
-                    "kind": kind
-                }
-            )
+            geometry.add(path, current['Z'], kind, tool=current.get('T', 0))
 
-        self.gcode_parsed = geometry
-        return geometry
+        self.gcode_parsed = geometry.toolpath()
+        return self.gcode_parsed
+
+    def drill_dia_index(self):
+        """
+        Index the diameters of the drills in self.exc_tools by the drill coordinates rounded to self.decimals, as
+        they are looked up in self.gcode_parse().
+
+        :return:    dict {(x, y): tool diameter}; when more tools have a drill in the same location the first one wins
+        :rtype:     dict
+        """
+        index = {}
+        for tool_dict in self.exc_tools.values():
+            if 'drills' not in tool_dict:
+                continue
+
+            dia = tool_dict['tooldia']
+            for drill_pt in tool_dict['drills']:
+                coords = (
+                    float('%.*f' % (self.decimals, drill_pt.x)),
+                    float('%.*f' % (self.decimals, drill_pt.y))
+                )
+                if coords not in index:
+                    index[coords] = dia
+        return index
 
     def excellon_tool_gcode_parse(self, dia, gcode, start_pt=(0, 0), force_parsing=None):
         """
@@ -6533,7 +6695,7 @@ class CNCjob(Geometry):
         single-segment LineString's and "kind" indicating cut or travel,
         fast or feedrate speed.
 
-        Will return the Geometry as a list of dict in the format:
+        Will return the Geometry as a Toolpath (appCommon/Toolpath.py), a sequence of dict in the format:
         {
             "geom": LineString(path),
             "kind": kind
@@ -6548,14 +6710,14 @@ class CNCjob(Geometry):
         :type start_pt:         tuple
         :param force_parsing:
         :type force_parsing:    bool
-        :return:                Geometry as a list of dictionaries
-        :rtype:                 list
+        :return:                Geometry as a sequence of dictionaries
+        :rtype:                 Toolpath
         """
 
         kind = ["C", "F"]  # T=travel, C=cut, F=fast, S=slow
 
         # Results go here
-        geometry = []
+        geometry = ToolpathBuilder()
 
         # Last known instruction
         current = {'X': 0.0, 'Y': 0.0, 'Z': 0.0, 'G': 0}
@@ -6574,13 +6736,17 @@ class CNCjob(Geometry):
                                 len(gcode_lines_list))
         )
 
+        # the dialect is resolved once, not for every line
+        dialect = self.gcode_dialect()
+        codes_split = gcode_tokenizers[dialect]
+
         # Process every instruction
         for line in gcode_lines_list:
             if force_parsing is False or force_parsing is None:
                 if '%MO' in line or '%' in line or 'MOIN' in line or 'MOMM' in line:
                     return "fail"
 
-            gobj = self.codes_split(line)
+            gobj = codes_split(line)
 
             # ## Units
             if 'G' in gobj and (gobj['G'] == 20.0 or gobj['G'] == 21.0):
@@ -6593,11 +6759,7 @@ class CNCjob(Geometry):
 
             # ## Changing height
             if 'Z' in gobj:
-                if 'Roland' in self.pp_excellon_name or 'Roland' in self.pp_geometry_name:
-                    pass
-                elif 'hpgl' in self.pp_excellon_name or 'hpgl' in self.pp_geometry_name:
-                    pass
-                elif 'laser' in self.pp_excellon_name or 'laser' in self.pp_geometry_name:
+                if dialect in ('roland', 'hpgl', 'laser'):
                     pass
                 elif ('X' in gobj or 'Y' in gobj) and gobj['Z'] != current['Z']:
                     if self.pp_geometry_name == 'line_xyz' or self.pp_excellon_name == 'line_xyz':
@@ -6606,12 +6768,11 @@ class CNCjob(Geometry):
                         log.warning("Non-orthogonal motion: From %s" % str(current))
                         log.warning("  To: %s" % str(gobj))
 
-                current['Z'] = gobj['Z']
                 # Store the path into geometry and reset path
                 if len(path) > 1:
-                    geometry.append({"geom": LineString(path),
-                                     "kind": kind})
+                    geometry.add(path, current['Z'], kind, tool=current.get('T', 0))
                     path = [path[-1]]  # Start with the last point of last path.
+                current['Z'] = gobj['Z']
 
                 # create the geometry for the holes created when drilling Excellon drills
                 if current['Z'] < 0:
@@ -6621,12 +6782,8 @@ class CNCjob(Geometry):
                     )
 
                     kind = ['C', 'F']
-                    geometry.append(
-                        {
-                            "geom": Point(current_drill_point_coords).buffer(dia/2.0).exterior,
-                            "kind": kind
-                        }
-                    )
+                    geometry.add_circle(current_drill_point_coords, dia / 2.0, current['Z'], kind,
+                                        tool=current.get('T', 0))
 
             if 'G' in gobj:
                 current['G'] = int(gobj['G'])
@@ -6662,13 +6819,8 @@ class CNCjob(Geometry):
         self.app.inform.emit('%s: %s' % (_("Creating Geometry from the parsed GCode file for tool diameter"), str(dia)))
         # There might not be a change in height at the end, therefore, see here too if there is a final path.
         if len(path) > 1:
-            geometry.append(
-                {
-                    "geom": LineString(path),
-                    "kind": kind
-                }
-            )
-        return geometry
+            geometry.add(path, current['Z'], kind, tool=current.get('T', 0))
+        return geometry.toolpath()
 
     # def plot(self, tooldia=None, dpi=75, margin=0.1,
     #          color={"T": ["#F0E24D", "#B5AB3A"], "C": ["#5E6CFF", "#4650BD"]},
@@ -6705,6 +6857,54 @@ class CNCjob(Geometry):
     #
     #     return fig
 
+    @staticmethod
+    def parsed_geometries(gcode_parsed, letter=None):
+        """
+        The geometry of the parsed G-code and the kind of each geometry.
+
+        :param gcode_parsed:    parsed G-code: a Toolpath or a list of dict as made by the parsers before Toolpath
+        :type gcode_parsed:     Toolpath | list
+        :param letter:          'T' or 'C' to make only the geometry of the travel or of the cut paths; None for all
+        :type letter:           str
+        :return:                tuple (list of geometries, list of the kind letter 'T' (travel) or 'C' (cut) of each)
+        :rtype:                 tuple
+        """
+        if isinstance(gcode_parsed, Toolpath):
+            if letter is None:
+                return gcode_parsed.geometries(), gcode_parsed.kind_letters()
+            mask = gcode_parsed.kind_mask(letter)
+            return gcode_parsed.geometries(mask=mask), [letter] * int(mask.sum())
+
+        selected = [geo for geo in gcode_parsed if letter is None or geo['kind'][0] == letter]
+        return [geo['geom'] for geo in selected], [geo['kind'][0] for geo in selected]
+
+    @staticmethod
+    def parsed_bounds_geometry(gcode_parsed):
+        """
+        The geometry kept for the bounding box of the parsed G-code of a tool.
+
+        :param gcode_parsed:    parsed G-code: a Toolpath or a list of dict as made by the parsers before Toolpath
+        :type gcode_parsed:     Toolpath | list
+        :return:                the box of the bounds of a Toolpath or the union of the geometries of a list of dict
+        :rtype:                 BaseGeometry
+        """
+        if isinstance(gcode_parsed, Toolpath):
+            return shply_box(*gcode_parsed.bounds())
+        return unary_union(CNCjob.parsed_geometries(gcode_parsed)[0])
+
+    @staticmethod
+    def travel_endpoints(gcode_parsed):
+        """
+        :param gcode_parsed:    parsed G-code: a Toolpath or a list of dict as made by the parsers before Toolpath
+        :type gcode_parsed:     Toolpath | list
+        :return:                list of (start, end) coordinates tuples of the travel lines
+        :rtype:                 list
+        """
+        if isinstance(gcode_parsed, Toolpath):
+            starts, ends = gcode_parsed.endpoints(gcode_parsed.kind_mask('T'))
+            return [(tuple(start), tuple(end)) for start, end in zip(starts.tolist(), ends.tolist())]
+        return [(geo['geom'].coords[0], geo['geom'].coords[-1]) for geo in gcode_parsed if geo['kind'][0] == 'T']
+
     def plot2(self, tooldia=None, dpi=75, margin=0.1, gcode_parsed=None,
               color=None, alpha={"T": 0.3, "C": 1.0}, tool_tolerance=0.0005, obj=None, visible=False, kind='all'):
         """
@@ -6717,7 +6917,7 @@ class CNCjob(Geometry):
         :param margin:              Not used!
         :type margin:               float
         :param gcode_parsed:        Parsed Gcode
-        :type gcode_parsed:         str
+        :type gcode_parsed:         Toolpath
         :param color:               Color specification.
         :type color:                str
         :param alpha:               Transparency specification.
@@ -6750,82 +6950,95 @@ class CNCjob(Geometry):
         if isinstance(tooldia, list):
             tooldia = tooldia[0] if tooldia[0] is not None else self.tooldia
 
+        # only the geometry of the plotted kind of paths is made
+        plot_kinds = {'all': ['T', 'C'], 'travel': ['T'], 'cut': ['C']}.get(kind, [])
+
         if tooldia == 0:
-            for geo in gcode_parsed:
-                if kind == 'all':
-                    obj.add_shape(shape=geo['geom'], color=color[geo['kind'][0]][1], visible=visible)
-                elif kind == 'travel':
-                    if geo['kind'][0] == 'T':
-                        obj.add_shape(shape=geo['geom'], color=color['T'][1], visible=visible)
-                elif kind == 'cut':
-                    if geo['kind'][0] == 'C':
-                        obj.add_shape(shape=geo['geom'], color=color['C'][1], visible=visible)
+            for geo_kind in plot_kinds:
+                for geom in self.parsed_geometries(gcode_parsed, geo_kind)[0]:
+                    obj.add_shape(shape=geom, color=color[geo_kind][1], visible=visible)
         else:
             path_num = 0
 
             self.coordinates_type = self.app.defaults["cncjob_coords_type"]
             if self.coordinates_type == "G90":
                 # For Absolute coordinates type G90
-                for geo in gcode_parsed:
-                    if geo['kind'][0] == 'T':
-                        start_position = geo['geom'].coords[0]
-
-                        if tooldia not in obj.annotations_dict:
-                            obj.annotations_dict[tooldia] = {
-                                'pos': [],
-                                'text': []
-                            }
-                        if start_position not in obj.annotations_dict[tooldia]['pos']:
-                            path_num += 1
-                            obj.annotations_dict[tooldia]['pos'].append(start_position)
-                            obj.annotations_dict[tooldia]['text'].append(str(path_num))
-
-                        end_position = geo['geom'].coords[-1]
-
-                        if tooldia not in obj.annotations_dict:
-                            obj.annotations_dict[tooldia] = {
-                                'pos': [],
-                                'text': []
-                            }
-                        if end_position not in obj.annotations_dict[tooldia]['pos']:
-                            path_num += 1
-                            obj.annotations_dict[tooldia]['pos'].append(end_position)
-                            obj.annotations_dict[tooldia]['text'].append(str(path_num))
-
-                    # plot the geometry of Excellon objects
-                    if self.origin_kind == 'excellon':
-                        try:
-                            # if the geos are travel lines
-                            if geo['kind'][0] == 'T':
-                                poly = geo['geom'].buffer(distance=(tooldia / 1.99999999),
-                                                          resolution=self.steps_per_circle)
-                            else:
-                                poly = Polygon(geo['geom'])
-
-                            poly = poly.simplify(tool_tolerance)
-                        except Exception:
-                            # deal here with unexpected plot errors due of LineStrings not valid
-                            continue
-                    else:
-                        # plot the geometry of any objects other than Excellon
-                        poly = geo['geom'].buffer(distance=(tooldia / 1.99999999), resolution=self.steps_per_circle)
-                        poly = poly.simplify(tool_tolerance)
-
-                    if kind == 'all':
-                        obj.add_shape(shape=poly, color=color[geo['kind'][0]][1], face_color=color[geo['kind'][0]][0],
-                                      visible=visible, layer=1 if geo['kind'][0] == 'C' else 2)
-                    elif kind == 'travel':
-                        if geo['kind'][0] == 'T':
-                            obj.add_shape(shape=poly, color=color['T'][1], face_color=color['T'][0],
-                                          visible=visible, layer=2)
-                    elif kind == 'cut':
-                        if geo['kind'][0] == 'C':
-                            obj.add_shape(shape=poly, color=color['C'][1], face_color=color['C'][0],
-                                          visible=visible, layer=1)
+                # the start and the end of the travel lines are numbered
+                travel_endpoints = self.travel_endpoints(gcode_parsed)
+                if travel_endpoints:
+                    if tooldia not in obj.annotations_dict:
+                        obj.annotations_dict[tooldia] = {
+                            'pos': [],
+                            'text': []
+                        }
+                    annotations = obj.annotations_dict[tooldia]
+                    positions = set(annotations['pos'])
+
+                    for start_position, end_position in travel_endpoints:
+                        for position in (start_position, end_position):
+                            if position not in positions:
+                                path_num += 1
+                                positions.add(position)
+                                annotations['pos'].append(position)
+                                annotations['text'].append(str(path_num))
+
+                for geo_kind in plot_kinds:
+                    geometries = self.parsed_geometries(gcode_parsed, geo_kind)[0]
+                    for poly in self.plot_polygons(geometries, geo_kind, tooldia, tool_tolerance):
+                        obj.add_shape(shape=poly, color=color[geo_kind][1], face_color=color[geo_kind][0],
+                                      visible=visible, layer=1 if geo_kind == 'C' else 2)
             else:
                 self.app.inform.emit('[ERROR_NOTCL] %s...' % _('G91 coordinates not implemented'))
                 return 'fail'
 
+    def plot_polygons(self, geometries, geo_kind, tooldia, tool_tolerance):
+        """
+        The polygons plotted for the paths of one kind: the paths buffered with the tool radius or, for the cut
+        paths of the Excellon jobs, the filled outlines of the drill holes. With Shapely >= 2.0 the polygons are
+        made and simplified in one call for all the paths.
+
+        :param geometries:      the geometry of the paths: LineString and LinearRing (the drill hole outlines)
+        :type geometries:       list
+        :param geo_kind:        the kind of the paths: 'T' (travel) or 'C' (cut)
+        :type geo_kind:         str
+        :param tooldia:         the tool diameter
+        :type tooldia:          float
+        :param tool_tolerance:  tolerance of the simplification of the polygons
+        :type tool_tolerance:   float
+        :return:                list of polygons; the paths that can't be plotted are skipped
+        :rtype:                 list
+        """
+        fill = self.origin_kind == 'excellon' and geo_kind == 'C'
+        radius = tooldia / 1.99999999
+        steps = int(self.steps_per_circle)
+
+        def one_by_one(paths):
+            polygons = []
+            for geom in paths:
+                try:
+                    poly = Polygon(geom) if fill else geom.buffer(distance=radius, resolution=steps)
+                    polygons.append(poly.simplify(tool_tolerance))
+                except Exception:
+                    # deal here with unexpected plot errors due of LineStrings not valid
+                    continue
+            return polygons
+
+        if shapely_buffer is None or not geometries:
+            return one_by_one(geometries)
+
+        geoms = np.empty(len(geometries), dtype=object)
+        geoms[:] = geometries
+        if fill:
+            # the drill hole outlines are filled at once; the other cut paths, like the slots, one by one
+            is_ring = shapely_get_type_id(geoms) == 2
+            polygons = shapely_simplify(shapely_polygons(geoms[is_ring]), tool_tolerance).tolist()
+            return polygons + one_by_one(geoms[~is_ring].tolist())
+
+        try:
+            return shapely_simplify(shapely_buffer(geoms, radius, quad_segs=steps), tool_tolerance).tolist()
+        except Exception:
+            return one_by_one(geometries)
+
     def plot_annotations(self, obj, visible=True):
         """
         Plot annotations.
@@ -6889,10 +7102,9 @@ class CNCjob(Geometry):
     def create_geometry(self):
         """
         It is used by the Excellon objects. Will create the solid_geometry which will be an attribute of the
-        Excellon object class.
+        Excellon object class. The geometry of a Toolpath is made when the solid_geometry is first used.
 
-        :return:    List of Shapely geometry elements
-        :rtype:     list
+        :return:    None
         """
 
         # This takes forever. Too much data?
@@ -6900,10 +7112,12 @@ class CNCjob(Geometry):
         #                                  str(len(self.gcode_parsed))))
         # self.solid_geometry = unary_union([geo['geom'] for geo in self.gcode_parsed])
 
-        # This is much faster but not so nice to look at as you can see different segments of the geometry
-        self.solid_geometry = [geo['geom'] for geo in self.gcode_parsed]
+        if isinstance(self.gcode_parsed, Toolpath):
+            self.solid_geometry = None
+            return
 
-        return self.solid_geometry
+        # This is much faster but not so nice to look at as you can see different segments of the geometry
+        self.solid_geometry = self.parsed_geometries(self.gcode_parsed)[0]
 
     def segment(self, coords):
         """
@@ -7493,29 +7707,30 @@ class CNCjob(Geometry):
         cutsgeom = ''
         travelsgeom = ''
 
-        for g in self.gcode_parsed:
+        geometries, geo_kinds = self.parsed_geometries(self.gcode_parsed)
+        for geom, geo_kind in zip(geometries, geo_kinds):
             if self.app.abort_flag:
                 # graceful abort requested by the user
                 raise grace
 
-            if g['kind'][0] == 'C':
-                cuts.append(g)
-            if g['kind'][0] == 'T':
-                travels.append(g)
+            if geo_kind == 'C':
+                cuts.append(geom)
+            if geo_kind == 'T':
+                travels.append(geom)
 
         # Used to determine the overall board size
-        self.solid_geometry = unary_union([geo['geom'] for geo in self.gcode_parsed])
+        self.solid_geometry = unary_union(geometries)
 
         # Convert the cuts and travels into single geometry objects we can render as svg xml
         if travels:
-            travelsgeom = unary_union([geo['geom'] for geo in travels])
+            travelsgeom = unary_union(travels)
 
         if self.app.abort_flag:
             # graceful abort requested by the user
             raise grace
 
         if cuts:
-            cutsgeom = unary_union([geo['geom'] for geo in cuts])
+            cutsgeom = unary_union(cuts)
 
         # Render the SVG Xml
         # The scale factor affects the size of the lines, and the stroke color adds different formatting for each set
@@ -7568,6 +7783,10 @@ class CNCjob(Geometry):
 
         if self.multitool is False:
             log.debug("CNCJob->bounds()")
+            if isinstance(self.gcode_parsed, Toolpath) and len(self.gcode_parsed):
+                # the bounds of the paths, without making their geometry
+                return self.gcode_parsed.bounds()
+
             if self.solid_geometry is None:
                 log.debug("solid_geometry is None")
                 return 0, 0, 0, 0
@@ -7621,6 +7840,36 @@ class CNCjob(Geometry):
             bounds_coords = minx, miny, maxx, maxy
         return bounds_coords
 
+    def transform_parsed(self, gcode_parsed, transform, *args, **kwargs):
+        """
+        Applies an affine transformation to the parsed G-code. A Toolpath is transformed in place, in one step;
+        the items of a list of dict are transformed one by one.
+
+        :param gcode_parsed:    parsed G-code: a Toolpath or a list of dict as made by the parsers before Toolpath
+        :type gcode_parsed:     Toolpath | list
+        :param transform:       one of the shapely.affinity functions: scale, translate, rotate, skew
+        :type transform:        function
+        :param args:            the arguments of the transform function, after the geometry
+        :param kwargs:          the keyword arguments of the transform function
+        :return:                None or the geometry that could not be transformed
+        """
+        if isinstance(gcode_parsed, Toolpath):
+            getattr(gcode_parsed, transform.__name__)(*args, **kwargs)
+            return None
+
+        for g in gcode_parsed:
+            try:
+                g['geom'] = transform(g['geom'], *args, **kwargs)
+            except AttributeError:
+                return g['geom']
+
+            self.el_count += 1
+            disp_number = int(np.interp(self.el_count, [0, self.geo_len], [0, 100]))
+            if self.old_disp_number < disp_number <= 100:
+                self.app.proc_container.update_view_text(' %d%%' % disp_number)
+                self.old_disp_number = disp_number
+        return None
+
     # TODO This function should be replaced at some point with a "real" function. Until then it's an ugly hack ...
     def scale(self, xfactor, yfactor=None, point=None):
         """
@@ -7763,17 +8012,9 @@ class CNCjob(Geometry):
             self.el_count = 0
 
             # scale geometry
-            for g in self.gcode_parsed:
-                try:
-                    g['geom'] = affinity.scale(g['geom'], xfactor, yfactor, origin=(px, py))
-                except AttributeError:
-                    return g['geom']
-
-                self.el_count += 1
-                disp_number = int(np.interp(self.el_count, [0, self.geo_len], [0, 100]))
-                if self.old_disp_number < disp_number <= 100:
-                    self.app.proc_container.update_view_text(' %d%%' % disp_number)
-                    self.old_disp_number = disp_number
+            ret = self.transform_parsed(self.gcode_parsed, affinity.scale, xfactor, yfactor, origin=(px, py))
+            if ret is not None:
+                return ret
 
             self.create_geometry()
         else:
@@ -7791,19 +8032,11 @@ class CNCjob(Geometry):
                 self.el_count = 0
 
                 # scale gcode_parsed
-                for g in v['gcode_parsed']:
-                    try:
-                        g['geom'] = affinity.scale(g['geom'], xfactor, yfactor, origin=(px, py))
-                    except AttributeError:
-                        return g['geom']
+                ret = self.transform_parsed(v['gcode_parsed'], affinity.scale, xfactor, yfactor, origin=(px, py))
+                if ret is not None:
+                    return ret
 
-                    self.el_count += 1
-                    disp_number = int(np.interp(self.el_count, [0, self.geo_len], [0, 100]))
-                    if self.old_disp_number < disp_number <= 100:
-                        self.app.proc_container.update_view_text(' %d%%' % disp_number)
-                        self.old_disp_number = disp_number
-
-                v['solid_geometry'] = unary_union([geo['geom'] for geo in v['gcode_parsed']])
+                v['solid_geometry'] = self.parsed_bounds_geometry(v['gcode_parsed'])
         self.create_geometry()
         self.app.proc_container.new_text = ''
 
@@ -7871,17 +8104,9 @@ class CNCjob(Geometry):
             self.el_count = 0
 
             # offset geometry
-            for g in self.gcode_parsed:
-                try:
-                    g['geom'] = affinity.translate(g['geom'], xoff=dx, yoff=dy)
-                except AttributeError:
-                    return g['geom']
-
-                self.el_count += 1
-                disp_number = int(np.interp(self.el_count, [0, self.geo_len], [0, 100]))
-                if self.old_disp_number < disp_number <= 100:
-                    self.app.proc_container.update_view_text(' %d%%' % disp_number)
-                    self.old_disp_number = disp_number
+            ret = self.transform_parsed(self.gcode_parsed, affinity.translate, xoff=dx, yoff=dy)
+            if ret is not None:
+                return ret
 
             self.create_geometry()
         else:
@@ -7899,20 +8124,12 @@ class CNCjob(Geometry):
                 self.el_count = 0
 
                 # offset gcode_parsed
-                for g in v['gcode_parsed']:
-                    try:
-                        g['geom'] = affinity.translate(g['geom'], xoff=dx, yoff=dy)
-                    except AttributeError:
-                        return g['geom']
-
-                    self.el_count += 1
-                    disp_number = int(np.interp(self.el_count, [0, self.geo_len], [0, 100]))
-                    if self.old_disp_number < disp_number <= 100:
-                        self.app.proc_container.update_view_text(' %d%%' % disp_number)
-                        self.old_disp_number = disp_number
+                ret = self.transform_parsed(v['gcode_parsed'], affinity.translate, xoff=dx, yoff=dy)
+                if ret is not None:
+                    return ret
 
                 # for the bounding box
-                v['solid_geometry'] = unary_union([geo['geom'] for geo in v['gcode_parsed']])
+                v['solid_geometry'] = self.parsed_bounds_geometry(v['gcode_parsed'])
 
         self.app.proc_container.new_text = ''
 
@@ -7938,17 +8155,9 @@ class CNCjob(Geometry):
         self.old_disp_number = 0
         self.el_count = 0
 
-        for g in self.gcode_parsed:
-            try:
-                g['geom'] = affinity.scale(g['geom'], xscale, yscale, origin=(px, py))
-            except AttributeError:
-                return g['geom']
-
-            self.el_count += 1
-            disp_number = int(np.interp(self.el_count, [0, self.geo_len], [0, 100]))
-            if self.old_disp_number < disp_number <= 100:
-                self.app.proc_container.update_view_text(' %d%%' % disp_number)
-                self.old_disp_number = disp_number
+        ret = self.transform_parsed(self.gcode_parsed, affinity.scale, xscale, yscale, origin=(px, py))
+        if ret is not None:
+            return ret
 
         self.create_geometry()
         self.app.proc_container.new_text = ''
@@ -7981,17 +8190,9 @@ class CNCjob(Geometry):
         self.old_disp_number = 0
         self.el_count = 0
 
-        for g in self.gcode_parsed:
-            try:
-                g['geom'] = affinity.skew(g['geom'], angle_x, angle_y, origin=(px, py))
-            except AttributeError:
-                return g['geom']
-
-            self.el_count += 1
-            disp_number = int(np.interp(self.el_count, [0, self.geo_len], [0, 100]))
-            if self.old_disp_number < disp_number <= 100:
-                self.app.proc_container.update_view_text(' %d%%' % disp_number)
-                self.old_disp_number = disp_number
+        ret = self.transform_parsed(self.gcode_parsed, affinity.skew, angle_x, angle_y, origin=(px, py))
+        if ret is not None:
+            return ret
 
         self.create_geometry()
         self.app.proc_container.new_text = ''
@@ -8017,17 +8218,9 @@ class CNCjob(Geometry):
         self.old_disp_number = 0
         self.el_count = 0
 
-        for g in self.gcode_parsed:
-            try:
-                g['geom'] = affinity.rotate(g['geom'], angle, origin=(px, py))
-            except AttributeError:
-                return g['geom']
-
-            self.el_count += 1
-            disp_number = int(np.interp(self.el_count, [0, self.geo_len], [0, 100]))
-            if self.old_disp_number < disp_number <= 100:
-                self.app.proc_container.update_view_text(' %d%%' % disp_number)
-                self.old_disp_number = disp_number
+        ret = self.transform_parsed(self.gcode_parsed, affinity.rotate, angle, origin=(px, py))
+        if ret is not None:
+            return ret
 
         self.create_geometry()
         self.app.proc_container.new_text = ''
@@ -8149,6 +8342,7 @@ def to_dict(obj):
 
     * ApertureMacro
     * BaseGeometry
+    * Toolpath
 
     :param obj:     Shapely geometry.
     :type obj:      BaseGeometry
@@ -8165,6 +8359,11 @@ def to_dict(obj):
             "__class__": "Shply",
             "__inst__": sdumps(obj)
         }
+    if isinstance(obj, Toolpath):
+        return {
+            "__class__": "Toolpath",
+            "__inst__": obj.to_dict()
+        }
     return obj
 
 
@@ -8183,6 +8382,8 @@ def dict2obj(d):
             am = ApertureMacro()
             am.from_dict(d['__inst__'])
             return am
+        if d['__class__'] == "Toolpath":
+            return Toolpath.from_dict(d['__inst__'])
         return d
     else:
         return d
@@ -95,6 +95,7 @@ class FlatCAMDefaults:
         "global_worker_number": int((os.cpu_count()) / 2) if os.cpu_count() > 4 else 2,
         "global_tolerance": 0.005,
 
+        "global_project_format": 'json',
         "global_save_compressed": True,
         "global_compression_level": 3,
         "global_autosave": False,
@@ -15,6 +15,7 @@ from appPreProcessor import *
 class GRBL_laser(PreProc):
 
     include_header = True
+    gcode_dialect = 'laser'
     coordinate_format = "%.*f"
     feedrate_format = '%.*f'
 
@@ -12,6 +12,7 @@ from appPreProcessor import *
 class Marlin_laser_FAN_pin(PreProc):
 
     include_header = True
+    gcode_dialect = 'laser'
     coordinate_format = "%.*f"
     feedrate_format = '%.*f'
     feedrate_rapid_format = feedrate_format
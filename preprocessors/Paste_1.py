@@ -12,6 +12,7 @@ from appPreProcessor import *
 class Paste_1(AppPreProcTools):
 
     include_header = True
+    gcode_dialect = 'paste'
     coordinate_format = "%.*f"
     feedrate_format = '%.*f'
 
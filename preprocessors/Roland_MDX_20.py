@@ -14,6 +14,7 @@ from appPreProcessor import *
 class Roland_MDX_20(PreProc):
 
     include_header = False
+    gcode_dialect = 'roland'
     coordinate_format = "%.1f"
     feedrate_format = '%.1f'
     feedrate_rapid_format = '%.1f'
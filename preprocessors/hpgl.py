@@ -13,6 +13,7 @@ from appPreProcessor import *
 # the same) to contain the following keyword, case-sensitive: 'Roland' without the quotes.
 class hpgl(PreProc):
     include_header = True
+    gcode_dialect = 'hpgl'
     coordinate_format = "%.*f"
 
     def start_code(self, p):
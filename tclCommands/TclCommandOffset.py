@@ -60,4 +60,5 @@ class TclCommandOffset(TclCommand):
         if (x, y) == (0.0, 0.0):
             return
 
-        self.app.collection.get_by_name(name).offset((x, y))
+        obj = self.app.collection.get_by_name(name)
+        obj.offset((x, y))
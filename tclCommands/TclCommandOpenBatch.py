@@ -0,0 +1,69 @@
+from tclCommands.TclCommand import TclCommandSignaled
+
+import collections
+
+
+class TclCommandOpenBatch(TclCommandSignaled):
+    """
+    Tcl shell command to open a set of Gerber and Excellon files, parsed in parallel
+    """
+
+    # array of all command aliases, to be able use  old names for backward compatibility (add_poly, add_polygon)
+    aliases = ['open_batch']
+
+    description = '%s %s' % ("--", "Opens a set of Gerber and Excellon files, parse them in parallel and create "
+                                   "an object from each of them.")
+
+    # dictionary of types from Tcl command, needs to be ordered
+    arg_names = collections.OrderedDict([
+    ])
+
+    # dictionary of types from Tcl command, needs to be ordered , this  is  for options  like -optionname value
+    option_types = collections.OrderedDict([
+        ('type', str)
+    ])
+
+    # array of mandatory options for current Tcl command: required = {'name','outname'}
+    required = []
+
+    # structured help for current command, args needs to be ordered
+    help = {
+        'main': "Opens a set of Gerber and Excellon files. The files are parsed in parallel.\n"
+                "The paths of the files are entered separated by spaces. The kind of each file is found by its\n"
+                "extension, as set in Preferences -> Utilities, unless the -type parameter is used.\n"
+                "WARNING: no spaces are allowed in the paths. If unsure enclose each path with quotes.",
+        'args': collections.OrderedDict([
+            ('type', 'The kind of all the files: "gerber" or "excellon". '
+                     'If not used the kind is found by the file extension.')
+        ]),
+        'examples': ['open_batch D:/job/top.gtl D:/job/bottom.gbl D:/job/drills.drl',
+                     'open_batch -type excellon "D:/job/drills plated.txt" "D:/job/drills non plated.txt"']
+    }
+
+    def execute(self, args, unnamed_args):
+        """
+        execute current TCL shell command
+
+        :param args: array of known named arguments and options
+        :param unnamed_args: array of other values which were passed into command
+            without -somename and  we do not have them in known arg_names
+        :return: None or exception
+        """
+
+        if not unnamed_args:
+            self.raise_tcl_error("No files to open.")
+
+        file_type = args['type'].lower() if 'type' in args else None
+        if file_type not in [None, 'gerber', 'excellon']:
+            self.raise_tcl_error("Unknown file type: %s. Expected 'gerber' or 'excellon'." % file_type)
+
+        files = []
+        for filename in unnamed_args:
+            filename = str(filename)
+            kind = file_type or self.app.f_handlers.source_kind(filename)
+            if kind is None:
+                self.raise_tcl_error("Unknown file extension for: %s. Use the -type parameter." % filename)
+            files.append((kind, filename))
+
+        if self.app.f_handlers.open_batch(files, plot=False, from_tcl=True) == 'fail':
+            self.raise_tcl_error("Failed to open some of the files.")
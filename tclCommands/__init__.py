@@ -43,6 +43,7 @@ import tclCommands.TclCommandNewExcellon
 import tclCommands.TclCommandNewGeometry
 import tclCommands.TclCommandNewGerber
 import tclCommands.TclCommandOffset
+import tclCommands.TclCommandOpenBatch
 import tclCommands.TclCommandOpenDXF
 import tclCommands.TclCommandOpenExcellon
 import tclCommands.TclCommandOpenFolder
@@ -0,0 +1,70 @@
+# This script measures the line rate of the G-code tokenizer used by CNCjob.gcode_parse() on a generated job:
+# - the word by word search of CNCjob.codes_split() before the dialect tokenizers (re-slicing the line after each word)
+# - the tokenizer of the 'gcode' dialect (appPreProcessor.split_gcode())
+# The tokens of both are compared, line by line.
+# Run from this folder: python gcode_tokenizer_benchmark.py [number of lines]
+
+import re
+import sys
+import time
+import random
+
+sys.path.append('../../')
+
+from appPreProcessor import gcode_tokenizers
+
+LINES = int(sys.argv[1]) if len(sys.argv) > 1 else 500000
+
+
+def make_job(n):
+    random.seed(0)
+    lines = ['(This is a G-code job made by FlatCAM)', 'G21', 'G90', 'G94', 'F150.00', 'M03 S10000', 'G01 Z-0.1000']
+    while len(lines) < n:
+        x = random.uniform(-100, 300)
+        y = random.uniform(-100, 300)
+        r = random.random()
+        if r < 0.8:
+            lines.append('G01 X%.4f Y%.4f' % (x, y))
+        elif r < 0.9:
+            lines.append('X%.4fY%.4f' % (x, y))
+        elif r < 0.95:
+            lines.append('G00 X%.4f Y%.4f' % (x, y))
+        elif r < 0.97:
+            lines.append('G01 Z%.4f' % random.uniform(-1, 2))
+        elif r < 0.98:
+            lines.append('G4 P%.1f ; dwell' % random.uniform(0, 2))
+        elif r < 0.99:
+            lines.append('T%d  (tool change)' % random.randint(1, 9))
+        else:
+            lines.append('G01 X %.4f Y - %.4f' % (x, abs(y)))
+    return lines
+
+
+def legacy_split(gline):
+    command = {}
+    match = re.search(r'^\s*([A-Z])\s*([\+\-\.\d\s]+)', gline)
+    while match:
+        command[match.group(1)] = float(match.group(2).replace(" ", ""))
+        gline = gline[match.end():]
+        match = re.search(r'^\s*([A-Z])\s*([\+\-\.\d\s]+)', gline)
+    return command
+
+
+def bench(tokenizer, lines):
+    start = time.perf_counter()
+    tokens = [tokenizer(line) for line in lines]
+    return time.perf_counter() - start, tokens
+
+
+if __name__ == '__main__':
+    glines = make_job(LINES)
+    n = len(glines)
+
+    print("G-code tokenizer, %d lines" % n)
+    t_old, old_tokens = bench(legacy_split, glines)
+    t_new, new_tokens = bench(gcode_tokenizers['gcode'], glines)
+    print("    word by word search: %8.3f s    %10.0f lines/s" % (t_old, n / t_old))
+    print("    dialect tokenizer:   %8.3f s    %10.0f lines/s    speedup x%.1f" % (t_new, n / t_new, t_old / t_new))
+
+    mismatches = sum(1 for old, new in zip(old_tokens, new_tokens) if old != new)
+    print("    lines tokenized differently: %d" % mismatches)
@@ -0,0 +1,61 @@
+# This script compares, on a generated drilling and milling job, the parsed G-code as a Toolpath
+# (appCommon/Toolpath.py) with the same paths as the list of dicts that CNCjob.gcode_parse() made before:
+# - the memory used by each representation (the resident memory growth of the process)
+# - the time to compute the bounds, as CNCjob.bounds() does
+# Run from this folder: python toolpath_memory_benchmark.py [number of drills]
+
+import gc
+import sys
+import time
+import random
+
+sys.path.append('../../')
+
+from appCommon.Toolpath import ToolpathBuilder
+
+DRILLS = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+
+
+def rss():
+    # resident memory of this process, in MB (Linux only)
+    with open('/proc/self/status') as f:
+        return int([line for line in f if line.startswith('VmRSS')][0].split()[1]) / 1024.0
+
+
+def make_toolpath(n):
+    random.seed(0)
+    builder = ToolpathBuilder()
+    last = (0.0, 0.0)
+    for i in range(n):
+        pt = (random.uniform(0, 300), random.uniform(0, 300))
+        builder.add([last, pt], 2.0, ['T', 'F'], tool=1)
+        builder.add_circle(pt, 0.4, -1.7, ['C', 'F'], tool=1)
+        builder.add([pt, (pt[0] + 3, pt[1] + 1), (pt[0] + 4, pt[1] + 3)], -1.7, ['C', 'S'], tool=1)
+        last = (pt[0] + 4, pt[1] + 3)
+    return builder.toolpath()
+
+
+if __name__ == '__main__':
+    gc.collect()
+    start = rss()
+    toolpath = make_toolpath(DRILLS)
+    gc.collect()
+    toolpath_mem = rss() - start
+
+    start = rss()
+    legacy = list(toolpath)
+    gc.collect()
+    legacy_mem = rss() - start
+
+    print("Parsed G-code, %d paths" % len(toolpath))
+    print("    memory:  list of dicts %8.1f MB    Toolpath %8.1f MB" % (legacy_mem, toolpath_mem))
+
+    t = time.perf_counter()
+    bounds = [geo['geom'].bounds for geo in legacy]
+    (min(b[0] for b in bounds), min(b[1] for b in bounds), max(b[2] for b in bounds), max(b[3] for b in bounds))
+    t_legacy = time.perf_counter() - t
+
+    t = time.perf_counter()
+    toolpath.bounds()
+    t_toolpath = time.perf_counter() - t
+    print("    bounds:  list of dicts %8.3f s    Toolpath %8.3f s" % (t_legacy, t_toolpath))
@@ -0,0 +1,102 @@
+# This script benchmarks the aperture flash templates of the Gerber parser:
+# the flashes made by building the aperture shape at every D03 (Gerber.create_flash_geometry())
+# against the translated copies of the aperture template (Gerber.flash_geometry()).
+# Run from this folder: python gerber_flash_template_benchmark.py [number of flashes per aperture]
+
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.append('../../')
+
+from appParsers.ParseGerber import *
+from defaults import FlatCAMDefaults
+
+log = logging.getLogger('base2')
+log.setLevel(logging.WARNING)
+
+N_FLASHES = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+
+APERTURES = """%FSLAX24Y24*%
+%MOIN*%
+%AMROUNDCROSS*
+1,1,0.060,0,0*
+21,1,0.090,0.020,0,0,0*
+21,1,0.020,0.090,0,0,0*%
+%ADD10C,0.060*%
+%ADD11R,0.050X0.080*%
+%ADD12O,0.050X0.080*%
+%ADD13P,0.070X6X15*%
+%ADD14ROUNDCROSS*%
+"""
+
+
+def make_app():
+    # just what the parser needs from the application
+    return SimpleNamespace(
+        defaults=FlatCAMDefaults.factory_defaults.copy(),
+        decimals=4,
+        is_legacy=False,
+        abort_flag=False,
+        inform=SimpleNamespace(emit=lambda *args: None),
+        proc_container=SimpleNamespace(update_view_text=lambda *args: None),
+        plotcanvas=SimpleNamespace(new_shape_collection=lambda **kwargs: None)
+    )
+
+
+def make_gerber():
+    Gerber.app = make_app()
+    return Gerber()
+
+
+def flash_lines(n):
+    lines = APERTURES.splitlines()
+    for aperture in ('10', '11', '12', '13', '14'):
+        lines.append('D%s*' % aperture)
+        for i in range(n):
+            lines.append('X%dY%dD03*' % ((i % 300) * 1000, (i // 300) * 1000))
+    lines.append('M02*')
+    return lines
+
+
+def no_template_flash(self, x, y, aperture_id):
+    return self.create_flash_geometry(Point(x, y), self.apertures[aperture_id], self.steps_per_circle)
+
+
+def bench_flashes(gerber, flash_function):
+    start = time.perf_counter()
+    area = 0.0
+    for aperture in sorted(gerber.apertures):
+        for i in range(N_FLASHES):
+            area += flash_function(gerber, (i % 300) * 0.1, (i // 300) * 0.1, aperture).area
+    return time.perf_counter() - start, area
+
+
+def bench_parse(flash_function):
+    Gerber.flash_geometry = flash_function
+    g = make_gerber()
+    start = time.perf_counter()
+    g.parse_lines(flash_lines(N_FLASHES))
+    elapsed = time.perf_counter() - start
+    return elapsed, unary_union(g.solid_geometry).area
+
+
+if __name__ == '__main__':
+    template_flash = Gerber.flash_geometry
+
+    gerber = make_gerber()
+    gerber.parse_lines(APERTURES.splitlines())
+
+    print("Flash geometry, %d flashes for each of %d apertures" % (N_FLASHES, len(gerber.apertures)))
+    t_old, area_old = bench_flashes(gerber, no_template_flash)
+    t_new, area_new = bench_flashes(gerber, template_flash)
+    print("    create_flash_geometry(): %8.3f s" % t_old)
+    print("    flash_geometry():        %8.3f s    speedup x%.1f    area difference %.2e" %
+          (t_new, t_old / t_new, abs(area_new - area_old)))
+
+    print("Complete parse_lines()")
+    t_old, area_old = bench_parse(no_template_flash)
+    t_new, area_new = bench_parse(template_flash)
+    print("    without templates: %8.3f s" % t_old)
+    print("    with templates:    %8.3f s    speedup x%.1f    area difference %.2e" %
+          (t_new, t_old / t_new, abs(area_new - area_old)))
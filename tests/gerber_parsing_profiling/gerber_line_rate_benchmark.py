@@ -0,0 +1,87 @@
+# This script measures the line rate of the Gerber parser on gerber1.gbr:
+# - the pattern matching alone: every pattern of Gerber.parse_lines() tried in sequence until one matches
+#   against the patterns selected by the kind of the line (Gerber.line_kind())
+# - the complete Gerber.parse_lines()
+# Run from this folder: python gerber_line_rate_benchmark.py [number of repeats]
+
+import sys
+import time
+
+sys.path.append('../../')
+
+from appParsers.ParseGerber import *
+from gerber_flash_template_benchmark import make_gerber
+
+log = logging.getLogger('base2')
+log.setLevel(logging.WARNING)
+
+REPEATS = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+
+
+def sequential_patterns(g):
+    # in the order they are tried in Gerber.parse_lines()
+    return [g.comm_re, g.lpol_re, g.fmt_re, g.mode_re, g.fmt_re_alt, g.fmt_re_orcad, g.units_re, g.absrel_re,
+            g.am1_re, g.ad_re, g.opcode_re, g.tool_re, g.regionon_re, g.regionoff_re, g.interp_re, g.lin_re,
+            g.quad_re, g.circ_re, g.eof_re]
+
+
+def dispatch_patterns(g):
+    # the patterns Gerber.parse_lines() tries for each kind of line
+    by_kind = {
+        '%': [g.lpol_re, g.mode_re, g.am1_re, g.ad_re],
+        'G': [g.comm_re, g.units_re, g.absrel_re, g.tool_re, g.regionon_re, g.regionoff_re, g.interp_re, g.lin_re,
+              g.quad_re, g.circ_re],
+        'D': [g.opcode_re, g.tool_re],
+        'M': [g.mode_re, g.eof_re],
+        'X': [g.lin_re, g.circ_re],
+        'Y': [g.lin_re, g.circ_re],
+        'I': [g.circ_re],
+        'J': [g.circ_re]
+    }
+    fs_patterns = [g.fmt_re, g.fmt_re_alt, g.fmt_re_orcad]
+    return by_kind, fs_patterns
+
+
+def bench_sequential(g, lines):
+    patterns = sequential_patterns(g)
+    start = time.perf_counter()
+    for gline in lines:
+        for pattern in patterns:
+            if pattern.search(gline):
+                break
+    return time.perf_counter() - start
+
+
+def bench_dispatch(g, lines):
+    by_kind, fs_patterns = dispatch_patterns(g)
+    start = time.perf_counter()
+    for gline in lines:
+        kind, match = g.line_kind(gline)
+        if match:
+            continue
+        patterns = fs_patterns + by_kind.get(kind, []) if 'FS' in gline else by_kind.get(kind, [])
+        for pattern in patterns:
+            if pattern.search(gline):
+                break
+    return time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    with open('gerber1.gbr', 'r') as f:
+        glines = [line.strip(' \r\n') for line in f.readlines()]
+
+    gerber = make_gerber()
+    lines = glines * REPEATS
+    n = len(lines)
+
+    print("Pattern matching, %d lines" % n)
+    t_seq = bench_sequential(gerber, lines)
+    t_dis = bench_dispatch(gerber, lines)
+    print("    sequential patterns: %8.3f s    %10.0f lines/s" % (t_seq, n / t_seq))
+    print("    dispatch by kind:    %8.3f s    %10.0f lines/s    speedup x%.1f" % (t_dis, n / t_dis, t_seq / t_dis))
+
+    print("Complete parse_lines(), %d lines" % len(glines))
+    start = time.perf_counter()
+    make_gerber().parse_lines(glines)
+    t_parse = time.perf_counter() - start
+    print("    parse_lines():       %8.3f s    %10.0f lines/s" % (t_parse, len(glines) / t_parse))
@@ -0,0 +1,163 @@
+import unittest
+
+import numpy as np
+
+import appCommon.PointGrid as PointGridModule
+import appCommon.PointTree as PointTreeModule
+from appCommon.DrillPath import nearest_neighbour_order, improve_order, optimize_order, path_length
+from appCommon.PointGrid import PointGrid
+from appCommon.PointTree import PointTree
+
+
+def brute_pairs(points, distance):
+    delta = points[:, None, :] - points[None, :, :]
+    dist = np.hypot(delta[..., 0], delta[..., 1])
+    i, j = np.nonzero(np.triu(dist <= distance, k=1))
+    return set(zip(i.tolist(), j.tolist()))
+
+
+def clustered_points(seed=3):
+    rs = np.random.RandomState(seed)
+    # a dense cluster with a few points far from it
+    cluster = rs.normal(0, 0.05, (400, 2)) + (50, 50)
+    outliers = rs.uniform(-1000, 1000, (6, 2))
+    return np.concatenate([cluster, outliers])
+
+
+POINT_SETS = {
+    'random': np.random.RandomState(1).uniform(0, 100, (300, 2)),
+    'duplicates': np.array([(1.0, 1.0)] * 20 + [(2.0, 2.0)] * 20 + [(3.0, 1.0)]),
+    'collinear': np.array([(float(x), 0.0) for x in np.random.RandomState(2).permutation(200)]),
+    'cluster': clustered_points(),
+}
+
+
+class DrillPathOrderTest(unittest.TestCase):
+
+    def assertPath(self, order, n, start):
+        self.assertEqual(sorted(order), list(range(n)))
+        if n:
+            self.assertEqual(order[0], start)
+
+    def test_empty(self):
+        self.assertEqual(nearest_neighbour_order(np.zeros((0, 2))), [])
+        self.assertEqual(optimize_order(np.zeros((0, 2))), [])
+        self.assertEqual(improve_order(np.zeros((0, 2)), []), [])
+
+    def test_single(self):
+        self.assertEqual(nearest_neighbour_order([(5.0, 5.0)]), [0])
+        self.assertEqual(optimize_order([(5.0, 5.0)]), [0])
+
+    def test_permutation(self):
+        for name, points in POINT_SETS.items():
+            for start in (0, len(points) // 2, len(points) - 1):
+                with self.subTest(points=name, start=start):
+                    self.assertPath(nearest_neighbour_order(points, start), len(points), start)
+                    self.assertPath(optimize_order(points, start), len(points), start)
+
+    def test_nearest_neighbour_is_greedy(self):
+        points = POINT_SETS['random']
+        order = nearest_neighbour_order(points, 0)
+
+        remaining = set(range(1, len(points)))
+        for current, nxt in zip(order[:-1], order[1:]):
+            candidates = sorted(remaining)
+            dist = np.hypot(*(points[candidates] - points[current]).T)
+            self.assertAlmostEqual(np.hypot(*(points[nxt] - points[current])), dist.min())
+            remaining.remove(nxt)
+
+    def test_improve_never_longer(self):
+        for name, points in POINT_SETS.items():
+            for order in (nearest_neighbour_order(points, 0),
+                          [0] + np.random.RandomState(4).permutation(np.arange(1, len(points))).tolist()):
+                with self.subTest(points=name):
+                    improved = improve_order(points, order)
+                    self.assertPath(improved, len(points), order[0])
+                    self.assertLessEqual(path_length(points, improved), path_length(points, order) + 1e-9)
+
+
+class PointTreeTest(unittest.TestCase):
+
+    def check_nearest_k(self, points, k):
+        result = PointTree(points, leaf_points=8).nearest_k(k)
+        delta = points[:, None, :] - points[None, :, :]
+        dist = np.hypot(delta[..., 0], delta[..., 1])
+        np.fill_diagonal(dist, np.inf)
+        expected = np.sort(dist, axis=1)[:, :k]
+
+        self.assertEqual(result.shape, (len(points), k))
+        rows = np.arange(len(points))[:, None]
+        # the neighbours may differ on ties; their distances may not
+        np.testing.assert_allclose(dist[rows, result], expected)
+        self.assertFalse((result == rows).any())
+
+    def test_nearest_k(self):
+        for name, points in POINT_SETS.items():
+            for k in (1, 8):
+                with self.subTest(points=name, k=k):
+                    self.check_nearest_k(points, k)
+
+    def test_nearest_k_one_point_at_a_time(self):
+        # the leaves that need too many distances at once are searched point by point
+        old = PointTreeModule.CHUNK_DISTANCES
+        PointTreeModule.CHUNK_DISTANCES = 16
+        try:
+            self.check_nearest_k(POINT_SETS['cluster'], 8)
+        finally:
+            PointTreeModule.CHUNK_DISTANCES = old
+
+    def test_nearest_k_few_points(self):
+        self.assertEqual(PointTree([(0.0, 0.0)]).nearest_k(8).shape, (1, 0))
+        self.assertEqual(PointTree([(0.0, 0.0), (1.0, 0.0)]).nearest_k(8).tolist(), [[1], [0]])
+
+    def test_nearest_and_remove(self):
+        points = POINT_SETS['cluster']
+        tree = PointTree(points, leaf_points=8)
+        rs = np.random.RandomState(5)
+        alive = np.ones(len(points), dtype=bool)
+        for idx in rs.permutation(len(points))[:300].tolist():
+            tree.remove(idx)
+            alive[idx] = False
+            x, y = rs.uniform(-1000, 1000, 2)
+            found = tree.nearest(x, y)
+            dist = np.hypot(points[alive, 0] - x, points[alive, 1] - y)
+            self.assertAlmostEqual(np.hypot(points[found, 0] - x, points[found, 1] - y), dist.min())
+
+        for idx in range(len(points)):
+            tree.remove(idx)
+        self.assertIsNone(tree.nearest(0.0, 0.0))
+
+
+class PointGridTest(unittest.TestCase):
+
+    def test_pairs_within(self):
+        for name, points in POINT_SETS.items():
+            for distance in (0.01, 0.5, 3.0):
+                with self.subTest(points=name, distance=distance):
+                    i, j = PointGrid(points, cell=distance).pairs_within(distance)
+                    self.assertTrue((i < j).all())
+                    pairs = list(zip(i.tolist(), j.tolist()))
+                    self.assertEqual(len(pairs), len(set(pairs)))
+                    self.assertEqual(set(pairs), brute_pairs(points, distance))
+
+    def test_pairs_within_in_pieces(self):
+        old = PointGridModule.CHUNK_PAIRS
+        PointGridModule.CHUNK_PAIRS = 64
+        try:
+            points = POINT_SETS['cluster']
+            i, j = PointGrid(points, cell=0.1).pairs_within(0.1)
+            self.assertEqual(set(zip(i.tolist(), j.tolist())), brute_pairs(points, 0.1))
+        finally:
+            PointGridModule.CHUNK_PAIRS = old
+
+    def test_distance_larger_than_cell(self):
+        with self.assertRaises(ValueError):
+            PointGrid(POINT_SETS['random'], cell=1.0).pairs_within(2.0)
+
+    def test_empty(self):
+        i, j = PointGrid(np.zeros((0, 2)), cell=1.0).pairs_within(1.0)
+        self.assertEqual((len(i), len(j)), (0, 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
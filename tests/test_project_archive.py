@@ -0,0 +1,372 @@
+import io
+import os
+import shutil
+import tempfile
+import unittest
+import zipfile
+from unittest import mock
+
+from PyQt5 import QtCore
+from shapely.geometry import LineString, Point, Polygon
+from shapely.geometry.base import BaseGeometry
+
+import appCommon.ProjectArchive as ProjectArchive
+from appCommon.Common import LoudDict
+from appCommon.ProjectArchive import ProjectJournal, VerificationError, atomic_write, base_locations, \
+    file_checksum, is_chunked_project, journal_filename, read_chunked_project, read_journal, read_json_project, \
+    write_chunked_project, write_json_project
+from appCommon.Toolpath import ToolpathBuilder
+from appObjects.FlatCAMObj import FlatCAMObj
+
+VERSION = 8.994
+OPTIONS = {'units': 'MM', 'global_tolerance': 0.005}
+
+
+def gerber_dict(name, dx=0.0):
+    square = Polygon([(dx, 0), (dx + 1, 0), (dx + 1, 1), (dx, 1)])
+    return {
+        'kind': 'gerber',
+        'units': 'MM',
+        'options': {'name': name, 'plot': True},
+        'solid_geometry': [square],
+        'follow_geometry': [LineString([(dx, 0), (dx + 1, 1)])],
+        'apertures': {'10': {'type': 'C', 'size': 0.2, 'geometry': [{'solid': square, 'follow': Point(dx, 0)}]}}
+    }
+
+
+def geometry_dict(name):
+    return {
+        'kind': 'geometry',
+        'units': 'MM',
+        'multigeo': True,
+        'options': {'name': name, 'plot': False},
+        # the empty geometries can't be WKB encoded
+        'solid_geometry': [Point()],
+        'tools': {'1': {'tooldia': 0.1, 'solid_geometry': [LineString([(0, 0), (5, 5), (5, 0)])]}}
+    }
+
+
+def cncjob_dict(name):
+    builder = ToolpathBuilder()
+    builder.add([(0, 0), (10, 0)], 2.0, ['T', 'F'])
+    builder.add([(10, 0), (10, 10), (0, 10)], -0.1, ['C', 'S'], tool=1)
+    return {
+        'kind': 'cncjob',
+        'options': {'name': name},
+        'cnc_tools': {'1': {'tooldia': 0.8, 'gcode_parsed': builder.toolpath()}}
+    }
+
+
+class ProjectTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.filename = os.path.join(self.folder, 'project.FlatPrj')
+        self.obj_dicts = [gerber_dict('top'), geometry_dict('outline'), cncjob_dict('job')]
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def assertSameValue(self, first, second):
+        if isinstance(first, BaseGeometry):
+            self.assertIsInstance(second, BaseGeometry)
+            self.assertEqual(first.wkt, second.wkt)
+        elif isinstance(first, dict):
+            self.assertEqual(sorted(first.keys()), sorted(second.keys()))
+            for key in first:
+                self.assertSameValue(first[key], second[key])
+        elif isinstance(first, list):
+            self.assertEqual(len(first), len(second))
+            for first_item, second_item in zip(first, second):
+                self.assertSameValue(first_item, second_item)
+        elif hasattr(first, 'to_dict'):
+            self.assertEqual(type(first), type(second))
+            self.assertSameValue(first.to_dict(), second.to_dict())
+        else:
+            self.assertEqual(first, second)
+
+    def loaded_dict(self, obj):
+        attrs, geo_keys, deferred, __ = obj
+        d = dict(attrs)
+        if deferred is not None:
+            geometry = deferred.load()
+            self.assertEqual(sorted(geometry.keys()), sorted(geo_keys))
+            d.update(geometry)
+        return d
+
+    def write_project(self, obj_dicts=None, compression_level=None):
+        return write_chunked_project(self.filename, self.obj_dicts if obj_dicts is None else obj_dicts, OPTIONS,
+                                     VERSION, compression_level=compression_level)
+
+
+class ProjectRoundTripTest(ProjectTestCase):
+
+    def test_json_project(self):
+        f = io.BytesIO()
+        write_json_project(f, self.obj_dicts, OPTIONS, VERSION)
+        d = read_json_project(f.getvalue())
+
+        self.assertEqual(d['version'], VERSION)
+        self.assertEqual(d['options'], OPTIONS)
+        # the Toolpath is saved in the JSON projects as its dictionary
+        expected = [gerber_dict('top'), geometry_dict('outline')]
+        self.assertSameValue(d['objs'][:2], expected)
+
+    def test_chunked_project(self):
+        for compression_level in (None, 6):
+            with self.subTest(compression_level=compression_level):
+                header_objs = self.write_project(compression_level=compression_level)
+                self.assertTrue(is_chunked_project(self.filename))
+                self.assertEqual([o['name'] for o in header_objs], ['top', 'outline', 'job'])
+
+                d = read_chunked_project(self.filename)
+                self.assertEqual(d['version'], VERSION)
+                self.assertEqual(d['options'], OPTIONS)
+                self.assertSameValue([self.loaded_dict(obj) for obj in d['objs']], self.obj_dicts)
+
+    def test_geometry_chunks(self):
+        self.write_project()
+        d = read_chunked_project(self.filename)
+
+        # only the attributes with geometry are deferred
+        self.assertEqual([obj[1] for obj in d['objs']],
+                         [['apertures', 'follow_geometry', 'solid_geometry'], ['solid_geometry', 'tools'],
+                          ['cnc_tools']])
+        attrs = d['objs'][0][0]
+        self.assertEqual(sorted(attrs.keys()), ['kind', 'options', 'units'])
+
+    def test_not_chunked(self):
+        with open(self.filename, 'wb') as f:
+            write_json_project(f, self.obj_dicts, OPTIONS, VERSION)
+        self.assertFalse(is_chunked_project(self.filename))
+        self.assertFalse(is_chunked_project(os.path.join(self.folder, 'missing.FlatPrj')))
+
+
+class DeferredObject(FlatCAMObj):
+    """
+    FlatCAMObj with only the attributes used by the deferred loading; the constructor needs the application.
+    """
+
+    def __init__(self, obj_dict):
+        QtCore.QObject.__init__(self)
+        self.__dict__['ser_attrs'] = list(obj_dict.keys())
+        self._deferred_attrs = set()
+        self._deferred_loader = None
+        self.app = mock.Mock()
+        self.options = LoudDict(obj_dict['options'])
+        self.load_complete = True
+
+
+class CountingLoader:
+
+    def __init__(self, loader):
+        self.loader = loader
+        self.count = 0
+
+    def load(self):
+        self.count += 1
+        return self.loader.load()
+
+
+class DeferredAttributesTest(ProjectTestCase):
+
+    def test_load_on_first_access(self):
+        self.write_project()
+        attrs, geo_keys, deferred, __ = read_chunked_project(self.filename)['objs'][0]
+
+        obj = DeferredObject(self.obj_dicts[0])
+        loader = CountingLoader(deferred)
+        obj.defer_attributes(geo_keys, loader)
+        self.assertTrue(obj.has_deferred_attributes())
+        self.assertNotIn('solid_geometry', obj.__dict__)
+        self.assertEqual(loader.count, 0)
+
+        # the first used attribute loads all of them
+        self.assertSameValue(obj.solid_geometry, self.obj_dicts[0]['solid_geometry'])
+        self.assertEqual(loader.count, 1)
+        self.assertFalse(obj.has_deferred_attributes())
+        self.assertSameValue(obj.apertures, self.obj_dicts[0]['apertures'])
+        self.assertSameValue(obj.follow_geometry, self.obj_dicts[0]['follow_geometry'])
+        self.assertEqual(loader.count, 1)
+
+        # loading the attributes does not change the object
+        obj.app.mark_object_dirty.assert_not_called()
+        obj.solid_geometry = []
+        obj.app.mark_object_dirty.assert_called_once_with(obj)
+
+    def test_failed_load_is_retried(self):
+        self.write_project()
+        __, geo_keys, deferred, __ = read_chunked_project(self.filename)['objs'][0]
+
+        obj = DeferredObject(self.obj_dicts[0])
+        obj.defer_attributes(geo_keys, deferred)
+        with mock.patch.object(deferred, 'load', side_effect=IOError):
+            with self.assertRaises(IOError):
+                obj.solid_geometry
+        self.assertTrue(obj.has_deferred_attributes())
+        self.assertSameValue(obj.solid_geometry, self.obj_dicts[0]['solid_geometry'])
+
+    def test_unknown_attribute(self):
+        obj = DeferredObject(self.obj_dicts[0])
+        with self.assertRaises(AttributeError):
+            obj.not_an_attribute
+
+
+class DamagedProjectTest(ProjectTestCase):
+
+    def test_changed_chunk(self):
+        self.write_project()
+        d = read_chunked_project(self.filename)
+
+        # the project file is saved again, with other geometry, after it was opened
+        self.write_project(obj_dicts=[gerber_dict('top', dx=5.0)] + self.obj_dicts[1:])
+        with self.assertRaises(IOError):
+            d['objs'][0][2].load()
+        # the chunks that did not change are still loaded
+        self.assertSameValue(self.loaded_dict(d['objs'][1]), self.obj_dicts[1])
+
+    def test_corrupted_chunk(self):
+        self.write_project()
+        d = read_chunked_project(self.filename)
+
+        with zipfile.ZipFile(self.filename, 'r') as zf:
+            info = zf.getinfo(d['objs'][0][3]['chunks'][2])
+        with open(self.filename, 'r+b') as f:
+            # the WKB blob is stored uncompressed after the local header of its chunk
+            f.seek(info.header_offset + 30 + len(info.filename.encode('utf-8')) + 10)
+            data = f.read(1)
+            f.seek(-1, os.SEEK_CUR)
+            f.write(bytes([data[0] ^ 0xFF]))
+
+        with self.assertRaises(zipfile.BadZipFile):
+            d['objs'][0][2].load()
+
+    def test_truncated_project(self):
+        self.write_project()
+        size = os.path.getsize(self.filename)
+        with open(self.filename, 'r+b') as f:
+            f.truncate(size // 2)
+
+        self.assertFalse(is_chunked_project(self.filename))
+        with self.assertRaises(zipfile.BadZipFile):
+            read_chunked_project(self.filename)
+
+
+class AtomicWriteTest(ProjectTestCase):
+
+    def write_old_content(self):
+        with open(self.filename, 'wb') as f:
+            f.write(b'old project')
+
+    def assertOldContent(self):
+        with open(self.filename, 'rb') as f:
+            self.assertEqual(f.read(), b'old project')
+        self.assertFalse(os.path.exists(self.filename + '.tmp'))
+
+    def test_write(self):
+        self.write_old_content()
+        checksum = atomic_write(self.filename, lambda f: write_chunked_project(f, self.obj_dicts, OPTIONS, VERSION))
+
+        self.assertEqual(checksum, file_checksum(self.filename))
+        self.assertFalse(os.path.exists(self.filename + '.tmp'))
+        d = read_chunked_project(self.filename)
+        self.assertSameValue([self.loaded_dict(obj) for obj in d['objs']], self.obj_dicts)
+
+    def test_failed_writer(self):
+        self.write_old_content()
+
+        def writer(f):
+            f.write(b'new project')
+            raise ValueError("failed")
+
+        with self.assertRaises(ValueError):
+            atomic_write(self.filename, writer)
+        self.assertOldContent()
+
+    def test_checksum_mismatch(self):
+        self.write_old_content()
+
+        # the data read back from the disk differs from the data written
+        with mock.patch.object(ProjectArchive, 'file_checksum', return_value='0' * 64):
+            with self.assertRaises(VerificationError):
+                atomic_write(self.filename, lambda f: f.write(b'new project'))
+        self.assertOldContent()
+
+
+class ProjectJournalTest(ProjectTestCase):
+
+    def start_journal(self):
+        header_objs = self.write_project()
+        # the uids of the objects are 1, 2 and 3
+        locations = dict(zip([1, 2, 3], base_locations(header_objs)))
+        return ProjectJournal.start(self.filename, locations)
+
+    def test_no_journal(self):
+        self.start_journal()
+        self.assertIsNone(read_journal(self.filename))
+
+    def test_take_dirty(self):
+        journal = self.start_journal()
+        journal.mark_dirty(2)
+
+        # the objects that are not in the journal yet are always taken
+        self.assertEqual(journal.take_dirty([1, 2, 3, 4]), {2, 4})
+        self.assertEqual(journal.take_dirty([1, 2, 3, 4]), {4})
+
+    def test_write_read(self):
+        journal = self.start_journal()
+        moved = gerber_dict('top', dx=5.0)
+        new = geometry_dict('new')
+
+        written = journal.write([(1, moved), (2, None), (3, None), (4, new)], OPTIONS, VERSION)
+        self.assertEqual(written, 2)
+        self.assertTrue(os.path.isfile(journal_filename(self.filename)))
+
+        d = read_journal(self.filename)
+        self.assertEqual(d['revision'], 1)
+        self.assertEqual(d['version'], VERSION)
+        self.assertEqual([obj[3]['archive'] for obj in d['objs']], ['journal', 'base', 'base', 'journal'])
+        self.assertSameValue([self.loaded_dict(obj) for obj in d['objs']],
+                             [moved, self.obj_dicts[1], self.obj_dicts[2], new])
+
+    def test_latest_revision(self):
+        journal = self.start_journal()
+        journal.write([(1, gerber_dict('top', dx=5.0)), (2, None), (3, None)], OPTIONS, VERSION)
+        journal.write([(1, gerber_dict('top', dx=7.0)), (2, None), (3, None)], OPTIONS, VERSION)
+        # a deleted object
+        journal.write([(1, None), (3, None)], OPTIONS, VERSION)
+
+        d = read_journal(self.filename)
+        self.assertEqual(d['revision'], 3)
+        self.assertEqual([obj[0]['options']['name'] for obj in d['objs']], ['top', 'job'])
+        self.assertSameValue(self.loaded_dict(d['objs'][0]), gerber_dict('top', dx=7.0))
+
+    def test_nothing_changed(self):
+        journal = self.start_journal()
+        self.assertEqual(journal.write([(1, None), (2, None), (3, None)], OPTIONS, VERSION), 0)
+        self.assertEqual(journal.revision, 0)
+        self.assertFalse(os.path.exists(journal_filename(self.filename)))
+
+    def test_other_project_file(self):
+        journal = self.start_journal()
+        journal.write([(1, gerber_dict('top', dx=5.0)), (2, None), (3, None)], OPTIONS, VERSION)
+
+        # the journal is not used for a project file that was saved after it
+        self.write_project(obj_dicts=self.obj_dicts[:2])
+        self.assertIsNone(read_journal(self.filename))
+
+    def test_compaction(self):
+        journal = self.start_journal()
+        self.assertFalse(journal.needs_compaction())
+        for nr in range(ProjectArchive.JOURNAL_MAX_REVISIONS):
+            journal.write([(1, gerber_dict('top', dx=float(nr + 1))), (2, None), (3, None)], OPTIONS, VERSION)
+        self.assertTrue(journal.needs_compaction())
+
+        # a new journal starts empty
+        journal = self.start_journal()
+        self.assertEqual(journal.revision, 0)
+        self.assertIsNone(read_journal(self.filename))
+
+
+if __name__ == '__main__':
+    unittest.main()
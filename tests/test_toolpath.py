@@ -0,0 +1,199 @@
+import unittest
+
+import numpy as np
+import shapely.affinity as affinity
+import simplejson as json
+
+from shapely.geometry import LinearRing, LineString, Point
+
+from appCommon.Toolpath import KINDS, Toolpath, ToolpathBuilder
+
+
+def make_toolpath(seed=0, nr_paths=40):
+    """
+    Random travel and cut paths with a drill hole after each fifth path.
+
+    :return:    tuple (Toolpath, list of the legacy dictionaries of the same paths)
+    """
+    rs = np.random.RandomState(seed)
+    builder = ToolpathBuilder()
+    legacy = []
+    for i in range(nr_paths):
+        coords = [tuple(xy) for xy in rs.uniform(-20, 20, (rs.randint(2, 6), 2)).tolist()]
+        kind = list(KINDS[i % len(KINDS)])
+        builder.add(coords, 1.0, kind, tool=i % 3)
+        legacy.append({'geom': LineString(coords), 'kind': kind})
+
+        if i % 5 == 0:
+            center = coords[-1]
+            radius = float(rs.uniform(0.1, 1.0))
+            builder.add_circle(center, radius, -1.5, ['C', 'F'], tool=i % 3)
+            legacy.append({'geom': LinearRing(Point(center).buffer(radius).exterior.coords), 'kind': ['C', 'F']})
+    return builder.toolpath(), legacy
+
+
+class ToolpathTestCase(unittest.TestCase):
+
+    def assertSameGeometries(self, first, second, decimal=9):
+        self.assertEqual(len(first), len(second))
+        for first_geom, second_geom in zip(first, second):
+            self.assertEqual(first_geom.geom_type, second_geom.geom_type)
+            np.testing.assert_array_almost_equal(np.asarray(first_geom.coords), np.asarray(second_geom.coords),
+                                                 decimal=decimal)
+
+
+class LegacyViewTest(ToolpathTestCase):
+
+    def test_items(self):
+        toolpath, legacy = make_toolpath()
+        self.assertEqual(len(toolpath), len(legacy))
+
+        for idx, expected in enumerate(legacy):
+            item = toolpath[idx]
+            self.assertEqual(item['kind'], expected['kind'])
+            self.assertSameGeometries([item['geom']], [expected['geom']])
+
+        self.assertSameGeometries([toolpath[-1]['geom']], [legacy[-1]['geom']])
+        with self.assertRaises(IndexError):
+            toolpath[len(toolpath)]
+
+    def test_iteration_and_slices(self):
+        toolpath, legacy = make_toolpath()
+        items = list(toolpath)
+        self.assertEqual([item['kind'] for item in items], [item['kind'] for item in legacy])
+        self.assertSameGeometries([item['geom'] for item in items], [item['geom'] for item in legacy])
+
+        self.assertEqual([item['kind'] for item in toolpath[3:10:2]], [item['kind'] for item in legacy[3:10:2]])
+
+    def test_geometries_by_kind(self):
+        toolpath, legacy = make_toolpath()
+        for letter in ('T', 'C', 'F', 'S'):
+            with self.subTest(letter=letter):
+                expected = [item['geom'] for item in legacy if letter in item['kind']]
+                self.assertSameGeometries(toolpath.geometries(mask=toolpath.kind_mask(letter)), expected)
+
+        self.assertEqual(toolpath.kind_letters(), [item['kind'][0] for item in legacy])
+        self.assertEqual(toolpath.kind_letters(1), [item['kind'][1] for item in legacy])
+
+    def test_bounds_and_endpoints(self):
+        toolpath, legacy = make_toolpath()
+        geometries = [item['geom'] for item in legacy]
+
+        bounds = np.array([geom.bounds for geom in geometries])
+        np.testing.assert_array_almost_equal(
+            toolpath.bounds(), [bounds[:, 0].min(), bounds[:, 1].min(), bounds[:, 2].max(), bounds[:, 3].max()])
+
+        starts, ends = toolpath.endpoints()
+        np.testing.assert_array_almost_equal(starts, [geom.coords[0] for geom in geometries])
+        np.testing.assert_array_almost_equal(ends, [geom.coords[-1] for geom in geometries])
+
+    def test_empty(self):
+        toolpath = ToolpathBuilder().toolpath()
+        self.assertEqual(len(toolpath), 0)
+        self.assertEqual(list(toolpath), [])
+        self.assertEqual(toolpath.geometries(), [])
+        self.assertEqual(toolpath.bounds(), (0, 0, 0, 0))
+
+
+class SharedVerticesTest(ToolpathTestCase):
+
+    def test_paths_share_vertices(self):
+        toolpath, legacy = make_toolpath()
+        part = toolpath.paths(5, 20)
+        self.assertEqual(len(part), 15)
+        self.assertSameGeometries(part.geometries(), [item['geom'] for item in legacy[5:20]])
+
+        # a transformation of the whole toolpath changes its parts too
+        toolpath.scale(2.0, 3.0, origin=(1.0, 1.0))
+        expected = [affinity.scale(item['geom'], 2.0, 3.0, origin=(1.0, 1.0)) for item in legacy[5:20]]
+        self.assertSameGeometries(part.geometries(), expected)
+        self.assertTrue(np.shares_memory(part.vertices, toolpath.vertices))
+
+    def test_concatenate(self):
+        first, first_legacy = make_toolpath(seed=1, nr_paths=12)
+        second, second_legacy = make_toolpath(seed=2, nr_paths=7)
+        total = Toolpath.concatenate([first, Toolpath(), second])
+
+        self.assertEqual(len(total), len(first) + len(second))
+        self.assertSameGeometries(total.geometries(), [item['geom'] for item in first_legacy + second_legacy])
+        self.assertEqual(total.tools.tolist(), first.tools.tolist() + second.tools.tolist())
+
+        # the tools of a job are parts of the concatenated toolpath of the job
+        first_part = total.paths(0, len(first))
+        second_part = total.paths(len(first), len(total))
+        self.assertSameGeometries(first_part.geometries(), first.geometries())
+        self.assertSameGeometries(second_part.geometries(), second.geometries())
+
+        total.translate(5.0, -5.0)
+        expected = [affinity.translate(item['geom'], 5.0, -5.0) for item in second_legacy]
+        self.assertSameGeometries(second_part.geometries(), expected)
+
+    def test_concatenate_nothing(self):
+        self.assertEqual(len(Toolpath.concatenate([])), 0)
+        self.assertEqual(len(Toolpath.concatenate([Toolpath(), Toolpath()])), 0)
+
+
+class TransformTest(ToolpathTestCase):
+
+    TRANSFORMS = [
+        ('translate', (3.5, -1.25), {}),
+        ('scale', (2.0, -0.5), {'origin': (4.0, 1.0)}),
+        ('scale', (-1.0, 1.0), {'origin': (0.0, 0.0)}),
+        ('rotate', (30.0,), {'origin': (2.0, -3.0)}),
+        ('rotate', (np.pi / 3,), {'origin': (0.0, 0.0), 'use_radians': True}),
+        ('skew', (15.0, -10.0), {'origin': (1.0, 2.0)}),
+        ('skew', (0.2, 0.1), {'origin': (-3.0, 0.5), 'use_radians': True}),
+        ('affine_transform', ([1.0, 0.5, -0.25, 2.0, 3.0, -4.0],), {}),
+    ]
+
+    def test_against_shapely_affinity(self):
+        for name, args, kwargs in self.TRANSFORMS:
+            with self.subTest(transform=name, args=args):
+                toolpath, legacy = make_toolpath()
+                getattr(toolpath, name)(*args, **kwargs)
+                expected = [getattr(affinity, name)(item['geom'], *args, **kwargs) for item in legacy]
+                self.assertSameGeometries(toolpath.geometries(), expected)
+
+    def test_z_unchanged(self):
+        toolpath, __ = make_toolpath()
+        z = toolpath.vertices[:, 2].copy()
+        for name, args, kwargs in self.TRANSFORMS:
+            getattr(toolpath, name)(*args, **kwargs)
+        np.testing.assert_array_equal(toolpath.vertices[:, 2], z)
+
+
+class SerializationTest(ToolpathTestCase):
+
+    def assertSameToolpath(self, first, second):
+        for name in Toolpath.ARRAYS:
+            first_array = getattr(first, name)
+            second_array = getattr(second, name)
+            self.assertEqual(first_array.dtype, second_array.dtype, name)
+            np.testing.assert_array_equal(first_array, second_array, name)
+
+    def test_npz(self):
+        toolpath, __ = make_toolpath()
+        toolpath.rotate(10.0, origin=(1.0, 1.0))
+        self.assertSameToolpath(Toolpath.from_bytes(toolpath.to_bytes()), toolpath)
+
+    def test_json(self):
+        toolpath, __ = make_toolpath()
+        toolpath.skew(5.0, 5.0, origin=(0.0, 0.0))
+        loaded = Toolpath.from_dict(json.loads(json.dumps(toolpath.to_dict())))
+        self.assertSameToolpath(loaded, toolpath)
+
+    def test_empty(self):
+        toolpath = Toolpath()
+        self.assertSameToolpath(Toolpath.from_bytes(toolpath.to_bytes()), toolpath)
+        self.assertSameToolpath(Toolpath.from_dict(json.loads(json.dumps(toolpath.to_dict()))), toolpath)
+
+    def test_part(self):
+        # a part saves only its own paths
+        toolpath, legacy = make_toolpath()
+        loaded = Toolpath.from_bytes(toolpath.paths(10, 30).to_bytes())
+        self.assertEqual(len(loaded.vertices), toolpath.offsets[30] - toolpath.offsets[10])
+        self.assertSameGeometries(loaded.geometries(), [item['geom'] for item in legacy[10:30]])
+
+
+if __name__ == '__main__':
+    unittest.main()
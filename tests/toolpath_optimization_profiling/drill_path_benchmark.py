@@ -0,0 +1,69 @@
+# This script compares the drill path optimizations on two sets of drill holes: random clusters, as the pins of the
+# components on a board, and one dense cluster (a fine pitch area) with a few holes far away in the corners:
+# - the greedy nearest neighbour path searched over all the points left (as CNCjob.optimized_travelling_salesman())
+# - the nearest neighbour path searched in a k-d tree (appCommon/DrillPath.py nearest_neighbour_order())
+# - the same path improved with 2-opt and Or-opt moves (appCommon/DrillPath.py improve_order())
+# Run from this folder: python drill_path_benchmark.py [number of holes] [time limit of the improvement, s]
+
+import sys
+import time
+
+import numpy as np
+
+sys.path.append('../../')
+
+from appCommon.DrillPath import nearest_neighbour_order, improve_order, path_length
+
+HOLES = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+TIME_LIMIT = float(sys.argv[2]) if len(sys.argv) > 2 else 10.0
+
+
+def make_holes(n, seed=3):
+    # holes in clusters, as the pins of the components on a board
+    rs = np.random.RandomState(seed)
+    centers = rs.uniform(0, 300, (max(1, n // 100), 2))
+    return centers[rs.randint(0, len(centers), n)] + rs.normal(0, 4, (n, 2))
+
+
+def make_dense_holes(n, seed=3):
+    # holes in a 10 mm square plus 4 holes in the corners of a 300 mm board
+    rs = np.random.RandomState(seed)
+    corners = np.array([[0.0, 0.0], [300.0, 0.0], [0.0, 300.0], [300.0, 300.0]])
+    return np.vstack([rs.uniform(145, 155, (max(0, n - 4), 2)), corners])[:n]
+
+
+def greedy_order(points):
+    xs, ys = points[:, 0].tolist(), points[:, 1].tolist()
+    left = set(range(1, len(points)))
+    order = [0]
+    while left:
+        x, y = xs[order[-1]], ys[order[-1]]
+        nearest = min(left, key=lambda i: (xs[i] - x) ** 2 + (ys[i] - y) ** 2)
+        order.append(nearest)
+        left.remove(nearest)
+    return order
+
+
+def run(name, holes):
+    print("%d holes, %s" % (len(holes), name))
+
+    if len(holes) <= 20000:
+        start = time.perf_counter()
+        order = greedy_order(holes)
+        print("    greedy, all points:     %8.3f s    distance %12.1f" %
+              (time.perf_counter() - start, path_length(holes, order)))
+
+    start = time.perf_counter()
+    order = nearest_neighbour_order(holes)
+    print("    greedy, k-d tree:       %8.3f s    distance %12.1f" %
+          (time.perf_counter() - start, path_length(holes, order)))
+
+    start = time.perf_counter()
+    order = improve_order(holes, order, time_limit=TIME_LIMIT)
+    print("    2-opt and Or-opt:       %8.3f s    distance %12.1f" %
+          (time.perf_counter() - start, path_length(holes, order)))
+
+
+if __name__ == '__main__':
+    run("random clusters", make_holes(HOLES))
+    run("one dense cluster", make_dense_holes(HOLES))